@@ -27,13 +27,20 @@ from deepagents.backends.protocol import (
     FileDownloadResponse,
     FileInfo,
     FileUploadResponse,
+    GlobPage,
     GrepMatch,
+    GrepPage,
     SandboxBackendProtocol,
     WriteResult,
+    _page_offset,
+    _page_slice,
 )
 from deepagents.backends.state import StateBackend
+from deepagents.backends.utils import merge_files_update
+from deepagents.instrumentation import instrument_backend
 
 
+@instrument_backend
 class CompositeBackend(BackendProtocol):
     """Routes file operations to different backends by path prefix.
 
@@ -314,6 +321,131 @@ class CompositeBackend(BackendProtocol):
         # Path specified but doesn't match a route - search only default
         return await self.default.agrep_raw(pattern, path, glob)
 
+    def _grep_targets(self, path: str | None) -> list[tuple[str, BackendProtocol, str | None]]:
+        """Backends searched for `path`, as (route prefix to restore, backend, path to search).
+
+        Follows the routing of `grep_raw`.
+        """
+        for route_prefix, backend in self.sorted_routes:
+            if path is not None and path.startswith(route_prefix.rstrip("/")):
+                return [(route_prefix[:-1], backend, path[len(route_prefix) - 1 :] or "/")]
+        if path is None or path == "/":
+            return [("", self.default, path), *((route_prefix[:-1], backend, "/") for route_prefix, backend in self.routes.items())]
+        return [("", self.default, path)]
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_results: int,
+        cursor: str | None = None,
+    ) -> GrepPage | str:
+        """Search files for a literal text pattern, one page of matches at a time.
+
+        Routes like `grep_raw`. Backends are searched in the same order, each only for
+        the matches still missing from the page, and backends after a full page are skipped.
+
+        Args:
+            pattern: Literal text to search for (NOT regex).
+            path: Directory to search. None searches all backends.
+            glob: Glob pattern to filter files (e.g., "*.py", "**/*.txt").
+            max_results: Maximum number of matches on the page.
+            cursor: `next_cursor` of the previous page, or None for the first page.
+
+        Returns:
+            GrepPage with the matches on the page (route prefix restored), or error string on failure.
+        """
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        wanted = offset + max_results + 1
+        matches: list[GrepMatch] = []
+        for route_prefix, backend, search_path in self._grep_targets(path):
+            page = backend.grep_page(pattern, search_path, glob, max_results=wanted - len(matches))
+            if isinstance(page, str):
+                return page
+            matches.extend(GrepMatch(path=f"{route_prefix}{m['path']}", line=m["line"], text=m["text"]) for m in page.matches)
+            if len(matches) >= wanted:
+                break
+        page_matches, next_cursor = _page_slice(matches, offset, max_results)
+        return GrepPage(matches=page_matches, next_cursor=next_cursor)
+
+    async def agrep_page(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_results: int,
+        cursor: str | None = None,
+    ) -> GrepPage | str:
+        """Async version of grep_page."""
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        wanted = offset + max_results + 1
+        matches: list[GrepMatch] = []
+        for route_prefix, backend, search_path in self._grep_targets(path):
+            page = await backend.agrep_page(pattern, search_path, glob, max_results=wanted - len(matches))
+            if isinstance(page, str):
+                return page
+            matches.extend(GrepMatch(path=f"{route_prefix}{m['path']}", line=m["line"], text=m["text"]) for m in page.matches)
+            if len(matches) >= wanted:
+                break
+        page_matches, next_cursor = _page_slice(matches, offset, max_results)
+        return GrepPage(matches=page_matches, next_cursor=next_cursor)
+
+    @staticmethod
+    def _merge_grep_many(results: dict[str, list[GrepMatch]], route_prefix: str, raw: dict[str, list[GrepMatch]]) -> None:
+        for pattern, matches in raw.items():
+            results[pattern].extend(GrepMatch(path=f"{route_prefix}{m['path']}", line=m["line"], text=m["text"]) for m in matches)
+
+    def grep_many(
+        self,
+        patterns: list[str],
+        path: str | None = None,
+        glob: str | None = None,
+    ) -> dict[str, list[GrepMatch]] | str:
+        """Search files for several literal patterns, with each backend searching for all of them at once.
+
+        Routes like `grep_raw`.
+
+        Args:
+            patterns: Literal strings to search for (NOT regex).
+            path: Directory to search. None searches all backends.
+            glob: Glob pattern to filter files (e.g., "*.py", "**/*.txt").
+
+        Returns:
+            Dict mapping each pattern to its GrepMatch list (route prefix restored),
+            or error string on failure.
+        """
+        results: dict[str, list[GrepMatch]] = {pattern: [] for pattern in patterns}
+        for route_prefix, backend, search_path in self._grep_targets(path):
+            raw = backend.grep_many(patterns, search_path, glob)
+            if isinstance(raw, str):
+                return raw
+            self._merge_grep_many(results, route_prefix, raw)
+        return results
+
+    async def agrep_many(
+        self,
+        patterns: list[str],
+        path: str | None = None,
+        glob: str | None = None,
+    ) -> dict[str, list[GrepMatch]] | str:
+        """Async version of grep_many."""
+        results: dict[str, list[GrepMatch]] = {pattern: [] for pattern in patterns}
+        for route_prefix, backend, search_path in self._grep_targets(path):
+            raw = await backend.agrep_many(patterns, search_path, glob)
+            if isinstance(raw, str):
+                return raw
+            self._merge_grep_many(results, route_prefix, raw)
+        return results
+
     def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
         results: list[FileInfo] = []
 
@@ -357,6 +489,55 @@ class CompositeBackend(BackendProtocol):
         results.sort(key=lambda x: x.get("path", ""))
         return results
 
+    def glob_page(self, pattern: str, path: str = "/", *, max_results: int, cursor: str | None = None) -> GlobPage | str:
+        """Find files matching a glob pattern, one page of files at a time.
+
+        A path inside a route pages through that backend alone. Otherwise every backend
+        is searched and the files are merged and sorted by path, as in `glob_info`.
+
+        Args:
+            pattern: Glob pattern to match files against.
+            path: Base directory to search from. Defaults to root (`/`).
+            max_results: Maximum number of files on the page.
+            cursor: `next_cursor` of the previous page, or None for the first page.
+
+        Returns:
+            GlobPage with the files on the page (route prefix restored), or error string on failure.
+        """
+        for route_prefix, backend in self.sorted_routes:
+            if path.startswith(route_prefix.rstrip("/")):
+                search_path = path[len(route_prefix) - 1 :]
+                page = backend.glob_page(pattern, search_path or "/", max_results=max_results, cursor=cursor)
+                if isinstance(page, str):
+                    return page
+                files = [FileInfo(path=f"{route_prefix[:-1]}{fi['path']}", **{k: v for k, v in fi.items() if k != "path"}) for fi in page.files]
+                return GlobPage(files=files, next_cursor=page.next_cursor)
+
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        files, next_cursor = _page_slice(self.glob_info(pattern, path), offset, max_results)
+        return GlobPage(files=files, next_cursor=next_cursor)
+
+    async def aglob_page(self, pattern: str, path: str = "/", *, max_results: int, cursor: str | None = None) -> GlobPage | str:
+        """Async version of glob_page."""
+        for route_prefix, backend in self.sorted_routes:
+            if path.startswith(route_prefix.rstrip("/")):
+                search_path = path[len(route_prefix) - 1 :]
+                page = await backend.aglob_page(pattern, search_path or "/", max_results=max_results, cursor=cursor)
+                if isinstance(page, str):
+                    return page
+                files = [FileInfo(path=f"{route_prefix[:-1]}{fi['path']}", **{k: v for k, v in fi.items() if k != "path"}) for fi in page.files]
+                return GlobPage(files=files, next_cursor=page.next_cursor)
+
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        files, next_cursor = _page_slice(await self.aglob_info(pattern, path), offset, max_results)
+        return GlobPage(files=files, next_cursor=next_cursor)
+
     def write(
         self,
         file_path: str,
@@ -379,9 +560,7 @@ class CompositeBackend(BackendProtocol):
                 runtime = getattr(self.default, "runtime", None)
                 if runtime is not None:
                     state = runtime.state
-                    files = state.get("files", {})
-                    files.update(res.files_update)
-                    state["files"] = files
+                    state["files"] = merge_files_update(state.get("files", {}), res.files_update)
             except Exception:
                 pass
         return res
@@ -400,9 +579,7 @@ class CompositeBackend(BackendProtocol):
                 runtime = getattr(self.default, "runtime", None)
                 if runtime is not None:
                     state = runtime.state
-                    files = state.get("files", {})
-                    files.update(res.files_update)
-                    state["files"] = files
+                    state["files"] = merge_files_update(state.get("files", {}), res.files_update)
             except Exception:
                 pass
         return res
@@ -432,9 +609,7 @@ class CompositeBackend(BackendProtocol):
                 runtime = getattr(self.default, "runtime", None)
                 if runtime is not None:
                     state = runtime.state
-                    files = state.get("files", {})
-                    files.update(res.files_update)
-                    state["files"] = files
+                    state["files"] = merge_files_update(state.get("files", {}), res.files_update)
             except Exception:
                 pass
         return res
@@ -454,9 +629,7 @@ class CompositeBackend(BackendProtocol):
                 runtime = getattr(self.default, "runtime", None)
                 if runtime is not None:
                     state = runtime.state
-                    files = state.get("files", {})
-                    files.update(res.files_update)
-                    state["files"] = files
+                    state["files"] = merge_files_update(state.get("files", {}), res.files_update)
             except Exception:
                 pass
         return res
@@ -581,6 +754,29 @@ class CompositeBackend(BackendProtocol):
 
         return results  # type: ignore[return-value]
 
+    def _route_downloads(self, paths: list[str]) -> dict[BackendProtocol, list[tuple[int, str]]]:
+        """Group download paths by their target backend, keeping original indices."""
+        backend_batches: dict[BackendProtocol, list[tuple[int, str]]] = defaultdict(list)
+        for idx, path in enumerate(paths):
+            backend, stripped_path = self._get_backend_and_key(path)
+            backend_batches[backend].append((idx, stripped_path))
+        return backend_batches
+
+    @staticmethod
+    def _place_downloads(
+        results: list[FileDownloadResponse | None],
+        paths: list[str],
+        indices: tuple[int, ...],
+        batch_responses: list[FileDownloadResponse],
+    ) -> None:
+        """Place a backend's responses at their original indices with original paths."""
+        for i, orig_idx in enumerate(indices):
+            results[orig_idx] = FileDownloadResponse(
+                path=paths[orig_idx],  # Original path
+                content=batch_responses[i].content if i < len(batch_responses) else None,
+                error=batch_responses[i].error if i < len(batch_responses) else None,
+            )
+
     def download_files(self, paths: list[str]) -> list[FileDownloadResponse]:
         """Download multiple files, batching by backend for efficiency.
 
@@ -597,55 +793,48 @@ class CompositeBackend(BackendProtocol):
         # Pre-allocate result list
         results: list[FileDownloadResponse | None] = [None] * len(paths)
 
-        backend_batches: dict[BackendProtocol, list[tuple[int, str]]] = defaultdict(list)
-
-        for idx, path in enumerate(paths):
-            backend, stripped_path = self._get_backend_and_key(path)
-            backend_batches[backend].append((idx, stripped_path))
-
-        # Process each backend's batch
-        for backend, batch in backend_batches.items():
-            # Extract data for backend call
+        # Call each backend once with all its paths
+        for backend, batch in self._route_downloads(paths).items():
             indices, stripped_paths = zip(*batch, strict=False)
-
-            # Call backend once with all its paths
-            batch_responses = backend.download_files(list(stripped_paths))
-
-            # Place responses at original indices with original paths
-            for i, orig_idx in enumerate(indices):
-                results[orig_idx] = FileDownloadResponse(
-                    path=paths[orig_idx],  # Original path
-                    content=batch_responses[i].content if i < len(batch_responses) else None,
-                    error=batch_responses[i].error if i < len(batch_responses) else None,
-                )
+            self._place_downloads(results, paths, indices, backend.download_files(list(stripped_paths)))
 
         return results  # type: ignore[return-value]
 
     async def adownload_files(self, paths: list[str]) -> list[FileDownloadResponse]:
         """Async version of download_files."""
-        # Pre-allocate result list
         results: list[FileDownloadResponse | None] = [None] * len(paths)
 
-        backend_batches: dict[BackendProtocol, list[tuple[int, str]]] = defaultdict(list)
+        for backend, batch in self._route_downloads(paths).items():
+            indices, stripped_paths = zip(*batch, strict=False)
+            self._place_downloads(results, paths, indices, await backend.adownload_files(list(stripped_paths)))
 
-        for idx, path in enumerate(paths):
-            backend, stripped_path = self._get_backend_and_key(path)
-            backend_batches[backend].append((idx, stripped_path))
+        return results  # type: ignore[return-value]
 
-        # Process each backend's batch
-        for backend, batch in backend_batches.items():
-            # Extract data for backend call
+    def download_file_prefixes(self, paths: list[str], max_bytes: int) -> list[FileDownloadResponse]:
+        """Download file prefixes, batching by backend like `download_files`.
+
+        Args:
+            paths: List of file paths to download.
+            max_bytes: Maximum number of bytes to return per file.
+
+        Returns:
+            List of FileDownloadResponse objects, one per input path.
+            Response order matches input order.
+        """
+        results: list[FileDownloadResponse | None] = [None] * len(paths)
+
+        for backend, batch in self._route_downloads(paths).items():
             indices, stripped_paths = zip(*batch, strict=False)
+            self._place_downloads(results, paths, indices, backend.download_file_prefixes(list(stripped_paths), max_bytes))
 
-            # Call backend once with all its paths
-            batch_responses = await backend.adownload_files(list(stripped_paths))
+        return results  # type: ignore[return-value]
 
-            # Place responses at original indices with original paths
-            for i, orig_idx in enumerate(indices):
-                results[orig_idx] = FileDownloadResponse(
-                    path=paths[orig_idx],  # Original path
-                    content=batch_responses[i].content if i < len(batch_responses) else None,
-                    error=batch_responses[i].error if i < len(batch_responses) else None,
-                )
+    async def adownload_file_prefixes(self, paths: list[str], max_bytes: int) -> list[FileDownloadResponse]:
+        """Async version of download_file_prefixes."""
+        results: list[FileDownloadResponse | None] = [None] * len(paths)
+
+        for backend, batch in self._route_downloads(paths).items():
+            indices, stripped_paths = zip(*batch, strict=False)
+            self._place_downloads(results, paths, indices, await backend.adownload_file_prefixes(list(stripped_paths), max_bytes))
 
         return results  # type: ignore[return-value]
@@ -1,13 +1,22 @@
 """`FilesystemBackend`: Read and write files directly from the filesystem."""
 
+import asyncio
+import contextlib
 import json
 import os
 import re
+import stat
 import subprocess
+import sys
+import threading
+from array import array
+from collections import OrderedDict
 from datetime import datetime
+from functools import cached_property
+from operator import itemgetter
 from pathlib import Path
 
-import wcmatch.glob as wcglob
+from typing_extensions import TypedDict
 
 from deepagents.backends.protocol import (
     BackendProtocol,
@@ -15,16 +24,159 @@ from deepagents.backends.protocol import (
     FileDownloadResponse,
     FileInfo,
     FileUploadResponse,
+    GlobPage,
     GrepMatch,
+    GrepPage,
     WriteResult,
+    _page_offset,
+    _page_slice,
 )
 from deepagents.backends.utils import (
+    EMPTY_CONTENT_WARNING,
     check_empty_content,
+    compile_glob,
     format_content_with_line_numbers,
     perform_string_replacement,
 )
+from deepagents.instrumentation import instrument_backend
 
+# Line boundaries of `str.splitlines`
+_LINE_BREAK = re.compile("\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
 
+
+class ReadCacheStats(TypedDict):
+    """Counters of the read cache of a `FilesystemBackend`."""
+
+    hits: int
+    """Reads served from the cache."""
+
+    misses: int
+    """Reads of files that were not cached or had changed on disk."""
+
+    hit_ratio: float
+    """`hits / (hits + misses)`, 0 before the first read."""
+
+    entries: int
+    """Files currently cached."""
+
+    bytes: int
+    """Estimated memory held by the cached files."""
+
+    max_bytes: int
+    """Memory budget of the cache."""
+
+
+class _CachedFile:
+    """Decoded contents of a file, with the stat fields that tell whether it changed since."""
+
+    def __init__(self, validator: tuple[int, int, int], text: str) -> None:
+        self.validator = validator
+        self.text = text
+        # Text plus the two 8-byte offsets per line of the index, built on first read
+        self.nbytes = sys.getsizeof(text) + 16 * (text.count("\n") + 1)
+
+    @cached_property
+    def _line_bounds(self) -> tuple[array, array]:
+        """Start and end offsets of the lines `text.splitlines()` would return."""
+        starts, ends = array("Q", [0]), array("Q")
+        for match in _LINE_BREAK.finditer(self.text):
+            ends.append(match.start())
+            starts.append(match.end())
+        if starts[-1] == len(self.text):
+            # A trailing line break does not start another line
+            starts.pop()
+        else:
+            ends.append(len(self.text))
+        return starts, ends
+
+    @cached_property
+    def is_blank(self) -> bool:
+        # Same test as `check_empty_content`, without copying the text
+        return not self.text or self.text.isspace()
+
+    @property
+    def line_count(self) -> int:
+        return len(self._line_bounds[0])
+
+    def lines(self, start: int, stop: int) -> list[str]:
+        """Return `text.splitlines()[start:stop]` without splitting the other lines."""
+        starts, ends = self._line_bounds
+        text = self.text
+        return [text[starts[i] : ends[i]] for i in range(start, min(stop, len(starts)))]
+
+
+class _FileReadCache:
+    """LRU of decoded file contents, validated against `(st_mtime_ns, st_size, st_ino)` on every lookup.
+
+    Args:
+        max_bytes: Estimated memory above which the least recently used files are dropped.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Path, _CachedFile] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> _CachedFile | None:
+        """Return the cached contents of `path` if the file is unchanged on disk, counting a hit or a miss."""
+        try:
+            # lstat: a symlink never matches, as reads do not follow them
+            st = os.lstat(path)
+        except OSError:
+            st = None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and st is not None and entry.validator == (st.st_mtime_ns, st.st_size, st.st_ino):
+                self._entries.move_to_end(path)
+                self._hits += 1
+                return entry
+            self._misses += 1
+            return None
+
+    def put(self, path: Path, st: os.stat_result, data: bytes) -> _CachedFile:
+        """Decode `data`, read from `path` while it had stat `st`, and cache it if it fits the budget.
+
+        Raises:
+            UnicodeDecodeError: If `data` is not valid UTF-8.
+        """
+        entry = _CachedFile((st.st_mtime_ns, st.st_size, st.st_ino), data.decode("utf-8"))
+        if entry.nbytes > self.max_bytes:
+            return entry
+        with self._lock:
+            self._discard(path)
+            self._entries[path] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, path: Path) -> None:
+        """Drop `path`, after the backend itself changed the file."""
+        with self._lock:
+            self._discard(path)
+
+    def _discard(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def stats(self) -> ReadCacheStats:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return ReadCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                hit_ratio=self._hits / lookups if lookups else 0.0,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+            )
+
+
+@instrument_backend
 class FilesystemBackend(BackendProtocol):
     """Backend that reads and writes files directly from the filesystem.
 
@@ -71,6 +223,8 @@ class FilesystemBackend(BackendProtocol):
         root_dir: str | Path | None = None,
         virtual_mode: bool = False,
         max_file_size_mb: int = 10,
+        *,
+        read_cache_mb: float | None = None,
     ) -> None:
         """Initialize filesystem backend.
 
@@ -104,10 +258,26 @@ class FilesystemBackend(BackendProtocol):
                 grep's Python fallback search.
 
                 Files exceeding this limit are skipped during search. Defaults to 10 MB.
+
+            read_cache_mb: Memory budget in megabytes of a cache of decoded file
+                contents for `read` and `download_files`.
+
+                Agents often read the same files again, e.g. before every edit. A
+                cached file is served without reading it again as long as its
+                modification time, size and inode are unchanged, and `read` only
+                splits the requested lines. Files written or edited through this
+                backend are dropped from the cache. The least recently read files are
+                dropped when the budget is exceeded. See `read_cache_stats`.
+                Defaults to `None` (no cache).
         """
         self.cwd = Path(root_dir).resolve() if root_dir else Path.cwd()
         self.virtual_mode = virtual_mode
         self.max_file_size_bytes = max_file_size_mb * 1024 * 1024
+        self._read_cache = _FileReadCache(int(read_cache_mb * 1024 * 1024)) if read_cache_mb is not None else None
+
+    def read_cache_stats(self) -> ReadCacheStats | None:
+        """Return the hit and size counters of the read cache, or None if it is disabled."""
+        return self._read_cache.stats() if self._read_cache is not None else None
 
     def _resolve_path(self, key: str) -> Path:
         """Resolve a file path with security checks.
@@ -269,6 +439,8 @@ class FilesystemBackend(BackendProtocol):
             Formatted file content with line numbers, or error message.
         """
         resolved_path = self._resolve_path(file_path)
+        if self._read_cache is not None:
+            return self._read_cached(self._read_cache, file_path, resolved_path, offset, limit)
 
         if not resolved_path.exists() or not resolved_path.is_file():
             return f"Error: File '{file_path}' not found"
@@ -295,6 +467,35 @@ class FilesystemBackend(BackendProtocol):
         except (OSError, UnicodeDecodeError) as e:
             return f"Error reading file '{file_path}': {e}"
 
+    def _read_cached(self, cache: _FileReadCache, file_path: str, resolved_path: Path, offset: int, limit: int) -> str:
+        """Read through the read cache, splitting only the requested lines."""
+        cached = cache.get(resolved_path)
+        if cached is None:
+            if not resolved_path.exists() or not resolved_path.is_file():
+                return f"Error: File '{file_path}' not found"
+            try:
+                data, st = self._read_bytes(resolved_path)
+                cached = cache.put(resolved_path, st, data)
+            except (OSError, UnicodeDecodeError) as e:
+                return f"Error reading file '{file_path}': {e}"
+
+        if cached.is_blank:
+            return EMPTY_CONTENT_WARNING
+        if offset >= cached.line_count:
+            return f"Error: Line offset {offset} exceeds file length ({cached.line_count} lines)"
+        return format_content_with_line_numbers(cached.lines(offset, offset + limit), start_line=offset + 1)
+
+    def _invalidate_cached(self, resolved_path: Path) -> None:
+        if self._read_cache is not None:
+            self._read_cache.invalidate(resolved_path)
+
+    @staticmethod
+    def _read_bytes(resolved_path: Path) -> tuple[bytes, os.stat_result]:
+        """Read a file without following symlinks, with the stat of the file that was read."""
+        fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+        with os.fdopen(fd, "rb") as f:
+            return f.read(), os.fstat(f.fileno())
+
     def write(
         self,
         file_path: str,
@@ -326,6 +527,7 @@ class FilesystemBackend(BackendProtocol):
             fd = os.open(resolved_path, flags, 0o644)
             with os.fdopen(fd, "w", encoding="utf-8") as f:
                 f.write(content)
+            self._invalidate_cached(resolved_path)
 
             return WriteResult(path=file_path, files_update=None)
         except (OSError, UnicodeEncodeError) as e:
@@ -377,6 +579,7 @@ class FilesystemBackend(BackendProtocol):
             fd = os.open(resolved_path, flags)
             with os.fdopen(fd, "w", encoding="utf-8") as f:
                 f.write(new_content)
+            self._invalidate_cached(resolved_path)
 
             return EditResult(path=file_path, files_update=None, occurrences=int(occurrences))
         except (OSError, UnicodeDecodeError, UnicodeEncodeError) as e:
@@ -400,6 +603,40 @@ class FilesystemBackend(BackendProtocol):
         Returns:
             List of GrepMatch dicts containing path, line number, and matched text.
         """
+        return self._grep(pattern, path, glob)
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_results: int,
+        cursor: str | None = None,
+    ) -> GrepPage | str:
+        """Search for a literal text pattern, stopping the search once the page is full.
+
+        Files are searched in path order so that every page sees the same order; with
+        ripgrep this gives up its parallel directory walk.
+
+        Args:
+            pattern: Literal string to search for (NOT regex).
+            path: Directory or file path to search in. Defaults to current directory.
+            glob: Optional glob pattern to filter which files to search.
+            max_results: Maximum number of matches on the page.
+            cursor: `next_cursor` of the previous page, or None for the first page.
+
+        Returns:
+            GrepPage with the matches on the page, or error string for an invalid cursor.
+        """
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        page, next_cursor = _page_slice(self._grep(pattern, path, glob, limit=offset + max_results + 1), offset, max_results)
+        return GrepPage(matches=page, next_cursor=next_cursor)
+
+    def _grep(self, pattern: str, path: str | None, glob: str | None, limit: int | None = None) -> list[GrepMatch]:
         # Resolve base path
         try:
             base_full = self._resolve_path(path or ".")
@@ -410,10 +647,10 @@ class FilesystemBackend(BackendProtocol):
             return []
 
         # Try ripgrep first (with -F flag for literal search)
-        results = self._ripgrep_search(pattern, base_full, glob)
+        results = self._ripgrep_search(pattern, base_full, glob, limit)
         if results is None:
             # Python fallback needs escaped pattern for literal search
-            results = self._python_search(re.escape(pattern), base_full, glob)
+            results = self._python_search(re.escape(pattern), base_full, glob, limit)
 
         matches: list[GrepMatch] = []
         for fpath, items in results.items():
@@ -421,23 +658,32 @@ class FilesystemBackend(BackendProtocol):
                 matches.append({"path": fpath, "line": int(line_num), "text": line_text})
         return matches
 
-    def _ripgrep_search(self, pattern: str, base_full: Path, include_glob: str | None) -> dict[str, list[tuple[int, str]]] | None:
+    def _ripgrep_search(
+        self, pattern: str, base_full: Path, include_glob: str | None, limit: int | None = None
+    ) -> dict[str, list[tuple[int, str]]] | None:
         """Search using ripgrep with fixed-string (literal) mode.
 
         Args:
             pattern: Literal string to search for (unescaped).
             base_full: Resolved base path to search in.
             include_glob: Optional glob pattern to filter files.
+            limit: Optional number of matches after which ripgrep is stopped. Files are
+                then searched in path order, so the first `limit` matches are always the same.
 
         Returns:
             Dict mapping file paths to list of `(line_number, line_text)` tuples.
                 Returns `None` if ripgrep is unavailable or times out.
         """
         cmd = ["rg", "--json", "-F"]  # -F enables fixed-string (literal) mode
+        if limit is not None:
+            cmd.extend(["--sort", "path"])
         if include_glob:
             cmd.extend(["--glob", include_glob])
         cmd.extend(["--", pattern, str(base_full)])
 
+        if limit is not None:
+            return self._ripgrep_stream(cmd, limit)
+
         try:
             proc = subprocess.run(  # noqa: S603
                 cmd,
@@ -451,33 +697,71 @@ class FilesystemBackend(BackendProtocol):
 
         results: dict[str, list[tuple[int, str]]] = {}
         for line in proc.stdout.splitlines():
-            try:
-                data = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if data.get("type") != "match":
-                continue
-            pdata = data.get("data", {})
-            ftext = pdata.get("path", {}).get("text")
-            if not ftext:
-                continue
-            p = Path(ftext)
-            if self.virtual_mode:
-                try:
-                    virt = "/" + str(p.resolve().relative_to(self.cwd))
-                except Exception:
-                    continue
-            else:
-                virt = str(p)
-            ln = pdata.get("line_number")
-            lt = pdata.get("lines", {}).get("text", "").rstrip("\n")
-            if ln is None:
-                continue
-            results.setdefault(virt, []).append((int(ln), lt))
+            match = self._parse_ripgrep_match(line)
+            if match is not None:
+                results.setdefault(match[0], []).append(match[1:])
 
         return results
 
-    def _python_search(self, pattern: str, base_full: Path, include_glob: str | None) -> dict[str, list[tuple[int, str]]]:
+    def _ripgrep_stream(self, cmd: list[str], limit: int) -> dict[str, list[tuple[int, str]]] | None:
+        """Run ripgrep and read its matches as they come, killing it after `limit` matches."""
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)  # noqa: S603
+        except FileNotFoundError:
+            return None
+
+        timed_out = threading.Event()
+
+        def kill_on_timeout() -> None:
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(30, kill_on_timeout)
+        timer.start()
+        results: dict[str, list[tuple[int, str]]] = {}
+        count = 0
+        try:
+            for line in proc.stdout:  # type: ignore[union-attr]
+                match = self._parse_ripgrep_match(line)
+                if match is None:
+                    continue
+                results.setdefault(match[0], []).append(match[1:])
+                count += 1
+                if count >= limit:
+                    break
+        finally:
+            timer.cancel()
+            proc.kill()
+            proc.communicate()
+        return None if timed_out.is_set() else results
+
+    def _parse_ripgrep_match(self, line: str) -> tuple[str, int, str] | None:
+        """Parse one line of `rg --json` output into `(path, line_number, line_text)`, or None if it is not a match."""
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        if data.get("type") != "match":
+            return None
+        pdata = data.get("data", {})
+        ftext = pdata.get("path", {}).get("text")
+        if not ftext:
+            return None
+        p = Path(ftext)
+        if self.virtual_mode:
+            try:
+                virt = "/" + str(p.resolve().relative_to(self.cwd))
+            except Exception:
+                return None
+        else:
+            virt = str(p)
+        ln = pdata.get("line_number")
+        lt = pdata.get("lines", {}).get("text", "").rstrip("\n")
+        if ln is None:
+            return None
+        return virt, int(ln), lt
+
+    def _python_search(self, pattern: str, base_full: Path, include_glob: str | None, limit: int | None = None) -> dict[str, list[tuple[int, str]]]:
         """Fallback search using Python when ripgrep is unavailable.
 
         Recursively searches files, respecting `max_file_size_bytes` limit.
@@ -486,6 +770,8 @@ class FilesystemBackend(BackendProtocol):
             pattern: Escaped regex pattern (from re.escape) for literal search.
             base_full: Resolved base path to search in.
             include_glob: Optional glob pattern to filter files by name.
+            limit: Optional number of matches after which the search stops. Files are
+                then searched in path order, so the first `limit` matches are always the same.
 
         Returns:
             Dict mapping file paths to list of `(line_number, line_text)` tuples.
@@ -494,15 +780,18 @@ class FilesystemBackend(BackendProtocol):
         regex = re.compile(pattern)
 
         results: dict[str, list[tuple[int, str]]] = {}
+        count = 0
         root = base_full if base_full.is_dir() else base_full.parent
+        matches_glob = compile_glob(include_glob) if include_glob else None
 
-        for fp in root.rglob("*"):
+        candidates = root.rglob("*") if limit is None else sorted(root.rglob("*"))
+        for fp in candidates:
             try:
                 if not fp.is_file():
                     continue
             except (PermissionError, OSError):
                 continue
-            if include_glob and not wcglob.globmatch(fp.name, include_glob, flags=wcglob.BRACE):
+            if matches_glob and not matches_glob(fp.name):
                 continue
             try:
                 if fp.stat().st_size > self.max_file_size_bytes:
@@ -523,6 +812,9 @@ class FilesystemBackend(BackendProtocol):
                     else:
                         virt_path = str(fp)
                     results.setdefault(virt_path, []).append((line_num, line))
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return results
 
         return results
 
@@ -537,6 +829,29 @@ class FilesystemBackend(BackendProtocol):
             List of `FileInfo` dicts for matching files, sorted by path. Each dict
                 contains `path`, `is_dir`, `size`, and `modified_at` fields.
         """
+        return [self._glob_file_info(display_path, matched_path) for display_path, matched_path in self._glob_matches(pattern, path)]
+
+    def glob_page(self, pattern: str, path: str = "/", *, max_results: int, cursor: str | None = None) -> GlobPage | str:
+        """Find files matching a glob pattern, reading size and modification time only for the files on the page.
+
+        Args:
+            pattern: Glob pattern to match files against (e.g., `'*.py'`, `'**/*.txt'`).
+            path: Base directory to search from. Defaults to root (`/`).
+            max_results: Maximum number of files on the page.
+            cursor: `next_cursor` of the previous page, or None for the first page.
+
+        Returns:
+            GlobPage with the `FileInfo` dicts on the page, or error string for an invalid cursor.
+        """
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        page, next_cursor = _page_slice(self._glob_matches(pattern, path), offset, max_results)
+        return GlobPage(files=[self._glob_file_info(display_path, matched_path) for display_path, matched_path in page], next_cursor=next_cursor)
+
+    def _glob_matches(self, pattern: str, path: str) -> list[tuple[str, Path]]:
+        """Find files matching a glob pattern, as `(returned path, filesystem path)` sorted by returned path."""
         if pattern.startswith("/"):
             pattern = pattern.lstrip("/")
 
@@ -544,7 +859,7 @@ class FilesystemBackend(BackendProtocol):
         if not search_path.exists() or not search_path.is_dir():
             return []
 
-        results: list[FileInfo] = []
+        matches: list[tuple[str, Path]] = []
         try:
             # Use recursive globbing to match files in subdirectories as tests expect
             for matched_path in search_path.rglob(pattern):
@@ -556,46 +871,66 @@ class FilesystemBackend(BackendProtocol):
                     continue
                 abs_path = str(matched_path)
                 if not self.virtual_mode:
-                    try:
-                        st = matched_path.stat()
-                        results.append(
-                            {
-                                "path": abs_path,
-                                "is_dir": False,
-                                "size": int(st.st_size),
-                                "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
-                            }
-                        )
-                    except OSError:
-                        results.append({"path": abs_path, "is_dir": False})
+                    matches.append((abs_path, matched_path))
+                    continue
+                cwd_str = str(self.cwd)
+                if not cwd_str.endswith("/"):
+                    cwd_str += "/"
+                if abs_path.startswith(cwd_str):
+                    relative_path = abs_path[len(cwd_str) :]
+                elif abs_path.startswith(str(self.cwd)):
+                    relative_path = abs_path[len(str(self.cwd)) :].lstrip("/")
                 else:
-                    cwd_str = str(self.cwd)
-                    if not cwd_str.endswith("/"):
-                        cwd_str += "/"
-                    if abs_path.startswith(cwd_str):
-                        relative_path = abs_path[len(cwd_str) :]
-                    elif abs_path.startswith(str(self.cwd)):
-                        relative_path = abs_path[len(str(self.cwd)) :].lstrip("/")
-                    else:
-                        relative_path = abs_path
-                    virt = "/" + relative_path
-                    try:
-                        st = matched_path.stat()
-                        results.append(
-                            {
-                                "path": virt,
-                                "is_dir": False,
-                                "size": int(st.st_size),
-                                "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
-                            }
-                        )
-                    except OSError:
-                        results.append({"path": virt, "is_dir": False})
+                    relative_path = abs_path
+                matches.append(("/" + relative_path, matched_path))
         except (OSError, ValueError):
             pass
 
-        results.sort(key=lambda x: x.get("path", ""))
-        return results
+        matches.sort(key=itemgetter(0))
+        return matches
+
+    @staticmethod
+    def _glob_file_info(display_path: str, matched_path: Path) -> FileInfo:
+        try:
+            st = matched_path.stat()
+        except OSError:
+            return {"path": display_path, "is_dir": False}
+        return {
+            "path": display_path,
+            "is_dir": False,
+            "size": int(st.st_size),
+            "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
+        }
+
+    def stat_files(self, paths: list[str]) -> list[FileInfo | None]:
+        """Get the size and modification time of specific files, with one `stat` each.
+
+        Unlike `ls_info` and `glob_info`, only the given paths are touched, which makes
+        this a cheap way to check whether known files changed.
+
+        Args:
+            paths: File paths to stat.
+
+        Returns:
+            One `FileInfo` per path in input order, carrying the path as given, or `None`
+                for a path that is missing, is not a regular file or cannot be resolved.
+        """
+        infos: list[FileInfo | None] = []
+        for path in paths:
+            try:
+                st = self._resolve_path(path).stat()
+            except (OSError, ValueError):
+                infos.append(None)
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                infos.append(None)
+                continue
+            infos.append({"path": path, "is_dir": False, "size": int(st.st_size), "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat()})
+        return infos
+
+    async def astat_files(self, paths: list[str]) -> list[FileInfo | None]:
+        """Async version of stat_files."""
+        return await asyncio.to_thread(self.stat_files, paths)
 
     def upload_files(self, files: list[tuple[str, bytes]]) -> list[FileUploadResponse]:
         """Upload multiple files to the filesystem.
@@ -621,6 +956,7 @@ class FilesystemBackend(BackendProtocol):
                 fd = os.open(resolved_path, flags, 0o644)
                 with os.fdopen(fd, "wb") as f:
                     f.write(content)
+                self._invalidate_cached(resolved_path)
 
                 responses.append(FileUploadResponse(path=path, error=None))
             except FileNotFoundError:
@@ -646,15 +982,35 @@ class FilesystemBackend(BackendProtocol):
         Returns:
             List of FileDownloadResponse objects, one per input path.
         """
+        return self._download(paths, max_bytes=None)
+
+    def download_file_prefixes(self, paths: list[str], max_bytes: int) -> list[FileDownloadResponse]:
+        """Download at most the first `max_bytes` bytes of multiple files.
+
+        Only the prefix is read from disk.
+
+        Args:
+            paths: List of file paths to download.
+            max_bytes: Maximum number of bytes to return per file.
+
+        Returns:
+            List of FileDownloadResponse objects, one per input path.
+        """
+        return self._download(paths, max_bytes=max_bytes)
+
+    def _download(self, paths: list[str], *, max_bytes: int | None) -> list[FileDownloadResponse]:
         responses: list[FileDownloadResponse] = []
         for path in paths:
             try:
                 resolved_path = self._resolve_path(path)
-                # Use flags to optionally prevent symlink following if
-                # supported by the OS
-                fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
-                with os.fdopen(fd, "rb") as f:
-                    content = f.read()
+                if self._read_cache is not None:
+                    content = self._download_cached(self._read_cache, resolved_path, max_bytes)
+                else:
+                    # Use flags to optionally prevent symlink following if
+                    # supported by the OS
+                    fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+                    with os.fdopen(fd, "rb") as f:
+                        content = f.read() if max_bytes is None else f.read(max_bytes)
                 responses.append(FileDownloadResponse(path=path, content=content, error=None))
             except FileNotFoundError:
                 responses.append(FileDownloadResponse(path=path, content=None, error="file_not_found"))
@@ -666,3 +1022,20 @@ class FilesystemBackend(BackendProtocol):
                 responses.append(FileDownloadResponse(path=path, content=None, error="invalid_path"))
             # Let other errors propagate
         return responses
+
+    def _download_cached(self, cache: _FileReadCache, resolved_path: Path, max_bytes: int | None) -> bytes:
+        """Download through the read cache. Prefix downloads are served from it but do not fill it."""
+        cached = cache.get(resolved_path)
+        if cached is not None:
+            if max_bytes is None:
+                return cached.text.encode("utf-8")
+            # Every character encodes to at least one byte
+            return cached.text[:max_bytes].encode("utf-8")[:max_bytes]
+        if max_bytes is not None:
+            fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+            with os.fdopen(fd, "rb") as f:
+                return f.read(max_bytes)
+        data, st = self._read_bytes(resolved_path)
+        with contextlib.suppress(UnicodeDecodeError):
+            cache.put(resolved_path, st, data)
+        return data
@@ -9,11 +9,13 @@ import abc
 import asyncio
 from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Any, Literal, NotRequired, TypeAlias
+from typing import Any, Literal, NotRequired, TypeAlias, TypeVar
 
 from langchain.tools import ToolRuntime
 from typing_extensions import TypedDict
 
+_T = TypeVar("_T")
+
 FileOperationError = Literal[
     "file_not_found",  # Download: file doesn't exist
     "permission_denied",  # Both: access denied
@@ -158,6 +160,61 @@ class EditResult:
     occurrences: int | None = None
 
 
+@dataclass
+class GrepPage:
+    """One page of results from `BackendProtocol.grep_page`.
+
+    Attributes:
+        matches: Matches on this page, in the order `grep_raw` returns them.
+        next_cursor: Cursor for the next page, None when this is the last page.
+    """
+
+    matches: list[GrepMatch]
+    next_cursor: str | None = None
+
+
+@dataclass
+class GlobPage:
+    """One page of results from `BackendProtocol.glob_page`.
+
+    Attributes:
+        files: Files on this page, in the order `glob_info` returns them.
+        next_cursor: Cursor for the next page, None when this is the last page.
+    """
+
+    files: list[FileInfo]
+    next_cursor: str | None = None
+
+
+def _page_offset(max_results: int, cursor: str | None) -> int:
+    """Validate a page request and return the number of results its cursor skips.
+
+    Cursors are opaque to callers. They hold the offset of the page in the full
+    result list, so they stay valid as long as the searched files do not change.
+
+    Raises:
+        ValueError: If `max_results` is not positive or the cursor was not returned by a previous page.
+    """
+    if max_results < 1:
+        msg = f"max_results must be at least 1, got {max_results}"
+        raise ValueError(msg)
+    if cursor is None:
+        return 0
+    if not cursor.isdigit():
+        msg = f"Invalid cursor '{cursor}'"
+        raise ValueError(msg)
+    return int(cursor)
+
+
+def _page_slice(results: list[_T], offset: int, max_results: int) -> tuple[list[_T], str | None]:
+    """Cut the page starting at `offset` out of `results`.
+
+    `results` needs at most one result past the page, which tells whether a next page exists.
+    """
+    end = offset + max_results
+    return results[offset:end], str(end) if len(results) > end else None
+
+
 class BackendProtocol(abc.ABC):
     """Protocol for pluggable memory backends (single, unified).
 
@@ -279,6 +336,96 @@ class BackendProtocol(abc.ABC):
         """Async version of grep_raw."""
         return await asyncio.to_thread(self.grep_raw, pattern, path, glob)
 
+    def grep_many(
+        self,
+        patterns: list[str],
+        path: str | None = None,
+        glob: str | None = None,
+    ) -> dict[str, list["GrepMatch"]] | str:
+        """Search for several literal text patterns in files.
+
+        Agents often grep the same files for several identifiers in a row. The default
+        implementation calls `grep_raw` once per pattern; backends that can search for
+        all the patterns in one pass over the files should override it.
+
+        Args:
+            patterns: Literal strings to search for (NOT regex).
+            path: Optional directory path to search in, as for `grep_raw`.
+            glob: Optional glob pattern to filter which FILES to search, as for `grep_raw`.
+
+        Returns:
+            On success: dict mapping each pattern to the list[GrepMatch] that
+                `grep_raw` would return for it.
+
+            On error: str with error message (e.g., invalid path, permission denied)
+        """
+        results: dict[str, list[GrepMatch]] = {}
+        for pattern in patterns:
+            matches = self.grep_raw(pattern, path, glob)
+            if isinstance(matches, str):
+                return matches
+            results[pattern] = matches
+        return results
+
+    async def agrep_many(
+        self,
+        patterns: list[str],
+        path: str | None = None,
+        glob: str | None = None,
+    ) -> dict[str, list["GrepMatch"]] | str:
+        """Async version of grep_many."""
+        return await asyncio.to_thread(self.grep_many, patterns, path, glob)
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_results: int,
+        cursor: str | None = None,
+    ) -> GrepPage | str:
+        """Search for a literal text pattern in files, one page of matches at a time.
+
+        Broad searches can match far more lines than fit in a tool result. Paging caps
+        each call and lets the caller fetch the rest on demand. The default implementation
+        slices the full `grep_raw` result; backends that can stop searching once a page is
+        full should override it.
+
+        Args:
+            pattern: Literal string to search for (NOT regex), as for `grep_raw`.
+            path: Optional directory path to search in, as for `grep_raw`.
+            glob: Optional glob pattern to filter which FILES to search, as for `grep_raw`.
+            max_results: Maximum number of matches on the page.
+            cursor: `next_cursor` of the previous page, or None for the first page.
+
+        Returns:
+            On success: GrepPage with the matches on the page and the cursor of the next one.
+
+            On error: str with error message (e.g., invalid cursor, invalid path)
+        """
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        matches = self.grep_raw(pattern, path, glob)
+        if isinstance(matches, str):
+            return matches
+        page, next_cursor = _page_slice(matches, offset, max_results)
+        return GrepPage(matches=page, next_cursor=next_cursor)
+
+    async def agrep_page(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_results: int,
+        cursor: str | None = None,
+    ) -> GrepPage | str:
+        """Async version of grep_page."""
+        return await asyncio.to_thread(self.grep_page, pattern, path, glob, max_results=max_results, cursor=cursor)
+
     def glob_info(self, pattern: str, path: str = "/") -> list["FileInfo"]:
         """Find files matching a glob pattern.
 
@@ -302,6 +449,34 @@ class BackendProtocol(abc.ABC):
         """Async version of glob_info."""
         return await asyncio.to_thread(self.glob_info, pattern, path)
 
+    def glob_page(self, pattern: str, path: str = "/", *, max_results: int, cursor: str | None = None) -> GlobPage | str:
+        """Find files matching a glob pattern, one page of files at a time.
+
+        The default implementation slices the full `glob_info` result; backends that can
+        skip work for files outside the page should override it.
+
+        Args:
+            pattern: Glob pattern with wildcards to match file paths, as for `glob_info`.
+            path: Base directory to search from. Default: "/" (root).
+            max_results: Maximum number of files on the page.
+            cursor: `next_cursor` of the previous page, or None for the first page.
+
+        Returns:
+            On success: GlobPage with the files on the page and the cursor of the next one.
+
+            On error: str with error message (e.g., invalid cursor)
+        """
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        page, next_cursor = _page_slice(self.glob_info(pattern, path), offset, max_results)
+        return GlobPage(files=page, next_cursor=next_cursor)
+
+    async def aglob_page(self, pattern: str, path: str = "/", *, max_results: int, cursor: str | None = None) -> GlobPage | str:
+        """Async version of glob_page."""
+        return await asyncio.to_thread(self.glob_page, pattern, path, max_results=max_results, cursor=cursor)
+
     def write(
         self,
         file_path: str,
@@ -410,6 +585,31 @@ class BackendProtocol(abc.ABC):
         """Async version of download_files."""
         return await asyncio.to_thread(self.download_files, paths)
 
+    def download_file_prefixes(self, paths: list[str], max_bytes: int) -> list[FileDownloadResponse]:
+        """Download at most the first `max_bytes` bytes of multiple files.
+
+        Used when only the start of a file is needed, such as YAML frontmatter. The
+        default implementation downloads whole files and truncates them; backends that
+        can read partially should override it so the cost is bounded by `max_bytes`.
+
+        Args:
+            paths: List of file paths to download.
+            max_bytes: Maximum number of bytes to return per file.
+
+        Returns:
+            List of FileDownloadResponse objects, one per input path.
+            Response order matches input order. Content may end mid-way through a
+            multi-byte UTF-8 character.
+        """
+        return [
+            FileDownloadResponse(path=r.path, content=r.content[:max_bytes] if r.content is not None else None, error=r.error)
+            for r in self.download_files(paths)
+        ]
+
+    async def adownload_file_prefixes(self, paths: list[str], max_bytes: int) -> list[FileDownloadResponse]:
+        """Async version of download_file_prefixes."""
+        return await asyncio.to_thread(self.download_file_prefixes, paths, max_bytes)
+
 
 @dataclass
 class ExecuteResponse:
@@ -24,6 +24,7 @@ from deepagents.backends.protocol import (
     SandboxBackendProtocol,
     WriteResult,
 )
+from deepagents.instrumentation import instrument_backend
 
 _GLOB_COMMAND_TEMPLATE = """python3 -c "
 import glob
@@ -149,6 +150,7 @@ print(count)
 __DEEPAGENTS_EOF__"""
 
 _READ_COMMAND_TEMPLATE = """python3 -c "
+import itertools
 import os
 import sys
 
@@ -166,14 +168,9 @@ if os.path.getsize(file_path) == 0:
     print('System reminder: File exists but has empty contents')
     sys.exit(0)
 
-# Read file with offset and limit
+# Stream only the requested window instead of loading the whole file
 with open(file_path, 'r') as f:
-    lines = f.readlines()
-
-# Apply offset and limit
-start_idx = offset
-end_idx = offset + limit
-selected_lines = lines[start_idx:end_idx]
+    selected_lines = list(itertools.islice(f, offset, offset + limit))
 
 # Format with line numbers (1-indexed, starting from offset + 1)
 for i, line in enumerate(selected_lines):
@@ -183,7 +180,34 @@ for i, line in enumerate(selected_lines):
     print(f'{{line_num:6d}}\\t{{line_content}}')
 " 2>&1"""
 
+# Stdin format: base64-encoded JSON with {"paths": list[str], "max_bytes": int}.
+# Prints one JSON line per path, in order: {"content": <base64 prefix>} or {"error": <FileOperationError>}.
+# Only the first max_bytes of each file are read, so the cost is bounded by the prefix size.
+_DOWNLOAD_PREFIXES_COMMAND_TEMPLATE = """python3 -c "
+import base64
+import json
+import sys
+
+data = json.loads(base64.b64decode(sys.stdin.read().strip()).decode('utf-8'))
+for path in data['paths']:
+    try:
+        with open(path, 'rb') as f:
+            result = {{'content': base64.b64encode(f.read(data['max_bytes'])).decode('ascii')}}
+    except FileNotFoundError:
+        result = {{'error': 'file_not_found'}}
+    except IsADirectoryError:
+        result = {{'error': 'is_directory'}}
+    except PermissionError:
+        result = {{'error': 'permission_denied'}}
+    except OSError:
+        result = {{'error': 'invalid_path'}}
+    print(json.dumps(result))
+" <<'__DEEPAGENTS_EOF__'
+{payload_b64}
+__DEEPAGENTS_EOF__"""
+
 
+@instrument_backend
 class BaseSandbox(SandboxBackendProtocol, ABC):
     """Base sandbox implementation with execute() as abstract method.
 
@@ -392,6 +416,34 @@ except PermissionError:
 
         return file_infos
 
+    def download_file_prefixes(self, paths: list[str], max_bytes: int) -> list[FileDownloadResponse]:
+        """Download at most the first `max_bytes` bytes of multiple files with one command.
+
+        Only the prefixes are read and transferred. Files whose response is missing from
+        the output (e.g. because the sandbox truncated it) are downloaded in full and
+        truncated instead.
+        """
+        if not paths:
+            return []
+        payload = json.dumps({"paths": paths, "max_bytes": max_bytes})
+        payload_b64 = base64.b64encode(payload.encode("utf-8")).decode("ascii")
+        result = self.execute(_DOWNLOAD_PREFIXES_COMMAND_TEMPLATE.format(payload_b64=payload_b64))
+
+        responses: list[FileDownloadResponse] = []
+        for path, line in zip(paths, result.output.splitlines(), strict=False):
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if not isinstance(data, dict) or not ("content" in data or "error" in data):
+                break
+            content = base64.b64decode(data["content"]) if "content" in data else None
+            responses.append(FileDownloadResponse(path=path, content=content, error=data.get("error")))
+
+        if len(responses) < len(paths):
+            responses.extend(super().download_file_prefixes(paths[len(responses) :], max_bytes))
+        return responses
+
     @property
     @abstractmethod
     def id(self) -> str:
@@ -8,23 +8,35 @@ from deepagents.backends.protocol import (
     FileDownloadResponse,
     FileInfo,
     FileUploadResponse,
+    GlobPage,
     GrepMatch,
+    GrepPage,
     WriteResult,
+    _page_offset,
+    _page_slice,
 )
 from deepagents.backends.utils import (
+    CompactFileData,
     _glob_search_files,
+    _shared_joined_lines,
     create_file_data,
+    create_file_patch,
+    file_data_prefix_bytes,
+    file_data_size,
     file_data_to_string,
     format_read_response,
+    grep_many_from_files,
     grep_matches_from_files,
     perform_string_replacement,
     update_file_data,
 )
+from deepagents.instrumentation import instrument_backend
 
 if TYPE_CHECKING:
     from langchain.tools import ToolRuntime
 
 
+@instrument_backend
 class StateBackend(BackendProtocol):
     """Backend that stores files in agent state (ephemeral).
 
@@ -35,11 +47,37 @@ class StateBackend(BackendProtocol):
     Special handling: Since LangGraph state must be updated via Command objects
     (not direct mutation), operations return Command objects instead of None.
     This is indicated by the uses_state=True flag.
+
+    Args:
+        runtime: The tool runtime giving access to the agent state.
+        compact_files: Store written and edited files as `CompactFileData` (one UTF-8
+            blob per file) instead of one string per line. Uses less memory and makes
+            checkpoints smaller and faster to serialize. Files already in state keep
+            their representation until they are edited.
+        delta_edits: Return edits as a `FilePatch` of the changed lines instead of the
+            whole new file, so the checkpointed update grows with the size of the edit
+            rather than of the file. Patches are applied by the `files` state reducer
+            (`FilesystemMiddleware`) and by `CompositeBackend`; callers that apply
+            `files_update` themselves must use `merge_files_update`. Edits that rewrite
+            at least half of a file are still returned as the whole file.
+        grep_cache: Keep the joined contents of files stored as line lists for `grep`,
+            in a process-wide cache bounded by `DEFAULT_GREP_CACHE_CHARS`. A file searched
+            again, by any backend, is then searched as a whole instead of line by line.
     """
 
-    def __init__(self, runtime: "ToolRuntime[Any, Any]"):
+    def __init__(
+        self,
+        runtime: "ToolRuntime[Any, Any]",
+        *,
+        compact_files: bool = False,
+        delta_edits: bool = False,
+        grep_cache: bool = True,
+    ):
         """Initialize StateBackend with runtime."""
         self.runtime = runtime
+        self.compact_files = compact_files
+        self.delta_edits = delta_edits
+        self._joined_lines = _shared_joined_lines if grep_cache else None
 
     def ls_info(self, path: str) -> list[FileInfo]:
         """List files and directories in the specified directory (non-recursive).
@@ -74,7 +112,7 @@ class StateBackend(BackendProtocol):
                 continue
 
             # This is a file directly in the current directory
-            size = len("\n".join(fd.get("content", [])))
+            size = file_data_size(fd)
             infos.append(
                 {
                     "path": k,
@@ -135,7 +173,7 @@ class StateBackend(BackendProtocol):
         if file_path in files:
             return WriteResult(error=f"Cannot write to {file_path} because it already exists. Read and then make an edit, or write to a new path.")
 
-        new_file_data = create_file_data(content)
+        new_file_data = create_file_data(content, compact=self.compact_files)
         return WriteResult(path=file_path, files_update={file_path: new_file_data})
 
     def edit(
@@ -161,7 +199,13 @@ class StateBackend(BackendProtocol):
             return EditResult(error=result)
 
         new_content, occurrences = result
-        new_file_data = update_file_data(file_data, new_content)
+        # A patch keeps the representation of the file, so compact_files converts through a full update
+        if self.delta_edits and (isinstance(file_data, CompactFileData) or not self.compact_files):
+            changed_end = content.rfind(old_string) + len(old_string)
+            patch = create_file_patch(content, new_content, content.find(old_string), changed_end)
+            if patch is not None:
+                return EditResult(path=file_path, files_update={file_path: patch}, occurrences=int(occurrences))
+        new_file_data = update_file_data(file_data, new_content, compact=True if self.compact_files else None)
         return EditResult(path=file_path, files_update={file_path: new_file_data}, occurrences=int(occurrences))
 
     def grep_raw(
@@ -171,19 +215,62 @@ class StateBackend(BackendProtocol):
         glob: str | None = None,
     ) -> list[GrepMatch] | str:
         files = self.runtime.state.get("files", {})
-        return grep_matches_from_files(files, pattern, path or "/", glob)
+        return grep_matches_from_files(files, pattern, path or "/", glob, joined_lines=self._joined_lines)
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_results: int,
+        cursor: str | None = None,
+    ) -> GrepPage | str:
+        """Search for a literal pattern, no longer searching files once the page is full."""
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        files = self.runtime.state.get("files", {})
+        matches = grep_matches_from_files(files, pattern, path or "/", glob, limit=offset + max_results + 1, joined_lines=self._joined_lines)
+        if isinstance(matches, str):
+            return matches
+        page, next_cursor = _page_slice(matches, offset, max_results)
+        return GrepPage(matches=page, next_cursor=next_cursor)
+
+    def grep_many(
+        self,
+        patterns: list[str],
+        path: str | None = None,
+        glob: str | None = None,
+    ) -> dict[str, list[GrepMatch]] | str:
+        """Search for several literal patterns in one pass over the files."""
+        files = self.runtime.state.get("files", {})
+        return grep_many_from_files(files, patterns, path or "/", glob, joined_lines=self._joined_lines)
 
     def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
         """Get FileInfo for files matching glob pattern."""
+        return self._glob(pattern, path)
+
+    def glob_page(self, pattern: str, path: str = "/", *, max_results: int, cursor: str | None = None) -> GlobPage | str:
+        """Get one page of FileInfo for files matching glob pattern, ordering only the files up to the end of the page."""
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        page, next_cursor = _page_slice(self._glob(pattern, path, limit=offset + max_results + 1), offset, max_results)
+        return GlobPage(files=page, next_cursor=next_cursor)
+
+    def _glob(self, pattern: str, path: str, limit: int | None = None) -> list[FileInfo]:
         files = self.runtime.state.get("files", {})
-        result = _glob_search_files(files, pattern, path)
+        result = _glob_search_files(files, pattern, path, limit)
         if result == "No files found":
             return []
         paths = result.split("\n")
         infos: list[FileInfo] = []
         for p in paths:
             fd = files.get(p)
-            size = len("\n".join(fd.get("content", []))) if fd else 0
+            size = file_data_size(fd) if fd else 0
             infos.append(
                 {
                     "path": p,
@@ -217,6 +304,21 @@ class StateBackend(BackendProtocol):
         Returns:
             List of FileDownloadResponse objects, one per input path
         """
+        return self._download(paths, max_bytes=None)
+
+    def download_file_prefixes(self, paths: list[str], max_bytes: int) -> list[FileDownloadResponse]:
+        """Download at most the first `max_bytes` bytes of multiple files from state.
+
+        Args:
+            paths: List of file paths to download
+            max_bytes: Maximum number of bytes to return per file
+
+        Returns:
+            List of FileDownloadResponse objects, one per input path
+        """
+        return self._download(paths, max_bytes=max_bytes)
+
+    def _download(self, paths: list[str], *, max_bytes: int | None) -> list[FileDownloadResponse]:
         state_files = self.runtime.state.get("files", {})
         responses: list[FileDownloadResponse] = []
 
@@ -228,8 +330,7 @@ class StateBackend(BackendProtocol):
                 continue
 
             # Convert file data to bytes
-            content_str = file_data_to_string(file_data)
-            content_bytes = content_str.encode("utf-8")
+            content_bytes = file_data_to_string(file_data).encode("utf-8") if max_bytes is None else file_data_prefix_bytes(file_data, max_bytes)
 
             responses.append(FileDownloadResponse(path=path, content=content_bytes, error=None))
 
@@ -16,18 +16,26 @@ from deepagents.backends.protocol import (
     FileDownloadResponse,
     FileInfo,
     FileUploadResponse,
+    GlobPage,
     GrepMatch,
+    GrepPage,
     WriteResult,
+    _page_offset,
+    _page_slice,
 )
 from deepagents.backends.utils import (
     _glob_search_files,
+    _shared_joined_lines,
     create_file_data,
+    file_data_prefix_bytes,
     file_data_to_string,
     format_read_response,
+    grep_many_from_files,
     grep_matches_from_files,
     perform_string_replacement,
     update_file_data,
 )
+from deepagents.instrumentation import instrument_backend
 
 if TYPE_CHECKING:
     from langchain.tools import ToolRuntime
@@ -91,6 +99,7 @@ def _validate_namespace(namespace: tuple[str, ...]) -> tuple[str, ...]:
     return namespace
 
 
+@instrument_backend
 class StoreBackend(BackendProtocol):
     """Backend that stores files in LangGraph's BaseStore (persistent).
 
@@ -100,7 +109,13 @@ class StoreBackend(BackendProtocol):
     The namespace can include an optional assistant_id for multi-agent isolation.
     """
 
-    def __init__(self, runtime: "ToolRuntime[Any, Any]", *, namespace: NamespaceFactory | None = None):
+    def __init__(
+        self,
+        runtime: "ToolRuntime[Any, Any]",
+        *,
+        namespace: NamespaceFactory | None = None,
+        grep_cache: bool = False,
+    ):
         """Initialize StoreBackend with runtime.
 
         Args:
@@ -115,12 +130,17 @@ class StoreBackend(BackendProtocol):
 
                 .. warning::
                     This API is subject to change in a minor version.
+            grep_cache: Keep the joined contents of files for `grep` in the process-wide
+                cache shared with `StateBackend`. A file searched again is then searched
+                as a whole instead of line by line. Only useful for stores that return
+                the same objects on every read, like `InMemoryStore`. Disabled by default.
 
         Example:
                     namespace=lambda ctx: ("filesystem", ctx.runtime.context.user_id)
         """
         self.runtime = runtime
         self._namespace = namespace
+        self._joined_lines = _shared_joined_lines if grep_cache else None
 
     def _get_store(self) -> BaseStore:
         """Get the store instance.
@@ -284,6 +304,19 @@ class StoreBackend(BackendProtocol):
 
         return all_items
 
+    def _load_files(self) -> dict[str, Any]:
+        """Load every file in the namespace as FileData, skipping items that are not files."""
+        store = self._get_store()
+        namespace = self._get_namespace()
+        items = self._search_store_paginated(store, namespace)
+        files: dict[str, Any] = {}
+        for item in items:
+            try:
+                files[item.key] = self._convert_store_item_to_file_data(item)
+            except ValueError:
+                continue
+        return files
+
     def ls_info(self, path: str) -> list[FileInfo]:
         """List files and directories in the specified directory (non-recursive).
 
@@ -532,28 +565,55 @@ class StoreBackend(BackendProtocol):
         path: str | None = None,
         glob: str | None = None,
     ) -> list[GrepMatch] | str:
-        store = self._get_store()
-        namespace = self._get_namespace()
-        items = self._search_store_paginated(store, namespace)
-        files: dict[str, Any] = {}
-        for item in items:
-            try:
-                files[item.key] = self._convert_store_item_to_file_data(item)
-            except ValueError:
-                continue
-        return grep_matches_from_files(files, pattern, path or "/", glob)
+        files = self._load_files()
+        return grep_matches_from_files(files, pattern, path or "/", glob, joined_lines=self._joined_lines)
+
+    def grep_page(
+        self,
+        pattern: str,
+        path: str | None = None,
+        glob: str | None = None,
+        *,
+        max_results: int,
+        cursor: str | None = None,
+    ) -> GrepPage | str:
+        """Search for a literal pattern, no longer searching files once the page is full."""
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        files = self._load_files()
+        matches = grep_matches_from_files(files, pattern, path or "/", glob, limit=offset + max_results + 1, joined_lines=self._joined_lines)
+        if isinstance(matches, str):
+            return matches
+        page, next_cursor = _page_slice(matches, offset, max_results)
+        return GrepPage(matches=page, next_cursor=next_cursor)
+
+    def grep_many(
+        self,
+        patterns: list[str],
+        path: str | None = None,
+        glob: str | None = None,
+    ) -> dict[str, list[GrepMatch]] | str:
+        """Search for several literal patterns, loading the files from the store once."""
+        files = self._load_files()
+        return grep_many_from_files(files, patterns, path or "/", glob, joined_lines=self._joined_lines)
 
     def glob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
-        store = self._get_store()
-        namespace = self._get_namespace()
-        items = self._search_store_paginated(store, namespace)
-        files: dict[str, Any] = {}
-        for item in items:
-            try:
-                files[item.key] = self._convert_store_item_to_file_data(item)
-            except ValueError:
-                continue
-        result = _glob_search_files(files, pattern, path)
+        return self._glob(pattern, path)
+
+    def glob_page(self, pattern: str, path: str = "/", *, max_results: int, cursor: str | None = None) -> GlobPage | str:
+        """Get one page of FileInfo for files matching glob pattern, ordering only the files up to the end of the page."""
+        try:
+            offset = _page_offset(max_results, cursor)
+        except ValueError as e:
+            return f"Error: {e}"
+        page, next_cursor = _page_slice(self._glob(pattern, path, limit=offset + max_results + 1), offset, max_results)
+        return GlobPage(files=page, next_cursor=next_cursor)
+
+    def _glob(self, pattern: str, path: str, limit: int | None = None) -> list[FileInfo]:
+        files = self._load_files()
+        result = _glob_search_files(files, pattern, path, limit)
         if result == "No files found":
             return []
         paths = result.split("\n")
@@ -607,6 +667,22 @@ class StoreBackend(BackendProtocol):
             List of FileDownloadResponse objects, one per input path.
             Response order matches input order.
         """
+        return self._download(paths, max_bytes=None)
+
+    def download_file_prefixes(self, paths: list[str], max_bytes: int) -> list[FileDownloadResponse]:
+        """Download at most the first `max_bytes` bytes of multiple files from the store.
+
+        Args:
+            paths: List of file paths to download.
+            max_bytes: Maximum number of bytes to return per file.
+
+        Returns:
+            List of FileDownloadResponse objects, one per input path.
+            Response order matches input order.
+        """
+        return self._download(paths, max_bytes=max_bytes)
+
+    def _download(self, paths: list[str], *, max_bytes: int | None) -> list[FileDownloadResponse]:
         store = self._get_store()
         namespace = self._get_namespace()
         responses: list[FileDownloadResponse] = []
@@ -620,8 +696,7 @@ class StoreBackend(BackendProtocol):
 
             file_data = self._convert_store_item_to_file_data(item)
             # Convert file data to bytes
-            content_str = file_data_to_string(file_data)
-            content_bytes = content_str.encode("utf-8")
+            content_bytes = file_data_to_string(file_data).encode("utf-8") if max_bytes is None else file_data_prefix_bytes(file_data, max_bytes)
 
             responses.append(FileDownloadResponse(path=path, content=content_bytes, error=None))
 
@@ -5,14 +5,27 @@ helpers used by backends and the composite router. Structured helpers
 enable composition without fragile string parsing.
 """
 
+import heapq
+import logging
 import re
-from datetime import UTC, datetime
-from pathlib import Path
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from functools import cached_property, lru_cache, partial
+from itertools import accumulate
+from operator import itemgetter
 from typing import Any, Literal
 
 import wcmatch.glob as wcglob
 
 from deepagents.backends.protocol import FileInfo as _FileInfo, GrepMatch as _GrepMatch
+from deepagents.tokenizers import Tokenizer, count_tokens_by_chars
+
+logger = logging.getLogger(__name__)
 
 EMPTY_CONTENT_WARNING = "System reminder: File exists but has empty contents"
 MAX_LINE_LENGTH = 5000
@@ -94,28 +107,192 @@ def check_empty_content(content: str) -> str | None:
     return None
 
 
-def file_data_to_string(file_data: dict[str, Any]) -> str:
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+# FileData keys, in the order a FileData dict has them
+_FILE_DATA_KEYS = ("content", "created_at", "modified_at")
+
+
+def _to_epoch_us(timestamp: str) -> int:
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_epoch_us(epoch_us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=epoch_us)).isoformat()
+
+
+def _now_epoch_us() -> int:
+    return (datetime.now(UTC) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _is_blank(blob: bytes) -> bool:
+    """Whether UTF-8 `blob` decodes to whitespace only, without decoding it in the common case."""
+    stripped = blob.strip()
+    if not stripped:
+        return True
+    # An ASCII character that bytes.strip() keeps is not whitespace, except the separators str.strip() also removes
+    if stripped[:1].isascii() and stripped[0] not in b"\x1c\x1d\x1e\x1f":
+        return False
+    return not stripped.decode("utf-8").strip()
+
+
+@dataclass
+class CompactFileData(Mapping[str, Any]):
+    """Memory-compact `FileData`: the content as one UTF-8 blob, timestamps as epoch microseconds.
+
+    A `FileData` dict keeps one Python string per line plus two ISO timestamp strings,
+    roughly three times the size of the text, and serializes every line as its own
+    msgpack string. `CompactFileData` keeps a single `bytes` object and two ints, and
+    checkpoints as exactly that.
+
+    It reads like a `FileData` dict: `content` is materialized into a list of lines on
+    access and the timestamps are returned as ISO strings, so code that only reads
+    `FileData` works unchanged. Backends use `text`, `lines()` and `blob` directly to avoid
+    materializing the line list, e.g. `read()` decodes only the requested window using
+    a lazily built `array('I')` of line offsets.
+
+    Create instances with `create_file_data(..., compact=True)`, or let `StateBackend`
+    do so with `compact_files=True`.
+    """
+
+    blob: bytes
+    """File content encoded as UTF-8."""
+
+    created_at_us: int
+    """Creation time in microseconds since the epoch."""
+
+    modified_at_us: int
+    """Last modification time in microseconds since the epoch."""
+
+    @property
+    def text(self) -> str:
+        """File content as a string."""
+        return self.blob.decode("utf-8")
+
+    @cached_property
+    def _offsets(self) -> array:
+        """Byte offset of the start of every line, plus one past the end of the blob."""
+        return array("I", accumulate((len(line) + 1 for line in self.blob.split(b"\n")), initial=0))
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, counting a trailing newline as starting an empty last line like `FileData`."""
+        return self.blob.count(b"\n") + 1
+
+    def lines(self, start: int = 0, stop: int | None = None) -> list[str]:
+        """Decode lines `start` to `stop` (exclusive), as `content[start:stop]` would return them."""
+        offsets = self._offsets
+        count = len(offsets) - 1
+        stop = count if stop is None else min(stop, count)
+        if start >= stop:
+            return []
+        return self.blob[offsets[start] : offsets[stop] - 1].decode("utf-8").split("\n")
+
+    def _asdict(self) -> dict[str, Any]:
+        """Fields as a dict.
+
+        `JsonPlusSerializer` checkpoints objects with an `_asdict` method (named tuples) as
+        their constructor arguments. That is the same result as its dataclass handling,
+        but reached before its slow runtime protocol checks.
+        """
+        return {"blob": self.blob, "created_at_us": self.created_at_us, "modified_at_us": self.modified_at_us}
+
+    def __getitem__(self, key: str) -> Any:  # noqa: ANN401
+        """Return a `FileData` field, materializing `content` from the blob."""
+        if key == "content":
+            return self.text.split("\n")
+        if key == "created_at":
+            return _from_epoch_us(self.created_at_us)
+        if key == "modified_at":
+            return _from_epoch_us(self.modified_at_us)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the `FileData` keys."""
+        return iter(_FILE_DATA_KEYS)
+
+    def __len__(self) -> int:
+        """Number of `FileData` keys."""
+        return len(_FILE_DATA_KEYS)
+
+
+def file_data_to_string(file_data: Mapping[str, Any]) -> str:
     """Convert FileData to plain string content.
 
     Args:
-        file_data: FileData dict with 'content' key
+        file_data: FileData dict with 'content' key, or `CompactFileData`
 
     Returns:
         Content as string with lines joined by newlines
     """
+    if isinstance(file_data, CompactFileData):
+        return file_data.text
     return "\n".join(file_data["content"])
 
 
-def create_file_data(content: str, created_at: str | None = None) -> dict[str, Any]:
+def file_data_size(file_data: Mapping[str, Any]) -> int:
+    """Number of characters in a FileData's content, as reported by `ls_info` and `glob_info`.
+
+    Args:
+        file_data: FileData dict with 'content' key, or `CompactFileData`
+
+    Returns:
+        Length of the content joined by newlines
+    """
+    if isinstance(file_data, CompactFileData):
+        return len(file_data.blob) if file_data.blob.isascii() else len(file_data.text)
+    lines = file_data.get("content", [])
+    return sum(map(len, lines)) + max(len(lines) - 1, 0)
+
+
+def file_data_prefix_bytes(file_data: Mapping[str, Any], max_bytes: int) -> bytes:
+    """Encode at most the first `max_bytes` bytes of a FileData's content.
+
+    Only the lines needed to fill the prefix are joined and encoded.
+
+    Args:
+        file_data: FileData dict with 'content' key, or `CompactFileData`
+        max_bytes: Maximum number of bytes to return
+
+    Returns:
+        UTF-8 encoded prefix of the content, possibly ending mid-character
+    """
+    if isinstance(file_data, CompactFileData):
+        return file_data.blob[:max_bytes]
+    parts: list[bytes] = []
+    size = 0
+    for i, line in enumerate(file_data["content"]):
+        encoded = ("\n" + line if i else line).encode("utf-8")
+        parts.append(encoded)
+        size += len(encoded)
+        if size >= max_bytes:
+            break
+    return b"".join(parts)[:max_bytes]
+
+
+def create_file_data(content: str, created_at: str | None = None, *, compact: bool = False) -> dict[str, Any] | CompactFileData:
     """Create a FileData object with timestamps.
 
     Args:
         content: File content as string
         created_at: Optional creation timestamp (ISO format)
+        compact: Return a `CompactFileData` instead of a FileData dict
 
     Returns:
         FileData dict with content and timestamps
     """
+    if compact:
+        text = content if isinstance(content, str) else "\n".join(content)
+        now_us = _now_epoch_us()
+        return CompactFileData(
+            blob=text.encode("utf-8"),
+            created_at_us=_to_epoch_us(created_at) if created_at else now_us,
+            modified_at_us=now_us,
+        )
+
     lines = content.split("\n") if isinstance(content, str) else content
     now = datetime.now(UTC).isoformat()
 
@@ -126,16 +303,25 @@ def create_file_data(content: str, created_at: str | None = None) -> dict[str, A
     }
 
 
-def update_file_data(file_data: dict[str, Any], content: str) -> dict[str, Any]:
+def update_file_data(file_data: Mapping[str, Any], content: str, *, compact: bool | None = None) -> dict[str, Any] | CompactFileData:
     """Update FileData with new content, preserving creation timestamp.
 
     Args:
-        file_data: Existing FileData dict
+        file_data: Existing FileData dict, or `CompactFileData`
         content: New content as string
+        compact: Return a `CompactFileData` (`True`) or a FileData dict (`False`).
+            Defaults to the representation of `file_data`.
 
     Returns:
         Updated FileData dict
     """
+    if compact is None:
+        compact = isinstance(file_data, CompactFileData)
+    if compact:
+        created_at_us = file_data.created_at_us if isinstance(file_data, CompactFileData) else _to_epoch_us(file_data["created_at"])
+        text = content if isinstance(content, str) else "\n".join(content)
+        return CompactFileData(blob=text.encode("utf-8"), created_at_us=created_at_us, modified_at_us=_now_epoch_us())
+
     lines = content.split("\n") if isinstance(content, str) else content
     now = datetime.now(UTC).isoformat()
 
@@ -146,6 +332,140 @@ def update_file_data(file_data: dict[str, Any], content: str) -> dict[str, Any]:
     }
 
 
+@dataclass
+class FilePatch:
+    """Replacement of a range of lines in a file, applied by the `files` state reducer.
+
+    `StateBackend(delta_edits=True)` returns a `FilePatch` from `edit()` instead of the
+    whole new file, so the state update written to the checkpoint for an edit is
+    proportional to the lines it touches rather than to the size of the file. The
+    reducer applies it to the current file and stores the result as a full file again,
+    so a file is never more than one patch away from a snapshot.
+
+    The replaced lines are kept to check that the patch applies to the file it was made
+    from. When another update in the same step moved them, the patch is applied where
+    they now are.
+    """
+
+    start: int
+    """Index of the first replaced line."""
+
+    removed: list[str]
+    """Lines replaced by the patch, starting at `start`."""
+
+    inserted: list[str]
+    """Lines that replace `removed`."""
+
+    modified_at: str
+    """ISO 8601 timestamp of the edit."""
+
+    def _asdict(self) -> dict[str, Any]:
+        """Fields as a dict, for `JsonPlusSerializer` (see `CompactFileData._asdict`)."""
+        return {"start": self.start, "removed": self.removed, "inserted": self.inserted, "modified_at": self.modified_at}
+
+
+def create_file_patch(content: str, new_content: str, changed_start: int, changed_end: int) -> FilePatch | None:
+    """Create a `FilePatch` turning `content` into `new_content`.
+
+    Args:
+        content: Current file content
+        new_content: File content after the edit
+        changed_start: Offset in `content` of the first changed character
+        changed_end: Offset in `content` just past the last changed character. The text
+            after it must be unchanged at the end of `new_content`.
+
+    Returns:
+        Patch covering the lines that contain the change, or `None` when it would replace
+        at least half of the file and a full snapshot is the better update.
+    """
+    line_start = content.rfind("\n", 0, changed_start) + 1
+    line_end = content.find("\n", changed_end)
+    if line_end == -1:
+        removed_text = content[line_start:]
+        inserted_text = new_content[line_start:]
+    else:
+        removed_text = content[line_start:line_end]
+        inserted_text = new_content[line_start : line_end + len(new_content) - len(content)]
+
+    removed = removed_text.split("\n")
+    inserted = inserted_text.split("\n")
+    if 2 * (len(removed) + len(inserted)) >= content.count("\n") + new_content.count("\n") + 2:
+        return None
+    return FilePatch(
+        start=content.count("\n", 0, line_start),
+        removed=removed,
+        inserted=inserted,
+        modified_at=datetime.now(UTC).isoformat(),
+    )
+
+
+def _find_lines(lines: list[str], block: list[str], near: int) -> int | None:
+    """Index of the occurrence of `block` in `lines` closest to `near`, if any."""
+    first = block[0]
+    candidates = [i for i, line in enumerate(lines) if line == first and lines[i : i + len(block)] == block]
+    return min(candidates, key=lambda i: abs(i - near), default=None)
+
+
+def apply_file_patch(file_data: Mapping[str, Any], patch: FilePatch) -> dict[str, Any] | CompactFileData | None:
+    """Apply a `FilePatch`, keeping the representation and creation time of `file_data`.
+
+    Args:
+        file_data: FileData dict, or `CompactFileData`
+        patch: Patch to apply
+
+    Returns:
+        The patched file, or `None` when the lines the patch replaces are not in the file
+    """
+    start = patch.start
+    end = start + len(patch.removed)
+    compact = isinstance(file_data, CompactFileData)
+    current = file_data.lines(start, end) if compact else file_data["content"][start:end]
+    if current != patch.removed:
+        start = _find_lines(file_data["content"], patch.removed, start)
+        if start is None:
+            return None
+        end = start + len(patch.removed)
+
+    if compact:
+        offsets = file_data._offsets
+        blob = file_data.blob[: offsets[start]] + "\n".join(patch.inserted).encode("utf-8") + file_data.blob[offsets[end] - 1 :]
+        return CompactFileData(blob=blob, created_at_us=file_data.created_at_us, modified_at_us=_to_epoch_us(patch.modified_at))
+
+    lines = file_data["content"]
+    return {
+        "content": [*lines[:start], *patch.inserted, *lines[end:]],
+        "created_at": file_data["created_at"],
+        "modified_at": patch.modified_at,
+    }
+
+
+def merge_files_update(files: Mapping[str, Any], files_update: Mapping[str, Any]) -> dict[str, Any]:
+    """Apply a `files_update` from a backend to a files dict.
+
+    Args:
+        files: Current files, by path
+        files_update: Updates by path: a FileData dict or `CompactFileData` replaces the
+            file, a `FilePatch` is applied to it and `None` deletes it.
+
+    Returns:
+        New files dict. Patches that do not apply are dropped with a warning.
+    """
+    result = {**files}
+    for path, value in files_update.items():
+        if value is None:
+            result.pop(path, None)
+        elif isinstance(value, FilePatch):
+            current = result.get(path)
+            patched = apply_file_patch(current, value) if current is not None else None
+            if patched is None:
+                logger.warning("Dropping edit of %s: the lines it replaces are no longer in the file", path)
+            else:
+                result[path] = patched
+        else:
+            result[path] = value
+    return result
+
+
 def format_read_response(
     file_data: dict[str, Any],
     offset: int,
@@ -153,27 +473,43 @@ def format_read_response(
 ) -> str:
     """Format file data for read response with line numbers.
 
+    FileData already stores content as a list of lines, which doubles as the line index:
+    the requested window is sliced directly so paging through a large file (e.g. an
+    evicted tool result) costs O(limit) rather than re-joining and re-splitting the
+    whole file on every read. `CompactFileData` decodes only the requested window.
+
     Args:
-        file_data: FileData dict
+        file_data: FileData dict, or `CompactFileData`
         offset: Line offset (0-indexed)
         limit: Maximum number of lines
 
     Returns:
         Formatted content or error message
     """
-    content = file_data_to_string(file_data)
-    empty_msg = check_empty_content(content)
-    if empty_msg:
-        return empty_msg
+    compact = isinstance(file_data, CompactFileData)
+    # A trailing newline produces a final empty entry that is not a line of its own.
+    # Whitespace-only files are reported as empty; stops at the first non-blank line
+    if compact:
+        lines = None
+        num_lines = file_data.line_count - file_data.blob.endswith(b"\n")
+        blank = _is_blank(file_data.blob)
+    else:
+        lines = file_data["content"]
+        num_lines = len(lines) - 1 if lines and lines[-1] == "" else len(lines)
+        blank = not any(line.strip() for line in lines)
+
+    if blank:
+        return EMPTY_CONTENT_WARNING
 
-    lines = content.splitlines()
     start_idx = offset
-    end_idx = min(start_idx + limit, len(lines))
+    end_idx = min(start_idx + limit, num_lines)
 
-    if start_idx >= len(lines):
-        return f"Error: Line offset {offset} exceeds file length ({len(lines)} lines)"
+    if start_idx >= num_lines:
+        return f"Error: Line offset {offset} exceeds file length ({num_lines} lines)"
 
-    selected_lines = lines[start_idx:end_idx]
+    # Strip carriage returns left over from CRLF content split on "\n"
+    window = file_data.lines(start_idx, end_idx) if compact else lines[start_idx:end_idx]
+    selected_lines = [line.removesuffix("\r") for line in window]
     return format_content_with_line_numbers(selected_lines, start_line=start_idx + 1)
 
 
@@ -206,16 +542,26 @@ def perform_string_replacement(
     return new_content, occurrences
 
 
-def truncate_if_too_long(result: list[str] | str) -> list[str] | str:
-    """Truncate list or string result if it exceeds token limit (rough estimate: 4 chars/token)."""
+def truncate_if_too_long(result: list[str] | str, *, tokenizer: Tokenizer | None = None) -> list[str] | str:
+    """Truncate list or string result if it exceeds the tool result token limit.
+
+    Args:
+        result: The tool result to check.
+        tokenizer: Tokenizer used to measure the result. Defaults to the 4 chars/token estimate.
+
+    Returns:
+        The result, cut proportionally to fit the limit and followed by truncation guidance if too long.
+    """
+    count_tokens = tokenizer or count_tokens_by_chars
     if isinstance(result, list):
-        total_chars = sum(len(item) for item in result)
-        if total_chars > TOOL_RESULT_TOKEN_LIMIT * 4:
-            return result[: len(result) * TOOL_RESULT_TOKEN_LIMIT * 4 // total_chars] + [TRUNCATION_GUIDANCE]
+        total_tokens = count_tokens("".join(result))
+        if total_tokens > TOOL_RESULT_TOKEN_LIMIT:
+            return result[: len(result) * TOOL_RESULT_TOKEN_LIMIT // total_tokens] + [TRUNCATION_GUIDANCE]
         return result
     # string
-    if len(result) > TOOL_RESULT_TOKEN_LIMIT * 4:
-        return result[: TOOL_RESULT_TOKEN_LIMIT * 4] + "\n" + TRUNCATION_GUIDANCE
+    total_tokens = count_tokens(result)
+    if total_tokens > TOOL_RESULT_TOKEN_LIMIT:
+        return result[: len(result) * TOOL_RESULT_TOKEN_LIMIT // total_tokens] + "\n" + TRUNCATION_GUIDANCE
     return result
 
 
@@ -283,10 +629,59 @@ def _filter_files_by_path(files: dict[str, Any], normalized_path: str) -> dict[s
     return {fp: fd for fp, fd in files.items() if fp.startswith(dir_prefix)}
 
 
+# `*.ext` and `**/*.ext` patterns, matched with suffix checks instead of wcmatch
+_SUFFIX_GLOB = re.compile(r"(\*\*/)?\*(\.\w[\w.-]*)")
+
+# Suffix checks compare case-sensitively, as wcmatch does everywhere except Windows
+_GLOB_CASE_SENSITIVE = not wcglob.globmatch("A", "a")
+
+
+def _match_suffix(suffix: str, recursive: bool, fallback: Callable[[str], bool], path: str) -> bool:
+    """Match `path` against `*<suffix>` (or `**/*<suffix>` if `recursive`) like wcmatch does."""
+    if path.endswith("/"):
+        return fallback(path)
+    if not path.endswith(suffix):
+        return False
+    head, separator, name = path.rpartition("/")
+    if separator and not recursive:
+        return False
+    # `*` does not match a leading dot: hidden files only match when `*` matches nothing
+    if name.startswith(".") and name != suffix:
+        return False
+    # `**` does not descend into hidden directories
+    return not (recursive and (head.startswith(".") or "/." in head))
+
+
+@lru_cache(maxsize=256)
+def compile_glob(pattern: str, flags: int = wcglob.BRACE) -> Callable[[str], bool]:
+    """Compile a glob pattern into a match function, cached by `(pattern, flags)`.
+
+    `wcglob.globmatch` parses the pattern again on every call, which dominates filtering
+    many paths against the same pattern. `*.ext` and `**/*.ext` patterns, by far the
+    most common, are matched with plain suffix checks.
+
+    Args:
+        pattern: Glob pattern (e.g., "*.py", "**/*.ts")
+        flags: wcmatch glob flags
+
+    Returns:
+        Function returning whether a path matches the pattern, as `wcglob.globmatch` would
+    """
+    fallback = wcglob.compile(pattern, flags=flags).match
+    shape = _SUFFIX_GLOB.fullmatch(pattern)
+    if shape is None or not _GLOB_CASE_SENSITIVE or flags & ~(wcglob.BRACE | wcglob.GLOBSTAR):
+        return fallback
+    if shape.group(1) and not flags & wcglob.GLOBSTAR:
+        # Without GLOBSTAR, `**` is an ordinary `*` that does not cross `/`
+        return fallback
+    return partial(_match_suffix, shape.group(2), bool(shape.group(1)), fallback)
+
+
 def _glob_search_files(
     files: dict[str, Any],
     pattern: str,
     path: str = "/",
+    limit: int | None = None,
 ) -> str:
     """Search files dict for paths matching glob pattern.
 
@@ -294,6 +689,7 @@ def _glob_search_files(
         files: Dictionary of file paths to FileData.
         pattern: Glob pattern (e.g., "*.py", "**/*.ts").
         path: Base path to search from.
+        limit: Optional maximum number of paths to return, the most recently modified ones.
 
     Returns:
         Newline-separated file paths, sorted by modification time (most recent first).
@@ -317,7 +713,7 @@ def _glob_search_files(
     # - Patterns without path separators (e.g., "*.py") match only in the current
     #   directory (non-recursive) relative to `path`.
     # - Use "**" explicitly for recursive matching.
-    effective_pattern = pattern
+    matches_pattern = compile_glob(pattern, wcglob.BRACE | wcglob.GLOBSTAR)
 
     matches = []
     for file_path, file_data in filtered.items():
@@ -333,10 +729,14 @@ def _glob_search_files(
             # Directory prefix - strip the directory path
             relative = file_path[len(normalized_path) + 1 :]  # +1 for the slash
 
-        if wcglob.globmatch(relative, effective_pattern, flags=wcglob.BRACE | wcglob.GLOBSTAR):
+        if matches_pattern(relative):
             matches.append((file_path, file_data["modified_at"]))
 
-    matches.sort(key=lambda x: x[1], reverse=True)
+    if limit is not None and limit < len(matches):
+        # Same order as the full sort, without sorting the paths past the limit
+        matches = heapq.nlargest(limit, matches, key=itemgetter(1))
+    else:
+        matches.sort(key=itemgetter(1), reverse=True)
 
     if not matches:
         return "No files found"
@@ -412,7 +812,8 @@ def _grep_search_files(
     filtered = _filter_files_by_path(files, normalized_path)
 
     if glob:
-        filtered = {fp: fd for fp, fd in filtered.items() if wcglob.globmatch(Path(fp).name, glob, flags=wcglob.BRACE)}
+        matches_glob = compile_glob(glob)
+        filtered = {fp: fd for fp, fd in filtered.items() if matches_glob(fp.rpartition("/")[2])}
 
     results: dict[str, list[tuple[int, str]]] = {}
     for file_path, file_data in filtered.items():
@@ -430,15 +831,175 @@ def _grep_search_files(
 # -------- Structured helpers for composition --------
 
 
+DEFAULT_GREP_CACHE_CHARS = 16 * 1024 * 1024
+"""Text budget, in characters, of the process-wide grep cache used by `StateBackend`."""
+
+_MAX_SEEN_LINE_LISTS = 100_000
+
+
+class _JoinedLinesCache:
+    """Joined text and line start offsets of FileData line lists, by list identity.
+
+    FileData contents are replaced on every write and edit, never mutated in place, so
+    a line list that is still referenced has the same text. Entries keep their list
+    alive, which keeps its `id()` from being reused while it is cached.
+
+    Joining a list and indexing its lines costs more than testing each line once, so a
+    list is only joined the second time it is searched. Entries beyond the budget are
+    evicted least recently used first, so at most `max_chars` of text (and the lists
+    holding it) are kept.
+
+    Args:
+        max_chars: Total length of the cached texts.
+    """
+
+    def __init__(self, max_chars: int) -> None:
+        self.max_chars = max_chars
+        self._entries: OrderedDict[int, tuple[list[str], str, array]] = OrderedDict()
+        # Lists searched once, by id only so they are not kept alive. A reused id only
+        # makes a list be joined on its first search.
+        self._seen: set[int] = set()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, lines: list[str]) -> tuple[str, array] | None:
+        """Return `"\\n".join(lines)` and the offset of the start of every line, plus one past the end.
+
+        Returns:
+            The joined text and line offsets, or `None` the first time `lines` is seen.
+        """
+        key = id(lines)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is lines:
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+            if key not in self._seen:
+                if len(self._seen) >= _MAX_SEEN_LINE_LISTS:
+                    self._seen.clear()
+                self._seen.add(key)
+                return None
+
+        text = "\n".join(lines)
+        starts = array("I", accumulate((len(line) + 1 for line in lines), initial=0))
+        if len(text) > self.max_chars:
+            return text, starts
+        with self._lock:
+            self._seen.discard(key)
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self._chars -= len(replaced[1])
+            self._entries[key] = (lines, text, starts)
+            self._chars += len(text)
+            while self._chars > self.max_chars:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._chars -= len(evicted)
+        return text, starts
+
+
+# Shared by every `StateBackend`: middleware builds a backend per tool call from a
+# factory, and the same state's files are searched through many of them
+_shared_joined_lines = _JoinedLinesCache(DEFAULT_GREP_CACHE_CHARS)
+
+
+# A hit followed by another within about this many lines means testing every remaining
+# line is cheaper than a search per hit
+_DENSE_MATCH_GAP = 32
+# After a file with dense matches, this many files are tested line by line without searching their text first
+_DENSE_FILES_SKIPPED = 7
+
+
+def _grep_lines(file_path: str, lines: list[str], pattern: str, first_line: int = 1) -> list[GrepMatch]:
+    return [{"path": file_path, "line": line_num, "text": line} for line_num, line in enumerate(lines, first_line) if pattern in line]
+
+
+def _grep_file(
+    file_path: str,
+    file_data: Mapping[str, Any],
+    pattern: str,
+    joined_lines: _JoinedLinesCache | None = None,
+    *,
+    by_line: bool = False,
+) -> tuple[list[GrepMatch], bool]:
+    """Return a match for every line of a file containing `pattern`.
+
+    Searches the whole text with `find` and maps each hit to its line with `bisect` over
+    the line start offsets, resuming at the next line. Sparse matches then cost a few
+    C-level calls per hit instead of a Python iteration per line. Matches are dense when
+    another hit closely follows the first one, which is checked in the text before any
+    line offset is read, or any later one. The remaining lines are then tested one by one.
+    FileData line lists are searched line by line unless `joined_lines` has their text.
+
+    Args:
+        file_path: Path reported in the matches.
+        file_data: The file's `FileData` or `CompactFileData`.
+        pattern: Literal text to search for.
+        joined_lines: Cache holding the joined text of line lists.
+        by_line: Test every line without searching the text first, e.g. because
+            matches were dense in the previous files.
+
+    Returns:
+        The matches, and whether they turned out to be dense.
+    """
+    compact = isinstance(file_data, CompactFileData)
+    if by_line or "\n" in pattern:
+        # Lines never contain a newline, but the joined text does
+        return _grep_lines(file_path, file_data.lines() if compact else file_data["content"], pattern), False
+
+    if compact:
+        text: str | bytes = file_data.blob
+        needle: str | bytes = pattern.encode("utf-8")
+        newline: str | bytes = b"\n"
+        starts = file_data._offsets
+        line_count = len(starts) - 1
+    else:
+        lines = file_data["content"]
+        joined = joined_lines.get(lines) if joined_lines is not None else None
+        if joined is None:
+            return _grep_lines(file_path, lines, pattern), False
+        text, starts = joined
+        needle = pattern
+        newline = "\n"
+        line_count = len(lines)
+
+    hit = text.find(needle)
+    if hit == -1:
+        return [], False
+    # Another hit within about `_DENSE_MATCH_GAP` average lines of the first one means dense matches
+    line_end = text.find(newline, hit)
+    if line_end != -1 and text.find(needle, line_end, line_end + _DENSE_MATCH_GAP * len(text) // line_count) != -1:
+        return _grep_lines(file_path, file_data.lines() if compact else lines, pattern), True
+
+    found: list[GrepMatch] = []
+    previous = -_DENSE_MATCH_GAP - 1
+    while hit != -1:
+        index = bisect_right(starts, hit) - 1
+        if index - previous <= _DENSE_MATCH_GAP:
+            found.extend(_grep_lines(file_path, file_data.lines(index) if compact else lines[index:], pattern, index + 1))
+            return found, True
+        next_start = starts[index + 1]
+        line = text[starts[index] : next_start - 1].decode("utf-8") if compact else lines[index]
+        found.append({"path": file_path, "line": index + 1, "text": line})
+        previous = index
+        hit = text.find(needle, next_start)
+    return found, False
+
+
 def grep_matches_from_files(
     files: dict[str, Any],
     pattern: str,
     path: str | None = None,
     glob: str | None = None,
+    limit: int | None = None,
+    *,
+    joined_lines: _JoinedLinesCache | None = None,
 ) -> list[GrepMatch] | str:
     """Return structured grep matches from an in-memory files mapping.
 
-    Performs literal text search (not regex).
+    Performs literal text search (not regex). `CompactFileData` searches its blob as a
+    whole, and so do FileData line lists whose joined text and line offsets are in
+    `joined_lines`; other line lists are searched line by line. With a `limit`, files
+    are no longer searched once that many matches are found.
 
     Returns a list of GrepMatch on success, or a string for invalid inputs.
     We deliberately do not raise here to keep backends non-throwing in tool
@@ -452,16 +1013,62 @@ def grep_matches_from_files(
     filtered = _filter_files_by_path(files, normalized_path)
 
     if glob:
-        filtered = {fp: fd for fp, fd in filtered.items() if wcglob.globmatch(Path(fp).name, glob, flags=wcglob.BRACE)}
+        matches_glob = compile_glob(glob)
+        filtered = {fp: fd for fp, fd in filtered.items() if matches_glob(fp.rpartition("/")[2])}
 
     matches: list[GrepMatch] = []
+    skip = 0
     for file_path, file_data in filtered.items():
-        for line_num, line in enumerate(file_data["content"], 1):
-            if pattern in line:  # Simple substring search for literal matching
-                matches.append({"path": file_path, "line": int(line_num), "text": line})
+        file_matches, dense = _grep_file(file_path, file_data, pattern, joined_lines, by_line=skip > 0)
+        skip = _DENSE_FILES_SKIPPED if dense else max(skip - 1, 0)
+        matches.extend(file_matches)
+        if limit is not None and len(matches) >= limit:
+            del matches[limit:]
+            break
     return matches
 
 
+def grep_many_from_files(
+    files: dict[str, Any],
+    patterns: list[str],
+    path: str | None = None,
+    glob: str | None = None,
+    *,
+    joined_lines: _JoinedLinesCache | None = None,
+) -> dict[str, list[GrepMatch]]:
+    """Return structured grep matches for several literal patterns with one pass over the files.
+
+    Each file is filtered and joined once for all the patterns, then searched for each
+    of them as in `grep_matches_from_files`, so files matching none of the patterns cost
+    one substring search per pattern over their text. Without `joined_lines`, the
+    joined texts are only kept for the duration of the call.
+
+    Returns:
+        Matches for each pattern, in the order `grep_matches_from_files` would return them.
+    """
+    results: dict[str, list[GrepMatch]] = {pattern: [] for pattern in patterns}
+    try:
+        normalized_path = _normalize_path(path)
+    except ValueError:
+        return results
+
+    filtered = _filter_files_by_path(files, normalized_path)
+
+    if glob:
+        matches_glob = compile_glob(glob)
+        filtered = {fp: fd for fp, fd in filtered.items() if matches_glob(fp.rpartition("/")[2])}
+
+    if joined_lines is None:
+        joined_lines = _JoinedLinesCache(DEFAULT_GREP_CACHE_CHARS)
+    skips = dict.fromkeys(patterns, 0)
+    for file_path, file_data in filtered.items():
+        for pattern, matches in results.items():
+            file_matches, dense = _grep_file(file_path, file_data, pattern, joined_lines, by_line=skips[pattern] > 0)
+            skips[pattern] = _DENSE_FILES_SKIPPED if dense else max(skips[pattern] - 1, 0)
+            matches.extend(file_matches)
+    return results
+
+
 def build_grep_results_dict(matches: list[GrepMatch]) -> dict[str, list[tuple[int, str]]]:
     """Group structured matches into the legacy dict form used by formatters."""
     grouped: dict[str, list[tuple[int, str]]] = {}
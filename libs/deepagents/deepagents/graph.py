@@ -2,17 +2,17 @@
 # ruff: noqa: ERA001
 
 from collections.abc import Callable, Sequence
-from typing import Any, cast
+from functools import partial
+from typing import TYPE_CHECKING, Any, cast
 
 from langchain.agents import create_agent
 from langchain.agents.middleware import HumanInTheLoopMiddleware, InterruptOnConfig, TodoListMiddleware
 from langchain.agents.middleware.types import AgentMiddleware, ContextT, ResponseT
 from langchain.agents.structured_output import ResponseFormat
 from langchain.chat_models import init_chat_model
-from langchain_anthropic import ChatAnthropic
-from langchain_anthropic.middleware import AnthropicPromptCachingMiddleware
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
 from langchain_core.tools import BaseTool
 from langgraph.cache.base import BaseCache
 from langgraph.graph.state import CompiledStateGraph
@@ -24,30 +24,126 @@ from deepagents.backends.protocol import BackendFactory, BackendProtocol
 from deepagents.middleware.filesystem import FilesystemMiddleware
 from deepagents.middleware.memory import MemoryMiddleware
 from deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
+from deepagents.middleware.prompt_caching import PromptCacheLayoutMiddleware, _LazyAnthropicPromptCachingMiddleware
 from deepagents.middleware.skills import SkillsMiddleware
 from deepagents.middleware.subagents import (
     GENERAL_PURPOSE_SUBAGENT,
     CompiledSubAgent,
     SubAgent,
     SubAgentMiddleware,
+    _LazySubAgentGraph,
 )
 from deepagents.middleware.summarization import _compute_summarization_defaults, _DeepAgentsSummarizationMiddleware
+from deepagents.tokenizers import Tokenizer, message_token_counter
+
+if TYPE_CHECKING:
+    from langchain_anthropic import ChatAnthropic
 
 BASE_AGENT_PROMPT = "In order to complete the objective that the user asks of you, you have access to a number of standard tools."
 
 
-def get_default_model() -> ChatAnthropic:
+def get_default_model() -> "ChatAnthropic":
     """Get the default model for deep agents.
 
+    `langchain_anthropic` is imported here rather than at module load, so agents built
+    with other models never import it.
+
     Returns:
         `ChatAnthropic` instance configured with Claude Sonnet 4.5.
     """
+    from langchain_anthropic import ChatAnthropic  # noqa: PLC0415
+
     return ChatAnthropic(
         model_name="claude-sonnet-4-5-20250929",
         max_tokens=20000,
     )
 
 
+def _summarization_token_counter(tokenizer: Tokenizer | None) -> Callable[..., int]:
+    """Return the message token counter for summarization triggers, using `tokenizer` when given."""
+    return count_tokens_approximately if tokenizer is None else message_token_counter(tokenizer)
+
+
+def _default_subagent_middleware(
+    model: BaseChatModel, backend: BackendProtocol | BackendFactory, tokenizer: Tokenizer | None = None
+) -> list[AgentMiddleware[Any, Any, Any]]:
+    """Build the base middleware stack every subagent receives."""
+    summarization_defaults = _compute_summarization_defaults(model)
+    return [
+        TodoListMiddleware(),
+        FilesystemMiddleware(backend=backend, tokenizer=tokenizer),
+        _DeepAgentsSummarizationMiddleware(
+            model=model,
+            backend=backend,
+            trigger=summarization_defaults["trigger"],
+            keep=summarization_defaults["keep"],
+            token_counter=_summarization_token_counter(tokenizer),
+            trim_tokens_to_summarize=None,
+            truncate_args_settings=summarization_defaults["truncate_args_settings"],
+        ),
+        _LazyAnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
+        PromptCacheLayoutMiddleware(),
+        PatchToolCallsMiddleware(),
+    ]
+
+
+def _compile_general_purpose_subagent(
+    *,
+    model: BaseChatModel,
+    tools: Sequence[BaseTool | Callable | dict[str, Any]] | None,
+    backend: BackendProtocol | BackendFactory,
+    skills: list[str] | None,
+    interrupt_on: dict[str, bool | InterruptOnConfig] | None,
+    tokenizer: Tokenizer | None = None,
+) -> CompiledStateGraph:
+    """Compile the general-purpose subagent, which shares the main agent's model, tools, and skills."""
+    gp_middleware = _default_subagent_middleware(model, backend, tokenizer)
+    if skills is not None:
+        gp_middleware.append(SkillsMiddleware(backend=backend, sources=skills))
+    if interrupt_on is not None:
+        gp_middleware.append(HumanInTheLoopMiddleware(interrupt_on=interrupt_on))
+
+    return create_agent(
+        model,
+        system_prompt=GENERAL_PURPOSE_SUBAGENT["system_prompt"],
+        tools=tools or [],
+        middleware=gp_middleware,
+        name=GENERAL_PURPOSE_SUBAGENT["name"],
+    )
+
+
+def _compile_subagent(
+    spec: SubAgent,
+    *,
+    model: BaseChatModel,
+    tools: Sequence[BaseTool | Callable | dict[str, Any]] | None,
+    backend: BackendProtocol | BackendFactory,
+    tokenizer: Tokenizer | None = None,
+) -> CompiledStateGraph:
+    """Compile a user-provided subagent, filling in defaults from the main agent."""
+    subagent_model: str | BaseChatModel = cast("str | BaseChatModel", spec.get("model", model))
+    if isinstance(subagent_model, str):
+        subagent_model = init_chat_model(subagent_model)
+
+    # Build middleware: base stack + skills (if specified) + user's middleware
+    subagent_middleware = _default_subagent_middleware(subagent_model, backend, tokenizer)
+    subagent_skills = spec.get("skills")
+    if subagent_skills:
+        subagent_middleware.append(SkillsMiddleware(backend=backend, sources=subagent_skills))
+    subagent_middleware.extend(spec.get("middleware", []))
+    subagent_interrupt_on = spec.get("interrupt_on")
+    if subagent_interrupt_on:
+        subagent_middleware.append(HumanInTheLoopMiddleware(interrupt_on=subagent_interrupt_on))
+
+    return create_agent(
+        subagent_model,
+        system_prompt=spec["system_prompt"],
+        tools=spec.get("tools", tools or []),
+        middleware=subagent_middleware,
+        name=spec["name"],
+    )
+
+
 def create_deep_agent(
     model: str | BaseChatModel | None = None,
     tools: Sequence[BaseTool | Callable | dict[str, Any]] | None = None,
@@ -66,6 +162,7 @@ def create_deep_agent(
     debug: bool = False,
     name: str | None = None,
     cache: BaseCache | None = None,
+    tokenizer: Tokenizer | None = None,
 ) -> CompiledStateGraph:
     """Create a deep agent.
 
@@ -98,7 +195,7 @@ def create_deep_agent(
         middleware: Additional middleware to apply after the standard middleware stack
             (`TodoListMiddleware`, `FilesystemMiddleware`, `SubAgentMiddleware`,
             `SummarizationMiddleware`, `AnthropicPromptCachingMiddleware`,
-            `PatchToolCallsMiddleware`).
+            `PromptCacheLayoutMiddleware`, `PatchToolCallsMiddleware`).
         subagents: The subagents to use.
 
             Each subagent should be a `dict` with the following keys:
@@ -109,6 +206,8 @@ def create_deep_agent(
             - (optional) `tools`
             - (optional) `model` (either a `LanguageModelLike` instance or `dict` settings)
             - (optional) `middleware` (list of `AgentMiddleware`)
+            - (optional) `state_keys` (parent state keys passed to the subagent, e.g. `["files"]`)
+            - (optional) `budget` (token, step, and wall-clock limits for each run)
         skills: Optional list of skill source paths (e.g., `["/skills/user/", "/skills/project/"]`).
 
             Paths must be specified using POSIX conventions (forward slashes) and are relative
@@ -138,6 +237,12 @@ def create_deep_agent(
         debug: Whether to enable debug mode. Passed through to `create_agent`.
         name: The name of the agent. Passed through to `create_agent`.
         cache: The cache to use for the agent. Passed through to `create_agent`.
+        tokenizer: Optional tokenizer shared by tool-result eviction, truncation and the
+            summarization trigger of the main agent and its subagents.
+
+            Use `bpe_tokenizer()` from `deepagents.tokenizers` for exact counts. Defaults to
+            the 4 chars/token estimate for tool results and `count_tokens_approximately`
+            for summarization.
 
     Returns:
         A configured deep agent.
@@ -168,74 +273,45 @@ def create_deep_agent(
 
     backend = backend if backend is not None else (StateBackend)
 
-    # Build general-purpose subagent with default middleware stack
-    gp_middleware: list[AgentMiddleware[Any, Any, Any]] = []
-    gp_middleware += [
-        TodoListMiddleware(),
-        FilesystemMiddleware(backend=backend),
-        _DeepAgentsSummarizationMiddleware(
-            model=model,
-            backend=backend,
-            trigger=summarization_defaults["trigger"],
-            keep=summarization_defaults["keep"],
-            trim_tokens_to_summarize=None,
-            truncate_args_settings=summarization_defaults["truncate_args_settings"],
+    # Subagents are compiled lazily on first use and cached by the objects they are built from
+    general_purpose_spec: CompiledSubAgent = {
+        "name": GENERAL_PURPOSE_SUBAGENT["name"],
+        "description": GENERAL_PURPOSE_SUBAGENT["description"],
+        "runnable": _LazySubAgentGraph(
+            GENERAL_PURPOSE_SUBAGENT["name"],
+            (GENERAL_PURPOSE_SUBAGENT, model, tools, backend, skills, interrupt_on, tokenizer),
+            partial(
+                _compile_general_purpose_subagent,
+                model=model,
+                tools=tools,
+                backend=backend,
+                skills=skills,
+                interrupt_on=interrupt_on,
+                tokenizer=tokenizer,
+            ),
         ),
-        AnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
-        PatchToolCallsMiddleware(),
-    ]
-    if skills is not None:
-        gp_middleware.append(SkillsMiddleware(backend=backend, sources=skills))
-    if interrupt_on is not None:
-        gp_middleware.append(HumanInTheLoopMiddleware(interrupt_on=interrupt_on))
-
-    general_purpose_spec: SubAgent = {  # type: ignore[missing-typed-dict-key]
-        **GENERAL_PURPOSE_SUBAGENT,
-        "model": model,
-        "tools": tools or [],
-        "middleware": gp_middleware,
     }
 
-    # Process user-provided subagents to fill in defaults for model, tools, and middleware
     processed_subagents: list[SubAgent | CompiledSubAgent] = []
     for spec in subagents or []:
         if "runnable" in spec:
             # CompiledSubAgent - use as-is
             processed_subagents.append(spec)
         else:
-            # SubAgent - fill in defaults and prepend base middleware
-            subagent_model: str | BaseChatModel = cast("str | BaseChatModel", spec.get("model", model))
-            if isinstance(subagent_model, str):
-                subagent_model = init_chat_model(subagent_model)
-
-            # Build middleware: base stack + skills (if specified) + user's middleware
-            subagent_summarization_defaults = _compute_summarization_defaults(subagent_model)
-            subagent_middleware: list[AgentMiddleware[Any, Any, Any]] = []
-            subagent_middleware += [
-                TodoListMiddleware(),
-                FilesystemMiddleware(backend=backend),
-                _DeepAgentsSummarizationMiddleware(
-                    model=subagent_model,
-                    backend=backend,
-                    trigger=subagent_summarization_defaults["trigger"],
-                    keep=subagent_summarization_defaults["keep"],
-                    trim_tokens_to_summarize=None,
-                    truncate_args_settings=subagent_summarization_defaults["truncate_args_settings"],
+            # SubAgent - fill in defaults for model, tools, and middleware on first use
+            processed_spec: CompiledSubAgent = {
+                "name": spec["name"],
+                "description": spec["description"],
+                "runnable": _LazySubAgentGraph(
+                    spec["name"],
+                    (spec, model, tools, backend, tokenizer),
+                    partial(_compile_subagent, cast("SubAgent", spec), model=model, tools=tools, backend=backend, tokenizer=tokenizer),
                 ),
-                AnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
-                PatchToolCallsMiddleware(),
-            ]
-            subagent_skills = spec.get("skills")
-            if subagent_skills:
-                subagent_middleware.append(SkillsMiddleware(backend=backend, sources=subagent_skills))
-            subagent_middleware.extend(spec.get("middleware", []))
-
-            processed_spec: SubAgent = {  # type: ignore[missing-typed-dict-key]
-                **spec,
-                "model": subagent_model,
-                "tools": spec.get("tools", tools or []),
-                "middleware": subagent_middleware,
             }
+            if "state_keys" in spec:
+                processed_spec["state_keys"] = spec["state_keys"]
+            if "budget" in spec:
+                processed_spec["budget"] = spec["budget"]
             processed_subagents.append(processed_spec)
 
     # Combine GP with processed user-provided subagents
@@ -250,7 +326,7 @@ def create_deep_agent(
         deepagent_middleware.append(SkillsMiddleware(backend=backend, sources=skills))
     deepagent_middleware.extend(
         [
-            FilesystemMiddleware(backend=backend),
+            FilesystemMiddleware(backend=backend, tokenizer=tokenizer),
             SubAgentMiddleware(
                 backend=backend,
                 subagents=all_subagents,
@@ -260,10 +336,12 @@ def create_deep_agent(
                 backend=backend,
                 trigger=summarization_defaults["trigger"],
                 keep=summarization_defaults["keep"],
+                token_counter=_summarization_token_counter(tokenizer),
                 trim_tokens_to_summarize=None,
                 truncate_args_settings=summarization_defaults["truncate_args_settings"],
             ),
-            AnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
+            _LazyAnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore"),
+            PromptCacheLayoutMiddleware(),
             PatchToolCallsMiddleware(),
         ]
     )
@@ -0,0 +1,643 @@
+"""Opt-in timing instrumentation for middleware hooks and backend operations.
+
+Nothing is measured until `enable_instrumentation` is called with one or more sinks.
+While disabled, every instrumented call pays a single check of a module global.
+
+When enabled, a `Span` is emitted for:
+
+- every hook of the deepagents middleware (`wrap_model_call`, `wrap_tool_call`,
+  `before_agent`, ...), named `<middleware name>.<hook>`
+- every method of the built-in backends, named `<backend class>.<method>`, with the
+  number of bytes read or written
+- backend resolution (`backend.resolve`), eviction of large tool results
+  (`filesystem.evict`), and the offload and summary steps of summarization
+  (`summarization.offload`, `summarization.summarize`)
+
+Spans nest: each span's `self_duration_s` excludes the spans started inside it and, for
+hooks that wrap a handler, the handler itself, i.e. the model or tool call and the
+middleware further down the stack. Summing self durations therefore attributes a
+turn's time without double counting.
+
+Example:
+    ```python
+    from deepagents.instrumentation import HistogramSink, LoggingSink, enable_instrumentation
+
+    histogram = HistogramSink()
+    enable_instrumentation(histogram, LoggingSink())
+    agent.invoke({"messages": [...]})
+    for name, stats in histogram.stats().items():
+        print(name, stats["count"], stats["p95_s"])
+    ```
+"""
+
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Literal, TypeVar
+
+from typing_extensions import TypedDict
+
+logger = logging.getLogger(__name__)
+
+SpanKind = Literal["middleware", "backend", "operation"]
+
+_T = TypeVar("_T", bound=type)
+
+
+@dataclass
+class Span:
+    """A single timed operation."""
+
+    name: str
+    """Operation name, e.g. `FilesystemMiddleware.wrap_tool_call` or `StateBackend.read`."""
+
+    kind: SpanKind
+    """Whether the span times a middleware hook, a backend method, or another operation."""
+
+    attributes: dict[str, Any] = field(default_factory=dict)
+    """Details of the operation, e.g. `path`, `tool`, `bytes_read` and `bytes_written`."""
+
+    start_time_ns: int = 0
+    """Wall clock start time in nanoseconds since the epoch."""
+
+    end_time_ns: int = 0
+    """Wall clock end time in nanoseconds since the epoch."""
+
+    duration_s: float = 0.0
+    """Elapsed time, measured with a monotonic clock."""
+
+    child_duration_s: float = 0.0
+    """Time spent in nested spans and, for wrapping middleware hooks, in the handler."""
+
+    error: str | None = None
+    """Type name of the exception raised by the operation, if any."""
+
+    @property
+    def self_duration_s(self) -> float:
+        """Elapsed time excluding nested spans and the handler of a wrapping hook."""
+        return self.duration_s - self.child_duration_s
+
+
+class SpanSink:
+    """Receives spans when instrumentation is enabled.
+
+    Both callbacks run synchronously on the thread doing the measured work, so sinks
+    should be cheap and thread-safe. The default implementations do nothing.
+    """
+
+    def on_start(self, span: Span) -> None:
+        """Called when `span` starts, with its name, kind, initial attributes and start time set."""
+
+    def on_end(self, span: Span) -> None:
+        """Called when `span` ends, with all fields set."""
+
+
+class LoggingSink(SpanSink):
+    """Log every finished span.
+
+    Args:
+        logger: Logger to write to. Defaults to the `deepagents.instrumentation` logger.
+        level: Log level of the records.
+    """
+
+    def __init__(self, logger: logging.Logger | None = None, level: int = logging.DEBUG) -> None:
+        """Initialize the logging sink."""
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def on_end(self, span: Span) -> None:
+        """Log the span's timing and attributes."""
+        self.logger.log(
+            self.level,
+            "%s took %.3fms (self %.3fms)%s %s",
+            span.name,
+            span.duration_s * 1000,
+            span.self_duration_s * 1000,
+            f" error={span.error}" if span.error else "",
+            span.attributes,
+        )
+
+
+class SpanStats(TypedDict):
+    """Aggregated timings of all spans with one name."""
+
+    kind: SpanKind
+    count: int
+    errors: int
+    total_s: float
+    """Sum of `self_duration_s`."""
+
+    mean_s: float
+    min_s: float
+    max_s: float
+    p50_s: float
+    p95_s: float
+    p99_s: float
+    bytes_read: int
+    bytes_written: int
+
+
+# Histogram buckets are log-scaled, `_BUCKETS_PER_OCTAVE` per doubling of duration,
+# starting at one microsecond. Percentiles are accurate to within one bucket (~19%).
+_BUCKETS_PER_OCTAVE = 4
+_BUCKET_BASE_S = 1e-6
+
+
+class _Histogram:
+    __slots__ = ("buckets", "bytes_read", "bytes_written", "count", "errors", "kind", "max_s", "min_s", "total_s")
+
+    def __init__(self, kind: SpanKind) -> None:
+        self.kind = kind
+        self.count = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.min_s = math.inf
+        self.max_s = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.buckets: dict[int, int] = {}
+
+    def add(self, span: Span) -> None:
+        duration = max(span.self_duration_s, 0.0)
+        self.count += 1
+        self.errors += span.error is not None
+        self.total_s += duration
+        self.min_s = min(self.min_s, duration)
+        self.max_s = max(self.max_s, duration)
+        self.bytes_read += span.attributes.get("bytes_read", 0)
+        self.bytes_written += span.attributes.get("bytes_written", 0)
+        bucket = max(0, math.ceil(math.log2(duration / _BUCKET_BASE_S) * _BUCKETS_PER_OCTAVE)) if duration > _BUCKET_BASE_S else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, fraction: float) -> float:
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # Upper bound of the bucket, clamped to the observed range
+                return min(max(_BUCKET_BASE_S * 2 ** (bucket / _BUCKETS_PER_OCTAVE), self.min_s), self.max_s)
+        return self.max_s
+
+    def stats(self) -> SpanStats:
+        return SpanStats(
+            kind=self.kind,
+            count=self.count,
+            errors=self.errors,
+            total_s=self.total_s,
+            mean_s=self.total_s / self.count,
+            min_s=self.min_s,
+            max_s=self.max_s,
+            p50_s=self.percentile(0.5),
+            p95_s=self.percentile(0.95),
+            p99_s=self.percentile(0.99),
+            bytes_read=self.bytes_read,
+            bytes_written=self.bytes_written,
+        )
+
+
+class HistogramSink(SpanSink):
+    """Aggregate span timings in memory, per span name.
+
+    Durations are the spans' `self_duration_s`, so totals across names add up without
+    double counting nested spans or the model call that every wrapping hook encloses.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self._histograms: dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        """Add the span to the histogram of its name."""
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = _Histogram(span.kind)
+            histogram.add(span)
+
+    def stats(self) -> dict[str, SpanStats]:
+        """Return the aggregated timings, slowest total first."""
+        with self._lock:
+            stats = {name: histogram.stats() for name, histogram in self._histograms.items()}
+        return dict(sorted(stats.items(), key=lambda item: item[1]["total_s"], reverse=True))
+
+    def reset(self) -> None:
+        """Discard all recorded spans."""
+        with self._lock:
+            self._histograms.clear()
+
+
+class OpenTelemetrySink(SpanSink):
+    """Export spans through an OpenTelemetry-compatible tracer.
+
+    The tracer only needs `start_span(name, start_time=..., attributes=...)` returning an
+    object with `set_attribute`, `set_status` and `end(end_time=...)`, so any tracer
+    implementing that part of the OpenTelemetry API works. When the
+    `opentelemetry-api` package is installed, each span is also made current while it
+    runs, so spans nest under the caller's trace and under each other.
+
+    Args:
+        tracer: The tracer to create spans with. Defaults to
+            `opentelemetry.trace.get_tracer("deepagents")`, which requires the
+            `opentelemetry-api` package.
+    """
+
+    def __init__(self, tracer: Any = None) -> None:  # noqa: ANN401
+        """Initialize the OpenTelemetry sink."""
+        try:
+            from opentelemetry import context, trace  # noqa: PLC0415
+        except ImportError:
+            if tracer is None:
+                msg = "OpenTelemetrySink requires a tracer or the `opentelemetry-api` package. Install it with `pip install opentelemetry-api`."
+                raise ImportError(msg) from None
+            context = trace = None
+        self.tracer = tracer if tracer is not None else trace.get_tracer("deepagents")
+        self._context = context
+        self._trace = trace
+        self._active: dict[int, tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        """Start the OpenTelemetry span and make it current."""
+        otel_span = self.tracer.start_span(span.name, start_time=span.start_time_ns, attributes={"deepagents.kind": span.kind, **span.attributes})
+        token = self._context.attach(self._trace.set_span_in_context(otel_span)) if self._context is not None else None
+        with self._lock:
+            self._active[id(span)] = (otel_span, token)
+
+    def on_end(self, span: Span) -> None:
+        """Record the final attributes and end the OpenTelemetry span."""
+        with self._lock:
+            entry = self._active.pop(id(span), None)
+        if entry is None:
+            return
+        otel_span, token = entry
+        if token is not None:
+            self._context.detach(token)
+        for key, value in span.attributes.items():
+            otel_span.set_attribute(key, value)
+        otel_span.set_attribute("deepagents.self_duration_s", span.self_duration_s)
+        if span.error is not None and self._trace is not None:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.end_time_ns)
+
+
+_sinks: tuple[SpanSink, ...] = ()
+
+# Innermost open span, whose `child_duration_s` accumulates the duration of nested spans
+_current_span: ContextVar[Span | None] = ContextVar("deepagents_current_span", default=None)
+
+
+def enable_instrumentation(*sinks: SpanSink) -> None:
+    """Start emitting spans to `sinks`, replacing any previously enabled sinks.
+
+    Args:
+        *sinks: Sinks that receive every span.
+    """
+    global _sinks  # noqa: PLW0603
+    _sinks = sinks
+
+
+def disable_instrumentation() -> None:
+    """Stop emitting spans."""
+    global _sinks  # noqa: PLW0603
+    _sinks = ()
+
+
+def is_instrumentation_enabled() -> bool:
+    """Whether spans are currently emitted."""
+    return bool(_sinks)
+
+
+class _SpanContext:
+    __slots__ = ("_parent", "_sinks", "_start", "_token", "span")
+
+    def __init__(self, name: str, kind: SpanKind, attributes: dict[str, Any]) -> None:
+        self.span = Span(name=name, kind=kind, attributes=attributes)
+        self._sinks = _sinks
+        self._parent: Span | None = None
+        self._token: Any = None
+        self._start = 0.0
+
+    def __enter__(self) -> Span:
+        self.span.start_time_ns = time.time_ns()
+        for sink in self._sinks:
+            _notify(sink.on_start, self.span)
+        self._parent = _current_span.get()
+        self._token = _current_span.set(self.span)
+        self._start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: object) -> None:
+        self.span.duration_s = time.perf_counter() - self._start
+        self.span.end_time_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if self._parent is not None:
+            self._parent.child_duration_s += self.span.duration_s
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        for sink in reversed(self._sinks):
+            _notify(sink.on_end, self.span)
+
+
+def _notify(callback: Callable[[Span], None], span: Span) -> None:
+    """Call a sink, never letting its failure break the measured operation."""
+    try:
+        callback(span)
+    except Exception:
+        logger.exception("Instrumentation sink %r failed on span %s", callback, span.name)
+
+
+class _NoopSpanContext:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *args: object) -> None:
+        return None
+
+
+_NOOP = _NoopSpanContext()
+
+
+def span(name: str, kind: SpanKind = "operation", **attributes: Any) -> _SpanContext | _NoopSpanContext:
+    """Time the enclosed block as a span.
+
+    Args:
+        name: Span name.
+        kind: Span kind.
+        **attributes: Initial span attributes.
+
+    Returns:
+        A context manager yielding the `Span`, whose attributes may be updated inside the
+        block, or yielding `None` if instrumentation is disabled.
+    """
+    if not _sinks:
+        return _NOOP
+    return _SpanContext(name, kind, attributes)
+
+
+# Middleware hooks that receive a handler
+_WRAP_HOOKS = ("wrap_model_call", "awrap_model_call", "wrap_tool_call", "awrap_tool_call")
+_NODE_HOOKS = (
+    "before_agent",
+    "abefore_agent",
+    "before_model",
+    "abefore_model",
+    "after_model",
+    "aafter_model",
+    "after_agent",
+    "aafter_agent",
+)
+
+
+def _hook_attributes(request: Any) -> dict[str, Any]:  # noqa: ANN401
+    """Describe a hook's request, never letting a failure break the hook."""
+    try:
+        tool_call = getattr(request, "tool_call", None)
+        return {"tool": tool_call["name"]} if tool_call is not None else {}
+    except Exception:
+        logger.exception("Instrumentation failed to describe the request of a middleware hook")
+        return {}
+
+
+def _wrap_handler_hook(hook: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def awrapper(self: Any, request: Any, handler: Callable[[Any], Any]) -> Any:  # noqa: ANN401
+            if not _sinks:
+                return await func(self, request, handler)
+            with _SpanContext(f"{self.name}.{hook}", "middleware", _hook_attributes(request)) as current:
+
+                async def timed_handler(req: Any) -> Any:  # noqa: ANN401
+                    # Spans inside the handler are accounted for by the handler's own duration
+                    token = _current_span.set(None)
+                    start = time.perf_counter()
+                    try:
+                        return await handler(req)
+                    finally:
+                        current.child_duration_s += time.perf_counter() - start
+                        _current_span.reset(token)
+
+                return await func(self, request, timed_handler)
+
+        return awrapper
+
+    @functools.wraps(func)
+    def wrapper(self: Any, request: Any, handler: Callable[[Any], Any]) -> Any:  # noqa: ANN401
+        if not _sinks:
+            return func(self, request, handler)
+        with _SpanContext(f"{self.name}.{hook}", "middleware", _hook_attributes(request)) as current:
+
+            def timed_handler(req: Any) -> Any:  # noqa: ANN401
+                # Spans inside the handler are accounted for by the handler's own duration
+                token = _current_span.set(None)
+                start = time.perf_counter()
+                try:
+                    return handler(req)
+                finally:
+                    current.child_duration_s += time.perf_counter() - start
+                    _current_span.reset(token)
+
+            return func(self, request, timed_handler)
+
+    return wrapper
+
+
+def _wrap_node_hook(hook: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def awrapper(self: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            if not _sinks:
+                return await func(self, *args, **kwargs)
+            with _SpanContext(f"{self.name}.{hook}", "middleware", {}):
+                return await func(self, *args, **kwargs)
+
+        return awrapper
+
+    @functools.wraps(func)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        if not _sinks:
+            return func(self, *args, **kwargs)
+        with _SpanContext(f"{self.name}.{hook}", "middleware", {}):
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+def instrument_middleware(cls: _T) -> _T:
+    """Class decorator emitting a span for every hook the middleware class defines.
+
+    Only hooks defined on `cls` itself are wrapped, so LangChain still sees inherited
+    default hooks as not overridden. Spans are named after the middleware's `name`.
+
+    Args:
+        cls: An `AgentMiddleware` subclass.
+
+    Returns:
+        The same class, with its hooks instrumented.
+    """
+    for hook in _WRAP_HOOKS:
+        if hook in cls.__dict__:
+            setattr(cls, hook, _wrap_handler_hook(hook, cls.__dict__[hook]))
+    for hook in _NODE_HOOKS:
+        if hook in cls.__dict__:
+            setattr(cls, hook, _wrap_node_hook(hook, cls.__dict__[hook]))
+    return cls
+
+
+def _arg(args: tuple[Any, ...], kwargs: dict[str, Any], index: int, name: str, default: Any = None) -> Any:  # noqa: ANN401
+    return args[index] if len(args) > index else kwargs.get(name, default)
+
+
+def _utf8_len(text: str | None) -> int:
+    return len(text.encode("utf-8")) if text else 0
+
+
+def _describe_listing(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401
+    attributes["path"] = _arg(args, kwargs, 0, "path")
+    attributes["entries"] = len(result)
+
+
+def _describe_read(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401
+    attributes["path"] = _arg(args, kwargs, 0, "file_path")
+    attributes["bytes_read"] = _utf8_len(result)
+
+
+def _describe_search(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401
+    attributes["pattern"] = _arg(args, kwargs, 0, "pattern")
+    attributes["path"] = _arg(args, kwargs, 1, "path")
+    if isinstance(result, list):
+        attributes["entries"] = len(result)
+
+
+def _describe_search_many(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401
+    attributes["patterns"] = len(_arg(args, kwargs, 0, "patterns"))
+    attributes["path"] = _arg(args, kwargs, 1, "path")
+    if isinstance(result, dict):
+        attributes["entries"] = sum(map(len, result.values()))
+
+
+def _describe_grep_page(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401
+    _describe_search(attributes, args, kwargs, result if isinstance(result, str) else result.matches)
+    attributes["max_results"] = kwargs.get("max_results")
+
+
+def _describe_glob_page(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401
+    _describe_search(attributes, args, kwargs, result if isinstance(result, str) else result.files)
+    attributes["max_results"] = kwargs.get("max_results")
+
+
+def _describe_write(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401, ARG001
+    attributes["path"] = _arg(args, kwargs, 0, "file_path")
+    attributes["bytes_written"] = _utf8_len(_arg(args, kwargs, 1, "content"))
+
+
+def _describe_edit(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401, ARG001
+    attributes["path"] = _arg(args, kwargs, 0, "file_path")
+    attributes["bytes_written"] = _utf8_len(_arg(args, kwargs, 2, "new_string"))
+
+
+def _describe_upload(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401, ARG001
+    files = _arg(args, kwargs, 0, "files")
+    attributes["files"] = len(files)
+    attributes["bytes_written"] = sum(len(content) for _, content in files)
+
+
+def _describe_download(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401
+    attributes["files"] = len(_arg(args, kwargs, 0, "paths"))
+    attributes["bytes_read"] = sum(len(response.content) for response in result if response.content is not None)
+
+
+def _describe_execute(attributes: dict[str, Any], args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> None:  # noqa: ANN401, ARG001
+    attributes["exit_code"] = result.exit_code
+    attributes["bytes_read"] = _utf8_len(result.output)
+
+
+_BACKEND_METHODS: dict[str, Callable[[dict[str, Any], tuple[Any, ...], dict[str, Any], Any], None]] = {
+    "ls_info": _describe_listing,
+    "read": _describe_read,
+    "grep_raw": _describe_search,
+    "grep_many": _describe_search_many,
+    "grep_page": _describe_grep_page,
+    "glob_info": _describe_search,
+    "glob_page": _describe_glob_page,
+    "write": _describe_write,
+    "edit": _describe_edit,
+    "upload_files": _describe_upload,
+    "download_files": _describe_download,
+    "download_file_prefixes": _describe_download,
+    "execute": _describe_execute,
+}
+
+
+def _describe_result(
+    describe: Callable[[dict[str, Any], tuple[Any, ...], dict[str, Any], Any], None],
+    span: Span,
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+    result: Any,  # noqa: ANN401
+) -> None:
+    """Add a backend call's attributes to its span, never letting a failure break the call."""
+    attributes: dict[str, Any] = {}
+    try:
+        describe(attributes, args, kwargs, result)
+    except Exception:
+        logger.exception("Instrumentation failed to describe span %s", span.name)
+        return
+    span.attributes.update(attributes)
+
+
+def _wrap_backend_method(method: str, func: Callable[..., Any], describe: Callable[..., None]) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def awrapper(self: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            if not _sinks:
+                return await func(self, *args, **kwargs)
+            with _SpanContext(f"{type(self).__name__}.{method}", "backend", {}) as current:
+                result = await func(self, *args, **kwargs)
+                _describe_result(describe, current, args, kwargs, result)
+                return result
+
+        return awrapper
+
+    @functools.wraps(func)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        if not _sinks:
+            return func(self, *args, **kwargs)
+        with _SpanContext(f"{type(self).__name__}.{method}", "backend", {}) as current:
+            result = func(self, *args, **kwargs)
+            _describe_result(describe, current, args, kwargs, result)
+            return result
+
+    return wrapper
+
+
+def instrument_backend(cls: _T) -> _T:
+    """Class decorator emitting a span for every backend method the class defines.
+
+    Covers the `BackendProtocol` methods and their async variants, with byte counts for
+    reads and writes. Async variants inherited from `BackendProtocol` run the sync
+    method in a thread and are timed through it.
+
+    Args:
+        cls: A `BackendProtocol` implementation.
+
+    Returns:
+        The same class, with its methods instrumented.
+    """
+    for method, describe in _BACKEND_METHODS.items():
+        for name in (method, f"a{method}"):
+            if name in cls.__dict__:
+                setattr(cls, name, _wrap_backend_method(name, cls.__dict__[name], describe))
+    return cls
@@ -1,17 +1,25 @@
 """Middleware for the agent."""
 
+from deepagents.middleware._utils import PromptAssemblyStats, get_prompt_assembly_stats, reset_prompt_assembly_stats
 from deepagents.middleware.filesystem import FilesystemMiddleware
 from deepagents.middleware.memory import MemoryMiddleware
+from deepagents.middleware.prompt_caching import PromptCacheLayoutMiddleware, PromptCacheUsage
 from deepagents.middleware.skills import SkillsMiddleware
-from deepagents.middleware.subagents import CompiledSubAgent, SubAgent, SubAgentMiddleware
+from deepagents.middleware.subagents import CompiledSubAgent, SubAgent, SubAgentBudget, SubAgentMiddleware
 from deepagents.middleware.summarization import SummarizationMiddleware
 
 __all__ = [
     "CompiledSubAgent",
     "FilesystemMiddleware",
     "MemoryMiddleware",
+    "PromptAssemblyStats",
+    "PromptCacheLayoutMiddleware",
+    "PromptCacheUsage",
     "SkillsMiddleware",
     "SubAgent",
+    "SubAgentBudget",
     "SubAgentMiddleware",
     "SummarizationMiddleware",
+    "get_prompt_assembly_stats",
+    "reset_prompt_assembly_stats",
 ]
@@ -0,0 +1,156 @@
+"""Scheduling of concurrent filesystem tool calls.
+
+When a model emits several tool calls in one message, the tool node runs them
+concurrently. Read-only calls are safe to overlap, but two `write_file`/`edit_file`
+calls on the same path can interleave their read-modify-write cycles. The scheduler
+bounds how many read-only calls hit a backend at once and serializes mutating calls
+per path.
+"""
+
+import asyncio
+import posixpath
+import threading
+import weakref
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from typing import Any, Literal
+
+READ_ONLY_TOOLS = frozenset({"ls", "read_file", "glob", "grep"})
+"""Filesystem tools that never modify the backend."""
+
+MUTATING_TOOLS = frozenset({"write_file", "edit_file"})
+"""Filesystem tools that modify a single file, identified by their `file_path` argument."""
+
+
+def classify_tool_call(tool_name: str) -> Literal["read", "write"] | None:
+    """Classify a tool call for scheduling.
+
+    Args:
+        tool_name: Name of the tool being called.
+
+    Returns:
+        `"read"` for read-only filesystem tools, `"write"` for mutating ones, and `None`
+        for tools the scheduler does not manage (e.g. `execute` or non-filesystem tools).
+    """
+    if tool_name in READ_ONLY_TOOLS:
+        return "read"
+    if tool_name in MUTATING_TOOLS:
+        return "write"
+    return None
+
+
+class _AsyncSchedulerState:
+    """Asyncio primitives for one event loop (they cannot be shared across loops)."""
+
+    def __init__(self, max_concurrent_reads: int | None) -> None:
+        self.read_slots = asyncio.Semaphore(max_concurrent_reads) if max_concurrent_reads else None
+        self.path_locks: dict[str, tuple[asyncio.Lock, int]] = {}
+
+
+class ToolCallScheduler:
+    """Bound read-only and serialize same-path mutating filesystem tool calls.
+
+    Path locks are reference counted and dropped once no call holds or waits on them,
+    so the scheduler does not grow with the number of files touched.
+
+    Args:
+        max_concurrent_reads: Maximum number of read-only calls running at once.
+            `None` leaves reads unbounded.
+        normalize_path: Maps a `file_path` argument to the path the tool will act on,
+            so spellings of the same file (`a.txt`, `/a.txt`, `/./a.txt`) share a lock.
+            Paths it rejects with `ValueError` (e.g. `/x/../a.txt`) are normalized lexically
+            instead, so they still share the lock of the file they name.
+    """
+
+    def __init__(self, max_concurrent_reads: int | None = None, *, normalize_path: Callable[[str], str] | None = None) -> None:
+        """Initialize the scheduler."""
+        self._max_concurrent_reads = max_concurrent_reads
+        self._normalize_path = normalize_path
+        self._read_slots = threading.BoundedSemaphore(max_concurrent_reads) if max_concurrent_reads else None
+        self._path_locks: dict[str, tuple[threading.Lock, int]] = {}
+        self._mutex = threading.Lock()
+        self._async_states: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncSchedulerState] = weakref.WeakKeyDictionary()
+
+    @contextmanager
+    def schedule(self, tool_name: str, args: dict[str, Any]) -> Iterator[None]:
+        """Hold the slot or lock a tool call needs while it runs.
+
+        Args:
+            tool_name: Name of the tool being called.
+            args: Arguments of the tool call.
+
+        Yields:
+            Control once the call may run.
+        """
+        kind = classify_tool_call(tool_name)
+        if kind == "read":
+            with self._read_slots or nullcontext():
+                yield
+        elif kind == "write" and (path := self._lock_key(args)) is not None:
+            with self._path_lock(path):
+                yield
+        else:
+            yield
+
+    @asynccontextmanager
+    async def aschedule(self, tool_name: str, args: dict[str, Any]) -> AsyncIterator[None]:
+        """Async version of `schedule`."""
+        kind = classify_tool_call(tool_name)
+        if kind is None:
+            yield
+            return
+
+        loop = asyncio.get_running_loop()
+        state = self._async_states.get(loop)
+        if state is None:
+            state = self._async_states[loop] = _AsyncSchedulerState(self._max_concurrent_reads)
+
+        if kind == "read":
+            if state.read_slots is None:
+                yield
+            else:
+                async with state.read_slots:
+                    yield
+        elif (path := self._lock_key(args)) is not None:
+            lock, waiters = state.path_locks.get(path, (None, 0))
+            lock = lock or asyncio.Lock()
+            state.path_locks[path] = (lock, waiters + 1)
+            try:
+                async with lock:
+                    yield
+            finally:
+                self._release(state.path_locks, path)
+        else:
+            yield
+
+    def _lock_key(self, args: dict[str, Any]) -> str | None:
+        path = args.get("file_path")
+        if not isinstance(path, str):
+            return None
+        if self._normalize_path is None:
+            return path
+        try:
+            return self._normalize_path(path)
+        except ValueError:
+            return posixpath.normpath("/" + path.lstrip("/"))
+
+    @contextmanager
+    def _path_lock(self, path: str) -> Iterator[None]:
+        with self._mutex:
+            lock, waiters = self._path_locks.get(path, (None, 0))
+            lock = lock or threading.Lock()
+            self._path_locks[path] = (lock, waiters + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._mutex:
+                self._release(self._path_locks, path)
+
+    @staticmethod
+    def _release(path_locks: dict[str, Any], path: str) -> None:
+        lock, waiters = path_locks[path]
+        if waiters == 1:
+            del path_locks[path]
+        else:
+            path_locks[path] = (lock, waiters - 1)
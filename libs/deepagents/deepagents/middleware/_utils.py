@@ -1,6 +1,49 @@
 """Utility functions for middleware."""
 
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
 from langchain_core.messages import SystemMessage
+from langgraph.config import get_config
+
+from deepagents.backends.protocol import BACKEND_TYPES, BackendProtocol, FileInfo
+from deepagents.instrumentation import span
+
+if TYPE_CHECKING:
+    from deepagents.backends.filesystem import FilesystemBackend
+
+
+@dataclass(frozen=True)
+class PromptAssemblyStats:
+    """Counters for system prompt assembly across all middleware in the process.
+
+    Attributes:
+        assemblies: Number of times a middleware appended a section to the system message.
+        changes: Number of those that produced a system message not composed recently,
+            i.e. where the prompt prefix seen by the model (and by provider-side prompt
+            caches) changed.
+    """
+
+    assemblies: int = 0
+    changes: int = 0
+
+    @property
+    def change_rate(self) -> float:
+        """Fraction of assemblies that changed the prompt prefix."""
+        return self.changes / self.assemblies if self.assemblies else 0.0
+
+
+# Maximum number of composed system messages kept. Each middleware stack contributes one
+# entry per section it appends, per distinct state (e.g. per loaded memory or skill set).
+_SYSTEM_MESSAGE_CACHE_SIZE = 256
+
+_system_message_cache: OrderedDict[tuple[int, str], tuple[SystemMessage | None, SystemMessage]] = OrderedDict()
+_system_message_cache_lock = threading.Lock()
+_prompt_assembly_stats = PromptAssemblyStats()
 
 
 def append_to_system_message(
@@ -9,6 +52,12 @@ def append_to_system_message(
 ) -> SystemMessage:
     """Append text to a system message.
 
+    Composed messages are memoized by the identity of the incoming message and the
+    appended text. The agent's base system message is a single object, so every
+    middleware in a stack returns the exact same `SystemMessage` object for as long as
+    its inputs are unchanged, and the assembled prompt is byte-for-byte stable across
+    model calls without being rebuilt.
+
     Args:
         system_message: Existing system message or None.
         text: Text to add to the system message.
@@ -16,8 +65,275 @@ def append_to_system_message(
     Returns:
         New SystemMessage with the text appended.
     """
+    global _prompt_assembly_stats  # noqa: PLW0603
+    key = (id(system_message), text)
+    with _system_message_cache_lock:
+        entry = _system_message_cache.get(key)
+        # Identity checks guard against id() reuse after the original message was freed
+        hit = entry is not None and entry[0] is system_message
+        _prompt_assembly_stats = PromptAssemblyStats(
+            assemblies=_prompt_assembly_stats.assemblies + 1,
+            changes=_prompt_assembly_stats.changes + (not hit),
+        )
+        if entry is not None and hit:
+            _system_message_cache.move_to_end(key)
+            return entry[1]
+
     new_content: list[str | dict[str, str]] = list(system_message.content_blocks) if system_message else []  # type: ignore[assignment]
     if new_content:
         text = f"\n\n{text}"
     new_content.append({"type": "text", "text": text})
-    return SystemMessage(content=new_content)
+    composed = SystemMessage(content=new_content)
+
+    with _system_message_cache_lock:
+        _system_message_cache[key] = (system_message, composed)
+        _system_message_cache.move_to_end(key)
+        while len(_system_message_cache) > _SYSTEM_MESSAGE_CACHE_SIZE:
+            _system_message_cache.popitem(last=False)
+    return composed
+
+
+def get_prompt_assembly_stats() -> PromptAssemblyStats:
+    """Return a snapshot of the process-wide system prompt assembly counters."""
+    return _prompt_assembly_stats
+
+
+def reset_prompt_assembly_stats() -> None:
+    """Reset the process-wide system prompt assembly counters to zero."""
+    global _prompt_assembly_stats  # noqa: PLW0603
+    with _system_message_cache_lock:
+        _prompt_assembly_stats = PromptAssemblyStats()
+
+
+class _BackendScope:
+    """Factory results shared by the calls that see one state snapshot."""
+
+    __slots__ = ("holders", "resolved", "state")
+
+    def __init__(self, state: Any) -> None:  # noqa: ANN401
+        self.state = state
+        self.holders = 0
+        self.resolved: dict[int, tuple[Any, BackendProtocol]] = {}
+
+
+# Open scopes keyed by the identity of their state snapshot. A scope holds its state, so
+# the id cannot be reused while the entry exists, and is dropped when its last holder exits.
+_backend_scopes: dict[int, _BackendScope] = {}
+_backend_scopes_lock = threading.Lock()
+
+
+@contextmanager
+def backend_scope(runtime: Any) -> Iterator[None]:  # noqa: ANN401
+    """Share backend factory results between calls that see `runtime.state` while open.
+
+    Runs with a thread id share factory results across the whole run (see
+    `resolve_backend`); this scope covers runs without one. Parallel tool calls of one
+    step see the same state snapshot. Each call opens a scope around its execution, and
+    `resolve_backend` calls a factory once for all calls whose scopes overlap. The scope
+    closes when its last call finishes, so nothing outlives the step.
+
+    Args:
+        runtime: The `ToolRuntime` of the call.
+
+    Yields:
+        Control while the scope is open.
+    """
+    state = getattr(runtime, "state", None)
+    if state is None:
+        yield
+        return
+
+    key = id(state)
+    with _backend_scopes_lock:
+        scope = _backend_scopes.get(key)
+        if scope is None:
+            scope = _backend_scopes[key] = _BackendScope(state)
+        scope.holders += 1
+    try:
+        yield
+    finally:
+        with _backend_scopes_lock:
+            scope.holders -= 1
+            if scope.holders == 0:
+                del _backend_scopes[key]
+
+
+# Maximum number of agent runs whose backend factory results are kept. Entries are
+# dropped when their run ends (see `release_run_backends`); the bound only matters for
+# runs that never reach `after_agent`, e.g. interrupted or failed runs.
+_MAX_RUN_SCOPES = 64
+
+# Factory results per run, keyed by (thread id, graph namespace) and then by the factory's
+# id, as (factory, context, store, files, backend)
+_run_scopes: OrderedDict[tuple[str, str], dict[int, tuple[Any, Any, Any, Any, BackendProtocol]]] = OrderedDict()
+
+
+def _run_key(runtime: Any) -> tuple[str, str] | None:  # noqa: ANN401
+    """Identify the agent run a runtime belongs to, or `None` if it has no thread id."""
+    config = getattr(runtime, "config", None)
+    if not config:
+        try:
+            config = get_config()
+        except RuntimeError:
+            return None
+    configurable = config.get("configurable") or {}
+    thread_id = configurable.get("thread_id")
+    if thread_id is None:
+        return None
+    # Subagents run as nested graphs on the same thread. The namespace of a node's parent
+    # graph tells them apart and is shared by every node and tool call of one graph.
+    graph_ns = str(configurable.get("checkpoint_ns") or "").rpartition("|")[0]
+    return str(thread_id), graph_ns
+
+
+def _resolve_in_run(backend: Any, runtime: Any, run_key: tuple[str, str]) -> BackendProtocol:  # noqa: ANN401
+    state = getattr(runtime, "state", None)
+    snapshot = (getattr(runtime, "context", None), getattr(runtime, "store", None), state.get("files") if isinstance(state, Mapping) else None)
+
+    def current(resolved: dict[int, tuple[Any, Any, Any, Any, BackendProtocol]] | None) -> BackendProtocol | None:
+        entry = resolved.get(id(backend)) if resolved is not None else None
+        if entry is not None and entry[0] is backend and all(a is b for a, b in zip(entry[1:4], snapshot, strict=True)):
+            return entry[4]
+        return None
+
+    with _backend_scopes_lock:
+        resolved = _run_scopes.get(run_key)
+        if resolved is not None:
+            _run_scopes.move_to_end(run_key)
+        if (shared := current(resolved)) is not None:
+            return shared
+
+    with span("backend.resolve"):
+        built = backend(runtime)
+    with _backend_scopes_lock:
+        resolved = _run_scopes.setdefault(run_key, {})
+        _run_scopes.move_to_end(run_key)
+        while len(_run_scopes) > _MAX_RUN_SCOPES:
+            _run_scopes.popitem(last=False)
+        # A concurrent call may have resolved the factory for the same snapshot first; keep its result
+        if (shared := current(resolved)) is not None:
+            return shared
+        resolved[id(backend)] = (backend, *snapshot, built)
+    return built
+
+
+def release_run_backends(runtime: Any) -> None:  # noqa: ANN401
+    """Drop the backend factory results shared by the run `runtime` belongs to.
+
+    Args:
+        runtime: A runtime of the finished run.
+    """
+    run_key = _run_key(runtime)
+    if run_key is not None:
+        with _backend_scopes_lock:
+            _run_scopes.pop(run_key, None)
+
+
+def resolve_backend(backend: BACKEND_TYPES, runtime: Any) -> BackendProtocol:  # noqa: ANN401
+    """Resolve a backend instance or factory, sharing factory results within a run or a `backend_scope`.
+
+    Backend factories (e.g. `lambda rt: CompositeBackend(...)`) are otherwise called for
+    every tool call and middleware hook.
+
+    When the run has a thread id (`config["configurable"]["thread_id"]`), a factory
+    result is shared by every hook and tool call of the run, across middleware (skills,
+    memory, summarization and filesystem). It is refreshed whenever the state's `files`,
+    the runtime context or the store is a different object than when it was built, so a
+    `StateBackend` never reads files from an outdated snapshot. Subagents are separate
+    runs. `FilesystemMiddleware` drops a run's results when the run ends.
+
+    Without a thread id there is no stable run identity, and results are only shared
+    inside an open `backend_scope`, i.e. between the overlapping tool calls of one step.
+    Otherwise the factory is called each time.
+
+    A shared backend is built with the runtime of the first call that resolves it, so
+    factories should depend only on the runtime's context, store, config and the state's
+    `files`, not on other state keys or per-call fields such as `tool_call_id` or
+    `stream_writer`.
+
+    Args:
+        backend: A backend instance or a factory taking a runtime.
+        runtime: The `ToolRuntime` (or `Runtime`) passed to the factory.
+
+    Returns:
+        Resolved backend instance.
+    """
+    if not callable(backend):
+        return backend
+
+    run_key = _run_key(runtime)
+    if run_key is not None:
+        return _resolve_in_run(backend, runtime, run_key)
+
+    state = getattr(runtime, "state", None)
+    scope = _backend_scopes.get(id(state)) if state is not None else None
+    if scope is None or scope.state is not state:
+        with span("backend.resolve"):
+            return backend(runtime)
+
+    with _backend_scopes_lock:
+        entry = scope.resolved.get(id(backend))
+    if entry is not None and entry[0] is backend:
+        return entry[1]
+
+    with span("backend.resolve"):
+        resolved = backend(runtime)
+    with _backend_scopes_lock:
+        # A concurrent call may have resolved the factory first; keep the first result
+        return scope.resolved.setdefault(id(backend), (backend, resolved))[1]
+
+
+def route_to_filesystem(backend: BackendProtocol, path: str) -> "tuple[FilesystemBackend, str] | None":
+    """Return the filesystem backend and backend-local path holding `path`, if any.
+
+    Follows `CompositeBackend` routes. Files on a `FilesystemBackend` outlive a thread and
+    can be checked for changes with a single `stat`, so middleware caches only those.
+    """
+    from deepagents.backends.composite import CompositeBackend  # noqa: PLC0415
+    from deepagents.backends.filesystem import FilesystemBackend  # noqa: PLC0415
+
+    if isinstance(backend, CompositeBackend):
+        backend, path = backend._get_backend_and_key(path)
+    if isinstance(backend, FilesystemBackend):
+        return backend, path
+    return None
+
+
+def _group_by_filesystem(backend: BackendProtocol, paths: list[str]) -> "dict[int, tuple[FilesystemBackend, list[str], list[str]]]":
+    """Group the filesystem-backed `paths` by backend, as (backend, paths, backend-local paths)."""
+    groups: dict[int, tuple[FilesystemBackend, list[str], list[str]]] = {}
+    for path in paths:
+        if (route := route_to_filesystem(backend, path)) is not None:
+            _, group_paths, local_paths = groups.setdefault(id(route[0]), (route[0], [], []))
+            group_paths.append(path)
+            local_paths.append(route[1])
+    return groups
+
+
+def _relabel(paths: list[str], infos: list[FileInfo | None]) -> dict[str, FileInfo | None]:
+    return {path: None if info is None else {**info, "path": path} for path, info in zip(paths, infos, strict=True)}
+
+
+def stat_filesystem_files(backend: BackendProtocol, paths: list[str]) -> dict[str, FileInfo | None]:
+    """Stat the `paths` that live on a `FilesystemBackend`, without listing their directories.
+
+    Args:
+        backend: Backend the paths belong to, possibly a `CompositeBackend`.
+        paths: Paths as seen through `backend`.
+
+    Returns:
+        Maps each filesystem-backed path to its `FileInfo` (carrying the path as given),
+            or `None` if the file does not exist. Paths on other backends are omitted.
+    """
+    stats: dict[str, FileInfo | None] = {}
+    for fs_backend, group_paths, local_paths in _group_by_filesystem(backend, paths).values():
+        stats.update(_relabel(group_paths, fs_backend.stat_files(local_paths)))
+    return stats
+
+
+async def astat_filesystem_files(backend: BackendProtocol, paths: list[str]) -> dict[str, FileInfo | None]:
+    """Async version of `stat_filesystem_files`."""
+    stats: dict[str, FileInfo | None] = {}
+    for fs_backend, group_paths, local_paths in _group_by_filesystem(backend, paths).values():
+        stats.update(_relabel(group_paths, await fs_backend.astat_files(local_paths)))
+    return stats
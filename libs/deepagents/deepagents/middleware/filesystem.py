@@ -1,9 +1,11 @@
 """Middleware for providing filesystem tools to an agent."""
 # ruff: noqa: E501
 
+import hashlib
 import os
 import re
-from collections.abc import Awaitable, Callable, Sequence
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from datetime import UTC, datetime
 from typing import Annotated, Any, Literal, NotRequired
 
 from langchain.agents.middleware.types import (
@@ -16,6 +18,7 @@ from langchain.tools import ToolRuntime
 from langchain.tools.tool_node import ToolCallRequest
 from langchain_core.messages import ToolMessage
 from langchain_core.tools import BaseTool, StructuredTool
+from langgraph.config import get_config
 from langgraph.runtime import Runtime
 from langgraph.types import Command
 from typing_extensions import TypedDict
@@ -26,21 +29,34 @@ from deepagents.backends.protocol import (
     BACKEND_TYPES as BACKEND_TYPES,  # Re-export type here for backwards compatibility
     BackendProtocol,
     EditResult,
+    GlobPage,
+    GrepPage,
     SandboxBackendProtocol,
     WriteResult,
 )
 from deepagents.backends.utils import (
+    FilePatch,
     format_content_with_line_numbers,
     format_grep_matches,
+    merge_files_update,
     sanitize_tool_call_id,
     truncate_if_too_long,
 )
-from deepagents.middleware._utils import append_to_system_message
+from deepagents.instrumentation import instrument_middleware, span
+from deepagents.middleware._scheduling import ToolCallScheduler
+from deepagents.middleware._utils import append_to_system_message, backend_scope, release_run_backends, resolve_backend
+from deepagents.tokenizers import (
+    NUM_CHARS_PER_TOKEN as NUM_CHARS_PER_TOKEN,  # Re-export constant here for backwards compatibility
+    Tokenizer,
+    count_tokens_by_chars,
+)
 
 EMPTY_CONTENT_WARNING = "System reminder: File exists but has empty contents"
 LINE_NUMBER_WIDTH = 6
 DEFAULT_READ_OFFSET = 0
 DEFAULT_READ_LIMIT = 100
+# Page size for grep and glob calls that pass a cursor without max_results
+DEFAULT_SEARCH_PAGE_SIZE = 100
 
 # Template for truncation message in read_file
 # {file_path} will be filled in at runtime
@@ -52,14 +68,20 @@ READ_FILE_TRUNCATION_MSG = (
     "For other formats, you can use appropriate formatting tools to split long lines.]"
 )
 
-# Approximate number of characters per token for truncation calculations.
-# Using 4 chars per token as a conservative approximation (actual ratio varies by content)
-# This errs on the high side to avoid premature eviction of content that might fit
-NUM_CHARS_PER_TOKEN = 4
+# Template for the note after a page of grep or glob results that is not the last one
+# {tool_name} and {cursor} will be filled in at runtime
+SEARCH_NEXT_PAGE_MSG = '\n\n[More results available. Call {tool_name} again with the same arguments and cursor="{cursor}" to see the next page.]'
+
+# Directory that large tool results are evicted to
+LARGE_TOOL_RESULTS_DIR = "/large_tool_results/"
 
 
 class FileData(TypedDict):
-    """Data structure for storing file contents with metadata."""
+    """Data structure for storing file contents with metadata.
+
+    `StateBackend(compact_files=True)` stores files as `CompactFileData` instead, which
+    reads like this dict.
+    """
 
     content: list[str]
     """Lines of the file."""
@@ -71,12 +93,14 @@ class FileData(TypedDict):
     """ISO 8601 timestamp of last modification."""
 
 
-def _file_data_reducer(left: dict[str, FileData] | None, right: dict[str, FileData | None]) -> dict[str, FileData]:
-    """Merge file updates with support for deletions.
+def _file_data_reducer(left: dict[str, FileData] | None, right: dict[str, FileData | FilePatch | None]) -> dict[str, FileData]:
+    """Merge file updates with support for deletions and patches.
 
     This reducer enables file deletion by treating `None` values in the right
     dictionary as deletion markers. It's designed to work with LangGraph's
     state management where annotated reducers control how state updates merge.
+    `FilePatch` values (from `StateBackend(delta_edits=True)`) are applied to the
+    existing file, so the state always holds whole files.
 
     Args:
         left: Existing files dictionary. May be `None` during initialization.
@@ -95,16 +119,7 @@ def _file_data_reducer(left: dict[str, FileData] | None, right: dict[str, FileDa
         # Result: {"/file1.txt": FileData(...), "/file3.txt": FileData(...)}
         ```
     """
-    if left is None:
-        return {k: v for k, v in right.items() if v is not None}
-
-    result = {**left}
-    for key, value in right.items():
-        if value is None:
-            result.pop(key, None)
-        else:
-            result[key] = value
-    return result
+    return merge_files_update(left or {}, right)
 
 
 def _validate_path(path: str, *, allowed_prefixes: Sequence[str] | None = None) -> str:
@@ -171,6 +186,38 @@ class FilesystemState(AgentState):
     """Files in the filesystem."""
 
 
+class EvictionSettings(TypedDict, total=False):
+    """Settings for how large tool results are evicted to the filesystem.
+
+    Attributes:
+        content_addressed: Name evicted files by a hash of their content instead of the tool call id,
+            so identical results (e.g. repeated `grep` or `execute` calls) are stored once (defaults to True).
+        max_results: Maximum number of evicted results kept in agent state. The least recently
+            used results beyond this count are deleted (defaults to no limit).
+        ttl_seconds: Delete evicted results from agent state once they have not been used for this
+            many seconds (defaults to no expiry).
+
+    Note:
+        Cleanup only applies to evicted results stored in agent state (e.g. `StateBackend`), where
+        they are serialized on every checkpoint. Backends that persist outside of state keep their
+        own retention. Cleanup runs once per step before the model call, so results written or
+        reused by parallel tool calls are never deleted by one another.
+    """
+
+    content_addressed: bool
+    max_results: int | None
+    ttl_seconds: float | None
+
+
+def _parse_timestamp(value: str) -> datetime | None:
+    """Parse an ISO 8601 timestamp, assuming UTC when no timezone is given."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=UTC)
+
+
 LIST_FILES_TOOL_DESCRIPTION = """Lists all files in a directory.
 
 This is useful for exploring the filesystem and finding the right file to read or edit.
@@ -217,7 +264,9 @@ Returns a list of absolute file paths that match the pattern.
 Examples:
 - `**/*.py` - Find all Python files
 - `*.txt` - Find all text files in root
-- `/subdir/**/*.md` - Find all markdown files under /subdir"""
+- `/subdir/**/*.md` - Find all markdown files under /subdir
+
+Set `max_results` to cap the number of files returned. If more files match, the result ends with a cursor: pass it back as `cursor` to get the next page."""
 
 GREP_TOOL_DESCRIPTION = """Search for a text pattern across files.
 
@@ -228,7 +277,9 @@ Examples:
 - Search all files: `grep(pattern="TODO")`
 - Search Python files only: `grep(pattern="import", glob="*.py")`
 - Show matching lines: `grep(pattern="error", output_mode="content")`
-- Search for code with special chars: `grep(pattern="def __init__(self):")`"""
+- Search for code with special chars: `grep(pattern="def __init__(self):")`
+
+Set `max_results` to cap the number of matching lines searched for. If there are more, the result ends with a cursor: pass it back as `cursor` to get the next page."""
 
 EXECUTE_TOOL_DESCRIPTION = """Executes a shell command in an isolated sandbox environment.
 
@@ -384,6 +435,7 @@ def _create_content_preview(content_str: str, *, head_lines: int = 5, tail_lines
     return head_sample + truncation_notice + tail_sample
 
 
+@instrument_middleware
 class FilesystemMiddleware(AgentMiddleware):
     """Middleware for providing filesystem and optional execution tools to an agent.
 
@@ -413,6 +465,19 @@ class FilesystemMiddleware(AgentMiddleware):
 
             When exceeded, writes the result using the configured backend and replaces it
             with a truncated preview and file reference.
+        eviction_settings: Optional settings for naming and cleaning up evicted tool results.
+
+            Provide an [`EvictionSettings`][deepagents.middleware.filesystem.EvictionSettings]
+            dictionary to store evicted results by content hash and bound how many are kept in
+            agent state. If `None`, results are stored per tool call id and never cleaned up.
+        tokenizer: Optional tokenizer used for eviction and truncation thresholds.
+
+            Any callable mapping a string to a token count, e.g. `count_tokens_heuristic` or
+            `bpe_tokenizer()` from `deepagents.tokenizers`. Defaults to a 4 chars/token estimate.
+        max_concurrent_reads: Maximum number of read-only tool calls (`ls`, `read_file`, `glob`,
+            `grep`) running against the backend at once when the model issues several calls in
+            one message. `write_file` and `edit_file` calls on the same path are always run one
+            at a time. `None` leaves reads unbounded.
 
     Example:
         ```python
@@ -444,6 +509,9 @@ class FilesystemMiddleware(AgentMiddleware):
         system_prompt: str | None = None,
         custom_tool_descriptions: dict[str, str] | None = None,
         tool_token_limit_before_evict: int | None = 20000,
+        eviction_settings: EvictionSettings | None = None,
+        tokenizer: Tokenizer | None = None,
+        max_concurrent_reads: int | None = 8,
     ) -> None:
         """Initialize the filesystem middleware.
 
@@ -453,6 +521,10 @@ class FilesystemMiddleware(AgentMiddleware):
             system_prompt: Optional custom system prompt override.
             custom_tool_descriptions: Optional custom tool descriptions override.
             tool_token_limit_before_evict: Optional token limit before evicting a tool result to the filesystem.
+            eviction_settings: Optional settings for content-addressed storage and cleanup of evicted tool results.
+            tokenizer: Optional tokenizer for measuring tool results against token limits.
+                Defaults to the 4 chars/token estimate.
+            max_concurrent_reads: Maximum number of read-only tool calls running against the backend at once.
         """
         # Use provided backend or default to StateBackend factory
         self.backend = backend if backend is not None else (StateBackend)
@@ -461,6 +533,18 @@ class FilesystemMiddleware(AgentMiddleware):
         self._custom_system_prompt = system_prompt
         self._custom_tool_descriptions = custom_tool_descriptions or {}
         self._tool_token_limit_before_evict = tool_token_limit_before_evict
+        self._tokenizer = tokenizer or count_tokens_by_chars
+        self._scheduler = ToolCallScheduler(max_concurrent_reads, normalize_path=_validate_path)
+
+        # Parse eviction_settings
+        if eviction_settings is None:
+            self._eviction_content_addressed = False
+            self._eviction_max_results: int | None = None
+            self._eviction_ttl_seconds: float | None = None
+        else:
+            self._eviction_content_addressed = eviction_settings.get("content_addressed", True)
+            self._eviction_max_results = eviction_settings.get("max_results")
+            self._eviction_ttl_seconds = eviction_settings.get("ttl_seconds")
 
         self.tools = [
             self._create_ls_tool(),
@@ -475,15 +559,42 @@ class FilesystemMiddleware(AgentMiddleware):
     def _get_backend(self, runtime: ToolRuntime[Any, Any] | Runtime[Any]) -> BackendProtocol:
         """Get the resolved backend instance from backend or factory.
 
+        Factory results are shared by the hooks and tool calls of a run, see `resolve_backend`.
+
         Args:
             runtime: The tool runtime context.
 
         Returns:
             Resolved backend instance.
         """
-        if callable(self.backend):
-            return self.backend(runtime)  # type: ignore[arg-type]
-        return self.backend
+        return resolve_backend(self.backend, runtime)
+
+    def _get_model_call_backend(self, request: ModelRequest) -> BackendProtocol:
+        """Resolve the backend for a model call, passing factories the request's state.
+
+        Args:
+            request: The model request being processed.
+
+        Returns:
+            Resolved backend instance.
+        """
+        if not callable(self.backend):
+            return self.backend
+        try:
+            config = get_config()
+        except RuntimeError:
+            config = {}
+        runtime = request.runtime
+        # Construct an artificial tool runtime, as for the other middleware hooks
+        tool_runtime = ToolRuntime(
+            state=request.state,
+            context=getattr(runtime, "context", None),
+            stream_writer=getattr(runtime, "stream_writer", None),
+            store=getattr(runtime, "store", None),
+            config=config,
+            tool_call_id=None,
+        )
+        return self._get_backend(tool_runtime)
 
     def _create_ls_tool(self) -> BaseTool:
         """Create the ls (list files) tool."""
@@ -501,7 +612,7 @@ class FilesystemMiddleware(AgentMiddleware):
                 return f"Error: {e}"
             infos = resolved_backend.ls_info(validated_path)
             paths = [fi.get("path", "") for fi in infos]
-            result = truncate_if_too_long(paths)
+            result = truncate_if_too_long(paths, tokenizer=self._tokenizer)
             return str(result)
 
         async def async_ls(
@@ -516,7 +627,7 @@ class FilesystemMiddleware(AgentMiddleware):
                 return f"Error: {e}"
             infos = await resolved_backend.als_info(validated_path)
             paths = [fi.get("path", "") for fi in infos]
-            result = truncate_if_too_long(paths)
+            result = truncate_if_too_long(paths, tokenizer=self._tokenizer)
             return str(result)
 
         return StructuredTool.from_function(
@@ -551,10 +662,11 @@ class FilesystemMiddleware(AgentMiddleware):
                 result = "".join(lines)
 
             # Check if result exceeds token threshold and truncate if necessary
-            if token_limit and len(result) >= NUM_CHARS_PER_TOKEN * token_limit:
-                # Calculate truncation message length to ensure final result stays under threshold
+            if token_limit and (result_tokens := self._tokenizer(result)) >= token_limit:
+                # Scale the character budget by the observed chars/token ratio and leave room
+                # for the truncation message so the final result stays under threshold
                 truncation_msg = READ_FILE_TRUNCATION_MSG.format(file_path=validated_path)
-                max_content_length = NUM_CHARS_PER_TOKEN * token_limit - len(truncation_msg)
+                max_content_length = len(result) * token_limit // result_tokens - len(truncation_msg)
                 result = result[:max_content_length]
                 result += truncation_msg
 
@@ -580,10 +692,11 @@ class FilesystemMiddleware(AgentMiddleware):
                 result = "".join(lines)
 
             # Check if result exceeds token threshold and truncate if necessary
-            if token_limit and len(result) >= NUM_CHARS_PER_TOKEN * token_limit:
-                # Calculate truncation message length to ensure final result stays under threshold
+            if token_limit and (result_tokens := self._tokenizer(result)) >= token_limit:
+                # Scale the character budget by the observed chars/token ratio and leave room
+                # for the truncation message so the final result stays under threshold
                 truncation_msg = READ_FILE_TRUNCATION_MSG.format(file_path=validated_path)
-                max_content_length = NUM_CHARS_PER_TOKEN * token_limit - len(truncation_msg)
+                max_content_length = len(result) * token_limit // result_tokens - len(truncation_msg)
                 result = result[:max_content_length]
                 result += truncation_msg
 
@@ -746,25 +859,41 @@ class FilesystemMiddleware(AgentMiddleware):
             pattern: Annotated[str, "Glob pattern to match files (e.g., '**/*.py', '*.txt', '/subdir/**/*.md')."],
             runtime: ToolRuntime[None, FilesystemState],
             path: Annotated[str, "Base directory to search from. Defaults to root '/'."] = "/",
+            *,
+            max_results: Annotated[int | None, "Maximum number of files to return. Defaults to all of them."] = None,
+            cursor: Annotated[str | None, "Cursor from the end of a previous glob result, to get its next page."] = None,
         ) -> str:
             """Synchronous wrapper for glob tool."""
             resolved_backend = self._get_backend(runtime)
-            infos = resolved_backend.glob_info(pattern, path=path)
-            paths = [fi.get("path", "") for fi in infos]
-            result = truncate_if_too_long(paths)
-            return str(result)
+            if max_results is None and cursor is None:
+                infos = resolved_backend.glob_info(pattern, path=path)
+                paths = [fi.get("path", "") for fi in infos]
+                result = truncate_if_too_long(paths, tokenizer=self._tokenizer)
+                return str(result)
+            page = resolved_backend.glob_page(
+                pattern, path, max_results=DEFAULT_SEARCH_PAGE_SIZE if max_results is None else max_results, cursor=cursor
+            )
+            return self._format_glob_page(page)
 
         async def async_glob(
             pattern: Annotated[str, "Glob pattern to match files (e.g., '**/*.py', '*.txt', '/subdir/**/*.md')."],
             runtime: ToolRuntime[None, FilesystemState],
             path: Annotated[str, "Base directory to search from. Defaults to root '/'."] = "/",
+            *,
+            max_results: Annotated[int | None, "Maximum number of files to return. Defaults to all of them."] = None,
+            cursor: Annotated[str | None, "Cursor from the end of a previous glob result, to get its next page."] = None,
         ) -> str:
             """Asynchronous wrapper for glob tool."""
             resolved_backend = self._get_backend(runtime)
-            infos = await resolved_backend.aglob_info(pattern, path=path)
-            paths = [fi.get("path", "") for fi in infos]
-            result = truncate_if_too_long(paths)
-            return str(result)
+            if max_results is None and cursor is None:
+                infos = await resolved_backend.aglob_info(pattern, path=path)
+                paths = [fi.get("path", "") for fi in infos]
+                result = truncate_if_too_long(paths, tokenizer=self._tokenizer)
+                return str(result)
+            page = await resolved_backend.aglob_page(
+                pattern, path, max_results=DEFAULT_SEARCH_PAGE_SIZE if max_results is None else max_results, cursor=cursor
+            )
+            return self._format_glob_page(page)
 
         return StructuredTool.from_function(
             name="glob",
@@ -773,6 +902,15 @@ class FilesystemMiddleware(AgentMiddleware):
             coroutine=async_glob,
         )
 
+    def _format_glob_page(self, page: GlobPage | str) -> str:
+        """Format a page of glob results like the glob tool, followed by the cursor of the next page."""
+        if isinstance(page, str):
+            return page
+        result = str(truncate_if_too_long([fi.get("path", "") for fi in page.files], tokenizer=self._tokenizer))
+        if page.next_cursor is not None:
+            result += SEARCH_NEXT_PAGE_MSG.format(tool_name="glob", cursor=page.next_cursor)
+        return result
+
     def _create_grep_tool(self) -> BaseTool:
         """Create the grep tool."""
         tool_description = self._custom_tool_descriptions.get("grep") or GREP_TOOL_DESCRIPTION
@@ -786,14 +924,24 @@ class FilesystemMiddleware(AgentMiddleware):
                 Literal["files_with_matches", "content", "count"],
                 "Output format: 'files_with_matches' (file paths only, default), 'content' (matching lines with context), 'count' (match counts per file).",
             ] = "files_with_matches",
+            *,
+            max_results: Annotated[
+                int | None, "Maximum number of matching lines to search for. Counts in 'count' mode only cover these lines. Defaults to all of them."
+            ] = None,
+            cursor: Annotated[str | None, "Cursor from the end of a previous grep result, to get its next page."] = None,
         ) -> str:
             """Synchronous wrapper for grep tool."""
             resolved_backend = self._get_backend(runtime)
-            raw = resolved_backend.grep_raw(pattern, path=path, glob=glob)
-            if isinstance(raw, str):
-                return raw
-            formatted = format_grep_matches(raw, output_mode)
-            return truncate_if_too_long(formatted)  # type: ignore[arg-type]
+            if max_results is None and cursor is None:
+                raw = resolved_backend.grep_raw(pattern, path=path, glob=glob)
+                if isinstance(raw, str):
+                    return raw
+                formatted = format_grep_matches(raw, output_mode)
+                return truncate_if_too_long(formatted, tokenizer=self._tokenizer)  # type: ignore[arg-type]
+            page = resolved_backend.grep_page(
+                pattern, path, glob, max_results=DEFAULT_SEARCH_PAGE_SIZE if max_results is None else max_results, cursor=cursor
+            )
+            return self._format_grep_page(page, output_mode)
 
         async def async_grep(
             pattern: Annotated[str, "Text pattern to search for (literal string, not regex)."],
@@ -804,14 +952,24 @@ class FilesystemMiddleware(AgentMiddleware):
                 Literal["files_with_matches", "content", "count"],
                 "Output format: 'files_with_matches' (file paths only, default), 'content' (matching lines with context), 'count' (match counts per file).",
             ] = "files_with_matches",
+            *,
+            max_results: Annotated[
+                int | None, "Maximum number of matching lines to search for. Counts in 'count' mode only cover these lines. Defaults to all of them."
+            ] = None,
+            cursor: Annotated[str | None, "Cursor from the end of a previous grep result, to get its next page."] = None,
         ) -> str:
             """Asynchronous wrapper for grep tool."""
             resolved_backend = self._get_backend(runtime)
-            raw = await resolved_backend.agrep_raw(pattern, path=path, glob=glob)
-            if isinstance(raw, str):
-                return raw
-            formatted = format_grep_matches(raw, output_mode)
-            return truncate_if_too_long(formatted)  # type: ignore[arg-type]
+            if max_results is None and cursor is None:
+                raw = await resolved_backend.agrep_raw(pattern, path=path, glob=glob)
+                if isinstance(raw, str):
+                    return raw
+                formatted = format_grep_matches(raw, output_mode)
+                return truncate_if_too_long(formatted, tokenizer=self._tokenizer)  # type: ignore[arg-type]
+            page = await resolved_backend.agrep_page(
+                pattern, path, glob, max_results=DEFAULT_SEARCH_PAGE_SIZE if max_results is None else max_results, cursor=cursor
+            )
+            return self._format_grep_page(page, output_mode)
 
         return StructuredTool.from_function(
             name="grep",
@@ -820,6 +978,15 @@ class FilesystemMiddleware(AgentMiddleware):
             coroutine=async_grep,
         )
 
+    def _format_grep_page(self, page: GrepPage | str, output_mode: Literal["files_with_matches", "content", "count"]) -> str:
+        """Format a page of grep matches like the grep tool, followed by the cursor of the next page."""
+        if isinstance(page, str):
+            return page
+        result = truncate_if_too_long(format_grep_matches(page.matches, output_mode), tokenizer=self._tokenizer)
+        if page.next_cursor is not None:
+            result += SEARCH_NEXT_PAGE_MSG.format(tool_name="grep", cursor=page.next_cursor)
+        return result  # type: ignore[return-value]
+
     def _create_execute_tool(self) -> BaseTool:
         """Create the execute tool for sandbox command execution."""
         tool_description = self._custom_tool_descriptions.get("execute") or EXECUTE_TOOL_DESCRIPTION
@@ -917,7 +1084,7 @@ class FilesystemMiddleware(AgentMiddleware):
         backend_supports_execution = False
         if has_execute_tool:
             # Resolve backend to check execution support
-            backend = self._get_backend(request.runtime)
+            backend = self._get_model_call_backend(request)
             backend_supports_execution = _supports_execution(backend)
 
             # If execute tool exists but backend doesn't support it, filter it out
@@ -965,7 +1132,7 @@ class FilesystemMiddleware(AgentMiddleware):
         backend_supports_execution = False
         if has_execute_tool:
             # Resolve backend to check execution support
-            backend = self._get_backend(request.runtime)
+            backend = self._get_model_call_backend(request)
             backend_supports_execution = _supports_execution(backend)
 
             # If execute tool exists but backend doesn't support it, filter it out
@@ -993,34 +1160,110 @@ class FilesystemMiddleware(AgentMiddleware):
 
         return await handler(request)
 
-    def _process_large_message(
-        self,
-        message: ToolMessage,
-        resolved_backend: BackendProtocol,
-    ) -> tuple[ToolMessage, dict[str, FileData] | None]:
-        """Process a large ToolMessage by evicting its content to filesystem.
+    def _evicted_result_path(self, tool_call_id: str, content_str: str) -> str:
+        """Get the path an evicted tool result is written to.
 
         Args:
-            message: The ToolMessage with large content to evict.
-            resolved_backend: The filesystem backend to write the content to.
+            tool_call_id: The id of the tool call that produced the result.
+            content_str: The stringified tool result.
 
         Returns:
-            A tuple of (processed_message, files_update):
-            - processed_message: New ToolMessage with truncated content and file reference
-            - files_update: Dict of file updates to apply to state, or None if eviction failed
+            A path under `/large_tool_results/` named by content hash if content addressing
+            is enabled, otherwise by the sanitized tool call id.
+        """
+        if self._eviction_content_addressed:
+            digest = hashlib.sha256(content_str.encode("utf-8")).hexdigest()[:32]
+            return f"{LARGE_TOOL_RESULTS_DIR}{digest}"
+        return f"{LARGE_TOOL_RESULTS_DIR}{sanitize_tool_call_id(tool_call_id)}"
 
-        Note:
-            The entire content is converted to string, written to /large_tool_results/{tool_call_id},
-            and replaced with a truncated preview plus file reference. The replacement is always
-            returned as a plain string for consistency, regardless of original content type.
+    def _expire_evicted_results(self, state_files: Mapping[str, Any]) -> dict[str, None]:
+        """Compute deletions for evicted results that exceed the configured retention.
 
-            ToolMessage supports multimodal content blocks (images, audio, etc.), but these are
-            uncommon in tool results. For simplicity, all content is stringified and evicted.
-            The model can recover by reading the offloaded file from the backend.
+        Results are ordered by `modified_at`, which is refreshed whenever a content-addressed
+        result is reused, so `max_results` evicts the least recently used entries.
+
+        Args:
+            state_files: The files currently in agent state.
+
+        Returns:
+            A dict mapping expired paths to `None` deletion markers.
+        """
+        if self._eviction_max_results is None and self._eviction_ttl_seconds is None:
+            return {}
+
+        entries = [
+            (path, file_data) for path, file_data in state_files.items() if path.startswith(LARGE_TOOL_RESULTS_DIR) and isinstance(file_data, Mapping)
+        ]
+        entries.sort(key=lambda item: item[1].get("modified_at", ""), reverse=True)
+
+        now = datetime.now(UTC)
+        expired: dict[str, None] = {}
+        for index, (path, file_data) in enumerate(entries):
+            if self._eviction_max_results is not None and index >= self._eviction_max_results:
+                expired[path] = None
+                continue
+            if self._eviction_ttl_seconds is not None:
+                modified_at = _parse_timestamp(file_data.get("modified_at", ""))
+                if modified_at is not None and (now - modified_at).total_seconds() > self._eviction_ttl_seconds:
+                    expired[path] = None
+        return expired
+
+    def before_model(self, state: FilesystemState, runtime: Runtime[Any]) -> dict[str, Any] | None:  # noqa: ARG002
+        """Delete evicted results that exceed the configured retention.
+
+        Retention runs once per step, after the updates of all tool calls of the previous
+        step are applied. Parallel tool calls only see the state from before the step, so
+        one of them could otherwise delete a content-addressed result that another one
+        reuses and refreshes.
+
+        Args:
+            state: Current agent state.
+            runtime: Runtime context.
+
+        Returns:
+            State update deleting the expired results, if any.
+        """
+        expired = self._expire_evicted_results(state.get("files") or {})
+        return {"files": expired} if expired else None
+
+    async def abefore_model(self, state: FilesystemState, runtime: Runtime[Any]) -> dict[str, Any] | None:
+        """(async) Delete evicted results that exceed the configured retention.
+
+        See `before_model`.
+        """
+        return self.before_model(state, runtime)
+
+    def after_agent(self, state: FilesystemState, runtime: Runtime[Any]) -> None:  # noqa: ARG002
+        """Release the backend factory results shared by the finished run.
+
+        Args:
+            state: Final agent state.
+            runtime: Runtime context.
+        """
+        release_run_backends(runtime)
+
+    async def aafter_agent(self, state: FilesystemState, runtime: Runtime[Any]) -> None:
+        """(async) Release the backend factory results shared by the finished run.
+
+        See `after_agent`.
+        """
+        self.after_agent(state, runtime)
+
+    def _prepare_eviction(
+        self,
+        message: ToolMessage,
+    ) -> str | None:
+        """Stringify a ToolMessage's content if it exceeds the eviction threshold.
+
+        Args:
+            message: The ToolMessage to check.
+
+        Returns:
+            The stringified content if it should be evicted, otherwise `None`.
         """
         # Early exit if eviction not configured
         if not self._tool_token_limit_before_evict:
-            return message, None
+            return None
 
         # Convert content to string once for both size check and eviction
         # Special case: single text block - extract text directly for readability
@@ -1039,16 +1282,12 @@ class FilesystemMiddleware(AgentMiddleware):
             content_str = str(message.content)
 
         # Check if content exceeds eviction threshold
-        if len(content_str) <= NUM_CHARS_PER_TOKEN * self._tool_token_limit_before_evict:
-            return message, None
-
-        # Write content to filesystem
-        sanitized_id = sanitize_tool_call_id(message.tool_call_id)
-        file_path = f"/large_tool_results/{sanitized_id}"
-        result = resolved_backend.write(file_path, content_str)
-        if result.error:
-            return message, None
+        if self._tokenizer(content_str) <= self._tool_token_limit_before_evict:
+            return None
+        return content_str
 
+    def _build_evicted_message(self, message: ToolMessage, file_path: str, content_str: str) -> ToolMessage:
+        """Build the replacement ToolMessage pointing at an evicted result."""
         # Create preview showing head and tail of the result
         content_sample = _create_content_preview(content_str)
         replacement_text = TOO_LARGE_TOOL_MSG.format(
@@ -1058,68 +1297,94 @@ class FilesystemMiddleware(AgentMiddleware):
         )
 
         # Always return as plain string after eviction
-        processed_message = ToolMessage(
+        return ToolMessage(
             content=replacement_text,
             tool_call_id=message.tool_call_id,
             name=message.name,
         )
-        return processed_message, result.files_update
+
+    def _process_large_message(
+        self,
+        message: ToolMessage,
+        resolved_backend: BackendProtocol,
+        state_files: dict[str, FileData] | None = None,
+    ) -> tuple[ToolMessage, dict[str, FileData] | None]:
+        """Process a large ToolMessage by evicting its content to filesystem.
+
+        Args:
+            message: The ToolMessage with large content to evict.
+            resolved_backend: The filesystem backend to write the content to.
+            state_files: The files currently in agent state, used to refresh reused
+                content-addressed results.
+
+        Returns:
+            A tuple of (processed_message, files_update):
+            - processed_message: New ToolMessage with truncated content and file reference
+            - files_update: Dict of file updates to apply to state, or None if there is nothing
+              to apply (eviction failed, or the backend stores files outside of state)
+
+        Note:
+            The entire content is converted to string, written to /large_tool_results/{tool_call_id}
+            (or /large_tool_results/{content_hash} with content addressing), and replaced with a
+            truncated preview plus file reference. The replacement is always returned as a plain
+            string for consistency, regardless of original content type.
+
+            ToolMessage supports multimodal content blocks (images, audio, etc.), but these are
+            uncommon in tool results. For simplicity, all content is stringified and evicted.
+            The model can recover by reading the offloaded file from the backend.
+        """
+        content_str = self._prepare_eviction(message)
+        if content_str is None:
+            return message, None
+
+        # Write content to filesystem
+        file_path = self._evicted_result_path(message.tool_call_id, content_str)
+        with span("filesystem.evict", path=file_path, tool_call_id=message.tool_call_id):
+            result = resolved_backend.write(file_path, content_str)
+            files_update = result.files_update
+            if result.error:
+                # A content-addressed path that already exists holds identical content, so reuse it
+                if not self._eviction_content_addressed or resolved_backend.download_files([file_path])[0].error is not None:
+                    return message, None
+                files_update = self._refresh_evicted_result(file_path, state_files)
+
+        return self._build_evicted_message(message, file_path, content_str), files_update
 
     async def _aprocess_large_message(
         self,
         message: ToolMessage,
         resolved_backend: BackendProtocol,
+        state_files: dict[str, FileData] | None = None,
     ) -> tuple[ToolMessage, dict[str, FileData] | None]:
         """Async version of _process_large_message.
 
         Uses async backend methods to avoid sync calls in async context.
         See _process_large_message for full documentation.
         """
-        # Early exit if eviction not configured
-        if not self._tool_token_limit_before_evict:
-            return message, None
-
-        # Convert content to string once for both size check and eviction
-        # Special case: single text block - extract text directly for readability
-        if (
-            isinstance(message.content, list)
-            and len(message.content) == 1
-            and isinstance(message.content[0], dict)
-            and message.content[0].get("type") == "text"
-            and "text" in message.content[0]
-        ):
-            content_str = str(message.content[0]["text"])
-        elif isinstance(message.content, str):
-            content_str = message.content
-        else:
-            # Multiple blocks or non-text content - stringify entire structure
-            content_str = str(message.content)
-
-        if len(content_str) <= NUM_CHARS_PER_TOKEN * self._tool_token_limit_before_evict:
+        content_str = self._prepare_eviction(message)
+        if content_str is None:
             return message, None
 
         # Write content to filesystem using async method
-        sanitized_id = sanitize_tool_call_id(message.tool_call_id)
-        file_path = f"/large_tool_results/{sanitized_id}"
-        result = await resolved_backend.awrite(file_path, content_str)
-        if result.error:
-            return message, None
-
-        # Create preview showing head and tail of the result
-        content_sample = _create_content_preview(content_str)
-        replacement_text = TOO_LARGE_TOOL_MSG.format(
-            tool_call_id=message.tool_call_id,
-            file_path=file_path,
-            content_sample=content_sample,
-        )
-
-        # Always return as plain string after eviction
-        processed_message = ToolMessage(
-            content=replacement_text,
-            tool_call_id=message.tool_call_id,
-            name=message.name,
-        )
-        return processed_message, result.files_update
+        file_path = self._evicted_result_path(message.tool_call_id, content_str)
+        with span("filesystem.evict", path=file_path, tool_call_id=message.tool_call_id):
+            result = await resolved_backend.awrite(file_path, content_str)
+            files_update = result.files_update
+            if result.error:
+                # A content-addressed path that already exists holds identical content, so reuse it
+                if not self._eviction_content_addressed or (await resolved_backend.adownload_files([file_path]))[0].error is not None:
+                    return message, None
+                files_update = self._refresh_evicted_result(file_path, state_files)
+
+        return self._build_evicted_message(message, file_path, content_str), files_update
+
+    @staticmethod
+    def _refresh_evicted_result(file_path: str, state_files: dict[str, FileData] | None) -> dict[str, FileData] | None:
+        """Bump `modified_at` of a reused evicted result stored in state so retention treats it as recently used."""
+        existing = (state_files or {}).get(file_path)
+        if existing is None:
+            return None
+        return {file_path: {**existing, "modified_at": datetime.now(UTC).isoformat()}}
 
     def _intercept_large_tool_result(self, tool_result: ToolMessage | Command, runtime: ToolRuntime[Any, Any]) -> ToolMessage | Command:
         """Intercept and process large tool results before they're added to state.
@@ -1137,11 +1402,13 @@ class FilesystemMiddleware(AgentMiddleware):
             multiple messages. Large content is automatically offloaded to filesystem
             to prevent context window overflow.
         """
+        state_files = (runtime.state or {}).get("files") or {}
         if isinstance(tool_result, ToolMessage):
             resolved_backend = self._get_backend(runtime)
             processed_message, files_update = self._process_large_message(
                 tool_result,
                 resolved_backend,
+                state_files,
             )
             return (
                 Command(
@@ -1170,6 +1437,7 @@ class FilesystemMiddleware(AgentMiddleware):
                 processed_message, files_update = self._process_large_message(
                     message,
                     resolved_backend,
+                    state_files,
                 )
                 processed_messages.append(processed_message)
                 if files_update is not None:
@@ -1183,11 +1451,13 @@ class FilesystemMiddleware(AgentMiddleware):
         Uses async backend methods to avoid sync calls in async context.
         See _intercept_large_tool_result for full documentation.
         """
+        state_files = (runtime.state or {}).get("files") or {}
         if isinstance(tool_result, ToolMessage):
             resolved_backend = self._get_backend(runtime)
             processed_message, files_update = await self._aprocess_large_message(
                 tool_result,
                 resolved_backend,
+                state_files,
             )
             return (
                 Command(
@@ -1216,6 +1486,7 @@ class FilesystemMiddleware(AgentMiddleware):
                 processed_message, files_update = await self._aprocess_large_message(
                     message,
                     resolved_backend,
+                    state_files,
                 )
                 processed_messages.append(processed_message)
                 if files_update is not None:
@@ -1228,7 +1499,11 @@ class FilesystemMiddleware(AgentMiddleware):
         request: ToolCallRequest,
         handler: Callable[[ToolCallRequest], ToolMessage | Command],
     ) -> ToolMessage | Command:
-        """Check the size of the tool call result and evict to filesystem if too large.
+        """Schedule the tool call, then evict its result to filesystem if too large.
+
+        Read-only filesystem calls are bounded by `max_concurrent_reads` and mutating
+        calls to the same path are serialized. Overlapping calls of one step share the
+        resolved backend even when the run has no thread id, see `backend_scope`.
 
         Args:
             request: The tool call request being processed.
@@ -1237,18 +1512,19 @@ class FilesystemMiddleware(AgentMiddleware):
         Returns:
             The raw ToolMessage, or a pseudo tool message with the ToolResult in state.
         """
-        if self._tool_token_limit_before_evict is None or request.tool_call["name"] in TOOLS_EXCLUDED_FROM_EVICTION:
-            return handler(request)
+        with backend_scope(request.runtime), self._scheduler.schedule(request.tool_call["name"], request.tool_call["args"]):
+            if self._tool_token_limit_before_evict is None or request.tool_call["name"] in TOOLS_EXCLUDED_FROM_EVICTION:
+                return handler(request)
 
-        tool_result = handler(request)
-        return self._intercept_large_tool_result(tool_result, request.runtime)
+            tool_result = handler(request)
+            return self._intercept_large_tool_result(tool_result, request.runtime)
 
     async def awrap_tool_call(
         self,
         request: ToolCallRequest,
         handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]],
     ) -> ToolMessage | Command:
-        """(async)Check the size of the tool call result and evict to filesystem if too large.
+        """(async)Schedule the tool call, then evict its result to filesystem if too large.
 
         Args:
             request: The tool call request being processed.
@@ -1257,8 +1533,10 @@ class FilesystemMiddleware(AgentMiddleware):
         Returns:
             The raw ToolMessage, or a pseudo tool message with the ToolResult in state.
         """
-        if self._tool_token_limit_before_evict is None or request.tool_call["name"] in TOOLS_EXCLUDED_FROM_EVICTION:
-            return await handler(request)
+        with backend_scope(request.runtime):
+            async with self._scheduler.aschedule(request.tool_call["name"], request.tool_call["args"]):
+                if self._tool_token_limit_before_evict is None or request.tool_call["name"] in TOOLS_EXCLUDED_FROM_EVICTION:
+                    return await handler(request)
 
-        tool_result = await handler(request)
-        return await self._aintercept_large_tool_result(tool_result, request.runtime)
+                tool_result = await handler(request)
+                return await self._aintercept_large_tool_result(tool_result, request.runtime)
@@ -37,6 +37,8 @@ Sources are simply paths to AGENTS.md files that are loaded in order and combine
 Multiple sources are concatenated in order, with all content included.
 Later sources appear after earlier ones in the combined prompt.
 
+All sources are fetched with a single batched download.
+
 ## File Format
 
 AGENTS.md files are standard Markdown with no required structure.
@@ -56,7 +58,7 @@ from typing import TYPE_CHECKING, Annotated, NotRequired, TypedDict
 from langchain_core.runnables import RunnableConfig
 
 if TYPE_CHECKING:
-    from deepagents.backends.protocol import BACKEND_TYPES, BackendProtocol
+    from deepagents.backends.protocol import BACKEND_TYPES, BackendProtocol, FileDownloadResponse
 
 from langchain.agents.middleware.types import (
     AgentMiddleware,
@@ -68,7 +70,8 @@ from langchain.agents.middleware.types import (
 from langchain.tools import ToolRuntime
 from langgraph.runtime import Runtime
 
-from deepagents.middleware._utils import append_to_system_message
+from deepagents.instrumentation import instrument_middleware
+from deepagents.middleware._utils import append_to_system_message, resolve_backend
 
 logger = logging.getLogger(__name__)
 
@@ -152,6 +155,34 @@ MEMORY_SYSTEM_PROMPT = """<agent_memory>
 """
 
 
+def _decode_memory_response(path: str, response: FileDownloadResponse) -> str | None:
+    """Return the content of a downloaded memory file, or `None` if it does not exist.
+
+    Raises:
+        ValueError: If the download failed for any reason other than a missing file.
+    """
+    if response.error is not None:
+        # For now, memory files are treated as optional. file_not_found is expected
+        # and we skip silently to allow graceful degradation.
+        if response.error == "file_not_found":
+            return None
+        # Other errors should be raised
+        raise ValueError(f"Failed to download {path}: {response.error}")
+
+    if response.content is not None:
+        return response.content.decode("utf-8")
+
+    return None
+
+
+def _decode_memory_responses(paths: list[str], responses: list[FileDownloadResponse]) -> dict[str, str | None]:
+    # Should get exactly one response per path
+    if len(responses) != len(paths):
+        raise AssertionError(f"Expected {len(paths)} responses for paths {paths}, got {len(responses)}")
+    return {path: _decode_memory_response(path, response) for path, response in zip(paths, responses, strict=True)}
+
+
+@instrument_middleware
 class MemoryMiddleware(AgentMiddleware):
     """Middleware for loading agent memory from `AGENTS.md` files.
 
@@ -186,6 +217,8 @@ class MemoryMiddleware(AgentMiddleware):
         """
         self._backend = backend
         self.sources = sources
+        # Last (contents, formatted prompt) pair, reused while the contents are unchanged
+        self._formatted_memory: tuple[dict[str, str], str] | None = None
 
     def _get_backend(self, state: MemoryState, runtime: Runtime, config: RunnableConfig) -> BackendProtocol:
         """Resolve backend from instance or factory.
@@ -208,7 +241,7 @@ class MemoryMiddleware(AgentMiddleware):
                 config=config,
                 tool_call_id=None,
             )
-            return self._backend(tool_runtime)  # type: ignore[arg-type]
+            return resolve_backend(self._backend, tool_runtime)
         return self._backend
 
     def _format_agent_memory(self, contents: dict[str, str]) -> str:
@@ -234,71 +267,37 @@ class MemoryMiddleware(AgentMiddleware):
         memory_body = "\n\n".join(sections)
         return MEMORY_SYSTEM_PROMPT.format(agent_memory=memory_body)
 
-    async def _load_memory_from_backend(
-        self,
-        backend: BackendProtocol,
-        path: str,
-    ) -> str | None:
-        """Load memory content from a backend path.
+    def _load_memory(self, backend: BackendProtocol) -> dict[str, str]:
+        """Load all memory sources with one batched download.
 
         Args:
             backend: Backend to load from.
-            path: Path to the AGENTS.md file.
 
         Returns:
-            File content if found, None otherwise.
+            Dict mapping source paths to their non-empty content.
         """
-        results = await backend.adownload_files([path])
-        # Should get exactly one response for one path
-        if len(results) != 1:
-            raise AssertionError(f"Expected 1 response for path {path}, got {len(results)}")
-        response = results[0]
-
-        if response.error is not None:
-            # For now, memory files are treated as optional. file_not_found is expected
-            # and we skip silently to allow graceful degradation.
-            if response.error == "file_not_found":
-                return None
-            # Other errors should be raised
-            raise ValueError(f"Failed to download {path}: {response.error}")
-
-        if response.content is not None:
-            return response.content.decode("utf-8")
-
-        return None
-
-    def _load_memory_from_backend_sync(
-        self,
-        backend: BackendProtocol,
-        path: str,
-    ) -> str | None:
-        """Load memory content from a backend path synchronously.
+        return self._collect_contents(_decode_memory_responses(self.sources, backend.download_files(self.sources)))
+
+    async def _aload_memory(self, backend: BackendProtocol) -> dict[str, str]:
+        """Load all memory sources with one batched download (async version).
 
         Args:
             backend: Backend to load from.
-            path: Path to the AGENTS.md file.
 
         Returns:
-            File content if found, None otherwise.
+            Dict mapping source paths to their non-empty content.
         """
-        results = backend.download_files([path])
-        # Should get exactly one response for one path
-        if len(results) != 1:
-            raise AssertionError(f"Expected 1 response for path {path}, got {len(results)}")
-        response = results[0]
-
-        if response.error is not None:
-            # For now, memory files are treated as optional. file_not_found is expected
-            # and we skip silently to allow graceful degradation.
-            if response.error == "file_not_found":
-                return None
-            # Other errors should be raised
-            raise ValueError(f"Failed to download {path}: {response.error}")
+        return self._collect_contents(_decode_memory_responses(self.sources, await backend.adownload_files(self.sources)))
 
-        if response.content is not None:
-            return response.content.decode("utf-8")
-
-        return None
+    def _collect_contents(self, contents: dict[str, str | None]) -> dict[str, str]:
+        """Order loaded contents by source, dropping missing and empty files."""
+        loaded: dict[str, str] = {}
+        for path in self.sources:
+            content = contents.get(path)
+            if content:
+                loaded[path] = content
+                logger.debug(f"Loaded memory from: {path}")
+        return loaded
 
     def before_agent(self, state: MemoryState, runtime: Runtime, config: RunnableConfig) -> MemoryStateUpdate | None:  # type: ignore[override]
         """Load memory content before agent execution (synchronous).
@@ -319,15 +318,7 @@ class MemoryMiddleware(AgentMiddleware):
             return None
 
         backend = self._get_backend(state, runtime, config)
-        contents: dict[str, str] = {}
-
-        for path in self.sources:
-            content = self._load_memory_from_backend_sync(backend, path)
-            if content:
-                contents[path] = content
-                logger.debug(f"Loaded memory from: {path}")
-
-        return MemoryStateUpdate(memory_contents=contents)
+        return MemoryStateUpdate(memory_contents=self._load_memory(backend))
 
     async def abefore_agent(self, state: MemoryState, runtime: Runtime, config: RunnableConfig) -> MemoryStateUpdate | None:  # type: ignore[override]
         """Load memory content before agent execution.
@@ -348,15 +339,7 @@ class MemoryMiddleware(AgentMiddleware):
             return None
 
         backend = self._get_backend(state, runtime, config)
-        contents: dict[str, str] = {}
-
-        for path in self.sources:
-            content = await self._load_memory_from_backend(backend, path)
-            if content:
-                contents[path] = content
-                logger.debug(f"Loaded memory from: {path}")
-
-        return MemoryStateUpdate(memory_contents=contents)
+        return MemoryStateUpdate(memory_contents=await self._aload_memory(backend))
 
     def modify_request(self, request: ModelRequest) -> ModelRequest:
         """Inject memory content into the system message.
@@ -368,7 +351,15 @@ class MemoryMiddleware(AgentMiddleware):
             Modified request with memory injected into system message.
         """
         contents = request.state.get("memory_contents", {})
-        agent_memory = self._format_agent_memory(contents)
+        # Memory is loaded once per thread, so the prompt section rarely changes between
+        # model calls. Comparing the contents is cheap: unchanged strings are shared
+        # objects, so the comparison short-circuits on identity.
+        formatted = self._formatted_memory
+        if formatted is not None and formatted[0] == contents:
+            agent_memory = formatted[1]
+        else:
+            agent_memory = self._format_agent_memory(contents)
+            self._formatted_memory = (dict(contents), agent_memory)
 
         new_system_message = append_to_system_message(request.system_message, agent_memory)
 
@@ -3,42 +3,57 @@
 from typing import Any
 
 from langchain.agents.middleware import AgentMiddleware, AgentState
-from langchain_core.messages import ToolMessage
+from langchain_core.messages import AnyMessage, ToolMessage
 from langgraph.runtime import Runtime
 from langgraph.types import Overwrite
 
+from deepagents.instrumentation import instrument_middleware
 
+
+def _cancelled_tool_message(tool_call: dict[str, Any]) -> ToolMessage:
+    """Create the ToolMessage answering a dangling tool call."""
+    tool_msg = f"Tool call {tool_call['name']} with id {tool_call['id']} was cancelled - another message came in before it could be completed."
+    return ToolMessage(
+        content=tool_msg,
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+    )
+
+
+@instrument_middleware
 class PatchToolCallsMiddleware(AgentMiddleware):
     """Middleware to patch dangling tool calls in the messages history."""
 
     def before_agent(self, state: AgentState, runtime: Runtime[Any]) -> dict[str, Any] | None:  # noqa: ARG002
-        """Before the agent runs, handle dangling tool calls from any AIMessage."""
-        messages = state["messages"]
-        if not messages or len(messages) == 0:
+        """Before the agent runs, handle dangling tool calls from any AIMessage.
+
+        Runs in a single pass over the history. Returns `None` when every tool call
+        has been answered, so the message channel is not rewritten. When the only
+        dangling calls belong to the last message, the cancellation ToolMessages are
+        appended; otherwise they must be inserted after their AIMessage, which
+        requires overwriting the history.
+        """
+        messages: list[AnyMessage] = state["messages"]
+        if not messages:
             return None
 
-        patched_messages = []
-        # Iterate over the messages and add any dangling tool calls
+        answered_ids = {msg.tool_call_id for msg in messages if msg.type == "tool"}
+        dangling: dict[int, list[ToolMessage]] = {}
         for i, msg in enumerate(messages):
-            patched_messages.append(msg)
             if msg.type == "ai" and msg.tool_calls:
-                for tool_call in msg.tool_calls:
-                    corresponding_tool_msg = next(
-                        (m for m in messages[i:] if m.type == "tool" and hasattr(m, "tool_call_id") and m.tool_call_id == tool_call["id"]),
-                        None,
-                    )
-                    if corresponding_tool_msg is None:
-                        # We have a dangling tool call which needs a ToolMessage
-                        tool_msg = (
-                            f"Tool call {tool_call['name']} with id {tool_call['id']} was "
-                            "cancelled - another message came in before it could be completed."
-                        )
-                        patched_messages.append(
-                            ToolMessage(
-                                content=tool_msg,
-                                name=tool_call["name"],
-                                tool_call_id=tool_call["id"],
-                            )
-                        )
+                patches = [_cancelled_tool_message(tool_call) for tool_call in msg.tool_calls if tool_call["id"] not in answered_ids]
+                if patches:
+                    dangling[i] = patches
 
+        if not dangling:
+            return None
+
+        # Dangling calls only on the last message: appending keeps them adjacent
+        if dangling.keys() == {len(messages) - 1}:
+            return {"messages": dangling[len(messages) - 1]}
+
+        patched_messages: list[AnyMessage] = []
+        for i, msg in enumerate(messages):
+            patched_messages.append(msg)
+            patched_messages.extend(dangling.get(i, ()))
         return {"messages": Overwrite(patched_messages)}
@@ -0,0 +1,292 @@
+"""Middleware that lays out prompt cache breakpoints for long-running deep agent threads.
+
+`AnthropicPromptCachingMiddleware` places a single, rolling cache breakpoint on the
+last message. In a long thread the head of the message list is rewritten whenever the
+conversation is summarized, so a rolling breakpoint alone re-writes the whole cache
+after every summarization and cannot share the tools and system prompt across threads.
+
+This middleware adds breakpoints at the boundaries that deep agents keep stable:
+
+- the last tool definition, so tool schemas are cached independently of the prompt
+- the last block of the system prompt, which middleware assemble deterministically
+- the summary message that replaces the summarized head of the conversation, so the
+  prefix up to and including the summary is reused until the next summarization
+
+Together with the rolling breakpoint this uses all four breakpoints Anthropic allows.
+
+Cache read and write token counts are reported per model call from the response's
+usage metadata, and accumulated on the middleware.
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, Literal
+
+from langchain.agents.middleware.types import AgentMiddleware, ExtendedModelResponse, ModelCallResult, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, AnyMessage, SystemMessage
+from typing_extensions import TypedDict
+
+from deepagents.instrumentation import instrument_middleware
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+
+    from langchain_anthropic.middleware import AnthropicPromptCachingMiddleware
+    from langchain_core.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+CacheBreakpoint = Literal["tools", "system", "summary"]
+
+
+class PromptCacheUsage(TypedDict):
+    """Prompt cache token counts for one or more model calls."""
+
+    input_tokens: int
+    """Total input tokens, including tokens read from and written to the cache."""
+
+    cache_read_tokens: int
+    """Input tokens served from the prompt cache."""
+
+    cache_creation_tokens: int
+    """Input tokens written to the prompt cache."""
+
+
+def _is_anthropic_model(model: Any) -> bool:  # noqa: ANN401
+    """Whether `model` is a `ChatAnthropic` instance, without importing `langchain_anthropic`."""
+    module = sys.modules.get("langchain_anthropic")
+    return module is not None and isinstance(model, module.ChatAnthropic)
+
+
+def _is_summary_message(message: AnyMessage) -> bool:
+    return message.type == "human" and message.additional_kwargs.get("lc_source") == "summarization"
+
+
+def _with_cache_control(content: str | list[str | dict[str, Any]], cache_control: dict[str, str]) -> list[str | dict[str, Any]] | None:
+    """Return `content` with `cache_control` set on its last text block, or `None` if it has none."""
+    blocks = [{"type": "text", "text": content}] if isinstance(content, str) else list(content)
+    if not blocks:
+        return None
+    last = blocks[-1]
+    if isinstance(last, str):
+        last = {"type": "text", "text": last}
+    if last.get("type") != "text" or not last.get("text"):
+        return None
+    blocks[-1] = {**last, "cache_control": cache_control}
+    return blocks
+
+
+def _usage_from_response(response: ModelCallResult) -> PromptCacheUsage | None:
+    """Extract prompt cache token counts from the AI message of a model response."""
+    if isinstance(response, ExtendedModelResponse):
+        response = response.model_response
+    messages = [response] if isinstance(response, AIMessage) else response.result
+    message = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+    usage = message.usage_metadata if message is not None else None
+    if not usage:
+        return None
+    details = usage.get("input_token_details") or {}
+    return PromptCacheUsage(
+        input_tokens=usage.get("input_tokens", 0),
+        cache_read_tokens=details.get("cache_read") or 0,
+        cache_creation_tokens=details.get("cache_creation") or 0,
+    )
+
+
+@instrument_middleware
+class PromptCacheLayoutMiddleware(AgentMiddleware):
+    """Place Anthropic prompt cache breakpoints on the tools, system prompt and latest summary.
+
+    Only applies to `ChatAnthropic` models; requests to other models are passed through,
+    but cache usage is still reported for any provider that returns it in
+    `usage_metadata.input_token_details`.
+
+    Each model call's cache usage is written to the stream as a
+    `{"type": "prompt_cache_usage", ...}` event (visible with `stream_mode="custom"`),
+    and the running totals are available from `usage`.
+
+    Args:
+        breakpoints: Which boundaries to mark. Anthropic allows at most four breakpoints
+            per request, one of which is used by `AnthropicPromptCachingMiddleware`.
+        ttl: Cache lifetime for the breakpoints. Should match the rolling breakpoint,
+            since longer-lived breakpoints must precede shorter-lived ones.
+    """
+
+    def __init__(
+        self,
+        *,
+        breakpoints: Sequence[CacheBreakpoint] = ("tools", "system", "summary"),
+        ttl: Literal["5m", "1h"] = "5m",
+    ) -> None:
+        """Initialize the prompt cache layout middleware."""
+        self.breakpoints = frozenset(breakpoints)
+        self.cache_control = {"type": "ephemeral", "ttl": ttl}
+        # Last (original, marked) system message, so a stable prompt yields a stable marked copy
+        self._marked_system: tuple[SystemMessage, SystemMessage] | None = None
+        self._usage = PromptCacheUsage(input_tokens=0, cache_read_tokens=0, cache_creation_tokens=0)
+        self._usage_lock = threading.Lock()
+
+    @property
+    def usage(self) -> PromptCacheUsage:
+        """Prompt cache token counts accumulated over all model calls through this middleware."""
+        with self._usage_lock:
+            return PromptCacheUsage(**self._usage)
+
+    def _mark_system_message(self, system_message: SystemMessage) -> SystemMessage:
+        marked = self._marked_system
+        if marked is not None and marked[0] is system_message:
+            return marked[1]
+        content = _with_cache_control(system_message.content, self.cache_control)
+        result = system_message if content is None else system_message.model_copy(update={"content": content})
+        self._marked_system = (system_message, result)
+        return result
+
+    def _mark_tools(self, tools: list[BaseTool | dict[str, Any]]) -> list[BaseTool | dict[str, Any]]:
+        last = tools[-1]
+        if isinstance(last, dict):
+            marked: BaseTool | dict[str, Any] = {**last, "cache_control": self.cache_control}
+        else:
+            marked = last.model_copy(update={"extras": {**(last.extras or {}), "cache_control": self.cache_control}})
+        return [*tools[:-1], marked]
+
+    def _mark_summary(self, messages: list[AnyMessage]) -> list[AnyMessage]:
+        summary = messages[0]
+        content = _with_cache_control(summary.content, self.cache_control)
+        if content is None:
+            return messages
+        return [summary.model_copy(update={"content": content}), *messages[1:]]
+
+    def _layout(self, request: ModelRequest) -> ModelRequest:
+        """Return the request with cache breakpoints placed, if the model supports them."""
+        if not _is_anthropic_model(request.model):
+            return request
+        overrides: dict[str, Any] = {}
+        if "tools" in self.breakpoints and request.tools:
+            overrides["tools"] = self._mark_tools(request.tools)
+        if "system" in self.breakpoints and request.system_message is not None:
+            overrides["system_message"] = self._mark_system_message(request.system_message)
+        if "summary" in self.breakpoints and request.messages and _is_summary_message(request.messages[0]):
+            overrides["messages"] = self._mark_summary(request.messages)
+        return request.override(**overrides) if overrides else request
+
+    def _record_usage(self, request: ModelRequest, response: ModelCallResult) -> None:
+        usage = _usage_from_response(response)
+        if usage is None:
+            return
+        with self._usage_lock:
+            for key, value in usage.items():
+                self._usage[key] += value  # type: ignore[literal-required]
+        logger.debug(
+            "Prompt cache: %d of %d input tokens read from cache, %d written",
+            usage["cache_read_tokens"],
+            usage["input_tokens"],
+            usage["cache_creation_tokens"],
+        )
+        stream_writer = getattr(request.runtime, "stream_writer", None)
+        if stream_writer is not None:
+            stream_writer({"type": "prompt_cache_usage", **usage})
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelCallResult:
+        """Place cache breakpoints on the request and report cache usage of the response.
+
+        Args:
+            request: The model request being processed.
+            handler: The handler function to call with the modified request.
+
+        Returns:
+            The model response from the handler.
+        """
+        response = handler(self._layout(request))
+        self._record_usage(request, response)
+        return response
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelCallResult:
+        """(async) Place cache breakpoints on the request and report cache usage of the response.
+
+        Args:
+            request: The model request being processed.
+            handler: The handler function to call with the modified request.
+
+        Returns:
+            The model response from the handler.
+        """
+        response = await handler(self._layout(request))
+        self._record_usage(request, response)
+        return response
+
+
+@instrument_middleware
+class _LazyAnthropicPromptCachingMiddleware(AgentMiddleware):
+    """`AnthropicPromptCachingMiddleware` that only imports `langchain_anthropic` once it has a `ChatAnthropic` request.
+
+    Requests to other models are passed through, as with `unsupported_model_behavior="ignore"`.
+    A `ChatAnthropic` model can only exist once `langchain_anthropic` is imported, so agents
+    built on other models never pay its import time.
+
+    Args:
+        **kwargs: Keyword arguments for `AnthropicPromptCachingMiddleware`.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the lazy prompt caching middleware."""
+        self._kwargs = kwargs
+        self._middleware: AnthropicPromptCachingMiddleware | None = None
+
+    @property
+    def name(self) -> str:
+        """Same name as the middleware it defers to, so duplicates are still detected."""
+        return "AnthropicPromptCachingMiddleware"
+
+    def _delegate(self, request: ModelRequest) -> AnthropicPromptCachingMiddleware | None:
+        if not _is_anthropic_model(request.model):
+            return None
+        if self._middleware is None:
+            from langchain_anthropic.middleware import AnthropicPromptCachingMiddleware  # noqa: PLC0415
+
+            self._middleware = AnthropicPromptCachingMiddleware(**self._kwargs)
+        return self._middleware
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelCallResult:
+        """Apply Anthropic prompt caching to requests for `ChatAnthropic` models.
+
+        Args:
+            request: The model request being processed.
+            handler: The handler function to call with the modified request.
+
+        Returns:
+            The model response from the handler.
+        """
+        middleware = self._delegate(request)
+        return handler(request) if middleware is None else middleware.wrap_model_call(request, handler)
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelCallResult:
+        """(async) Apply Anthropic prompt caching to requests for `ChatAnthropic` models.
+
+        Args:
+            request: The model request being processed.
+            handler: The handler function to call with the modified request.
+
+        Returns:
+            The model response from the handler.
+        """
+        middleware = self._delegate(request)
+        return await handler(request) if middleware is None else await middleware.awrap_model_call(request, handler)
@@ -90,16 +90,21 @@ middleware = SkillsMiddleware(
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import re
+import threading
+import warnings
+from collections import OrderedDict
+from collections.abc import Hashable
 from pathlib import PurePosixPath
-from typing import TYPE_CHECKING, Annotated
+from typing import TYPE_CHECKING, Annotated, Any
 
 import yaml
 from langchain.agents.middleware.types import PrivateStateAttr
 
 if TYPE_CHECKING:
-    from deepagents.backends.protocol import BACKEND_TYPES, BackendProtocol
+    from deepagents.backends.protocol import BACKEND_TYPES, BackendProtocol, FileDownloadResponse, FileInfo
 
 from collections.abc import Awaitable, Callable
 from typing import NotRequired, TypedDict
@@ -114,13 +119,24 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import ToolRuntime
 from langgraph.runtime import Runtime
 
-from deepagents.middleware._utils import append_to_system_message
+from deepagents.instrumentation import instrument_middleware
+from deepagents.middleware._utils import (
+    append_to_system_message,
+    astat_filesystem_files,
+    resolve_backend,
+    route_to_filesystem,
+    stat_filesystem_files,
+)
 
 logger = logging.getLogger(__name__)
 
 # Security: Maximum size for SKILL.md files to prevent DoS attacks (10MB)
 MAX_SKILL_FILE_SIZE = 10 * 1024 * 1024
 
+# Only this many bytes of each SKILL.md are read to find its frontmatter; files whose
+# frontmatter does not close within the prefix are downloaded in full
+MAX_FRONTMATTER_BYTES = 64 * 1024
+
 # Agent Skills specification constraints (https://agentskills.io/specification)
 MAX_SKILL_NAME_LENGTH = 64
 MAX_SKILL_DESCRIPTION_LENGTH = 1024
@@ -242,6 +258,109 @@ def _validate_skill_name(name: str, directory_name: str) -> tuple[bool, str]:
     return True, ""
 
 
+_YAML_SUBSET_KEY = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_-]*")
+# Plain scalars that YAML resolves to booleans, nulls, numbers, or timestamps rather than strings
+_YAML_NON_STRING_SCALAR = re.compile(r"y|n|yes|no|on|off|true|false|null|~|=|[-+]?\.?\d.*|[-+]?\.inf|\.nan", re.IGNORECASE)
+_YAML_SINGLE_QUOTED = re.compile(r"'((?:[^']|'')*)'")
+_YAML_DOUBLE_QUOTED = re.compile(r'"([^"\\]*)"')
+_YAML_INDICATORS = frozenset("-?:,[]{}#&*!|>'\"%@`")
+
+
+def _extract_frontmatter(content: str) -> str | None:
+    """Return the text between the opening and closing `---` lines, if both are present."""
+    lines = content.split("\n")
+    if lines[0].rstrip() != "---":
+        return None
+    # The closing delimiter must be followed by a newline
+    for i in range(1, len(lines) - 1):
+        if lines[i].rstrip() == "---":
+            return "\n".join(lines[1:i])
+    return None
+
+
+def _parse_yaml_scalar(raw: str) -> str | None:
+    """Parse a scalar the subset parser supports, or return `None` if full YAML is needed."""
+    if match := _YAML_SINGLE_QUOTED.fullmatch(raw):
+        return match.group(1).replace("''", "'")
+    if match := _YAML_DOUBLE_QUOTED.fullmatch(raw):
+        return match.group(1)
+    if raw[0] in _YAML_INDICATORS or ": " in raw or " #" in raw or raw.endswith(":") or not raw.isprintable():
+        return None
+    return None if _YAML_NON_STRING_SCALAR.fullmatch(raw) else raw
+
+
+def _parse_yaml_subset_line(line: str) -> tuple[int, str, str] | None:
+    """Split a `key: value` line into (indent, key, value), or `None` if unsupported."""
+    stripped = line.lstrip(" ")
+    key, sep, value = stripped.partition(":")
+    if not sep or (value and not value.startswith(" ")):
+        return None
+    if not _YAML_SUBSET_KEY.fullmatch(key) or _YAML_NON_STRING_SCALAR.fullmatch(key):
+        return None
+    return len(line) - len(stripped), key, value.strip()
+
+
+def _parse_yaml_subset(text: str) -> dict[str, Any] | None:
+    """Parse the YAML subset used by typical skill frontmatter without PyYAML.
+
+    Supports `key: value` lines with plain or simply-quoted string values, one level of
+    nested `key: value` mappings, blank lines, and full-line comments. Anything else
+    (lists, flow collections, block scalars, multi-line values, escapes, or scalars that
+    YAML would resolve to non-strings) returns `None` so the caller can fall back to
+    `yaml.safe_load`. For supported input the result equals `yaml.safe_load(text)`.
+    """
+    # Tabs are significant (and often invalid) in YAML indentation; leave them to PyYAML
+    if "\t" in text:
+        return None
+
+    result: dict[str, Any] = {}
+    # The mapping that indented lines belong to, and their indentation
+    nested: dict[str, str] | None = None
+    nested_indent = 0
+
+    for raw_line in text.split("\n"):
+        line = raw_line.rstrip()
+        if not line.strip() or line.lstrip(" ").startswith("#"):
+            continue
+        parsed = _parse_yaml_subset_line(line)
+        if parsed is None:
+            return None
+        indent, key, value = parsed
+
+        if indent == 0:
+            # A key with no value opens a nested mapping, which must not be left empty
+            if nested == {}:
+                return None
+            if not value:
+                nested = result[key] = {}
+                nested_indent = 0
+                continue
+            nested = None
+            target = result
+        else:
+            if nested is None or not value or (nested_indent and indent != nested_indent):
+                return None
+            nested_indent = indent
+            target = nested
+
+        scalar = _parse_yaml_scalar(value)
+        if scalar is None:
+            return None
+        target[key] = scalar
+
+    return result if result and nested != {} else None
+
+
+def _load_frontmatter(frontmatter: str) -> Any:  # noqa: ANN401
+    """Load frontmatter with the fast subset parser, falling back to `yaml.safe_load`.
+
+    Raises:
+        yaml.YAMLError: If the frontmatter needs full YAML and is invalid.
+    """
+    data = _parse_yaml_subset(frontmatter)
+    return data if data is not None else yaml.safe_load(frontmatter)
+
+
 def _parse_skill_metadata(
     content: str,
     skill_path: str,
@@ -265,19 +384,15 @@ def _parse_skill_metadata(
         logger.warning("Skipping %s: content too large (%d bytes)", skill_path, len(content))
         return None
 
-    # Match YAML frontmatter between --- delimiters
-    frontmatter_pattern = r"^---\s*\n(.*?)\n---\s*\n"
-    match = re.match(frontmatter_pattern, content, re.DOTALL)
-
-    if not match:
+    # Extract YAML frontmatter between --- delimiters
+    frontmatter_str = _extract_frontmatter(content)
+    if frontmatter_str is None:
         logger.warning("Skipping %s: no valid YAML frontmatter found", skill_path)
         return None
 
-    frontmatter_str = match.group(1)
-
-    # Parse YAML using safe_load for proper nested structure support
+    # Parse YAML, using PyYAML only when the frontmatter needs more than the simple subset
     try:
-        frontmatter_data = yaml.safe_load(frontmatter_str)
+        frontmatter_data = _load_frontmatter(frontmatter_str)
     except yaml.YAMLError as e:
         logger.warning("Invalid YAML in %s: %s", skill_path, e)
         return None
@@ -396,11 +511,197 @@ def _format_skill_annotations(skill: SkillMetadata) -> str:
     return ", ".join(parts)
 
 
+_SKILLS_CACHE_SIZE = 256
+"""Maximum number of `(backend, source)` listings kept in the process-wide skills cache."""
+
+_SkillsCacheEntries = dict[str, tuple[str | None, "SkillMetadata | None"]]
+
+
+class _SkillsMetadataCache:
+    """Process-wide cache of parsed skills, keyed by `(backend identity, source path)`.
+
+    Each entry maps a `SKILL.md` path to the version it was parsed at (its modification
+    time and size) and the parsed metadata. Listing a source re-downloads and re-parses
+    only the files whose version changed, so many threads sharing one skill library
+    do not repeat the same I/O and YAML parsing.
+    """
+
+    def __init__(self, maxsize: int = _SKILLS_CACHE_SIZE) -> None:
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, _SkillsCacheEntries] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable | None) -> _SkillsCacheEntries:
+        if key is None:
+            return {}
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries is None:
+                return {}
+            self._entries.move_to_end(key)
+            return entries
+
+    def put(self, key: Hashable | None, entries: _SkillsCacheEntries) -> None:
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = entries
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_skills_cache = _SkillsMetadataCache()
+
+
+def _backend_cache_key(backend: BackendProtocol, source_path: str) -> Hashable | None:
+    """Identify the storage a skills source lives in, or `None` if it cannot be shared.
+
+    Filesystem and store backends read from storage that outlives a single thread, so
+    different backend instances over the same root or store namespace share entries.
+    State-backed sources differ per thread and are not cached.
+    """
+    from deepagents.backends.composite import CompositeBackend  # noqa: PLC0415
+    from deepagents.backends.filesystem import FilesystemBackend  # noqa: PLC0415
+    from deepagents.backends.store import StoreBackend  # noqa: PLC0415
+
+    if isinstance(backend, CompositeBackend):
+        routed, routed_path = backend._get_backend_and_key(source_path)
+        inner_key = _backend_cache_key(routed, routed_path)
+        return None if inner_key is None else ("composite", source_path, inner_key)
+    if isinstance(backend, FilesystemBackend):
+        return ("filesystem", str(backend.cwd), backend.virtual_mode, source_path)
+    if isinstance(backend, StoreBackend):
+        with warnings.catch_warnings():
+            # The legacy-namespace deprecation warning is already raised by the store calls themselves
+            warnings.simplefilter("ignore", DeprecationWarning)
+            namespace = backend._get_namespace()
+        return ("store", id(backend._get_store()), namespace, source_path)
+    return None
+
+
+def _skill_md_paths(items: list[FileInfo]) -> list[str]:
+    """Return the `SKILL.md` path of every directory in a source listing."""
+    return [str(PurePosixPath(item["path"]) / "SKILL.md") for item in items if item.get("is_dir")]
+
+
+def _globbed_skill_files(infos: list[FileInfo], source_path: str) -> list[FileInfo]:
+    """Keep the `<source>/<skill>/SKILL.md` files among the results of a `*/SKILL.md` glob."""
+    source = PurePosixPath(source_path)
+    return [
+        info
+        for info in infos
+        if not info.get("is_dir") and PurePosixPath(info["path"]).name == "SKILL.md" and PurePosixPath(info["path"]).parent.parent == source
+    ]
+
+
+def _skill_file_versions(infos: list[FileInfo]) -> dict[str, str | None]:
+    """Map each `SKILL.md` file to its version.
+
+    The version combines modification time and size. It is `None` when the backend does
+    not report a modification time, in which case the file is always re-read.
+    """
+    versions: dict[str, str | None] = {}
+    for info in sorted(infos, key=lambda i: i["path"]):
+        modified_at = info.get("modified_at")
+        versions[info["path"]] = f"{modified_at}:{info.get('size', '')}" if modified_at else None
+    return versions
+
+
+def _skill_files(backend: BackendProtocol, source_path: str) -> list[FileInfo]:
+    """Find the `SKILL.md` files of a source, with their size and modification time.
+
+    On a filesystem a glob would walk every skill's whole subtree (dependencies, virtual
+    environments, data), so the source is listed one level deep and only each
+    `<skill>/SKILL.md` is stat'ed. Other backends glob their stored files directly.
+    """
+    if route_to_filesystem(backend, source_path) is not None:
+        stats = stat_filesystem_files(backend, _skill_md_paths(backend.ls_info(source_path)))
+        return [info for info in stats.values() if info is not None]
+    return _globbed_skill_files(backend.glob_info("*/SKILL.md", path=source_path), source_path)
+
+
+async def _askill_files(backend: BackendProtocol, source_path: str) -> list[FileInfo]:
+    """Find the `SKILL.md` files of a source, with their size and modification time (async version)."""
+    if route_to_filesystem(backend, source_path) is not None:
+        stats = await astat_filesystem_files(backend, _skill_md_paths(await backend.als_info(source_path)))
+        return [info for info in stats.values() if info is not None]
+    return _globbed_skill_files(await backend.aglob_info("*/SKILL.md", path=source_path), source_path)
+
+
+def _decode_utf8_prefix(content: bytes) -> str:
+    """Decode UTF-8, dropping a multi-byte character cut off by a bounded read."""
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if len(content) >= MAX_FRONTMATTER_BYTES and e.end == len(content) and e.reason == "unexpected end of data":
+            return content[: e.start].decode("utf-8")
+        raise
+
+
+def _frontmatter_truncated(response: FileDownloadResponse) -> bool:
+    """Whether a bounded read filled its budget without reaching the end of the frontmatter."""
+    if response.content is None or len(response.content) < MAX_FRONTMATTER_BYTES:
+        return False
+    try:
+        return _extract_frontmatter(_decode_utf8_prefix(response.content)) is None
+    except UnicodeDecodeError:
+        return False
+
+
+def _parse_skill_response(skill_md_path: str, response: FileDownloadResponse) -> SkillMetadata | None:
+    """Decode and parse a downloaded `SKILL.md`, returning `None` if it cannot be used."""
+    if response.error:
+        # Skill doesn't have a SKILL.md, skip it
+        return None
+
+    if response.content is None:
+        logger.warning("Downloaded skill file %s has no content", skill_md_path)
+        return None
+
+    try:
+        content = _decode_utf8_prefix(response.content)
+    except UnicodeDecodeError as e:
+        logger.warning("Error decoding %s: %s", skill_md_path, e)
+        return None
+
+    # Extract directory name from path using PurePosixPath
+    directory_name = PurePosixPath(skill_md_path).parent.name
+    return _parse_skill_metadata(
+        content=content,
+        skill_path=skill_md_path,
+        directory_name=directory_name,
+    )
+
+
+def _stale_skill_files(versions: dict[str, str | None], cached: _SkillsCacheEntries) -> list[str]:
+    """Return the `SKILL.md` paths that must be downloaded and parsed again."""
+    return [path for path, version in versions.items() if version is None or path not in cached or cached[path][0] != version]
+
+
+def _update_skills_cache(
+    cache_key: Hashable | None,
+    versions: dict[str, str | None],
+    cached: _SkillsCacheEntries,
+    parsed: dict[str, SkillMetadata | None],
+) -> list[SkillMetadata]:
+    """Store the current listing of a source and return its skills."""
+    entries: _SkillsCacheEntries = {path: (version, parsed[path] if path in parsed else cached[path][1]) for path, version in versions.items()}
+    _skills_cache.put(cache_key, entries)
+    return [metadata for _, metadata in entries.values() if metadata is not None]
+
+
 def _list_skills(backend: BackendProtocol, source_path: str) -> list[SkillMetadata]:
     """List all skills from a backend source.
 
-    Scans backend for subdirectories containing `SKILL.md` files, downloads
-    their content, parses YAML frontmatter, and returns skill metadata.
+    Finds the `SKILL.md` files one level down, then reads the frontmatter of only the
+    files that are new or changed since they were last parsed in this process.
+    Each read is bounded to `MAX_FRONTMATTER_BYTES`, so listing costs O(frontmatter)
+    rather than O(file).
 
     Expected structure:
 
@@ -418,68 +719,26 @@ def _list_skills(backend: BackendProtocol, source_path: str) -> list[SkillMetada
     Returns:
         List of skill metadata from successfully parsed `SKILL.md` files
     """
-    base_path = source_path
-
-    skills: list[SkillMetadata] = []
-    items = backend.ls_info(base_path)
-
-    # Find all skill directories (directories containing SKILL.md)
-    skill_dirs = []
-    for item in items:
-        if not item.get("is_dir"):
-            continue
-        skill_dirs.append(item["path"])
-
-    if not skill_dirs:
-        return []
-
-    # For each skill directory, check if SKILL.md exists and download it
-    skill_md_paths = []
-    for skill_dir_path in skill_dirs:
-        # Construct SKILL.md path using PurePosixPath for safe, standardized path operations
-        skill_dir = PurePosixPath(skill_dir_path)
-        skill_md_path = str(skill_dir / "SKILL.md")
-        skill_md_paths.append((skill_dir_path, skill_md_path))
-
-    paths_to_download = [skill_md_path for _, skill_md_path in skill_md_paths]
-    responses = backend.download_files(paths_to_download)
-
-    # Parse each downloaded SKILL.md
-    for (skill_dir_path, skill_md_path), response in zip(skill_md_paths, responses, strict=True):
-        if response.error:
-            # Skill doesn't have a SKILL.md, skip it
-            continue
+    versions = _skill_file_versions(_skill_files(backend, source_path))
+    cache_key = _backend_cache_key(backend, source_path)
+    cached = _skills_cache.get(cache_key)
 
-        if response.content is None:
-            logger.warning("Downloaded skill file %s has no content", skill_md_path)
-            continue
-
-        try:
-            content = response.content.decode("utf-8")
-        except UnicodeDecodeError as e:
-            logger.warning("Error decoding %s: %s", skill_md_path, e)
-            continue
-
-        # Extract directory name from path using PurePosixPath
-        directory_name = PurePosixPath(skill_dir_path).name
-
-        # Parse metadata
-        skill_metadata = _parse_skill_metadata(
-            content=content,
-            skill_path=skill_md_path,
-            directory_name=directory_name,
-        )
-        if skill_metadata:
-            skills.append(skill_metadata)
-
-    return skills
+    stale = _stale_skill_files(versions, cached)
+    responses = backend.download_file_prefixes(stale, MAX_FRONTMATTER_BYTES) if stale else []
+    if truncated := [path for path, response in zip(stale, responses, strict=True) if _frontmatter_truncated(response)]:
+        full = dict(zip(truncated, backend.download_files(truncated), strict=True))
+        responses = [full.get(path, response) for path, response in zip(stale, responses, strict=True)]
+    parsed = {path: _parse_skill_response(path, response) for path, response in zip(stale, responses, strict=True)}
+    return _update_skills_cache(cache_key, versions, cached, parsed)
 
 
 async def _alist_skills(backend: BackendProtocol, source_path: str) -> list[SkillMetadata]:
     """List all skills from a backend source (async version).
 
-    Scans backend for subdirectories containing `SKILL.md` files, downloads
-    their content, parses YAML frontmatter, and returns skill metadata.
+    Finds the `SKILL.md` files one level down, then reads the frontmatter of only the
+    files that are new or changed since they were last parsed in this process.
+    Each read is bounded to `MAX_FRONTMATTER_BYTES`, so listing costs O(frontmatter)
+    rather than O(file).
 
     Expected structure:
 
@@ -497,61 +756,17 @@ async def _alist_skills(backend: BackendProtocol, source_path: str) -> list[Skil
     Returns:
         List of skill metadata from successfully parsed `SKILL.md` files
     """
-    base_path = source_path
-
-    skills: list[SkillMetadata] = []
-    items = await backend.als_info(base_path)
+    versions = _skill_file_versions(await _askill_files(backend, source_path))
+    cache_key = _backend_cache_key(backend, source_path)
+    cached = _skills_cache.get(cache_key)
 
-    # Find all skill directories (directories containing SKILL.md)
-    skill_dirs = []
-    for item in items:
-        if not item.get("is_dir"):
-            continue
-        skill_dirs.append(item["path"])
-
-    if not skill_dirs:
-        return []
-
-    # For each skill directory, check if SKILL.md exists and download it
-    skill_md_paths = []
-    for skill_dir_path in skill_dirs:
-        # Construct SKILL.md path using PurePosixPath for safe, standardized path operations
-        skill_dir = PurePosixPath(skill_dir_path)
-        skill_md_path = str(skill_dir / "SKILL.md")
-        skill_md_paths.append((skill_dir_path, skill_md_path))
-
-    paths_to_download = [skill_md_path for _, skill_md_path in skill_md_paths]
-    responses = await backend.adownload_files(paths_to_download)
-
-    # Parse each downloaded SKILL.md
-    for (skill_dir_path, skill_md_path), response in zip(skill_md_paths, responses, strict=True):
-        if response.error:
-            # Skill doesn't have a SKILL.md, skip it
-            continue
-
-        if response.content is None:
-            logger.warning("Downloaded skill file %s has no content", skill_md_path)
-            continue
-
-        try:
-            content = response.content.decode("utf-8")
-        except UnicodeDecodeError as e:
-            logger.warning("Error decoding %s: %s", skill_md_path, e)
-            continue
-
-        # Extract directory name from path using PurePosixPath
-        directory_name = PurePosixPath(skill_dir_path).name
-
-        # Parse metadata
-        skill_metadata = _parse_skill_metadata(
-            content=content,
-            skill_path=skill_md_path,
-            directory_name=directory_name,
-        )
-        if skill_metadata:
-            skills.append(skill_metadata)
-
-    return skills
+    stale = _stale_skill_files(versions, cached)
+    responses = await backend.adownload_file_prefixes(stale, MAX_FRONTMATTER_BYTES) if stale else []
+    if truncated := [path for path, response in zip(stale, responses, strict=True) if _frontmatter_truncated(response)]:
+        full = dict(zip(truncated, await backend.adownload_files(truncated), strict=True))
+        responses = [full.get(path, response) for path, response in zip(stale, responses, strict=True)]
+    parsed = {path: _parse_skill_response(path, response) for path, response in zip(stale, responses, strict=True)}
+    return _update_skills_cache(cache_key, versions, cached, parsed)
 
 
 SKILLS_SYSTEM_PROMPT = """
@@ -596,6 +811,7 @@ Remember: Skills make you more capable and consistent. When in doubt, check if a
 """
 
 
+@instrument_middleware
 class SkillsMiddleware(AgentMiddleware):
     """Middleware for loading and exposing agent skills to the system prompt.
 
@@ -642,6 +858,8 @@ class SkillsMiddleware(AgentMiddleware):
         self._backend = backend
         self.sources = sources
         self.system_prompt_template = SKILLS_SYSTEM_PROMPT
+        # Last (template, skills metadata, formatted section), reused while the skills are unchanged
+        self._formatted_skills: tuple[str, list[SkillMetadata], str] | None = None
 
     def _get_backend(self, state: SkillsState, runtime: Runtime, config: RunnableConfig) -> BackendProtocol:
         """Resolve backend from instance or factory.
@@ -664,7 +882,7 @@ class SkillsMiddleware(AgentMiddleware):
                 config=config,
                 tool_call_id=None,
             )
-            backend = self._backend(tool_runtime)  # type: ignore[arg-type]
+            backend = resolve_backend(self._backend, tool_runtime)
             if backend is None:
                 raise AssertionError("SkillsMiddleware requires a valid backend instance")
             return backend
@@ -711,13 +929,19 @@ class SkillsMiddleware(AgentMiddleware):
             New model request with skills documentation injected into system message
         """
         skills_metadata = request.state.get("skills_metadata", [])
-        skills_locations = self._format_skills_locations()
-        skills_list = self._format_skills_list(skills_metadata)
-
-        skills_section = self.system_prompt_template.format(
-            skills_locations=skills_locations,
-            skills_list=skills_list,
-        )
+        formatted = self._formatted_skills
+        if formatted is not None and formatted[0] is self.system_prompt_template and formatted[1] == skills_metadata:
+            # Skills are loaded once per thread; reuse the section so the prompt stays stable
+            skills_section = formatted[2]
+        else:
+            skills_locations = self._format_skills_locations()
+            skills_list = self._format_skills_list(skills_metadata)
+
+            skills_section = self.system_prompt_template.format(
+                skills_locations=skills_locations,
+                skills_list=skills_list,
+            )
+            self._formatted_skills = (self.system_prompt_template, list(skills_metadata), skills_section)
 
         new_system_message = append_to_system_message(request.system_message, skills_section)
 
@@ -783,10 +1007,9 @@ class SkillsMiddleware(AgentMiddleware):
         backend = self._get_backend(state, runtime, config)
         all_skills: dict[str, SkillMetadata] = {}
 
-        # Load skills from each source in order
+        # Load all sources concurrently, then merge in source order
         # Later sources override earlier ones (last one wins)
-        for source_path in self.sources:
-            source_skills = await _alist_skills(backend, source_path)
+        for source_skills in await asyncio.gather(*(_alist_skills(backend, source_path) for source_path in self.sources)):
             for skill in source_skills:
                 all_skills[skill["name"]] = skill
 
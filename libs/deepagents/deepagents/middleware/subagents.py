@@ -1,8 +1,14 @@
 """Middleware for providing subagents to an agent via a `task` tool."""
 
+import asyncio
+import queue
+import threading
+import time
 import warnings
-from collections.abc import Awaitable, Callable, Sequence
-from typing import Annotated, Any, NotRequired, TypedDict, Unpack, cast
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Sequence
+from functools import partial
+from typing import Annotated, Any, NotRequired, TypeVar, Unpack, cast
 
 from langchain.agents import create_agent
 from langchain.agents.middleware import HumanInTheLoopMiddleware, InterruptOnConfig
@@ -10,15 +16,40 @@ from langchain.agents.middleware.types import AgentMiddleware, ModelRequest, Mod
 from langchain.chat_models import init_chat_model
 from langchain.tools import BaseTool, ToolRuntime
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import HumanMessage, ToolMessage
-from langchain_core.runnables import Runnable
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from langchain_core.tools import StructuredTool
+from langgraph.pregel import Pregel
 from langgraph.types import Command
+from typing_extensions import TypedDict
 
 from deepagents.backends.protocol import BackendFactory, BackendProtocol
+from deepagents.instrumentation import instrument_middleware
 from deepagents.middleware._utils import append_to_system_message
 
 
+class SubAgentBudget(TypedDict, total=False):
+    """Limits on a single subagent run.
+
+    When a limit is reached the subagent is cancelled and the task tool returns a
+    partial result (the subagent's latest response) instead of raising.
+    """
+
+    max_tokens: int
+    """Maximum total tokens across the subagent's model calls, from `usage_metadata`."""
+
+    max_steps: int
+    """Maximum number of model calls the subagent may make."""
+
+    max_seconds: float
+    """Maximum wall-clock time for the run.
+
+    Async runs are cancelled as soon as the limit is hit. Sync runs are checked
+    between graph steps, so a step already in progress is allowed to finish.
+    """
+
+
 class SubAgent(TypedDict):
     """Specification for an agent.
 
@@ -51,6 +82,10 @@ class SubAgent(TypedDict):
         skills: Skill source paths for SkillsMiddleware.
 
             List of paths to skill directories (e.g., `["/skills/user/", "/skills/project/"]`).
+        state_keys: Parent state keys passed to the subagent.
+
+            If not specified, every shareable key of the parent state is passed.
+        budget: Token, step, and wall-clock limits for a single run of the subagent.
     """
 
     name: str
@@ -77,6 +112,12 @@ class SubAgent(TypedDict):
     skills: NotRequired[list[str]]
     """Skill source paths for SkillsMiddleware."""
 
+    state_keys: NotRequired[list[str]]
+    """Parent state keys passed to the subagent (e.g. `["files"]`). If not specified, all shareable keys are passed."""
+
+    budget: NotRequired[SubAgentBudget]
+    """Token, step, and wall-clock limits for a single run. Overrides the middleware's `subagent_budget`."""
+
 
 class CompiledSubAgent(TypedDict):
     """A pre-compiled agent spec.
@@ -109,6 +150,12 @@ class CompiledSubAgent(TypedDict):
     This is required for the subagent to communicate results back to the main agent.
     """
 
+    state_keys: NotRequired[list[str]]
+    """Parent state keys passed to the subagent (e.g. `["files"]`). If not specified, all shareable keys are passed."""
+
+    budget: NotRequired[SubAgentBudget]
+    """Token, step, and wall-clock limits for a single run. Overrides the middleware's `subagent_budget`."""
+
 
 DEFAULT_SUBAGENT_PROMPT = "In order to complete the objective that the user asks of you, you have access to a number of standard tools."
 
@@ -265,6 +312,17 @@ When NOT to use the task tool:
 - You should use the `task` tool whenever you have a complex task that will take multiple steps, and is independent from other tasks that the agent needs to complete. These agents are highly competent and efficient."""  # noqa: E501
 
 
+TASK_BATCH_TOOL_DESCRIPTION = """Launch several ephemeral subagents in one call and wait for all of their results.
+
+Available agent types and the tools they have access to:
+{available_agents}
+
+Each entry in `tasks` takes the same `description` and `subagent_type` as the `task` tool, and the same usage notes apply.
+
+Use this tool instead of several separate `task` calls when you have a batch of independent tasks (e.g. researching several topics). Up to {max_concurrency} subagents run at the same time. Results are returned as one message, numbered in the same order as `tasks`."""  # noqa: E501
+
+TASK_BATCH_SYSTEM_PROMPT = """Use the `task_batch` tool to launch a batch of independent subagents in a single call; it runs them concurrently and returns all results together."""  # noqa: E501
+
 DEFAULT_GENERAL_PURPOSE_DESCRIPTION = "General-purpose agent for researching complex questions, searching for files and content, and executing multi-step tasks. When you are searching for a keyword or file and are not confident that you will find the right match in the first few tries use this agent to perform the search for you. This agent has access to all tools as the main agent."  # noqa: E501
 
 # Base spec for general-purpose subagent (caller adds model, tools, middleware)
@@ -275,12 +333,116 @@ GENERAL_PURPOSE_SUBAGENT: SubAgent = {
 }
 
 
+_SUBAGENT_GRAPH_CACHE_SIZE = 128
+"""Maximum number of compiled subagent graphs kept in the process-wide cache."""
+
+_subagent_graph_cache: OrderedDict[tuple[Any, ...], tuple[tuple[Any, ...], Runnable]] = OrderedDict()
+_subagent_graph_cache_lock = threading.Lock()
+
+
+def _tool_name(tool: Any) -> str | None:  # noqa: ANN401
+    """Return the name a tool is exposed under, if it can be determined cheaply."""
+    if isinstance(tool, str):
+        return tool
+    if isinstance(tool, dict):
+        return tool.get("name")
+    return getattr(tool, "name", None) or getattr(tool, "__name__", None)
+
+
+def _fingerprint(obj: Any) -> Any:  # noqa: ANN401
+    """Return a cheap fingerprint of the mutable parts of a subagent graph's inputs.
+
+    Specs and tool lists are plain mutable containers, so the same object may describe
+    a different subagent by the time it is used again.
+    """
+    if isinstance(obj, dict) and "name" in obj:
+        return (obj.get("name"), obj.get("description"), obj.get("system_prompt"), _fingerprint(obj.get("tools")))
+    if isinstance(obj, (list, tuple)):
+        return tuple(_tool_name(tool) for tool in obj)
+    return None
+
+
+def _get_or_build_subagent_graph(key: tuple[Any, ...], build: Callable[[], Runnable]) -> Runnable:
+    """Return the compiled graph cached for `key`, building it on a miss.
+
+    Keys are compared by identity: a cached graph is reused only when every object
+    it was built from (spec, model, tools, backend, ...) is the same object, and the
+    spec still has the same name, description, system prompt and tool names. The cache
+    holds references to those objects, so their ids cannot be recycled while cached.
+    """
+    cache_key = (tuple(id(obj) for obj in key), tuple(_fingerprint(obj) for obj in key))
+    with _subagent_graph_cache_lock:
+        entry = _subagent_graph_cache.get(cache_key)
+        # Identity checks guard against id() reuse after the original objects were freed
+        if entry is not None and all(a is b for a, b in zip(entry[0], key, strict=True)):
+            _subagent_graph_cache.move_to_end(cache_key)
+            return entry[1]
+
+    # Compile outside the lock so unrelated subagents are not serialized
+    graph = build()
+    with _subagent_graph_cache_lock:
+        _subagent_graph_cache[cache_key] = (key, graph)
+        _subagent_graph_cache.move_to_end(cache_key)
+        while len(_subagent_graph_cache) > _SUBAGENT_GRAPH_CACHE_SIZE:
+            _subagent_graph_cache.popitem(last=False)
+    return graph
+
+
+class _LazySubAgentGraph(Runnable[dict[str, Any], dict[str, Any]]):
+    """A subagent graph that is compiled on first use.
+
+    Compiling a subagent (`create_agent` plus its middleware stack) is the bulk of
+    agent startup time, and most subagent types are never called in a given run.
+    Compiled graphs are shared process-wide through `_get_or_build_subagent_graph`.
+
+    Args:
+        name: Name of the subagent.
+        key: Objects the graph is built from, used as the cache key.
+        build: Callable that compiles the graph.
+    """
+
+    def __init__(self, name: str, key: tuple[Any, ...], build: Callable[[], Runnable]) -> None:
+        """Initialize the lazy graph."""
+        self.name = name
+        self._key = key
+        self._build = build
+        self._graph: Runnable | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def graph(self) -> Runnable:
+        """The compiled subagent graph, built on first access."""
+        if self._graph is None:
+            with self._lock:
+                if self._graph is None:
+                    self._graph = _get_or_build_subagent_graph(self._key, self._build)
+        return self._graph
+
+    def invoke(self, input: dict[str, Any], config: RunnableConfig | None = None, **kwargs: Any) -> dict[str, Any]:  # noqa: A002
+        """Invoke the compiled subagent graph."""
+        return self.graph.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: dict[str, Any], config: RunnableConfig | None = None, **kwargs: Any) -> dict[str, Any]:  # noqa: A002
+        """Invoke the compiled subagent graph asynchronously."""
+        return await self.graph.ainvoke(input, config, **kwargs)
+
+    def stream(self, input: dict[str, Any], config: RunnableConfig | None = None, **kwargs: Any) -> Iterator[Any]:  # noqa: A002
+        """Stream from the compiled subagent graph."""
+        return self.graph.stream(input, config, **kwargs)
+
+    def astream(self, input: dict[str, Any], config: RunnableConfig | None = None, **kwargs: Any) -> AsyncIterator[Any]:  # noqa: A002
+        """Stream from the compiled subagent graph asynchronously."""
+        return self.graph.astream(input, config, **kwargs)
+
+
 class _SubagentSpec(TypedDict):
     """Internal spec for building the task tool."""
 
     name: str
     description: str
     runnable: Runnable
+    state_keys: NotRequired[list[str] | None]
+    budget: NotRequired[SubAgentBudget | None]
 
 
 def _get_subagents_legacy(
@@ -341,6 +503,8 @@ def _get_subagents_legacy(
                     "name": custom_agent["name"],
                     "description": custom_agent["description"],
                     "runnable": custom_agent["runnable"],
+                    "state_keys": custom_agent.get("state_keys"),
+                    "budget": custom_agent.get("budget"),
                 }
             )
             continue
@@ -358,6 +522,8 @@ def _get_subagents_legacy(
             {
                 "name": agent_["name"],
                 "description": agent_["description"],
+                "state_keys": agent_.get("state_keys"),
+                "budget": agent_.get("budget"),
                 "runnable": create_agent(
                     subagent_model,
                     system_prompt=agent_["system_prompt"],
@@ -371,6 +537,209 @@ def _get_subagents_legacy(
     return specs
 
 
+def _prepare_subagent_state(state: dict[str, Any], description: str, state_keys: Sequence[str] | None = None) -> dict[str, Any]:
+    """Build the input state for a subagent invocation.
+
+    Values are passed by reference, not copied. This is safe for `files`: its reducer
+    builds a new dict on every update and edits replace `FileData` entries rather than
+    mutating them, so the parent's map is never modified by the subagent.
+
+    Args:
+        state: The parent agent's state.
+        description: The task description, passed as the subagent's only message.
+        state_keys: Keys of the parent state to pass. `None` passes every shareable key.
+
+    Returns:
+        A new state dict with the projected parent keys and a single `HumanMessage`.
+    """
+    # Create a new state dict to avoid mutating the original
+    keys = state.keys() if state_keys is None else [k for k in state_keys if k in state]
+    subagent_state = {k: state[k] for k in keys if k not in _EXCLUDED_STATE_KEYS}
+    subagent_state["messages"] = [HumanMessage(content=description)]
+    return subagent_state
+
+
+def _changed_files(input_files: dict[str, Any], result_files: dict[str, Any]) -> dict[str, Any]:
+    """Compute the files a subagent changed relative to the map it was given.
+
+    Unchanged entries are the same `FileData` objects the subagent received, so most
+    are skipped by an identity check. Files the subagent deleted are returned as `None`
+    deletion markers for the parent's reducer.
+    """
+    changed = {path: data for path, data in result_files.items() if input_files.get(path) is not data and input_files.get(path) != data}
+    changed.update({path: None for path in input_files if path not in result_files})
+    return changed
+
+
+def _extract_subagent_result(result: dict[str, Any], subagent_state: dict[str, Any]) -> tuple[dict[str, Any], str]:
+    """Split a subagent's final state into the parent state update and its final message text.
+
+    Only keys the subagent changed are returned: values that are still the object the
+    subagent was given are dropped, and `files` is reduced to the changed paths.
+
+    Args:
+        result: The final state returned by the subagent.
+        subagent_state: The input state the subagent was invoked with.
+
+    Returns:
+        A tuple of (state_update, message_text).
+
+    Raises:
+        ValueError: If the result does not contain a `messages` key.
+    """
+    # Validate that the result contains a 'messages' key
+    if "messages" not in result:
+        error_msg = (
+            "CompiledSubAgent must return a state containing a 'messages' key. "
+            "Custom StateGraphs used with CompiledSubAgent should include 'messages' "
+            "in their state schema to communicate results back to the main agent."
+        )
+        raise ValueError(error_msg)
+
+    state_update = {}
+    for key, value in result.items():
+        if key in _EXCLUDED_STATE_KEYS or (key in subagent_state and subagent_state[key] is value):
+            continue
+        if key == "files" and isinstance(value, dict):
+            changed_files = _changed_files(subagent_state.get("files") or {}, value)
+            if changed_files:
+                state_update[key] = changed_files
+            continue
+        state_update[key] = value
+    # Strip trailing whitespace to prevent API errors with Anthropic
+    message_text = result["messages"][-1].text.rstrip() if result["messages"][-1].text else ""
+    return state_update, message_text
+
+
+def _budget_exceeded(budget: SubAgentBudget, new_messages: list[AnyMessage], started: float) -> str | None:
+    """Return a description of the first limit the subagent run has hit, if any."""
+    if (max_seconds := budget.get("max_seconds")) is not None and time.monotonic() - started >= max_seconds:
+        return f"wall-clock budget of {max_seconds}s exceeded"
+    ai_messages = [m for m in new_messages if m.type == "ai"]
+    if (max_steps := budget.get("max_steps")) is not None and len(ai_messages) >= max_steps:
+        return f"step budget of {max_steps} model calls reached"
+    if (max_tokens := budget.get("max_tokens")) is not None:
+        used = sum((m.usage_metadata or {}).get("total_tokens", 0) for m in ai_messages)
+        if used >= max_tokens:
+            return f"token budget of {max_tokens} tokens reached ({used} used)"
+    return None
+
+
+def _with_partial_result(state: dict[str, Any] | None, subagent_state: dict[str, Any], reason: str) -> dict[str, Any]:
+    """Append a final message reporting an early stop, quoting the subagent's latest response."""
+    state = state or subagent_state
+    messages = state.get("messages", [])
+    latest = next((m.text for m in reversed(messages[len(subagent_state["messages"]) :]) if m.type == "ai" and m.text), None)
+    text = f"Subagent stopped early: {reason}."
+    text += f" Partial result:\n\n{latest}" if latest else " No result was produced."
+    return {**state, "messages": [*messages, AIMessage(content=text)]}
+
+
+def _supports_streaming(subagent: Runnable) -> bool:
+    """Whether the subagent is a graph that can stream state values."""
+    return isinstance(subagent, (Pregel, _LazySubAgentGraph))
+
+
+def _run_subagent(
+    subagent: Runnable,
+    subagent_state: dict[str, Any],
+    budget: SubAgentBudget | None,
+    on_message: Callable[[AnyMessage], None],
+) -> dict[str, Any]:
+    """Run a subagent, streaming its new messages and enforcing its budget.
+
+    Graph subagents are consumed with `stream_mode="values"` so each new message can be
+    forwarded as it is produced and the run can be cancelled between steps. Other
+    runnables are invoked directly.
+
+    Args:
+        subagent: The subagent to run.
+        subagent_state: The input state.
+        budget: Limits for the run, or `None` for no limits.
+        on_message: Called with each message the subagent produces.
+
+    Returns:
+        The subagent's final state. If a limit was hit, the state at that point with a
+        final message reporting the early stop.
+    """
+    if not _supports_streaming(subagent):
+        return subagent.invoke(subagent_state)
+
+    started = time.monotonic()
+    num_input = len(subagent_state["messages"])
+    num_seen = num_input
+    state: dict[str, Any] | None = None
+    stream = subagent.stream(subagent_state, stream_mode="values")
+    try:
+        for state in stream:
+            messages = state.get("messages", [])
+            for message in messages[num_seen:]:
+                on_message(message)
+            num_seen = max(num_seen, len(messages))
+            if budget and (reason := _budget_exceeded(budget, messages[num_input:], started)):
+                return _with_partial_result(state, subagent_state, reason)
+    finally:
+        # Closing the stream cancels any remaining steps of the subagent
+        stream.close()
+    return state or {}
+
+
+async def _arun_subagent(
+    subagent: Runnable,
+    subagent_state: dict[str, Any],
+    budget: SubAgentBudget | None,
+    on_message: Callable[[AnyMessage], None],
+) -> dict[str, Any]:
+    """Async version of `_run_subagent`. The wall-clock limit also cancels an in-progress step."""
+    if not _supports_streaming(subagent):
+        return await subagent.ainvoke(subagent_state)
+
+    started = time.monotonic()
+    num_input = len(subagent_state["messages"])
+    num_seen = num_input
+    state: dict[str, Any] | None = None
+    stream = subagent.astream(subagent_state, stream_mode="values")
+    try:
+        async with asyncio.timeout((budget or {}).get("max_seconds")):
+            async for state in stream:
+                messages = state.get("messages", [])
+                for message in messages[num_seen:]:
+                    on_message(message)
+                num_seen = max(num_seen, len(messages))
+                if budget and (reason := _budget_exceeded(budget, messages[num_input:], started)):
+                    return _with_partial_result(state, subagent_state, reason)
+    except TimeoutError:
+        return _with_partial_result(state, subagent_state, f"wall-clock budget of {(budget or {}).get('max_seconds')}s exceeded")
+    finally:
+        await stream.aclose()
+    return state or {}
+
+
+def _message_forwarder(
+    runtime: ToolRuntime,
+    subagent_type: str,
+    write: Callable[[Any], None] | None = None,
+) -> Callable[[AnyMessage], None]:
+    """Forward subagent messages to the parent's custom stream as they are produced.
+
+    Args:
+        runtime: The tool runtime of the parent's tool call.
+        subagent_type: The type of the subagent producing the messages.
+        write: Writer to send the events to. Defaults to `runtime.stream_writer`.
+    """
+    write = write or runtime.stream_writer
+
+    def forward(message: AnyMessage) -> None:
+        write({"type": "subagent_message", "subagent_type": subagent_type, "tool_call_id": runtime.tool_call_id, "message": message})
+
+    return forward
+
+
+def _format_available_agents(subagents: list[_SubagentSpec]) -> str:
+    """Format the available subagent types for tool descriptions."""
+    return "\n".join(f"- {s['name']}: {s['description']}" for s in subagents)
+
+
 def _build_task_tool(
     subagents: list[_SubagentSpec],
     task_description: str | None = None,
@@ -389,7 +758,9 @@ def _build_task_tool(
     """
     # Build the graphs dict and descriptions from the unified spec list
     subagent_graphs: dict[str, Runnable] = {spec["name"]: spec["runnable"] for spec in subagents}
-    subagent_description_str = "\n".join(f"- {s['name']}: {s['description']}" for s in subagents)
+    subagent_state_keys = {spec["name"]: spec.get("state_keys") for spec in subagents}
+    subagent_budgets = {spec["name"]: spec.get("budget") for spec in subagents}
+    subagent_description_str = _format_available_agents(subagents)
 
     # Use custom description if provided, otherwise use default template
     if task_description is None:
@@ -399,19 +770,8 @@ def _build_task_tool(
     else:
         description = task_description
 
-    def _return_command_with_state_update(result: dict, tool_call_id: str) -> Command:
-        # Validate that the result contains a 'messages' key
-        if "messages" not in result:
-            error_msg = (
-                "CompiledSubAgent must return a state containing a 'messages' key. "
-                "Custom StateGraphs used with CompiledSubAgent should include 'messages' "
-                "in their state schema to communicate results back to the main agent."
-            )
-            raise ValueError(error_msg)
-
-        state_update = {k: v for k, v in result.items() if k not in _EXCLUDED_STATE_KEYS}
-        # Strip trailing whitespace to prevent API errors with Anthropic
-        message_text = result["messages"][-1].text.rstrip() if result["messages"][-1].text else ""
+    def _return_command_with_state_update(result: dict, subagent_state: dict, tool_call_id: str) -> Command:
+        state_update, message_text = _extract_subagent_result(result, subagent_state)
         return Command(
             update={
                 **state_update,
@@ -422,10 +782,7 @@ def _build_task_tool(
     def _validate_and_prepare_state(subagent_type: str, description: str, runtime: ToolRuntime) -> tuple[Runnable, dict]:
         """Prepare state for invocation."""
         subagent = subagent_graphs[subagent_type]
-        # Create a new state dict to avoid mutating the original
-        subagent_state = {k: v for k, v in runtime.state.items() if k not in _EXCLUDED_STATE_KEYS}
-        subagent_state["messages"] = [HumanMessage(content=description)]
-        return subagent, subagent_state
+        return subagent, _prepare_subagent_state(runtime.state, description, subagent_state_keys[subagent_type])
 
     def task(
         description: Annotated[
@@ -439,11 +796,11 @@ def _build_task_tool(
             allowed_types = ", ".join([f"`{k}`" for k in subagent_graphs])
             return f"We cannot invoke subagent {subagent_type} because it does not exist, the only allowed types are {allowed_types}"
         subagent, subagent_state = _validate_and_prepare_state(subagent_type, description, runtime)
-        result = subagent.invoke(subagent_state)
+        result = _run_subagent(subagent, subagent_state, subagent_budgets[subagent_type], _message_forwarder(runtime, subagent_type))
         if not runtime.tool_call_id:
             value_error_msg = "Tool call ID is required for subagent invocation"
             raise ValueError(value_error_msg)
-        return _return_command_with_state_update(result, runtime.tool_call_id)
+        return _return_command_with_state_update(result, subagent_state, runtime.tool_call_id)
 
     async def atask(
         description: Annotated[
@@ -457,11 +814,11 @@ def _build_task_tool(
             allowed_types = ", ".join([f"`{k}`" for k in subagent_graphs])
             return f"We cannot invoke subagent {subagent_type} because it does not exist, the only allowed types are {allowed_types}"
         subagent, subagent_state = _validate_and_prepare_state(subagent_type, description, runtime)
-        result = await subagent.ainvoke(subagent_state)
+        result = await _arun_subagent(subagent, subagent_state, subagent_budgets[subagent_type], _message_forwarder(runtime, subagent_type))
         if not runtime.tool_call_id:
             value_error_msg = "Tool call ID is required for subagent invocation"
             raise ValueError(value_error_msg)
-        return _return_command_with_state_update(result, runtime.tool_call_id)
+        return _return_command_with_state_update(result, subagent_state, runtime.tool_call_id)
 
     return StructuredTool.from_function(
         name="task",
@@ -471,6 +828,178 @@ def _build_task_tool(
     )
 
 
+class _BatchTask(TypedDict):
+    """A single task in a `task_batch` call."""
+
+    description: str
+    """A detailed description of the task for the subagent to perform autonomously."""
+
+    subagent_type: str
+    """The type of subagent to use."""
+
+
+def _merge_batch_results(tasks: list[_BatchTask], results: list[tuple[dict[str, Any], dict[str, Any], float]], runtime: ToolRuntime) -> Command:
+    """Merge the results of a `task_batch` call into a single state update."""
+    if not runtime.tool_call_id:
+        value_error_msg = "Tool call ID is required for subagent invocation"
+        raise ValueError(value_error_msg)
+
+    update: dict[str, Any] = {}
+    files_update: dict[str, Any] = {}
+    sections = []
+    timings = []
+    # Merge in task order so the outcome does not depend on completion order:
+    # later tasks win on conflicting keys and file paths
+    for index, (task, (subagent_state, result, duration)) in enumerate(zip(tasks, results, strict=True)):
+        state_update, message_text = _extract_subagent_result(result, subagent_state)
+        files_update.update(state_update.pop("files", None) or {})
+        update.update(state_update)
+        sections.append(f"[{index + 1}] {task['subagent_type']}:\n{message_text}")
+        timings.append({"index": index, "subagent_type": task["subagent_type"], "duration_s": duration})
+    if files_update:
+        update["files"] = files_update
+
+    tool_message = ToolMessage("\n\n".join(sections), tool_call_id=runtime.tool_call_id, artifact={"tasks": timings})
+    return Command(update={**update, "messages": [tool_message]})
+
+
+_T = TypeVar("_T")
+
+
+def _map_in_threads(
+    func: Callable[[int, _BatchTask, Callable[[Any], None]], _T],
+    items: list[tuple[int, _BatchTask]],
+    max_workers: int,
+    write: Callable[[Any], None],
+) -> list[_T]:
+    """Run `func` over `items` in a thread pool, streaming its events from the calling thread.
+
+    Stream writers are not thread-safe, so each worker gets a writer that queues its
+    events, and the calling thread forwards them to `write` as they arrive.
+
+    Args:
+        func: Called with each item's arguments and the worker's writer.
+        items: Arguments of each call.
+        max_workers: Maximum number of calls running at the same time.
+        write: The stream writer of the calling thread.
+
+    Returns:
+        The results, in the order of `items`.
+    """
+    events: queue.SimpleQueue[Any] = queue.SimpleQueue()
+    done = object()
+
+    def run(item: tuple[int, _BatchTask]) -> _T:
+        try:
+            return func(*item, events.put)
+        finally:
+            events.put(done)
+
+    # ContextThreadPoolExecutor propagates the parent's runnable config (callbacks, streaming) to each thread
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run, item) for item in items]
+        running = len(futures)
+        while running:
+            event = events.get()
+            if event is done:
+                running -= 1
+            else:
+                write(event)
+        return [future.result() for future in futures]
+
+
+def _build_task_batch_tool(
+    subagents: list[_SubagentSpec],
+    max_concurrency: int,
+) -> BaseTool:
+    """Create a tool that runs several subagents concurrently.
+
+    Args:
+        subagents: List of subagent specs containing name, description, and runnable.
+        max_concurrency: Maximum number of subagents running at the same time.
+
+    Returns:
+        A StructuredTool that invokes a batch of subagents and merges their results.
+
+    Raises:
+        ValueError: If `max_concurrency` is less than 1.
+    """
+    if max_concurrency < 1:
+        msg = f"batch_task_concurrency must be at least 1, got {max_concurrency}"
+        raise ValueError(msg)
+
+    subagent_graphs: dict[str, Runnable] = {spec["name"]: spec["runnable"] for spec in subagents}
+    subagent_state_keys = {spec["name"]: spec.get("state_keys") for spec in subagents}
+    subagent_budgets = {spec["name"]: spec.get("budget") for spec in subagents}
+    description = TASK_BATCH_TOOL_DESCRIPTION.format(available_agents=_format_available_agents(subagents), max_concurrency=max_concurrency)
+
+    def _validate_tasks(tasks: list[_BatchTask]) -> str | None:
+        if not tasks:
+            return "At least one task must be provided"
+        unknown = sorted({task["subagent_type"] for task in tasks} - subagent_graphs.keys())
+        if unknown:
+            allowed_types = ", ".join([f"`{k}`" for k in subagent_graphs])
+            return f"We cannot invoke subagent(s) {', '.join(unknown)} because they do not exist, the only allowed types are {allowed_types}"
+        return None
+
+    def _report_progress(write: Callable[[Any], None], index: int, task: _BatchTask, result: dict[str, Any], duration: float) -> None:
+        # Stream each result as soon as its subagent finishes, ahead of the merged tool message
+        message_text = result["messages"][-1].text if result.get("messages") else ""
+        write({"type": "task_batch_result", "index": index, "subagent_type": task["subagent_type"], "duration_s": duration, "result": message_text})
+
+    def task_batch(
+        tasks: Annotated[list[_BatchTask], "The tasks to run, each with a `description` and a `subagent_type`."],
+        runtime: ToolRuntime,
+    ) -> str | Command:
+        if (error := _validate_tasks(tasks)) is not None:
+            return error
+
+        def run(index: int, task: _BatchTask, write: Callable[[Any], None]) -> tuple[dict[str, Any], dict[str, Any], float]:
+            start = time.perf_counter()
+            subagent_state = _prepare_subagent_state(runtime.state, task["description"], subagent_state_keys[task["subagent_type"]])
+            subagent_type = task["subagent_type"]
+            result = _run_subagent(
+                subagent_graphs[subagent_type], subagent_state, subagent_budgets[subagent_type], _message_forwarder(runtime, subagent_type, write)
+            )
+            duration = time.perf_counter() - start
+            _report_progress(write, index, task, result, duration)
+            return subagent_state, result, duration
+
+        results = _map_in_threads(run, list(enumerate(tasks)), min(max_concurrency, len(tasks)), runtime.stream_writer)
+        return _merge_batch_results(tasks, results, runtime)
+
+    async def atask_batch(
+        tasks: Annotated[list[_BatchTask], "The tasks to run, each with a `description` and a `subagent_type`."],
+        runtime: ToolRuntime,
+    ) -> str | Command:
+        if (error := _validate_tasks(tasks)) is not None:
+            return error
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(index: int, task: _BatchTask) -> tuple[dict[str, Any], dict[str, Any], float]:
+            async with semaphore:
+                start = time.perf_counter()
+                subagent_state = _prepare_subagent_state(runtime.state, task["description"], subagent_state_keys[task["subagent_type"]])
+                subagent_type = task["subagent_type"]
+                result = await _arun_subagent(
+                    subagent_graphs[subagent_type], subagent_state, subagent_budgets[subagent_type], _message_forwarder(runtime, subagent_type)
+                )
+                duration = time.perf_counter() - start
+            _report_progress(runtime.stream_writer, index, task, result, duration)
+            return subagent_state, result, duration
+
+        results = await asyncio.gather(*(run(index, task) for index, task in enumerate(tasks)))
+        return _merge_batch_results(tasks, list(results), runtime)
+
+    return StructuredTool.from_function(
+        name="task_batch",
+        func=task_batch,
+        coroutine=atask_batch,
+        description=description,
+    )
+
+
 class _DeprecatedKwargs(TypedDict, total=False):
     """TypedDict for deprecated SubAgentMiddleware keyword arguments.
 
@@ -479,6 +1008,7 @@ class _DeprecatedKwargs(TypedDict, total=False):
     """
 
 
+@instrument_middleware
 class SubAgentMiddleware(AgentMiddleware):
     """Middleware for providing subagents to an agent via a `task` tool.
 
@@ -500,6 +1030,14 @@ class SubAgentMiddleware(AgentMiddleware):
         system_prompt: Instructions appended to main agent's system prompt
             about how to use the task tool.
         task_description: Custom description for the task tool.
+        batch_task_concurrency: When set, also adds a `task_batch` tool that runs a
+            list of tasks concurrently, with at most this many subagents running at
+            once. Results are merged in task order and report per-subagent timing in
+            the tool message artifact. `None` (default) disables the tool.
+        subagent_budget: Default token, step, and wall-clock limits for each subagent
+            run. A subagent's own `budget` takes precedence. When a limit is hit, the
+            run is cancelled and the subagent's latest response is returned as a
+            partial result.
 
     Example:
         ```python
@@ -549,6 +1087,8 @@ class SubAgentMiddleware(AgentMiddleware):
         subagents: list[SubAgent | CompiledSubAgent] | None = None,
         system_prompt: str | None = TASK_SYSTEM_PROMPT,
         task_description: str | None = None,
+        batch_task_concurrency: int | None = None,
+        subagent_budget: SubAgentBudget | None = None,
         **deprecated_kwargs: Unpack[_DeprecatedKwargs],
     ) -> None:
         """Initialize the `SubAgentMiddleware`."""
@@ -610,6 +1150,8 @@ class SubAgentMiddleware(AgentMiddleware):
             msg = "SubAgentMiddleware requires either `backend` (new API) or `default_model` (deprecated API)"
             raise ValueError(msg)
 
+        subagent_specs = [{**spec, "budget": spec.get("budget") or subagent_budget} for spec in subagent_specs]
+
         task_tool = _build_task_tool(subagent_specs, task_description)
 
         # Build system prompt with available agents
@@ -620,6 +1162,10 @@ class SubAgentMiddleware(AgentMiddleware):
             self.system_prompt = system_prompt
 
         self.tools = [task_tool]
+        if batch_task_concurrency is not None:
+            self.tools.append(_build_task_batch_tool(subagent_specs, batch_task_concurrency))
+            if self.system_prompt:
+                self.system_prompt += "\n\n" + TASK_BATCH_SYSTEM_PROMPT
 
     def _get_subagents(self) -> list[_SubagentSpec]:
         """Create runnable agents from specs.
@@ -633,7 +1179,15 @@ class SubAgentMiddleware(AgentMiddleware):
             if "runnable" in spec:
                 # CompiledSubAgent - use as-is
                 compiled = cast("CompiledSubAgent", spec)
-                specs.append({"name": compiled["name"], "description": compiled["description"], "runnable": compiled["runnable"]})
+                specs.append(
+                    {
+                        "name": compiled["name"],
+                        "description": compiled["description"],
+                        "runnable": compiled["runnable"],
+                        "state_keys": compiled.get("state_keys"),
+                        "budget": compiled.get("budget"),
+                    }
+                )
                 continue
 
             # SubAgent - validate required fields
@@ -644,34 +1198,41 @@ class SubAgentMiddleware(AgentMiddleware):
                 msg = f"SubAgent '{spec['name']}' must specify 'tools'"
                 raise ValueError(msg)
 
-            # Resolve model if string
-            model = spec["model"]
-            if isinstance(model, str):
-                model = init_chat_model(model)
-
-            # Use middleware as provided (caller is responsible for building full stack)
-            middleware: list[AgentMiddleware] = list(spec.get("middleware", []))
-
-            interrupt_on = spec.get("interrupt_on")
-            if interrupt_on:
-                middleware.append(HumanInTheLoopMiddleware(interrupt_on=interrupt_on))
-
             specs.append(
                 {
                     "name": spec["name"],
                     "description": spec["description"],
-                    "runnable": create_agent(
-                        model,
-                        system_prompt=spec["system_prompt"],
-                        tools=spec["tools"],
-                        middleware=middleware,
-                        name=spec["name"],
-                    ),
+                    "state_keys": spec.get("state_keys"),
+                    "budget": spec.get("budget"),
+                    "runnable": _LazySubAgentGraph(spec["name"], (spec,), partial(self._compile_subagent, cast("SubAgent", spec))),
                 }
             )
 
         return specs
 
+    @staticmethod
+    def _compile_subagent(spec: SubAgent) -> Runnable:
+        """Compile a fully-specified subagent into an agent graph."""
+        # Resolve model if string
+        model = spec["model"]
+        if isinstance(model, str):
+            model = init_chat_model(model)
+
+        # Use middleware as provided (caller is responsible for building full stack)
+        middleware: list[AgentMiddleware] = list(spec.get("middleware", []))
+
+        interrupt_on = spec.get("interrupt_on")
+        if interrupt_on:
+            middleware.append(HumanInTheLoopMiddleware(interrupt_on=interrupt_on))
+
+        return create_agent(
+            model,
+            system_prompt=spec["system_prompt"],
+            tools=spec["tools"],
+            middleware=middleware,
+            name=spec["name"],
+        )
+
     def wrap_model_call(
         self,
         request: ModelRequest,
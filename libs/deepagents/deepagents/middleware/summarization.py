@@ -55,6 +55,9 @@ from langgraph.config import get_config
 from langgraph.types import Command
 from typing_extensions import TypedDict
 
+from deepagents.instrumentation import instrument_middleware, span
+from deepagents.middleware._utils import resolve_backend
+
 if TYPE_CHECKING:
     from collections.abc import Awaitable, Callable
 
@@ -156,6 +159,7 @@ def _compute_summarization_defaults(model: BaseChatModel) -> SummarizationDefaul
     }
 
 
+@instrument_middleware
 class _DeepAgentsSummarizationMiddleware(AgentMiddleware):
     """Summarization middleware with backend for conversation history offloading."""
 
@@ -185,6 +189,9 @@ class _DeepAgentsSummarizationMiddleware(AgentMiddleware):
 
                 Defaults to keeping last 20 messages.
             token_counter: Function to count tokens in messages.
+
+                Use `deepagents.tokenizers.message_token_counter` to count with the same
+                tokenizer as `FilesystemMiddleware` eviction.
             summary_prompt: Prompt template for generating summaries.
             trim_tokens_to_summarize: Max tokens to include when generating summary.
 
@@ -278,11 +285,13 @@ class _DeepAgentsSummarizationMiddleware(AgentMiddleware):
 
     def _create_summary(self, messages_to_summarize: list[AnyMessage]) -> str:
         """Generate summary for the given messages."""
-        return self._lc_helper._create_summary(messages_to_summarize)
+        with span("summarization.summarize", messages=len(messages_to_summarize)):
+            return self._lc_helper._create_summary(messages_to_summarize)
 
     async def _acreate_summary(self, messages_to_summarize: list[AnyMessage]) -> str:
         """Generate summary for the given messages (async)."""
-        return await self._lc_helper._acreate_summary(messages_to_summarize)
+        with span("summarization.summarize", messages=len(messages_to_summarize)):
+            return await self._lc_helper._acreate_summary(messages_to_summarize)
 
     def _get_backend(
         self,
@@ -313,7 +322,7 @@ class _DeepAgentsSummarizationMiddleware(AgentMiddleware):
                 config=config,
                 tool_call_id=None,
             )
-            return self._backend(tool_runtime)  # type: ignore[arg-type]
+            return resolve_backend(self._backend, tool_runtime)
         return self._backend
 
     def _get_thread_id(self) -> str:
@@ -822,7 +831,8 @@ A condensed summary follows:
 
         # Offload to backend first - abort summarization if this fails to prevent data loss
         backend = self._get_backend(request.state, request.runtime)
-        file_path = self._offload_to_backend(backend, messages_to_summarize)
+        with span("summarization.offload", messages=len(messages_to_summarize)):
+            file_path = self._offload_to_backend(backend, messages_to_summarize)
         if file_path is None:
             warnings.warn(
                 "Offloading conversation history to backend failed during summarization.",
@@ -917,7 +927,8 @@ A condensed summary follows:
 
         # Offload to backend first - abort summarization if this fails to prevent data loss
         backend = self._get_backend(request.state, request.runtime)
-        file_path = await self._aoffload_to_backend(backend, messages_to_summarize)
+        with span("summarization.offload", messages=len(messages_to_summarize)):
+            file_path = await self._aoffload_to_backend(backend, messages_to_summarize)
         if file_path is None:
             warnings.warn(
                 "Offloading conversation history to backend failed during summarization.",
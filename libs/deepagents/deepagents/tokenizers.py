@@ -0,0 +1,195 @@
+"""Pluggable tokenizers for estimating the token size of tool results and messages.
+
+A tokenizer is any callable that takes a string and returns a token count. The default,
+`count_tokens_by_chars`, is the cheap 4-characters-per-token estimate used throughout
+deepagents. It is badly off for code, JSON and CJK text, so `count_tokens_heuristic`
+(character-class aware, still local and fast) and `bpe_tokenizer` (exact byte-level BPE
+counts via the optional `tiktoken` package) are provided as drop-in alternatives.
+
+Tokenizers are used by `FilesystemMiddleware` for eviction and truncation thresholds,
+and can back the summarization trigger via `message_token_counter`.
+"""
+
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, convert_to_messages
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+Tokenizer = Callable[[str], int]
+"""Callable that returns the number of tokens in a string."""
+
+# Approximate number of characters per token for the default estimate.
+# Using 4 chars per token as a conservative approximation (actual ratio varies by content)
+NUM_CHARS_PER_TOKEN = 4
+
+_PUNCTUATION = "!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~"
+
+# Overhead added per message by chat formats (role markers, separators)
+_TOKENS_PER_MESSAGE = 3
+
+
+def count_tokens_by_chars(text: str) -> int:
+    """Estimate tokens as one token per `NUM_CHARS_PER_TOKEN` characters.
+
+    Args:
+        text: The text to measure.
+
+    Returns:
+        The estimated token count, rounded up.
+    """
+    return math.ceil(len(text) / NUM_CHARS_PER_TOKEN)
+
+
+def count_tokens_heuristic(text: str) -> int:
+    """Estimate tokens from character classes without a vocabulary.
+
+    Byte-level BPE vocabularies merge runs of ASCII letters, digits and whitespace into
+    tokens of roughly four characters, while punctuation (dominant in code and JSON)
+    rarely merges beyond pairs and non-ASCII characters (e.g. CJK) usually cost at least
+    one token each. Counting these classes separately tracks real tokenizers much more
+    closely than a flat character ratio, at the cost of a few extra passes over the text.
+
+    Args:
+        text: The text to measure.
+
+    Returns:
+        The estimated token count, rounded up.
+    """
+    if not text:
+        return 0
+    non_ascii = len(text) - len(text.encode("ascii", "ignore"))
+    punctuation = sum(text.count(char) for char in _PUNCTUATION)
+    word_chars = len(text) - non_ascii - punctuation
+    return math.ceil(word_chars / NUM_CHARS_PER_TOKEN + punctuation / 2 + non_ascii)
+
+
+class CachedTokenizer:
+    """Tokenizer wrapper that caches counts per content hash.
+
+    Counting the same tool result or message repeatedly (e.g. once per turn for the
+    summarization trigger) only runs the wrapped tokenizer once. Entries are keyed by a
+    digest of the text rather than the text itself, so the cache never retains large
+    tool outputs.
+
+    Args:
+        tokenizer: The tokenizer whose results should be cached.
+        maxsize: Maximum number of cached counts. Least recently used entries are dropped.
+        min_length: Texts shorter than this are counted directly, since hashing them
+            costs about as much as counting.
+    """
+
+    def __init__(self, tokenizer: Tokenizer, *, maxsize: int = 4096, min_length: int = 256) -> None:
+        """Initialize the cache around `tokenizer`."""
+        self.tokenizer = tokenizer
+        self._maxsize = maxsize
+        self._min_length = min_length
+        self._cache: OrderedDict[bytes, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> int:
+        """Return the (possibly cached) token count for `text`."""
+        if len(text) < self._min_length:
+            return self.tokenizer(text)
+
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            count = self._cache.get(key)
+            if count is not None:
+                self._cache.move_to_end(key)
+                return count
+
+        count = self.tokenizer(text)
+        with self._lock:
+            self._cache[key] = count
+            if len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+        return count
+
+    def cache_clear(self) -> None:
+        """Drop all cached counts."""
+        with self._lock:
+            self._cache.clear()
+
+
+def bpe_tokenizer(encoding_name: str = "o200k_base", *, maxsize: int = 4096) -> CachedTokenizer:
+    """Create a cached byte-level BPE tokenizer backed by `tiktoken`.
+
+    Args:
+        encoding_name: The `tiktoken` encoding to use.
+        maxsize: Maximum number of cached counts.
+
+    Returns:
+        A `CachedTokenizer` returning exact token counts for the encoding.
+
+    Raises:
+        ImportError: If `tiktoken` is not installed.
+    """
+    try:
+        import tiktoken  # noqa: PLC0415
+    except ImportError as e:
+        msg = "bpe_tokenizer requires the `tiktoken` package. Install it with `pip install tiktoken`."
+        raise ImportError(msg) from e
+
+    encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return CachedTokenizer(count, maxsize=maxsize)
+
+
+def _message_text(message: BaseMessage) -> str:
+    """Extract the text of a message's content, ignoring non-text blocks."""
+    if isinstance(message.content, str):
+        return message.content
+    parts = []
+    for block in message.content:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and isinstance(block.get("text"), str):
+            parts.append(block["text"])
+    return "\n".join(parts)
+
+
+def message_token_counter(tokenizer: Tokenizer) -> Callable[..., int]:
+    """Create a message token counter (e.g. for summarization triggers) from a tokenizer.
+
+    Args:
+        tokenizer: The tokenizer used to count message text, tool calls and tool schemas.
+
+    Returns:
+        A callable accepting a sequence of messages and an optional `tools` keyword,
+        compatible with the `token_counter` argument of `SummarizationMiddleware`.
+    """
+
+    def count_tokens(messages: Iterable[Any], *, tools: list[BaseTool | dict[str, Any]] | None = None) -> int:
+        total = 0
+        for message in convert_to_messages(messages):
+            total += tokenizer(_message_text(message)) + _TOKENS_PER_MESSAGE
+            if message.name:
+                total += tokenizer(message.name)
+            if isinstance(message, AIMessage) and message.tool_calls:
+                total += tokenizer(json.dumps([{"name": call["name"], "args": call["args"]} for call in message.tool_calls], default=str))
+        for tool in tools or []:
+            total += tokenizer(json.dumps(convert_to_openai_tool(tool), default=str))
+        return total
+
+    return count_tokens
+
+
+__all__ = [
+    "NUM_CHARS_PER_TOKEN",
+    "CachedTokenizer",
+    "Tokenizer",
+    "bpe_tokenizer",
+    "count_tokens_by_chars",
+    "count_tokens_heuristic",
+    "message_token_counter",
+]
@@ -0,0 +1,116 @@
+"""Timing fixture and JSON result storage for the benchmark suite.
+
+Run with `make benchmark`. Every measurement taken through the `bench` fixture is
+written at the end of the session to `.benchmarks/<commit>.json` (or to the path in
+`DEEPAGENTS_BENCHMARK_JSON`), so runs on different commits can be compared. Set
+`DEEPAGENTS_BENCHMARK_COMPARE` to a previous results file to print the change in best
+time for every benchmark present in both runs.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+RESULTS_DIR = Path(__file__).parents[2] / ".benchmarks"
+
+_results: list[dict[str, Any]] = []
+
+
+def _git_commit() -> str:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=RESULTS_DIR.parent)  # noqa: S607
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return result.stdout.strip()
+
+
+class Bench:
+    """Time callables and record the results under the current test's id."""
+
+    def __init__(self, node_id: str) -> None:
+        self._node_id = node_id
+
+    def __call__(self, func: Callable[[], Any], *, label: str | None = None, rounds: int = 5, warmup: int = 1, **metrics: Any) -> float:
+        """Run `func` `warmup + rounds` times and record its timings.
+
+        Args:
+            func: The operation to time.
+            label: Distinguishes several measurements taken in one test.
+            rounds: Number of timed runs.
+            warmup: Number of untimed runs before timing, to fill caches.
+            **metrics: Additional values to store with the result (sizes, byte counts).
+
+        Returns:
+            The best time in seconds.
+        """
+        for _ in range(warmup):
+            func()
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        name = f"{self._node_id}::{label}" if label else self._node_id
+        _results.append(
+            {
+                "name": name,
+                "best_s": min(timings),
+                "median_s": statistics.median(timings),
+                "mean_s": statistics.fmean(timings),
+                "rounds": rounds,
+                "metrics": metrics,
+            }
+        )
+        print(f"\n{name} best={min(timings) * 1000:.3f}ms median={statistics.median(timings) * 1000:.3f}ms {metrics or ''}")  # noqa: T201
+        return min(timings)
+
+
+@pytest.fixture
+def bench(request: pytest.FixtureRequest) -> Bench:
+    return Bench(request.node.nodeid)
+
+
+def _compare(previous_path: Path) -> list[str]:
+    previous = {r["name"]: r for r in json.loads(previous_path.read_text())["results"]}
+    lines = [f"benchmark comparison against {previous_path}:"]
+    for result in _results:
+        before = previous.get(result["name"])
+        if before is None or not before["best_s"]:
+            continue
+        ratio = result["best_s"] / before["best_s"]
+        lines.append(f"  {ratio:6.2f}x  {before['best_s'] * 1000:10.3f}ms -> {result['best_s'] * 1000:10.3f}ms  {result['name']}")
+    return lines
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:  # noqa: ARG001
+    if not _results:
+        return
+    commit = _git_commit()
+    path = Path(os.environ.get("DEEPAGENTS_BENCHMARK_JSON", RESULTS_DIR / f"{commit}.json"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "commit": commit,
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": _results,
+    }
+    path.write_text(json.dumps(payload, indent=2))
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter) -> None:
+    if not _results:
+        return
+    if compare := os.environ.get("DEEPAGENTS_BENCHMARK_COMPARE"):
+        for line in _compare(Path(compare)):
+            terminalreporter.write_line(line)
@@ -0,0 +1,195 @@
+"""Benchmarks for `ls`, `read`, `grep` and `glob` across backends and data sizes."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from langchain.tools import ToolRuntime
+from langgraph.store.memory import InMemoryStore
+
+from deepagents.backends.composite import CompositeBackend
+from deepagents.backends.filesystem import FilesystemBackend
+from deepagents.backends.protocol import BackendProtocol, GlobPage, GrepPage
+from deepagents.backends.state import StateBackend
+from deepagents.backends.store import StoreBackend
+from deepagents.backends.utils import create_file_data
+from deepagents.middleware.filesystem import FilesystemMiddleware
+from tests.benchmarks.conftest import Bench
+
+LINES_PER_FILE = 200
+
+
+def _file_content(index: int) -> str:
+    lines = [f"def function_{index}_{line}(value):  # line {line}" for line in range(LINES_PER_FILE)]
+    # One rare match per file for grep, and a dense token on every line
+    lines[LINES_PER_FILE // 2] = f"NEEDLE = {index}"
+    return "\n".join(lines)
+
+
+def _files(num_files: int, prefix: str) -> dict[str, str]:
+    return {f"{prefix}/pkg_{i % 10}/module_{i}.py": _file_content(i) for i in range(num_files)}
+
+
+def _runtime(files: dict[str, str], store: InMemoryStore | None = None) -> ToolRuntime:
+    return ToolRuntime(
+        state={"messages": [], "files": {path: create_file_data(content) for path, content in files.items()}},
+        context=None,
+        tool_call_id="bench",
+        store=store,
+        stream_writer=lambda _: None,
+        config={},
+    )
+
+
+def _state_backend(tmp_path: Path, num_files: int) -> tuple[BackendProtocol, str]:  # noqa: ARG001
+    return StateBackend(_runtime(_files(num_files, "/src"))), "/src"
+
+
+def _store_backend(tmp_path: Path, num_files: int) -> tuple[BackendProtocol, str]:  # noqa: ARG001
+    store = InMemoryStore()
+    backend = StoreBackend(_runtime({}, store), namespace=lambda _: ("bench",))
+    backend.upload_files([(path, content.encode()) for path, content in _files(num_files, "/src").items()])
+    return backend, "/src"
+
+
+def _filesystem_backend(tmp_path: Path, num_files: int) -> tuple[BackendProtocol, str]:
+    backend = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+    backend.upload_files([(path, content.encode()) for path, content in _files(num_files, "/src").items()])
+    return backend, "/src"
+
+
+def _composite_backend(tmp_path: Path, num_files: int) -> tuple[BackendProtocol, str]:
+    disk = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+    disk.upload_files([(path, content.encode()) for path, content in _files(num_files, "").items()])
+    backend = CompositeBackend(default=StateBackend(_runtime({})), routes={"/disk/": disk})
+    return backend, "/disk"
+
+
+BACKENDS: dict[str, Callable[[Path, int], tuple[BackendProtocol, str]]] = {
+    "state": _state_backend,
+    "store": _store_backend,
+    "filesystem": _filesystem_backend,
+    "composite": _composite_backend,
+}
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("num_files", [100, 1000])
+@pytest.mark.parametrize("backend_name", list(BACKENDS))
+def test_backend_operations(bench: Bench, backend_name: str, num_files: int, tmp_path: Path) -> None:
+    backend, root = BACKENDS[backend_name](tmp_path, num_files)
+    middle = f"{root}/pkg_0/module_{(num_files // 2) // 10 * 10}.py"
+    metrics = {"backend": backend_name, "num_files": num_files, "lines_per_file": LINES_PER_FILE}
+
+    listing = backend.ls_info(f"{root}/pkg_0")
+    bench(lambda: backend.ls_info(f"{root}/pkg_0"), label="ls", **metrics)
+
+    content = backend.read(middle, offset=LINES_PER_FILE // 2, limit=50)
+    bench(lambda: backend.read(middle, offset=LINES_PER_FILE // 2, limit=50), label="read", **metrics)
+
+    sparse = backend.grep_raw("NEEDLE", path=root)
+    bench(lambda: backend.grep_raw("NEEDLE", path=root), label="grep_sparse", rounds=3, **metrics)
+
+    dense = backend.grep_raw("value", path=f"{root}/pkg_0")
+    bench(lambda: backend.grep_raw("value", path=f"{root}/pkg_0"), label="grep_dense", rounds=3, **metrics)
+
+    filtered = backend.grep_raw("NEEDLE", path=root, glob="*.py")
+    bench(lambda: backend.grep_raw("NEEDLE", path=root, glob="*.py"), label="grep_glob", rounds=3, **metrics)
+
+    patterns = ["NEEDLE", "function_7_", "function_42_1(", "line 199", "missing_name"]
+    many = backend.grep_many(patterns, path=root)
+    bench(lambda: [backend.grep_raw(pattern, path=root) for pattern in patterns], label="grep_5_patterns_separately", rounds=3, **metrics)
+    bench(lambda: backend.grep_many(patterns, path=root), label="grep_many_5_patterns", rounds=3, **metrics)
+
+    # A broad search the model only needs the first page of
+    broad = backend.grep_raw("value", path=root)
+    first_page = backend.grep_page("value", path=root, max_results=100)
+    bench(lambda: backend.grep_raw("value", path=root), label="grep_broad", rounds=3, **metrics)
+    bench(lambda: backend.grep_page("value", path=root, max_results=100), label="grep_broad_first_page", rounds=3, **metrics)
+
+    matches = backend.glob_info("**/*.py", path=root)
+    bench(lambda: backend.glob_info("**/*.py", path=root), label="glob", rounds=3, **metrics)
+    glob_page = backend.glob_page("**/*.py", path=root, max_results=100)
+    bench(lambda: backend.glob_page("**/*.py", path=root, max_results=100), label="glob_first_page", rounds=3, **metrics)
+
+    assert len(listing) == num_files // 10
+    assert "NEEDLE" in content
+    assert isinstance(sparse, list)
+    assert len(sparse) == num_files
+    assert filtered == sparse
+    assert isinstance(many, dict)
+    assert many["NEEDLE"] == sparse
+    assert isinstance(dense, list)
+    assert len(dense) == num_files // 10 * LINES_PER_FILE - num_files // 10
+    assert len(matches) == num_files
+    assert isinstance(first_page, GrepPage)
+    assert len(first_page.matches) == 100
+    assert first_page.next_cursor is not None
+    assert isinstance(broad, list)
+    assert len(broad) > 100
+    assert isinstance(glob_page, GlobPage)
+    assert glob_page.files == matches[:100]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("match_every", [0, 1000, 100, 10, 1])
+def test_state_grep_match_density(bench: Bench, match_every: int, compact: bool) -> None:  # noqa: FBT001
+    """Literal grep over 1000 files of 200 lines, with a match on every `match_every`-th line (none for 0)."""
+    num_lines = 200
+    files = {}
+    for i in range(1000):
+        lines = [f"def function_{i}_{line}(value):  # line {line}" for line in range(num_lines)]
+        for line in range(num_lines):
+            if match_every and (i * num_lines + line) % match_every == 0:
+                lines[line] += "  # MATCH"
+        files[f"/src/module_{i}.py"] = create_file_data("\n".join(lines), compact=compact)
+    backend = StateBackend(
+        ToolRuntime(state={"messages": [], "files": files}, context=None, tool_call_id="bench", store=None, stream_writer=lambda _: None, config={})
+    )
+
+    matches = backend.grep_raw("MATCH", path="/src")
+    bench(lambda: backend.grep_raw("MATCH", path="/src"), label="grep", rounds=5, match_every=match_every, compact=compact)
+    assert isinstance(matches, list)
+    assert len(matches) == (1000 * num_lines // match_every if match_every else 0)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("match_every", [0, 100, 10])
+def test_middleware_grep_with_backend_factory(bench: Bench, match_every: int) -> None:
+    """The `grep` tool over 1000 files of 200 lines, with a new `StateBackend` per call as agents build them."""
+    num_lines = 200
+    files = {}
+    for i in range(1000):
+        lines = [f"def function_{i}_{line}(value):  # line {line}" for line in range(num_lines)]
+        for line in range(num_lines):
+            if match_every and (i * num_lines + line) % match_every == 0:
+                lines[line] += "  # MATCH"
+        files[f"/src/module_{i}.py"] = create_file_data("\n".join(lines))
+    grep_tool = next(tool for tool in FilesystemMiddleware(backend=StateBackend).tools if tool.name == "grep")
+    state = {"messages": [], "files": files}
+    runtime = ToolRuntime(state=state, context=None, tool_call_id="bench", store=None, stream_writer=lambda _: None, config={})
+
+    def grep() -> str:
+        return grep_tool.func(pattern="MATCH", path="/src", output_mode="count", runtime=runtime)
+
+    result = grep()
+    bench(grep, label="grep_tool", rounds=5, match_every=match_every)
+    assert ("No matches found" in result) == (match_every == 0)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("read_cache_mb", [None, 64])
+def test_filesystem_repeated_read(bench: Bench, read_cache_mb: int | None, tmp_path: Path) -> None:
+    """Read 100 lines of a 20,000-line file and download it, as agents do before every edit."""
+    lines = [f"def function_{line}(value):  # line {line}" for line in range(20_000)]
+    (tmp_path / "big.py").write_text("\n".join(lines))
+    backend = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True, read_cache_mb=read_cache_mb)
+
+    content = backend.read("/big.py", offset=10_000, limit=100)
+    bench(lambda: backend.read("/big.py", offset=10_000, limit=100), label="read", rounds=20, read_cache_mb=read_cache_mb)
+    bench(lambda: backend.download_files(["/big.py"]), label="download", rounds=20, read_cache_mb=read_cache_mb)
+
+    assert "function_10000(" in content
+    if read_cache_mb is not None:
+        assert backend.read_cache_stats()["hit_ratio"] > 0.9
@@ -0,0 +1,42 @@
+"""Benchmarks for `create_deep_agent` startup time and per-turn overhead."""
+
+from itertools import repeat
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from deepagents.graph import create_deep_agent
+from deepagents.middleware.subagents import SubAgent
+from tests.benchmarks.conftest import Bench
+from tests.unit_tests.chat_model import GenericFakeChatModel
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("num_subagents", [1, 10, 50])
+def test_create_deep_agent_startup(bench: Bench, num_subagents: int) -> None:
+    subagents = [SubAgent(name=f"agent-{i}", description=f"Agent {i}.", system_prompt="You help.") for i in range(num_subagents)]
+
+    best = bench(
+        lambda: create_deep_agent(model=GenericFakeChatModel(messages=iter([AIMessage(content="done")])), subagents=subagents),
+        rounds=3,
+        num_subagents=num_subagents,
+    )
+
+    # Subagents compile on first use, so startup does not grow with the number of subagent types
+    assert best < 1.0
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("history_turns", [0, 200])
+def test_create_deep_agent_turn_overhead(bench: Bench, history_turns: int) -> None:
+    """Time one agent turn with a model that answers instantly, i.e. pure framework overhead."""
+    agent = create_deep_agent(model=GenericFakeChatModel(messages=repeat(AIMessage(content="done"))))
+    history = []
+    for turn in range(history_turns):
+        history += [HumanMessage(content=f"question {turn}"), AIMessage(content=f"answer {turn}")]
+    state = {"messages": [*history, HumanMessage(content="hello")]}
+
+    result = agent.invoke(state)
+    bench(lambda: agent.invoke(state), rounds=10, history_messages=len(history))
+
+    assert result["messages"][-1].content == "done"
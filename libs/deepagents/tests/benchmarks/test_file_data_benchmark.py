@@ -0,0 +1,68 @@
+"""Benchmark memory and checkpoint serialization of `FileData` representations and edits."""
+
+import tracemalloc
+
+import pytest
+from langchain.tools import ToolRuntime
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from deepagents.backends.state import StateBackend
+from deepagents.backends.utils import create_file_data
+from deepagents.middleware.filesystem import _file_data_reducer
+from tests.benchmarks.conftest import Bench
+
+NUM_FILES = 1000
+LINES_PER_FILE = 200
+
+
+def _content(index: int) -> str:
+    return "\n".join(f"def function_{index}_{line}(value):  # line {line}" for line in range(LINES_PER_FILE))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("compact", [False, True])
+def test_file_data_memory_and_checkpoint(bench: Bench, compact: bool) -> None:  # noqa: FBT001
+    contents = {f"/src/module_{i}.py": _content(i) for i in range(NUM_FILES)}
+    text_bytes = sum(len(content.encode()) for content in contents.values())
+
+    tracemalloc.start()
+    files = {path: create_file_data(content, compact=compact) for path, content in contents.items()}
+    memory_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    serde = JsonPlusSerializer()
+    checkpoint = serde.dumps_typed(files)
+    metrics = {
+        "compact": compact,
+        "num_files": NUM_FILES,
+        "text_bytes": text_bytes,
+        "memory_bytes": memory_bytes,
+        "checkpoint_bytes": len(checkpoint[1]),
+    }
+    bench(lambda: serde.dumps_typed(files), label="serialize", **metrics)
+    bench(lambda: serde.loads_typed(checkpoint), label="deserialize", **metrics)
+
+    assert serde.loads_typed(checkpoint) == files
+    if compact:
+        # One blob per file: close to the size of the text itself
+        assert memory_bytes < text_bytes * 1.5
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("delta_edits", [False, True])
+def test_edit_update_size(bench: Bench, delta_edits: bool) -> None:  # noqa: FBT001
+    lines = 20_000
+    files = {"/big.py": create_file_data("\n".join(f"value_{i} = {i}" for i in range(lines)))}
+    runtime = ToolRuntime(
+        state={"messages": [], "files": files}, context=None, tool_call_id="t1", store=None, stream_writer=lambda _: None, config={}
+    )
+    backend = StateBackend(runtime, delta_edits=delta_edits)
+    update = backend.edit("/big.py", "value_10000 = 10000", "value_10000 = 10001").files_update
+
+    serde = JsonPlusSerializer()
+    metrics = {"delta_edits": delta_edits, "lines": lines, "update_bytes": len(serde.dumps_typed(update)[1])}
+    bench(lambda: backend.edit("/big.py", "value_10000 = 10000", "value_10000 = 10001"), label="edit", **metrics)
+    bench(lambda: _file_data_reducer(files, update), label="reduce", **metrics)
+
+    if delta_edits:
+        assert metrics["update_bytes"] < 200
@@ -0,0 +1,72 @@
+"""Benchmarks for large tool result eviction and summarization token counting."""
+
+import pytest
+from langchain.agents.middleware.types import ModelRequest, ModelResponse
+from langchain.tools import ToolRuntime
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage, ToolCall, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from deepagents.backends.state import StateBackend
+from deepagents.middleware.filesystem import FilesystemMiddleware
+from deepagents.middleware.summarization import _DeepAgentsSummarizationMiddleware
+from deepagents.tokenizers import count_tokens_heuristic, message_token_counter
+from tests.benchmarks.conftest import Bench
+from tests.unit_tests.chat_model import GenericFakeChatModel
+
+
+def _runtime() -> ToolRuntime:
+    return ToolRuntime(state={"messages": [], "files": {}}, context=None, tool_call_id="bench", store=None, stream_writer=lambda _: None, config={})
+
+
+def _history(num_messages: int) -> list[AnyMessage]:
+    """Build a history of tool-calling turns with realistically sized tool results."""
+    messages: list[AnyMessage] = []
+    turn = 0
+    while len(messages) < num_messages:
+        call_id = f"call_{turn}"
+        messages.append(HumanMessage(content=f"Look at file {turn} and summarize it."))
+        messages.append(AIMessage(content="", tool_calls=[ToolCall(id=call_id, name="read_file", args={"file_path": f"/src/module_{turn}.py"})]))
+        messages.append(ToolMessage(content="\n".join(f"{i:6d}\tdef f_{i}(x): return x * {i}" for i in range(40)), tool_call_id=call_id))
+        turn += 1
+    return messages
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("num_lines", [10_000, 100_000])
+def test_evict_large_tool_result(bench: Bench, num_lines: int) -> None:
+    middleware = FilesystemMiddleware(backend=StateBackend)
+    content = "\n".join(f"row {i}: " + "x" * 40 for i in range(num_lines))
+    message = ToolMessage(content=content, tool_call_id="large")
+
+    result = middleware._intercept_large_tool_result(message, _runtime())
+    bench(lambda: middleware._intercept_large_tool_result(message, _runtime()), content_bytes=len(content.encode()))
+
+    assert "/large_tool_results/" in next(iter(result.update["files"]))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("counter", ["approximate", "heuristic"])
+@pytest.mark.parametrize("num_messages", [1_000, 10_000])
+def test_summarization_token_counting(bench: Bench, counter: str, num_messages: int) -> None:
+    token_counter = count_tokens_approximately if counter == "approximate" else message_token_counter(count_tokens_heuristic)
+    model = GenericFakeChatModel(messages=iter([]))
+    middleware = _DeepAgentsSummarizationMiddleware(
+        model=model,
+        backend=StateBackend,
+        # A trigger that is never reached isolates the per-call counting overhead
+        trigger=("tokens", 10**9),
+        token_counter=token_counter,
+        truncate_args_settings={"trigger": ("messages", 10**9), "keep": ("messages", 20)},
+    )
+    messages = _history(num_messages)
+    request = ModelRequest(
+        model=model,
+        messages=messages,
+        system_message=SystemMessage(content="You are a deep agent."),
+        tools=[],
+        state={"messages": messages},
+    )
+    response = ModelResponse(result=[AIMessage(content="ok")])
+
+    bench(lambda: token_counter(messages), label="count", num_messages=num_messages)
+    bench(lambda: middleware.wrap_model_call(request, lambda _: response), label="wrap_model_call", num_messages=num_messages)
@@ -0,0 +1,61 @@
+"""Benchmark for `PatchToolCallsMiddleware` on long message histories."""
+
+import pytest
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolCall, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.types import Overwrite
+
+from deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
+from tests.benchmarks.conftest import Bench
+
+NUM_MESSAGES = 10_000
+
+
+def _history(num_messages: int, *, dangling_tail: bool) -> list[AnyMessage]:
+    """Build a history of human/AI/tool turns, optionally ending in a dangling tool call."""
+    messages: list[AnyMessage] = []
+    turn = 0
+    while len(messages) < num_messages:
+        call_id = f"call_{turn}"
+        messages.append(HumanMessage(content=f"question {turn}", id=f"h{turn}"))
+        messages.append(AIMessage(content="", tool_calls=[ToolCall(id=call_id, name="grep", args={"pattern": "x"})], id=f"a{turn}"))
+        messages.append(ToolMessage(content="no matches", tool_call_id=call_id, id=f"t{turn}"))
+        turn += 1
+    if dangling_tail:
+        messages.append(AIMessage(content="", tool_calls=[ToolCall(id="dangling", name="ls", args={"path": "/"})], id="dangling"))
+    return messages
+
+
+def _update_bytes(update: dict | None) -> int:
+    """Size of the state update as it would be written to a checkpoint."""
+    if update is None:
+        return 0
+    value = update["messages"]
+    payload = value.value if isinstance(value, Overwrite) else value
+    return len(JsonPlusSerializer().dumps_typed(payload)[1])
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("dangling_tail", [False, True])
+def test_patch_tool_calls_long_history(bench: Bench, dangling_tail: bool) -> None:  # noqa: FBT001
+    middleware = PatchToolCallsMiddleware()
+    messages = _history(NUM_MESSAGES, dangling_tail=dangling_tail)
+
+    update = middleware.before_agent({"messages": messages}, None)
+    update_bytes = _update_bytes(update)
+    full_history_bytes = len(JsonPlusSerializer().dumps_typed(messages)[1])
+    best = bench(
+        lambda: middleware.before_agent({"messages": messages}, None),
+        num_messages=len(messages),
+        update_bytes=update_bytes,
+        full_history_bytes=full_history_bytes,
+    )
+
+    # Linear scan: 10k messages stays well under the cost of rewriting the history
+    assert best < 0.5
+    if dangling_tail:
+        assert isinstance(update["messages"], list)
+        assert len(update["messages"]) == 1
+    else:
+        assert update is None
+    assert update_bytes < full_history_bytes / 100
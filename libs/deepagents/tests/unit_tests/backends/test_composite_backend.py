@@ -10,6 +10,7 @@ from deepagents.backends.composite import CompositeBackend
 from deepagents.backends.filesystem import FilesystemBackend
 from deepagents.backends.protocol import (
     ExecuteResponse,
+    GrepPage,
     SandboxBackendProtocol,
     WriteResult,
 )
@@ -982,6 +983,44 @@ def test_composite_grep_multiple_routes_aggregation(tmp_path: Path) -> None:
     assert match_paths == expected_paths
 
 
+def test_composite_grep_many_matches_grep_raw_per_pattern(tmp_path: Path) -> None:
+    """grep_many routes like grep_raw and returns its matches for every pattern."""
+    rt = make_runtime("t_grep_many")
+    (tmp_path / "default.txt").write_text("alpha beta\ngamma")
+    comp = CompositeBackend(default=FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True), routes={"/memories/": StoreBackend(rt)})
+    comp.write("/memories/mem.txt", "beta\nalphabet\nnothing")
+    comp.write("/memories/sub/deep.md", "gamma alpha")
+
+    patterns = ["alpha", "beta", "gamma", "missing"]
+    for path, glob in [("/", None), (None, None), ("/memories/", None), ("/memories/sub", None), ("/", "*.txt")]:
+        assert comp.grep_many(patterns, path=path, glob=glob) == {p: comp.grep_raw(p, path=path, glob=glob) for p in patterns}
+
+
+def test_composite_grep_page_and_glob_page_match_unpaged_results(tmp_path: Path) -> None:
+    """Pages route like grep_raw and glob_info and concatenate to their results."""
+    rt = make_runtime("t_grep_page")
+    (tmp_path / "default.txt").write_text("alpha\nalpha beta")
+    comp = CompositeBackend(default=FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True), routes={"/memories/": StoreBackend(rt)})
+    comp.write("/memories/mem.txt", "alpha\nbeta\nalphabet")
+    comp.write("/memories/sub/deep.txt", "alpha")
+
+    def all_pages(search, max_results):
+        items, cursor = [], None
+        while True:
+            page = search(max_results=max_results, cursor=cursor)
+            items.extend(page.matches if isinstance(page, GrepPage) else page.files)
+            if page.next_cursor is None:
+                return items
+            cursor = page.next_cursor
+
+    for max_results in [1, 2, 10]:
+        for path in ["/", None, "/memories/", "/memories/sub"]:
+            assert all_pages(lambda path=path, **kw: comp.grep_page("alpha", path, **kw), max_results) == comp.grep_raw("alpha", path)
+        for path in ["/", "/memories/"]:
+            assert all_pages(lambda path=path, **kw: comp.glob_page("**/*.txt", path, **kw), max_results) == comp.glob_info("**/*.txt", path)
+    assert comp.grep_page("alpha", max_results=1, cursor="x") == "Error: Invalid cursor 'x'"
+
+
 def test_composite_grep_error_in_routed_backend() -> None:
     """Test grep error handling when routed backend returns error string."""
     rt = make_runtime("t_grep_err1")
@@ -1,11 +1,14 @@
+import os
+from collections.abc import Callable
 from pathlib import Path
+from typing import Any
 
 import pytest
 from langchain.tools import ToolRuntime
 from langchain_core.messages import ToolMessage
 
 from deepagents.backends.filesystem import FilesystemBackend
-from deepagents.backends.protocol import EditResult, WriteResult
+from deepagents.backends.protocol import EditResult, GlobPage, GrepPage, WriteResult
 from deepagents.middleware.filesystem import FilesystemMiddleware
 
 
@@ -521,3 +524,110 @@ def test_grep_literal_search_with_special_chars(tmp_path: Path, pattern: str, ex
     matches = be.grep_raw(pattern, path="/")
     assert isinstance(matches, list)
     assert any(expected_file in m["path"] for m in matches), f"Pattern '{pattern}' not found in {expected_file}"
+
+
+def test_filesystem_download_file_prefixes(tmp_path: Path):
+    """Test that prefix downloads read at most `max_bytes` of each file."""
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+    (tmp_path / "long.txt").write_bytes(b"0123456789" * 100)
+    (tmp_path / "short.txt").write_bytes(b"tiny")
+
+    responses = be.download_file_prefixes(["/long.txt", "/short.txt", "/missing.txt"], 16)
+
+    assert [r.content for r in responses] == [b"0123456789012345", b"tiny", None]
+    assert responses[2].error == "file_not_found"
+
+
+def test_filesystem_grep_page_and_glob_page(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test that pages cover every match once and that the first page stops the search early."""
+    for i in range(5):
+        write_file(tmp_path / f"dir{i % 2}" / f"f{i}.txt", "hit\nmiss\nhit again")
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+
+    def all_pages(search: Callable[..., GrepPage | GlobPage], max_results: int) -> list:
+        items, cursor = [], None
+        while True:
+            page = search(max_results=max_results, cursor=cursor)
+            items.extend(page.matches if isinstance(page, GrepPage) else page.files)
+            if page.next_cursor is None:
+                return items
+            cursor = page.next_cursor
+
+    matches = all_pages(lambda **kw: be.grep_page("hit", path="/", **kw), 3)
+    assert matches == sorted(be.grep_raw("hit", path="/"), key=lambda m: (m["path"], m["line"]))
+    assert all_pages(lambda **kw: be.glob_page("**/*.txt", "/", **kw), 2) == be.glob_info("**/*.txt", "/")
+
+    read_text = Path.read_text
+    reads: list[Path] = []
+
+    def counting_read_text(self: Path, *args: Any, **kwargs: Any) -> str:
+        reads.append(self)
+        return read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", counting_read_text)
+    be.grep_page("hit", path="/", max_results=1)
+    assert len(reads) == 1
+
+
+def test_filesystem_read_cache_matches_uncached_reads(tmp_path: Path):
+    """Test that cached reads and downloads return what uncached ones do, including line break edge cases."""
+    (tmp_path / "breaks.txt").write_bytes("a\r\nb\rc\n\nd\x0be\u2028f\n".encode())
+    (tmp_path / "blank.txt").write_text("  \n\t")
+    (tmp_path / "binary.bin").write_bytes(b"\xff\xfe")
+    (tmp_path / "link.txt").symlink_to(tmp_path / "breaks.txt")
+    plain = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+    cached = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True, read_cache_mb=1)
+
+    for path in ["/breaks.txt", "/blank.txt", "/binary.bin", "/link.txt", "/missing.txt"]:
+        for offset, limit in [(0, 2000), (1, 2), (5, 10), (9, 1)]:
+            # Second round served from the cache
+            for _ in range(2):
+                assert cached.read(path, offset, limit) == plain.read(path, offset, limit)
+        for _ in range(2):
+            assert cached.download_files([path]) == plain.download_files([path])
+            assert cached.download_file_prefixes([path], 3) == plain.download_file_prefixes([path], 3)
+    assert plain.read_cache_stats() is None
+
+
+def test_filesystem_read_cache_invalidation_and_stats(tmp_path: Path):
+    """Test that changed files are read again and that the budget bounds the cache."""
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True, read_cache_mb=0.01)
+    path = tmp_path / "f.txt"
+    path.write_text("one\ntwo")
+    assert "one" in be.read("/f.txt")
+    assert "one" in be.read("/f.txt")
+
+    # Changed on disk behind the backend's back
+    path.write_text("three\nfour")
+    assert "three" in be.read("/f.txt")
+
+    # Our own same-size edit is seen even when the modification time is unchanged
+    mtime_ns = path.stat().st_mtime_ns
+    be.edit("/f.txt", "three", "eerht")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    assert "eerht" in be.read("/f.txt")
+
+    stats = be.read_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"], stats["entries"]) == (1, 3, 0.25, 1)
+
+    # Files beyond the budget evict the least recently read ones
+    for i in range(5):
+        (tmp_path / f"big{i}.txt").write_text("x" * 4000)
+        be.read(f"/big{i}.txt")
+    stats = be.read_cache_stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_filesystem_stat_files(tmp_path: Path):
+    """Test that stat_files reports regular files and None for anything else."""
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "dir" / "a.txt").write_text("hello")
+    be = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=True)
+
+    info, missing, directory, escaped = be.stat_files(["/dir/a.txt", "/dir/missing.txt", "/dir", "/../etc/passwd"])
+    assert info is not None
+    assert info["path"] == "/dir/a.txt"
+    assert info["size"] == 5
+    assert info["modified_at"]
+    assert (missing, directory, escaped) == (None, None, None)
@@ -10,6 +10,8 @@ that need to be escaped as {{e}} for Python's .format() method.
 
 import base64
 import json
+import subprocess
+from pathlib import Path
 
 from deepagents.backends.protocol import (
     ExecuteResponse,
@@ -17,6 +19,7 @@ from deepagents.backends.protocol import (
     FileUploadResponse,
 )
 from deepagents.backends.sandbox import (
+    _DOWNLOAD_PREFIXES_COMMAND_TEMPLATE,
     _EDIT_COMMAND_TEMPLATE,
     _GLOB_COMMAND_TEMPLATE,
     _READ_COMMAND_TEMPLATE,
@@ -93,6 +96,56 @@ def test_read_command_template_format() -> None:
     assert "/test/file.txt" in cmd
 
 
+def test_read_command_template_pages_window(tmp_path: Path) -> None:
+    """Test that the read command returns only the requested window of lines."""
+    file_path = tmp_path / "large.txt"
+    file_path.write_text("".join(f"row {i}\n" for i in range(5000)))
+    cmd = _READ_COMMAND_TEMPLATE.format(file_path=file_path, offset=4000, limit=3)
+
+    result = subprocess.run(cmd, shell=True, capture_output=True, text=True, check=True)  # noqa: S602
+
+    assert result.stdout.splitlines() == ["  4001\trow 4000", "  4002\trow 4001", "  4003\trow 4002"]
+
+
+class LocalSandbox(MockSandbox):
+    """Sandbox that runs commands on the local machine."""
+
+    def execute(self, command: str) -> ExecuteResponse:
+        self.last_command = command
+        result = subprocess.run(command, shell=True, capture_output=True, text=True, check=False)  # noqa: S602
+        return ExecuteResponse(output=result.stdout, exit_code=result.returncode, truncated=False)
+
+
+def test_download_prefixes_command_template_format() -> None:
+    """Test that _DOWNLOAD_PREFIXES_COMMAND_TEMPLATE can be formatted without KeyError."""
+    payload_b64 = base64.b64encode(json.dumps({"paths": ["/test/file.txt"], "max_bytes": 16}).encode()).decode("ascii")
+
+    cmd = _DOWNLOAD_PREFIXES_COMMAND_TEMPLATE.format(payload_b64=payload_b64)
+
+    assert "python3 -c" in cmd
+    assert payload_b64 in cmd
+
+
+def test_sandbox_download_file_prefixes_reads_only_prefixes(tmp_path: Path) -> None:
+    """Test that prefix downloads read at most `max_bytes` of each file in one command."""
+    (tmp_path / "long.txt").write_bytes(b"0123456789" * 100)
+    (tmp_path / "short.txt").write_bytes(b"tiny")
+    paths = [str(tmp_path / name) for name in ("long.txt", "short.txt", "missing.txt")] + [str(tmp_path)]
+
+    responses = LocalSandbox().download_file_prefixes(paths, 16)
+
+    assert [r.content for r in responses] == [b"0123456789012345", b"tiny", None, None]
+    assert [r.error for r in responses] == [None, None, "file_not_found", "is_directory"]
+    assert [r.path for r in responses] == paths
+
+
+def test_sandbox_download_file_prefixes_falls_back_to_downloads() -> None:
+    """Test that files missing from the command output are downloaded in full instead."""
+    responses = MockSandbox().download_file_prefixes(["/a.txt", "/b.txt"], 16)
+
+    assert [(r.path, r.error) for r in responses] == [("/a.txt", "not_implemented"), ("/b.txt", "not_implemented")]
+
+
 def test_sandbox_write_method() -> None:
     """Test that BaseSandbox.write() successfully formats the command."""
     sandbox = MockSandbox()
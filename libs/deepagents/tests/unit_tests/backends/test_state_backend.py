@@ -1,11 +1,16 @@
+import itertools
+
 import pytest
+import wcmatch.glob as wcglob
 from langchain.tools import ToolRuntime
 from langchain_core.messages import ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 from langgraph.types import Command
 
-from deepagents.backends.protocol import EditResult, WriteResult
+from deepagents.backends.protocol import EditResult, GrepPage, WriteResult
 from deepagents.backends.state import StateBackend
-from deepagents.middleware.filesystem import FilesystemMiddleware
+from deepagents.backends.utils import CompactFileData, FilePatch, _JoinedLinesCache, _shared_joined_lines, compile_glob, create_file_data
+from deepagents.middleware.filesystem import FilesystemMiddleware, _file_data_reducer
 
 
 def make_runtime(files=None):
@@ -160,6 +165,23 @@ def test_state_backend_intercept_large_tool_result():
     assert "Tool result too large" in result.update["messages"][0].content
 
 
+def test_state_backend_read_pages_evicted_result():
+    """Test that paging through an evicted result slices the stored lines."""
+    rt = make_runtime()
+    middleware = FilesystemMiddleware(backend=StateBackend, tool_token_limit_before_evict=1000)
+    large_content = "\r\n".join(f"row {i}" for i in range(2000)) + "\r\n"
+    result = middleware._intercept_large_tool_result(ToolMessage(content=large_content, tool_call_id="paged"), rt)
+
+    be = StateBackend(make_runtime(result.update["files"]))
+    page = be.read("/large_tool_results/paged", offset=1500, limit=2)
+    assert page.splitlines() == ["  1501\trow 1500", "  1502\trow 1501"]
+    assert "\r" not in page
+
+    # The trailing newline does not count as an extra line
+    assert be.read("/large_tool_results/paged", offset=1999, limit=5).splitlines() == ["  2000\trow 1999"]
+    assert "exceeds file length (2000 lines)" in be.read("/large_tool_results/paged", offset=2000)
+
+
 @pytest.mark.parametrize(
     ("pattern", "expected_file"),
     [
@@ -323,3 +345,230 @@ def test_state_backend_grep_with_path_variations(path: str, expected_count: int,
     assert len(matches) == expected_count
     match_paths = {m["path"] for m in matches}
     assert match_paths == set(expected_paths)
+
+
+def test_state_backend_download_file_prefixes():
+    """Test that prefix downloads encode and truncate only the requested bytes."""
+    rt = make_runtime()
+    be = StateBackend(rt)
+    rt.state["files"].update(be.write("/notes.txt", "héllo\nworld\n" * 100).files_update)
+
+    responses = be.download_file_prefixes(["/notes.txt", "/missing.txt"], 8)
+
+    assert responses[0].content == "héllo\nworld\n".encode()[:8]
+    assert responses[1].content is None
+    assert responses[1].error == "file_not_found"
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["hello world", "héllo\nwörld\n", "", "  \n\t\n", "\u3000", "line\r\nwith crlf\r\n", "a\n\nb"],
+)
+def test_compact_file_data_reads_like_file_data(content: str) -> None:
+    """CompactFileData behaves exactly like the list-of-lines FileData for every backend operation."""
+    created_at = "2025-01-02T03:04:05.123456+00:00"
+    compact = create_file_data(content, created_at, compact=True)
+    assert isinstance(compact, CompactFileData)
+    plain = dict(compact)
+
+    assert plain["content"] == create_file_data(content)["content"]
+    assert plain["created_at"] == created_at
+    assert plain.keys() == create_file_data(content).keys()
+    assert compact.lines(1, 2) == plain["content"][1:2]
+
+    compact_be = StateBackend(make_runtime({"/f.txt": compact}))
+    plain_be = StateBackend(make_runtime({"/f.txt": plain}))
+    assert compact_be.read("/f.txt") == plain_be.read("/f.txt")
+    assert compact_be.read("/f.txt", offset=1, limit=1) == plain_be.read("/f.txt", offset=1, limit=1)
+    assert compact_be.ls_info("/") == plain_be.ls_info("/")
+    assert compact_be.grep_raw("l", path="/") == plain_be.grep_raw("l", path="/")
+    assert compact_be.download_files(["/f.txt"]) == plain_be.download_files(["/f.txt"])
+    assert compact_be.download_file_prefixes(["/f.txt"], 3) == plain_be.download_file_prefixes(["/f.txt"], 3)
+
+
+def test_state_backend_compact_files_round_trip_checkpoint():
+    """Compact files are written, edited and checkpointed as a blob and two ints."""
+    rt = make_runtime({"/legacy.txt": create_file_data("old\ncontent")})
+    be = StateBackend(rt, compact_files=True)
+
+    rt.state["files"].update(be.write("/notes.txt", "hello\nworld").files_update)
+    rt.state["files"].update(be.edit("/legacy.txt", "old", "new").files_update)
+    notes = rt.state["files"]["/notes.txt"]
+    assert isinstance(notes, CompactFileData)
+    assert notes.blob == b"hello\nworld"
+    # Edits convert existing files and keep their creation time
+    assert isinstance(rt.state["files"]["/legacy.txt"], CompactFileData)
+    assert be.read("/legacy.txt") == "     1\tnew\n     2\tcontent"
+
+    serde = JsonPlusSerializer()
+    restored = serde.loads_typed(serde.dumps_typed(rt.state["files"]))
+    assert restored == rt.state["files"]
+    assert StateBackend(make_runtime(restored)).read("/notes.txt") == be.read("/notes.txt")
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_state_backend_delta_edits_apply_through_reducer(compact):
+    content = "\n".join(f"line {i}" for i in range(100))
+    rt = make_runtime({"/big.txt": create_file_data(content, compact=compact)})
+    be = StateBackend(rt, delta_edits=True)
+
+    res = be.edit("/big.txt", "line 42\nline 43", "changed\nlines\nhere")
+    (patch,) = res.files_update.values()
+    assert patch == FilePatch(start=42, removed=["line 42", "line 43"], inserted=["changed", "lines", "here"], modified_at=patch.modified_at)
+    serde = JsonPlusSerializer()
+    assert serde.loads_typed(serde.dumps_typed(res.files_update)) == res.files_update
+
+    rt.state["files"] = _file_data_reducer(rt.state["files"], res.files_update)
+    expected = content.replace("line 42\nline 43", "changed\nlines\nhere")
+    assert isinstance(rt.state["files"]["/big.txt"], CompactFileData) is compact
+    assert dict(rt.state["files"]["/big.txt"]) == {
+        **create_file_data(expected),
+        "created_at": rt.state["files"]["/big.txt"]["created_at"],
+        "modified_at": patch.modified_at,
+    }
+
+    # replace_all patches span from the first to the last occurrence
+    res = be.edit("/big.txt", "line 4", "LINE 4", replace_all=True)
+    (patch,) = res.files_update.values()
+    assert (patch.start, len(patch.removed)) == (4, 47)
+    rt.state["files"] = _file_data_reducer(rt.state["files"], res.files_update)
+    assert be.read("/big.txt", offset=49, limit=3) == "    50\tLINE 48\n    51\tLINE 49\n    52\tline 50"
+
+    # Edits that rewrite most of a small file are returned whole
+    rt.state["files"]["/small.txt"] = create_file_data("a\nb")
+    assert not isinstance(be.edit("/small.txt", "a", "c").files_update["/small.txt"], FilePatch)
+
+
+def test_reducer_applies_patches_made_from_the_same_file():
+    content = "\n".join(f"line {i}" for i in range(20))
+    files = {"/f.txt": create_file_data(content)}
+    be = StateBackend(make_runtime(files), delta_edits=True)
+    # All edits are made from the same state, as parallel tool calls in one step are.
+    # The third one applies where its line moved to after the first
+    first = be.edit("/f.txt", "line 2", "inserted\nline 2").files_update
+    second = be.edit("/f.txt", "line 15", "line fifteen").files_update
+    moved = be.edit("/f.txt", "line 2\n", "").files_update
+
+    merged = _file_data_reducer(_file_data_reducer(files, first), second)
+    lines = merged["/f.txt"]["content"]
+    assert lines[:4] == ["line 0", "line 1", "inserted", "line 2"]
+    assert lines[16] == "line fifteen"
+    assert _file_data_reducer(merged, moved) == {
+        "/f.txt": {**merged["/f.txt"], "content": [line for line in lines if line != "line 2"], "modified_at": moved["/f.txt"].modified_at}
+    }
+    # A patch whose lines are gone is dropped
+    assert _file_data_reducer({"/f.txt": create_file_data("other\ncontent")}, second)["/f.txt"]["content"] == ["other", "content"]
+
+
+@pytest.mark.parametrize("pattern", ["*.py", "**/*.py", "*.tar.gz", "**/*.tar.gz", "src/*.py", "*.{py,md}", "**/*"])
+@pytest.mark.parametrize("flags", [wcglob.BRACE, wcglob.BRACE | wcglob.GLOBSTAR])
+def test_compile_glob_matches_like_wcmatch(pattern, flags):
+    parts = ["src", ".hidden", "", "a.py", ".py", "..py", "b.tar.gz", "c.PY", "."]
+    paths = ["/".join(combo) for n in range(1, 4) for combo in itertools.product(parts, repeat=n)]
+    matches = compile_glob(pattern, flags)
+    expected = wcglob.compile(pattern, flags=flags)
+    assert [p for p in paths if matches(p)] == [p for p in paths if expected.match(p)]
+    assert compile_glob(pattern, flags) is matches
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_grep_many_matches_grep_raw_per_pattern(compact):
+    contents = {
+        "/src/a.py": "def alpha():\n    return beta  # alphabet\n\nalpha\r\n",
+        "/src/b.md": "gamma\nbetamax\népée beta",
+        "/docs/c.txt": "",
+    }
+    be = StateBackend(make_runtime({path: create_file_data(content, compact=compact) for path, content in contents.items()}))
+    # Overlapping patterns, a pattern inside another and a non-ASCII one
+    patterns = ["alpha", "alphabet", "beta", "etam", "épée", "\r", "missing"]
+    for path, glob in [("/", None), ("/src", None), ("/", "*.md"), ("/nope", None)]:
+        assert be.grep_many(patterns, path=path, glob=glob) == {p: be.grep_raw(p, path=path, glob=glob) for p in patterns}
+    assert be.grep_many([]) == {}
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("match_every", [1, 3, 50, 1000])
+def test_grep_raw_matches_line_by_line_search(compact, match_every):
+    lines = [f"line {i} {'héllo' if i % match_every == 0 else 'world'}" for i in range(200)]
+    rt = make_runtime({"/f.txt": create_file_data("\n".join([*lines, ""]), compact=compact)})
+    be = StateBackend(rt)
+    for pattern in ["héllo", "line 1", "", "\n", "o\nl", "missing"]:
+        expected = [{"path": "/f.txt", "line": i, "text": line} for i, line in enumerate([*lines, ""], 1) if pattern in line]
+        assert be.grep_raw(pattern, path="/") == expected
+
+    # Replacing the file's content is seen by the next search
+    rt.state["files"]["/f.txt"] = create_file_data("only héllo here", compact=compact)
+    assert be.grep_raw("héllo", path="/") == [{"path": "/f.txt", "line": 1, "text": "only héllo here"}]
+
+
+@pytest.mark.parametrize("max_results", [1, 2, 7, 100])
+def test_grep_page_and_glob_page_concatenate_to_full_results(max_results):
+    files = {f"/src/m{i}.py": create_file_data("x = 1\n" * (i % 3) + "y = 2") for i in range(6)}
+    files["/README.md"] = create_file_data("x = 1")
+    be = StateBackend(make_runtime(files))
+
+    def all_pages(search) -> list:
+        items, cursor = [], None
+        while True:
+            page = search(max_results=max_results, cursor=cursor)
+            batch = page.matches if isinstance(page, GrepPage) else page.files
+            assert 0 < len(batch) <= max_results
+            items.extend(batch)
+            if page.next_cursor is None:
+                return items
+            cursor = page.next_cursor
+
+    assert all_pages(lambda **kw: be.grep_page("x = 1", path="/", **kw)) == be.grep_raw("x = 1", path="/")
+    assert all_pages(lambda **kw: be.grep_page("1", path="/src", glob="*.py", **kw)) == be.grep_raw("1", path="/src", glob="*.py")
+    assert all_pages(lambda **kw: be.glob_page("**/*.py", "/", **kw)) == be.glob_info("**/*.py", "/")
+    assert be.grep_page("missing", max_results=max_results) == GrepPage(matches=[])
+
+
+def test_grep_page_rejects_invalid_requests():
+    be = StateBackend(make_runtime({"/a.txt": create_file_data("x")}))
+    assert be.grep_page("x", max_results=1, cursor="abc") == "Error: Invalid cursor 'abc'"
+    assert be.grep_page("x", max_results=0) == "Error: max_results must be at least 1, got 0"
+    assert be.glob_page("*", max_results=1, cursor="-1") == "Error: Invalid cursor '-1'"
+
+
+def test_grep_cache_is_shared_between_backends():
+    files = {f"/f{i}.txt": create_file_data("\n".join(f"line {j} of file {i}" for j in range(100))) for i in range(3)}
+    rt = make_runtime(files)
+    expected = StateBackend(rt).grep_raw("line 7 of", path="/")
+    assert len(expected) == 3
+
+    # A file is joined the second time it is searched, by any backend
+    cache = _shared_joined_lines
+    assert not any(id(fd["content"]) in cache._entries for fd in files.values())
+    assert StateBackend(rt).grep_raw("line 7 of", path="/") == expected
+    assert all(cache._entries[id(fd["content"])][0] is fd["content"] for fd in files.values())
+    uncached = StateBackend(rt, grep_cache=False)
+    assert uncached._joined_lines is None
+    assert uncached.grep_raw("line 7 of", path="/") == expected
+
+
+def test_joined_lines_cache_evicts_least_recently_used():
+    lists = [[f"line {j} of list {i}" for j in range(10)] for i in range(3)]
+    cache = _JoinedLinesCache(max_chars=2 * len("\n".join(lists[0])))
+    for lines in lists[:2]:
+        assert cache.get(lines) is None
+        assert cache.get(lines)[0] == "\n".join(lines)
+    # Using the first list makes the second one the least recently used
+    assert cache.get(lists[0]) is not None
+    assert cache.get(lists[2]) is None
+    text, starts = cache.get(lists[2])
+    assert text == "\n".join(lists[2])
+    assert list(starts) == [0, *itertools.accumulate(len(line) + 1 for line in lists[2])]
+    assert list(cache._entries) == [id(lists[0]), id(lists[2])]
+    assert cache._chars <= cache.max_chars
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_grep_matches_files_of_mixed_density(compact):
+    # Dense files make the following ones be tested line by line, sparse ones are searched as a whole
+    contents = {f"/f{i:02}.txt": [f"line {j} {'hit' if j % (2 if i % 5 == 0 else 90) == 0 else 'miss'}" for j in range(180)] for i in range(20)}
+    be = StateBackend(make_runtime({path: create_file_data("\n".join(lines), compact=compact) for path, lines in contents.items()}))
+    expected = [{"path": path, "line": j, "text": line} for path, lines in contents.items() for j, line in enumerate(lines, 1) if "hit" in line]
+    for _ in range(2):
+        assert be.grep_raw("hit", path="/") == expected
+        assert be.grep_many(["hit", "miss"], path="/")["hit"] == expected
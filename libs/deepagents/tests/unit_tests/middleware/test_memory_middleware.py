@@ -8,7 +8,9 @@ from datetime import UTC, datetime
 from pathlib import Path
 from types import SimpleNamespace
 
+import pytest
 from langchain.agents import create_agent
+from langchain.agents.middleware.types import ModelRequest
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import InMemorySaver
@@ -285,6 +287,68 @@ def test_load_memory_handles_missing_file(tmp_path: Path) -> None:
     assert user_path in result["memory_contents"]
 
 
+def test_load_memory_batches_downloads(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that all sources are fetched in a single batched call per load."""
+    user_path = str(tmp_path / "user" / "AGENTS.md")
+    project_path = str(tmp_path / "project" / "AGENTS.md")
+    missing_path = str(tmp_path / "missing" / "AGENTS.md")
+    FilesystemBackend(root_dir=str(tmp_path)).upload_files(
+        [
+            (user_path, make_memory_content("User", "- Be concise").encode("utf-8")),
+            (project_path, make_memory_content("Project", "- Use uv").encode("utf-8")),
+        ]
+    )
+
+    download_calls: list[list[str]] = []
+    download_files = FilesystemBackend.download_files
+
+    def recording_download(self: FilesystemBackend, paths: list[str]) -> list:
+        download_calls.append(list(paths))
+        return download_files(self, paths)
+
+    monkeypatch.setattr(FilesystemBackend, "download_files", recording_download)
+    sources = [user_path, project_path, missing_path]
+
+    def load() -> dict[str, str]:
+        middleware = MemoryMiddleware(backend=FilesystemBackend(root_dir=str(tmp_path)), sources=sources)
+        result = middleware.before_agent({}, None, {})  # type: ignore[arg-type]
+        assert result is not None
+        return result["memory_contents"]
+
+    assert list(load()) == [user_path, project_path]
+    assert download_calls == [sources]
+
+    download_calls.clear()
+    Path(project_path).write_text(make_memory_content("Project", "- Use uv, and pin every dependency"))
+    assert "pin every dependency" in load()[project_path]
+    assert download_calls == [sources]
+
+
+def test_modify_request_reuses_formatted_memory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the memory prompt is only formatted again when the contents change."""
+    middleware = MemoryMiddleware(backend=FilesystemBackend(root_dir=str(tmp_path)), sources=["/AGENTS.md"])
+    formatted: list[dict[str, str]] = []
+    format_agent_memory = middleware._format_agent_memory
+
+    def recording_format(contents: dict[str, str]) -> str:
+        formatted.append(contents)
+        return format_agent_memory(contents)
+
+    monkeypatch.setattr(middleware, "_format_agent_memory", recording_format)
+
+    def system_prompt(contents: dict[str, str]) -> str:
+        request = ModelRequest(model=None, messages=[], system_message=None, state={"messages": [], "memory_contents": contents})  # type: ignore[arg-type]
+        return middleware.modify_request(request).system_message.text
+
+    first = system_prompt({"/AGENTS.md": "- Be concise"})
+    # Equal contents from another state snapshot reuse the formatted prompt
+    assert system_prompt({"/AGENTS.md": "- Be concise"}) == first
+    assert len(formatted) == 1
+
+    assert "Be thorough" in system_prompt({"/AGENTS.md": "- Be thorough"})
+    assert len(formatted) == 2
+
+
 def test_before_agent_skips_if_already_loaded(tmp_path: Path) -> None:
     """Test that before_agent doesn't reload if already in state."""
     backend = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=False)
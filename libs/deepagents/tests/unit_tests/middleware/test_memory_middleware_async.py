@@ -5,6 +5,7 @@ This module contains async versions of memory middleware tests.
 
 from pathlib import Path
 
+import pytest
 from langchain.agents import create_agent
 from langchain_core.messages import AIMessage, HumanMessage
 
@@ -97,6 +98,35 @@ async def test_load_memory_from_backend_multiple_sources_async(tmp_path: Path) -
     assert "FastAPI" in result["memory_contents"][project_path]
 
 
+async def test_load_memory_batches_downloads_async(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that all sources are fetched in a single batched call per load (async)."""
+    user_path = str(tmp_path / "user" / "AGENTS.md")
+    project_path = str(tmp_path / "project" / "AGENTS.md")
+    FilesystemBackend(root_dir=str(tmp_path)).upload_files(
+        [
+            (user_path, make_memory_content("User", "- Be concise").encode("utf-8")),
+            (project_path, make_memory_content("Project", "- Use uv").encode("utf-8")),
+        ]
+    )
+
+    download_calls: list[list[str]] = []
+    adownload_files = FilesystemBackend.adownload_files
+
+    async def recording_download(self: FilesystemBackend, paths: list[str]) -> list:
+        download_calls.append(list(paths))
+        return await adownload_files(self, paths)
+
+    monkeypatch.setattr(FilesystemBackend, "adownload_files", recording_download)
+
+    for _ in range(2):
+        middleware = MemoryMiddleware(backend=FilesystemBackend(root_dir=str(tmp_path)), sources=[user_path, project_path])
+        result = await middleware.abefore_agent({}, None, {})  # type: ignore[arg-type]
+        assert result is not None
+        assert list(result["memory_contents"]) == [user_path, project_path]
+
+    assert download_calls == [[user_path, project_path]] * 2
+
+
 async def test_load_memory_handles_missing_file_async(tmp_path: Path) -> None:
     """Test that missing files raise an error (async)."""
     backend = FilesystemBackend(root_dir=str(tmp_path), virtual_mode=False)
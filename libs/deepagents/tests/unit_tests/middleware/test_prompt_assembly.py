@@ -0,0 +1,66 @@
+"""Unit tests for memoized system prompt assembly across middleware."""
+
+from functools import partial
+
+from langchain.agents.middleware.types import ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, SystemMessage
+
+from deepagents.backends.state import StateBackend
+from deepagents.middleware import get_prompt_assembly_stats, reset_prompt_assembly_stats
+from deepagents.middleware._utils import append_to_system_message
+from deepagents.middleware.filesystem import FilesystemMiddleware
+from deepagents.middleware.memory import MemoryMiddleware
+from deepagents.middleware.skills import SkillsMiddleware
+
+
+def _compose(base: SystemMessage, state: dict) -> SystemMessage:
+    """Run a request through a memory, skills and filesystem stack and return the system message the model sees."""
+    stack = [
+        MemoryMiddleware(backend=StateBackend, sources=["/AGENTS.md"]),
+        SkillsMiddleware(backend=StateBackend, sources=["/skills/"]),
+        FilesystemMiddleware(),
+    ]
+    seen: list[SystemMessage] = []
+
+    def model(request: ModelRequest) -> ModelResponse:
+        seen.append(request.system_message)
+        return ModelResponse(result=[AIMessage(content="ok")])
+
+    handler = model
+    for middleware in reversed(stack):
+        handler = partial(middleware.wrap_model_call, handler=handler)
+    handler(ModelRequest(model=None, messages=[], system_message=base, tools=[], state=state))  # type: ignore[arg-type]
+    return seen[0]
+
+
+def test_append_to_system_message_is_memoized() -> None:
+    base = SystemMessage(content="You are helpful.")
+    first = append_to_system_message(base, "Section")
+
+    assert append_to_system_message(base, "Section") is first
+    assert append_to_system_message(base, "Other section") is not first
+    # Equal but distinct base messages compose separately
+    assert append_to_system_message(SystemMessage(content="You are helpful."), "Section") is not first
+    assert first.text == "You are helpful.\n\nSection"
+
+
+def test_composed_prompt_is_stable_across_model_calls() -> None:
+    base = SystemMessage(content="You are a deep agent.")
+    state = {"messages": [], "memory_contents": {"/AGENTS.md": "- Be concise"}, "skills_metadata": []}
+    reset_prompt_assembly_stats()
+
+    first = _compose(base, state)
+    assert get_prompt_assembly_stats().changes == 3
+
+    # Later calls, including from equal state in another snapshot, reuse the composed message
+    assert _compose(base, state) is first
+    assert _compose(base, {**state, "memory_contents": dict(state["memory_contents"])}) is first
+    stats = get_prompt_assembly_stats()
+    assert (stats.assemblies, stats.changes) == (9, 3)
+    assert first.text.startswith("You are a deep agent.\n\n<agent_memory>")
+
+    # New memory changes the memory section and every section appended after it
+    changed = _compose(base, {**state, "memory_contents": {"/AGENTS.md": "- Be thorough"}})
+    assert changed is not first
+    assert get_prompt_assembly_stats().changes == 6
+    assert get_prompt_assembly_stats().change_rate == 0.5
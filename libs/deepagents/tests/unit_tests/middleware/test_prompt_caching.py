@@ -0,0 +1,128 @@
+"""Unit tests for prompt cache breakpoint placement."""
+
+from langchain.agents.middleware.types import ModelRequest, ModelResponse
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.tools import tool
+
+from deepagents.middleware.prompt_caching import PromptCacheLayoutMiddleware, _LazyAnthropicPromptCachingMiddleware
+from tests.unit_tests.chat_model import GenericFakeChatModel
+
+CACHE_CONTROL = {"type": "ephemeral", "ttl": "5m"}
+
+
+@tool
+def ls(path: str) -> str:
+    """List files in a directory."""
+    return path
+
+
+def _request(model: object, *, summarized: bool = True) -> ModelRequest:
+    messages = [HumanMessage(content="question")]
+    if summarized:
+        messages.insert(0, HumanMessage(content="Summary so far", additional_kwargs={"lc_source": "summarization"}))
+    return ModelRequest(
+        model=model,  # type: ignore[arg-type]
+        messages=messages,
+        system_message=SystemMessage(content=[{"type": "text", "text": "You are helpful."}, {"type": "text", "text": "Use tools."}]),
+        tools=[ls, {"name": "web_search", "description": "Search", "input_schema": {"type": "object"}}],
+        state={"messages": messages},
+    )
+
+
+def _response(cache_read: int, cache_creation: int) -> ModelResponse:
+    usage = {
+        "input_tokens": 1000,
+        "output_tokens": 10,
+        "total_tokens": 1010,
+        "input_token_details": {"cache_read": cache_read, "cache_creation": cache_creation},
+    }
+    return ModelResponse(result=[AIMessage(content="ok", usage_metadata=usage)])
+
+
+def test_places_breakpoints_for_anthropic_models() -> None:
+    middleware = PromptCacheLayoutMiddleware()
+    seen: list[ModelRequest] = []
+
+    def handler(request: ModelRequest) -> ModelResponse:
+        seen.append(request)
+        return _response(0, 900)
+
+    request = _request(ChatAnthropic(model_name="claude-sonnet-4-5-20250929", api_key="test"))  # type: ignore[call-arg]
+    middleware.wrap_model_call(request, handler)
+    middleware.wrap_model_call(request, handler)
+
+    first, second = seen
+    # Only the last system block, last tool and summary carry breakpoints
+    assert first.system_message.content[0] == {"type": "text", "text": "You are helpful."}
+    assert first.system_message.content[-1]["cache_control"] == CACHE_CONTROL
+    assert first.tools[-1]["cache_control"] == CACHE_CONTROL
+    assert "cache_control" not in (first.tools[0].extras or {})
+    assert first.messages[0].content[-1]["cache_control"] == CACHE_CONTROL
+    assert first.messages[1].content == "question"
+    # The marked system message is reused while the prompt is unchanged
+    assert second.system_message is first.system_message
+    # The original request is left untouched
+    assert request.system_message.content[-1] == {"type": "text", "text": "Use tools."}
+
+
+def test_marks_last_base_tool_through_extras() -> None:
+    middleware = PromptCacheLayoutMiddleware(breakpoints=["tools"])
+    request = _request(ChatAnthropic(model_name="claude-sonnet-4-5-20250929", api_key="test"), summarized=False)  # type: ignore[call-arg]
+    request = request.override(tools=[ls])
+    seen: list[ModelRequest] = []
+
+    def handler(r: ModelRequest) -> ModelResponse:
+        seen.append(r)
+        return _response(0, 0)
+
+    middleware.wrap_model_call(request, handler)
+
+    assert seen[0].tools[0].extras == {"cache_control": CACHE_CONTROL}
+    assert seen[0].system_message is request.system_message
+    assert ls.extras is None
+
+
+def test_passes_other_models_through_and_reports_usage() -> None:
+    middleware = PromptCacheLayoutMiddleware()
+    request = _request(GenericFakeChatModel(messages=iter([])))
+    seen: list[ModelRequest] = []
+
+    def handler(r: ModelRequest) -> ModelResponse:
+        seen.append(r)
+        return _response(800, 100)
+
+    middleware.wrap_model_call(request, handler)
+    middleware.wrap_model_call(request, handler)
+
+    assert seen[0] is request
+    assert middleware.usage == {"input_tokens": 2000, "cache_read_tokens": 1600, "cache_creation_tokens": 200}
+
+
+async def test_async_reports_usage() -> None:
+    middleware = PromptCacheLayoutMiddleware()
+
+    async def handler(_: ModelRequest) -> ModelResponse:
+        return _response(500, 0)
+
+    await middleware.awrap_model_call(_request(GenericFakeChatModel(messages=iter([]))), handler)
+
+    assert middleware.usage["cache_read_tokens"] == 500
+
+
+def test_lazy_anthropic_caching_only_applies_to_anthropic_models() -> None:
+    middleware = _LazyAnthropicPromptCachingMiddleware(unsupported_model_behavior="ignore")
+    seen: list[ModelRequest] = []
+
+    def handler(r: ModelRequest) -> ModelResponse:
+        seen.append(r)
+        return _response(0, 0)
+
+    other = _request(GenericFakeChatModel(messages=iter([])))
+    middleware.wrap_model_call(other, handler)
+    assert seen[0] is other
+    assert middleware._middleware is None
+
+    middleware.wrap_model_call(_request(ChatAnthropic(model_name="claude-sonnet-4-5-20250929", api_key="test")), handler)  # type: ignore[call-arg]
+    assert seen[1].model_settings["cache_control"] == {"type": "ephemeral", "ttl": "5m"}
+    assert middleware.name == "AnthropicPromptCachingMiddleware"
@@ -5,9 +5,11 @@ directories and the FilesystemBackend in normal (non-virtual) mode.
 """
 
 from datetime import UTC, datetime
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from types import SimpleNamespace
 
+import pytest
+import yaml
 from langchain.agents import create_agent
 from langchain.tools import ToolRuntime
 from langchain_core.messages import AIMessage, HumanMessage
@@ -15,11 +17,14 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.store.memory import InMemoryStore
 
+from deepagents.backends.composite import CompositeBackend
 from deepagents.backends.filesystem import FilesystemBackend
 from deepagents.backends.state import StateBackend
 from deepagents.backends.store import StoreBackend
+from deepagents.backends.utils import create_file_data
 from deepagents.graph import create_deep_agent
 from deepagents.middleware.skills import (
+    MAX_FRONTMATTER_BYTES,
     MAX_SKILL_COMPATIBILITY_LENGTH,
     MAX_SKILL_DESCRIPTION_LENGTH,
     MAX_SKILL_FILE_SIZE,
@@ -28,6 +33,7 @@ from deepagents.middleware.skills import (
     _format_skill_annotations,
     _list_skills,
     _parse_skill_metadata,
+    _parse_yaml_subset,
     _validate_metadata,
     _validate_skill_name,
 )
@@ -705,6 +711,148 @@ def test_list_skills_from_backend_with_helper_files(tmp_path: Path) -> None:
     ]
 
 
+def test_list_skills_reparses_only_changed_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that listing a source again only downloads new or modified SKILL.md files."""
+    skills_dir = tmp_path / "skills"
+    first_path = str(skills_dir / "first" / "SKILL.md")
+    second_path = str(skills_dir / "second" / "SKILL.md")
+    FilesystemBackend(root_dir=str(tmp_path)).upload_files(
+        [
+            (first_path, make_skill_content("first", "First skill").encode("utf-8")),
+            (second_path, make_skill_content("second", "Second skill").encode("utf-8")),
+        ]
+    )
+
+    downloaded: list[str] = []
+    download_file_prefixes = FilesystemBackend.download_file_prefixes
+
+    def recording_download(self: FilesystemBackend, paths: list[str], max_bytes: int) -> list:
+        downloaded.extend(paths)
+        return download_file_prefixes(self, paths, max_bytes)
+
+    monkeypatch.setattr(FilesystemBackend, "download_file_prefixes", recording_download)
+
+    # Separate backend instances over the same root share the process-wide cache
+    assert [s["name"] for s in _list_skills(FilesystemBackend(root_dir=str(tmp_path)), str(skills_dir))] == ["first", "second"]
+    assert downloaded == [first_path, second_path]
+
+    downloaded.clear()
+    assert [s["name"] for s in _list_skills(FilesystemBackend(root_dir=str(tmp_path)), str(skills_dir))] == ["first", "second"]
+    assert downloaded == []
+
+    Path(second_path).write_text(make_skill_content("second", "Updated second skill, now with a longer description"))
+    skills = _list_skills(FilesystemBackend(root_dir=str(tmp_path)), str(skills_dir))
+    assert downloaded == [second_path]
+    assert skills[1]["description"] == "Updated second skill, now with a longer description"
+
+    # Removed skills drop out of the listing
+    Path(first_path).unlink()
+    assert [s["name"] for s in _list_skills(FilesystemBackend(root_dir=str(tmp_path)), str(skills_dir))] == ["second"]
+
+
+def test_list_skills_does_not_walk_skill_subtrees(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that filesystem skill listing lists the source one level deep and stats only each SKILL.md."""
+    skills_dir = tmp_path / "skills"
+    for name in ("alpha", "beta"):
+        (skills_dir / name / "node_modules" / "dep").mkdir(parents=True)
+        (skills_dir / name / "node_modules" / "dep" / "index.js").write_text("module.exports = {}")
+        (skills_dir / name / "SKILL.md").write_text(make_skill_content(name, f"{name} skill"))
+    (skills_dir / "no-skill-md").mkdir()
+
+    def fail_glob(self: FilesystemBackend, pattern: str, path: str = "/") -> list:  # noqa: ARG001
+        msg = f"recursive glob of {path}"
+        raise AssertionError(msg)
+
+    stat_calls: list[list[str]] = []
+    stat_files = FilesystemBackend.stat_files
+
+    def recording_stat(self: FilesystemBackend, paths: list[str]) -> list:
+        stat_calls.append(paths)
+        return stat_files(self, paths)
+
+    monkeypatch.setattr(FilesystemBackend, "glob_info", fail_glob)
+    monkeypatch.setattr(FilesystemBackend, "stat_files", recording_stat)
+
+    skills = _list_skills(FilesystemBackend(root_dir=str(tmp_path)), str(skills_dir))
+    assert [s["name"] for s in skills] == ["alpha", "beta"]
+    assert all(PurePosixPath(path).name == "SKILL.md" for paths in stat_calls for path in paths)
+
+    # Sources behind a composite route are listed the same way, with paths as seen through the route
+    composite = CompositeBackend(default=StateBackend(None), routes={"/skills/": FilesystemBackend(root_dir=str(skills_dir), virtual_mode=True)})
+    skills = _list_skills(composite, "/skills/")
+    assert [s["path"] for s in skills] == ["/skills/alpha/SKILL.md", "/skills/beta/SKILL.md"]
+
+
+@pytest.mark.parametrize(
+    "frontmatter",
+    [
+        "name: my-skill\ndescription: A skill",
+        "name: 'my-skill'\ndescription: \"Quoted: with colon\"\nlicense: MIT\n# comment\n",
+        "name: my-skill\ndescription: Uses it's apostrophe\nmetadata:\n  author: someone\n  version: '1.0'",
+        "name: my-skill\ndescription: 'It''s escaped'\nallowed-tools: Bash(git:*) Read",
+    ],
+)
+def test_parse_yaml_subset_matches_safe_load(frontmatter: str) -> None:
+    """Test that the fast frontmatter parser agrees with PyYAML on the common subset."""
+    assert _parse_yaml_subset(frontmatter) == yaml.safe_load(frontmatter)
+
+
+@pytest.mark.parametrize(
+    "frontmatter",
+    [
+        "name: my-skill\nallowed-tools:\n  - Bash\n  - Read",
+        "name: my-skill\nlicense: true",
+        "name: my-skill\nversion: 1.0",
+        "name: my-skill\ndescription: |\n  Multi-line\n  block",
+        "name: my-skill\ndescription: [a, b]",
+        "name: my-skill\n\tdescription: tab",
+        "name: my-skill # trailing comment",
+        "",
+    ],
+)
+def test_parse_yaml_subset_defers_to_safe_load(frontmatter: str) -> None:
+    """Test that anything outside the plain-string subset falls back to PyYAML."""
+    assert _parse_yaml_subset(frontmatter) is None
+
+
+def test_list_skills_reads_only_frontmatter(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a large SKILL.md body is not read, while oversized frontmatter is read in full."""
+    skills_dir = tmp_path / "skills"
+    large_body_path = skills_dir / "large-body" / "SKILL.md"
+    large_body_path.parent.mkdir(parents=True)
+    large_body_path.write_text(make_skill_content("large-body", "Large body") + "x" * (4 * MAX_FRONTMATTER_BYTES))
+    long_frontmatter_path = skills_dir / "long-frontmatter" / "SKILL.md"
+    long_frontmatter_path.parent.mkdir(parents=True)
+    long_description = "d" * (2 * MAX_FRONTMATTER_BYTES)
+    long_frontmatter_path.write_text(f"---\nname: long-frontmatter\ndescription: {long_description}\n---\n\n# Body\n")
+
+    full_downloads: list[str] = []
+    download_files = FilesystemBackend.download_files
+
+    def recording_download(self: FilesystemBackend, paths: list[str]) -> list:
+        full_downloads.extend(paths)
+        return download_files(self, paths)
+
+    monkeypatch.setattr(FilesystemBackend, "download_files", recording_download)
+
+    skills = _list_skills(FilesystemBackend(root_dir=str(tmp_path)), str(skills_dir))
+    assert [s["name"] for s in skills] == ["large-body", "long-frontmatter"]
+    assert full_downloads == [str(long_frontmatter_path)]
+    assert skills[1]["description"] == long_description[:MAX_SKILL_DESCRIPTION_LENGTH]
+
+
+def test_list_skills_state_backend_is_not_cached() -> None:
+    """Test that state-backed skills, which differ per thread, are always read from state."""
+    skill_path = "/skills/my-skill/SKILL.md"
+
+    def runtime_with(description: str) -> ToolRuntime:
+        files = {skill_path: create_file_data(make_skill_content("my-skill", description))}
+        return ToolRuntime(state={"messages": [], "files": files}, context=None, tool_call_id="", store=None, stream_writer=lambda _: None, config={})
+
+    assert _list_skills(StateBackend(runtime_with("Thread one")), "/skills")[0]["description"] == "Thread one"
+    assert _list_skills(StateBackend(runtime_with("Thread two")), "/skills")[0]["description"] == "Thread two"
+
+
 def test_format_skills_locations_single_registry() -> None:
     """Test _format_skills_locations with a single source."""
     sources = ["/skills/user/"]
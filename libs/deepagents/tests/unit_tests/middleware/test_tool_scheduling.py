@@ -0,0 +1,145 @@
+"""Unit tests for scheduling of concurrent filesystem tool calls."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.tools.tool_node import ToolCallRequest
+from langchain_core.messages import ToolMessage
+
+from deepagents.middleware._scheduling import ToolCallScheduler, classify_tool_call
+from deepagents.middleware.filesystem import FilesystemMiddleware
+
+
+class _ConcurrencyProbe:
+    """Records the peak number of overlapping calls."""
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self) -> None:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def exit(self) -> None:
+        with self._lock:
+            self.active -= 1
+
+
+def test_classify_tool_call() -> None:
+    assert classify_tool_call("read_file") == "read"
+    assert classify_tool_call("grep") == "read"
+    assert classify_tool_call("edit_file") == "write"
+    assert classify_tool_call("execute") is None
+    assert classify_tool_call("my_tool") is None
+
+
+def test_reads_are_bounded() -> None:
+    scheduler = ToolCallScheduler(max_concurrent_reads=2)
+    probe = _ConcurrencyProbe()
+
+    def read() -> None:
+        with scheduler.schedule("read_file", {"file_path": "/a.txt"}):
+            probe.enter()
+            time.sleep(0.02)
+            probe.exit()
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(lambda _: read(), range(6)))
+
+    assert probe.peak == 2
+
+
+def test_writes_to_same_path_are_serialized() -> None:
+    scheduler = ToolCallScheduler()
+    same_path = _ConcurrencyProbe()
+    other_paths = _ConcurrencyProbe()
+
+    def write(path: str, probe: _ConcurrencyProbe) -> None:
+        with scheduler.schedule("edit_file", {"file_path": path}):
+            probe.enter()
+            time.sleep(0.02)
+            probe.exit()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(write, "/same.txt", same_path) for _ in range(4)]
+        futures += [pool.submit(write, f"/other_{i}.txt", other_paths) for i in range(4)]
+        for future in futures:
+            future.result()
+
+    assert same_path.peak == 1
+    assert other_paths.peak > 1
+    # Locks are released once no call is waiting on them
+    assert scheduler._path_locks == {}
+
+
+async def test_async_scheduling() -> None:
+    scheduler = ToolCallScheduler(max_concurrent_reads=2)
+    reads = _ConcurrencyProbe()
+    writes = _ConcurrencyProbe()
+
+    async def call(tool_name: str, probe: _ConcurrencyProbe) -> None:
+        async with scheduler.aschedule(tool_name, {"file_path": "/same.txt"}):
+            probe.enter()
+            await asyncio.sleep(0.01)
+            probe.exit()
+
+    await asyncio.gather(*[call("grep", reads) for _ in range(5)], *[call("write_file", writes) for _ in range(3)])
+
+    assert reads.peak == 2
+    assert writes.peak == 1
+
+
+def test_middleware_schedules_tool_calls() -> None:
+    middleware = FilesystemMiddleware(max_concurrent_reads=1)
+    probe = _ConcurrencyProbe()
+
+    def handler(request: ToolCallRequest) -> ToolMessage:
+        probe.enter()
+        time.sleep(0.02)
+        probe.exit()
+        return ToolMessage(content="ok", tool_call_id=request.tool_call["id"])
+
+    def run(call_id: str) -> None:
+        request = ToolCallRequest(
+            tool_call={"id": call_id, "name": "ls", "args": {"path": "/"}},
+            tool=None,
+            state={},
+            runtime=None,
+        )
+        middleware.wrap_tool_call(request, handler)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(run, ["1", "2", "3", "4"]))
+
+    assert probe.peak == 1
+
+
+def test_middleware_locks_normalized_paths() -> None:
+    middleware = FilesystemMiddleware()
+    probe = _ConcurrencyProbe()
+
+    def handler(request: ToolCallRequest) -> ToolMessage:
+        probe.enter()
+        time.sleep(0.02)
+        probe.exit()
+        return ToolMessage(content="ok", tool_call_id=request.tool_call["id"])
+
+    def run(file_path: str) -> None:
+        request = ToolCallRequest(
+            tool_call={"id": file_path, "name": "edit_file", "args": {"file_path": file_path}},
+            tool=None,
+            state={},
+            runtime=None,
+        )
+        middleware.wrap_tool_call(request, handler)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(run, ["/a.txt", "a.txt", "/./a.txt", "/b/../a.txt"]))
+
+    assert probe.peak == 1
+    assert middleware._scheduler._path_locks == {}
@@ -14,14 +14,16 @@ from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_core.runnables import Runnable
 from langchain_core.tools import BaseTool, tool
+from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.store.memory import InMemoryStore
 
 from deepagents.backends import FilesystemBackend
 from deepagents.backends.protocol import BackendProtocol
 from deepagents.backends.state import StateBackend
 from deepagents.backends.store import StoreBackend
-from deepagents.backends.utils import TOOL_RESULT_TOKEN_LIMIT
+from deepagents.backends.utils import TOOL_RESULT_TOKEN_LIMIT, create_file_data
 from deepagents.graph import create_deep_agent
+from deepagents.middleware._utils import _run_scopes
 from deepagents.middleware.filesystem import NUM_CHARS_PER_TOKEN
 from tests.utils import assert_all_deepagent_qualities
 
@@ -1186,3 +1188,43 @@ class TestDeepAgentEndToEnd:
             f"Expected <= {max_reasonable_chars:,} chars (TOOL_RESULT_TOKEN_LIMIT * 4). "
             f"A single-line file should not cause token overflow."
         )
+
+    def test_backend_factory_shared_across_middleware_within_a_run(self) -> None:
+        """Test that skills, memory, model calls and tool calls of a run share one factory result until files change."""
+        runtimes: list[ToolRuntime] = []
+
+        def backend_factory(runtime: ToolRuntime) -> StateBackend:
+            runtimes.append(runtime)
+            return StateBackend(runtime)
+
+        def tool_call(name: str, args: dict[str, Any], call_id: str) -> dict[str, Any]:
+            return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+        model = FixedGenericFakeChatModel(
+            messages=iter(
+                [
+                    AIMessage(
+                        content="",
+                        tool_calls=[tool_call("ls", {"path": "/"}, "call_1"), tool_call("read_file", {"file_path": "/AGENTS.md"}, "call_2")],
+                    ),
+                    AIMessage(content="", tool_calls=[tool_call("write_file", {"file_path": "/new.txt", "content": "fresh"}, "call_3")]),
+                    AIMessage(content="", tool_calls=[tool_call("read_file", {"file_path": "/new.txt"}, "call_4")]),
+                    AIMessage(content="Done."),
+                ]
+            )
+        )
+        agent = create_deep_agent(model=model, backend=backend_factory, memory=["/AGENTS.md"], skills=["/skills/"], checkpointer=InMemorySaver())
+        files = {
+            "/AGENTS.md": create_file_data("Be concise."),
+            "/skills/demo/SKILL.md": create_file_data("---\nname: demo\ndescription: A demo skill.\n---\nBody."),
+        }
+
+        result = agent.invoke({"messages": [HumanMessage(content="Go")], "files": files}, {"configurable": {"thread_id": "thread-1"}})
+
+        # One result for the skills and memory hooks, the model calls and the read-only tool calls,
+        # and one more once write_file changed the files, so the next read sees the new file
+        assert len(runtimes) == 2
+        assert runtimes[1].state["files"]["/new.txt"] is not None
+        assert "fresh" in [msg for msg in result["messages"] if msg.type == "tool"][-1].content
+        # Nothing is kept once the run ends
+        assert dict(_run_scopes) == {}
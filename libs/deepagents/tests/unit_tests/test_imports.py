@@ -0,0 +1,34 @@
+"""Import-time regression tests: provider SDKs must only load when they are used."""
+
+import subprocess
+import sys
+
+import pytest
+
+# Provider packages that are expensive to import and only needed for specific models
+LAZY_MODULES = ("langchain_anthropic", "anthropic", "langchain_google_genai", "google.genai")
+
+
+def _imported_modules(code: str) -> set[str]:
+    """Run `code` in a fresh interpreter and return the modules reported by `-X importtime`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)  # noqa: S603
+    return {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import deepagents",
+        "from deepagents.backends import FilesystemBackend",
+        "from deepagents.graph import create_deep_agent",
+    ],
+)
+def test_import_does_not_load_provider_packages(code: str) -> None:
+    imported = _imported_modules(code)
+    assert "deepagents" in imported
+    assert not imported.intersection(LAZY_MODULES)
+
+
+def test_default_model_loads_anthropic_on_demand() -> None:
+    imported = _imported_modules("from deepagents.graph import get_default_model; get_default_model()")
+    assert "langchain_anthropic" in imported
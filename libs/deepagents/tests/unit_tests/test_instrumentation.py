@@ -0,0 +1,255 @@
+"""Unit tests for opt-in timing instrumentation."""
+
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import pytest
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import ModelRequest, ModelResponse
+from langchain.tools import ToolRuntime
+from langchain_core.messages import AIMessage, HumanMessage
+
+from deepagents.backends.composite import CompositeBackend
+from deepagents.backends.state import StateBackend
+from deepagents.graph import create_deep_agent
+from deepagents.instrumentation import (
+    HistogramSink,
+    OpenTelemetrySink,
+    Span,
+    SpanSink,
+    disable_instrumentation,
+    enable_instrumentation,
+    instrument_backend,
+    instrument_middleware,
+    is_instrumentation_enabled,
+    span,
+)
+from tests.unit_tests.chat_model import GenericFakeChatModel
+
+
+class RecordingSink(SpanSink):
+    def __init__(self) -> None:
+        self.started: list[str] = []
+        self.spans: list[Span] = []
+
+    def on_start(self, span: Span) -> None:
+        self.started.append(span.name)
+
+    def on_end(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def named(self, name: str) -> list[Span]:
+        return [s for s in self.spans if s.name == name]
+
+
+@pytest.fixture
+def sink() -> Iterator[RecordingSink]:
+    recording = RecordingSink()
+    enable_instrumentation(recording)
+    yield recording
+    disable_instrumentation()
+
+
+def _runtime(files: dict[str, Any] | None = None) -> ToolRuntime:
+    return ToolRuntime(
+        state={"messages": [], "files": files or {}}, context=None, tool_call_id="t1", store=None, stream_writer=lambda _: None, config={}
+    )
+
+
+def test_disabled_emits_nothing() -> None:
+    recording = RecordingSink()
+    enable_instrumentation(recording)
+    assert is_instrumentation_enabled()
+    disable_instrumentation()
+    assert not is_instrumentation_enabled()
+    with span("noop") as current:
+        assert current is None
+    StateBackend(_runtime()).write("/a.txt", "hello")
+    assert recording.spans == []
+
+
+def test_backend_spans_count_bytes(sink: RecordingSink) -> None:
+    runtime = _runtime()
+    backend = StateBackend(runtime)
+    result = backend.write("/a.txt", "héllo\nworld")
+    runtime.state["files"].update(result.files_update)
+    backend.read("/a.txt")
+    backend.download_files(["/a.txt", "/missing.txt"])
+    backend.glob_info("*.txt", path="/")
+
+    (write,) = sink.named("StateBackend.write")
+    assert write.kind == "backend"
+    assert write.attributes == {"path": "/a.txt", "bytes_written": len("héllo\nworld".encode())}
+    (read,) = sink.named("StateBackend.read")
+    assert read.attributes["bytes_read"] > len("héllo\nworld")
+    (download,) = sink.named("StateBackend.download_files")
+    assert download.attributes == {"files": 2, "bytes_read": len("héllo\nworld".encode())}
+    (glob,) = sink.named("StateBackend.glob_info")
+    assert glob.attributes == {"pattern": "*.txt", "path": "/", "entries": 1}
+    assert sink.started[0] == "StateBackend.write"
+
+
+def test_nested_spans_exclude_children_from_self_time(sink: RecordingSink) -> None:
+    backend = CompositeBackend(default=StateBackend(_runtime()), routes={})
+    with span("outer"):
+        backend.write("/a.txt", "x")
+        time.sleep(0.01)
+
+    outer = sink.named("outer")[0]
+    composite = sink.named("CompositeBackend.write")[0]
+    state = sink.named("StateBackend.write")[0]
+    assert composite.child_duration_s == pytest.approx(state.duration_s)
+    assert outer.child_duration_s == pytest.approx(composite.duration_s)
+    assert outer.self_duration_s >= 0.01
+
+
+def test_wrap_hooks_exclude_handler_time(sink: RecordingSink) -> None:
+    @instrument_middleware
+    class SlowMiddleware(AgentMiddleware):
+        def wrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], ModelResponse]) -> ModelResponse:
+            time.sleep(0.01)
+            return handler(request)
+
+    def handler(request: ModelRequest) -> ModelResponse:  # noqa: ARG001
+        with span("inside_handler"):
+            time.sleep(0.02)
+        return ModelResponse(result=[AIMessage(content="ok")])
+
+    request = ModelRequest(model=None, messages=[HumanMessage(content="hi")], state={"messages": []})  # type: ignore[arg-type]
+    SlowMiddleware().wrap_model_call(request, handler)
+
+    (hook,) = sink.named("SlowMiddleware.wrap_model_call")
+    assert hook.kind == "middleware"
+    assert hook.child_duration_s >= 0.02
+    assert 0.01 <= hook.self_duration_s < hook.child_duration_s
+    # Spans inside the handler are not also subtracted from the hook
+    assert sink.named("inside_handler")[0].duration_s == pytest.approx(hook.child_duration_s, abs=0.005)
+
+
+def test_failing_sink_does_not_break_operation() -> None:
+    class FailingSink(SpanSink):
+        def on_end(self, span: Span) -> None:
+            raise RuntimeError(span.name)
+
+    enable_instrumentation(FailingSink())
+    try:
+        result = StateBackend(_runtime()).write("/a.txt", "x")
+    finally:
+        disable_instrumentation()
+    assert result.error is None
+
+
+def test_failing_describe_does_not_break_operation(sink: RecordingSink) -> None:
+    @instrument_backend
+    class OddBackend:
+        def download_files(self, paths: list[str]) -> list[str]:
+            # Not `FileDownloadResponse`s, so the byte count cannot be computed
+            return [f"content of {path}" for path in paths]
+
+    @instrument_middleware
+    class PassthroughMiddleware(AgentMiddleware):
+        def wrap_tool_call(self, request: Any, handler: Callable[[Any], Any]) -> Any:  # noqa: ANN401
+            return handler(request)
+
+    class Request:
+        tool_call: dict[str, Any] = {}  # noqa: RUF012
+
+    assert OddBackend().download_files(["/a.txt"]) == ["content of /a.txt"]
+    assert PassthroughMiddleware().wrap_tool_call(Request(), lambda _: "ok") == "ok"
+
+    (download,) = sink.named("OddBackend.download_files")
+    assert download.attributes == {}
+    (hook,) = sink.named("PassthroughMiddleware.wrap_tool_call")
+    assert hook.attributes == {}
+
+
+def test_histogram_sink_aggregates_per_name() -> None:
+    histogram = HistogramSink()
+    for duration in [0.001] * 98 + [0.1, 0.2]:
+        histogram.on_end(Span(name="op", kind="operation", duration_s=duration, attributes={"bytes_read": 10}))
+    histogram.on_end(Span(name="other", kind="backend", duration_s=0.001, error="ValueError"))
+
+    stats = histogram.stats()
+    assert list(stats) == ["op", "other"]
+    op = stats["op"]
+    assert op["count"] == 100
+    assert op["total_s"] == pytest.approx(0.398)
+    assert op["min_s"] == pytest.approx(0.001)
+    assert op["max_s"] == pytest.approx(0.2)
+    assert 0.001 <= op["p50_s"] < 0.0012
+    assert 0.1 <= op["p99_s"] <= 0.2
+    assert op["bytes_read"] == 1000
+    assert stats["other"]["errors"] == 1
+
+    histogram.reset()
+    assert histogram.stats() == {}
+
+
+def test_opentelemetry_sink_uses_tracer_api() -> None:
+    class FakeOtelSpan:
+        def __init__(self, name: str, start_time: int, attributes: dict[str, Any]) -> None:
+            self.name = name
+            self.start_time = start_time
+            self.attributes = dict(attributes)
+            self.end_time: int | None = None
+
+        def set_attribute(self, key: str, value: Any) -> None:  # noqa: ANN401
+            self.attributes[key] = value
+
+        def set_status(self, status: Any) -> None:  # noqa: ANN401
+            self.attributes["status"] = status
+
+        def end(self, end_time: int | None = None) -> None:
+            self.end_time = end_time
+
+    class FakeTracer:
+        def __init__(self) -> None:
+            self.spans: list[FakeOtelSpan] = []
+
+        def start_span(self, name: str, start_time: int, attributes: dict[str, Any]) -> FakeOtelSpan:
+            self.spans.append(FakeOtelSpan(name, start_time, attributes))
+            return self.spans[-1]
+
+    tracer = FakeTracer()
+    enable_instrumentation(OpenTelemetrySink(tracer))
+    try:
+        with span("op", path="/a.txt") as current:
+            current.attributes["bytes_read"] = 3
+    finally:
+        disable_instrumentation()
+
+    (otel_span,) = tracer.spans
+    assert otel_span.name == "op"
+    assert otel_span.attributes["deepagents.kind"] == "operation"
+    assert otel_span.attributes["path"] == "/a.txt"
+    assert otel_span.attributes["bytes_read"] == 3
+    assert otel_span.end_time is not None
+    assert otel_span.end_time >= otel_span.start_time
+
+
+def test_agent_turn_reports_middleware_and_backend_spans() -> None:
+    model = GenericFakeChatModel(
+        messages=iter(
+            [
+                AIMessage(
+                    content="",
+                    tool_calls=[{"name": "write_file", "args": {"file_path": "/notes.md", "content": "abc"}, "id": "call_1", "type": "tool_call"}],
+                ),
+                AIMessage(content="done"),
+            ]
+        )
+    )
+    agent = create_deep_agent(model=model)
+    histogram = HistogramSink()
+    enable_instrumentation(histogram)
+    try:
+        agent.invoke({"messages": [HumanMessage(content="write notes")]})
+    finally:
+        disable_instrumentation()
+
+    stats = histogram.stats()
+    assert stats["FilesystemMiddleware.wrap_model_call"]["count"] == 2
+    assert stats["FilesystemMiddleware.wrap_tool_call"]["count"] == 1
+    assert stats["PatchToolCallsMiddleware.before_agent"]["count"] == 1
+    assert stats["StateBackend.write"]["bytes_written"] == 3
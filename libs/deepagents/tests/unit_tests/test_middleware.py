@@ -23,11 +23,13 @@ from deepagents.backends.utils import (
     truncate_if_too_long,
     update_file_data,
 )
+from deepagents.middleware._utils import _backend_scopes
 from deepagents.middleware.filesystem import (
     FileData,
     FilesystemMiddleware,
     FilesystemState,
     _create_content_preview,
+    _file_data_reducer,
     _supports_execution,
 )
 from deepagents.middleware.patch_tool_calls import PatchToolCallsMiddleware
@@ -469,6 +471,35 @@ class TestFilesystemMiddleware:
         assert "/helper.txt" in result
         assert "/main.py" not in result
 
+    def test_grep_reuses_joined_text_across_factory_backends(self):
+        """Test that files searched again through a new backend from a factory use the shared grep cache."""
+        files = {f"/src/f{i}.py": create_file_data("\n".join(f"value_{i}_{j} = {j}" for j in range(50))) for i in range(3)}
+        state = FilesystemState(messages=[], files=files)
+        backends = []
+
+        def factory(rt):
+            backends.append(StateBackend(rt))
+            return backends[-1]
+
+        grep_search_tool = next(tool for tool in FilesystemMiddleware(backend=factory).tools if tool.name == "grep")
+        results = [
+            grep_search_tool.invoke(
+                {
+                    "pattern": "= 7",
+                    "output_mode": "content",
+                    "runtime": ToolRuntime(state=state, context=None, tool_call_id=f"call_{i}", store=None, stream_writer=lambda _: None, config={}),
+                }
+            )
+            for i in range(2)
+        ]
+
+        assert len(backends) == 2
+        assert results[0] == results[1]
+        assert "/src/f2.py" in results[1]
+        # The second search, through a new backend, found the joined text of every file
+        entries = backends[1]._joined_lines._entries
+        assert all(entries[id(file_data["content"])][0] is file_data["content"] for file_data in files.values())
+
     def test_grep_search_shortterm_content_mode(self):
         state = FilesystemState(
             messages=[],
@@ -521,6 +552,30 @@ class TestFilesystemMiddleware:
         assert "/test.py:2" in result or "/test.py: 2" in result
         assert "/main.py:1" in result or "/main.py: 1" in result
 
+    def test_grep_and_glob_return_pages_with_cursor(self):
+        state = FilesystemState(
+            messages=[],
+            files={
+                f"/f{i}.py": FileData(content=["import os", "import sys"], modified_at=f"2021-01-0{i + 1}", created_at="2021-01-01") for i in range(3)
+            },
+        )
+        runtime = ToolRuntime(state=state, context=None, tool_call_id="", store=None, stream_writer=lambda _: None, config={})
+        middleware = FilesystemMiddleware()
+        grep_search_tool = next(tool for tool in middleware.tools if tool.name == "grep")
+        glob_search_tool = next(tool for tool in middleware.tools if tool.name == "glob")
+
+        first = grep_search_tool.invoke({"pattern": "import", "output_mode": "content", "max_results": 4, "runtime": runtime})
+        assert first.count("import") == 4
+        assert 'cursor="4"' in first
+        last = grep_search_tool.invoke({"pattern": "import", "output_mode": "content", "max_results": 4, "cursor": "4", "runtime": runtime})
+        assert last == "/f2.py:\n  1: import os\n  2: import sys"
+
+        first = glob_search_tool.invoke({"pattern": "*.py", "max_results": 2, "runtime": runtime})
+        assert first.startswith(str(["/f2.py", "/f1.py"]))
+        assert 'cursor="2"' in first
+        assert glob_search_tool.invoke({"pattern": "*.py", "max_results": 2, "cursor": "2", "runtime": runtime}) == str(["/f0.py"])
+        assert grep_search_tool.invoke({"pattern": "import", "cursor": "bad", "runtime": runtime}) == "Error: Invalid cursor 'bad'"
+
     def test_grep_search_shortterm_with_include(self):
         state = FilesystemState(
             messages=[],
@@ -909,6 +964,51 @@ class TestFilesystemMiddleware:
         assert "/large_tool_results/test_123" in result.update["files"]
         assert "Tool result too large" in result.update["messages"][0].content
 
+    def test_backend_factory_resolved_once_per_scope(self):
+        """Test that overlapping tool calls of one step share a backend and nothing outlives the step."""
+        calls = []
+
+        def factory(rt):
+            calls.append(rt)
+            return StateBackend(rt)
+
+        fs_middleware = FilesystemMiddleware(backend=factory)
+        other_middleware = FilesystemMiddleware(backend=factory)
+        state = {"messages": [], "files": {}}
+        runtimes = [
+            ToolRuntime(state=state, context=None, tool_call_id=f"call_{i}", store=None, stream_writer=lambda _: None, config={}) for i in range(3)
+        ]
+
+        def handler(request: ToolCallRequest) -> ToolMessage:
+            backends = {id(fs_middleware._get_backend(rt)) for rt in runtimes} | {id(other_middleware._get_backend(request.runtime))}
+            assert len(backends) == 1
+            return ToolMessage(content="ok", tool_call_id=request.tool_call["id"])
+
+        request = ToolCallRequest(tool_call={"id": "call_0", "name": "ls", "args": {}}, tool=None, state=state, runtime=runtimes[0])
+        fs_middleware.wrap_tool_call(request, handler)
+        assert len(calls) == 1
+        # The scope closed with the call: no state snapshot is kept alive
+        assert _backend_scopes == {}
+
+        # Outside a scope, and for the next state snapshot, the factory is called again
+        next_state = {"messages": [], "files": {"/a.txt": create_file_data("a")}}
+        next_runtime = ToolRuntime(state=next_state, context=None, tool_call_id="call_4", store=None, stream_writer=lambda _: None, config={})
+        assert fs_middleware._get_backend(next_runtime).read("/a.txt").endswith("a")
+        assert len(calls) == 2
+
+    def test_intercept_uses_custom_tokenizer(self):
+        """Test that the eviction threshold is measured with the configured tokenizer."""
+        middleware = FilesystemMiddleware(tool_token_limit_before_evict=1000, tokenizer=len)
+        state = FilesystemState(messages=[], files={})
+        runtime = ToolRuntime(state=state, context=None, tool_call_id="test_123", store=None, stream_writer=lambda _: None, config={})
+
+        # 2000 chars is under the default 4 chars/token estimate but over 1000 tokens at 1 char/token
+        tool_message = ToolMessage(content="x" * 2000, tool_call_id="test_123")
+        result = middleware._intercept_large_tool_result(tool_message, runtime)
+
+        assert isinstance(result, Command)
+        assert "/large_tool_results/test_123" in result.update["files"]
+
     def test_intercept_long_toolmessage_preserves_name(self):
         """Test that ToolMessage name is preserved after eviction."""
         middleware = FilesystemMiddleware(tool_token_limit_before_evict=1000)
@@ -987,6 +1087,114 @@ class TestFilesystemMiddleware:
         assert isinstance(result, Command)
         assert "/large_tool_results/test_call_id" in result.update["files"]
 
+    def test_intercept_content_addressed_dedupes_identical_results(self):
+        """Test that identical evicted results share one content-addressed file."""
+        middleware = FilesystemMiddleware(tool_token_limit_before_evict=1000, eviction_settings={"content_addressed": True})
+        large_content = "x" * 5000
+
+        runtime = ToolRuntime(
+            state={"messages": [], "files": {}}, context=None, tool_call_id="call_1", store=None, stream_writer=lambda _: None, config={}
+        )
+        first = middleware._intercept_large_tool_result(ToolMessage(content=large_content, tool_call_id="call_1"), runtime)
+        assert isinstance(first, Command)
+        (file_path,) = first.update["files"].keys()
+        assert file_path.startswith("/large_tool_results/")
+        assert "call_1" not in file_path
+
+        # Same content from a different tool call reuses the stored file and only refreshes its timestamp
+        files = {file_path: {**first.update["files"][file_path], "modified_at": "2021-01-01T00:00:00+00:00"}}
+        runtime = ToolRuntime(
+            state={"messages": [], "files": files}, context=None, tool_call_id="call_2", store=None, stream_writer=lambda _: None, config={}
+        )
+        second = middleware._intercept_large_tool_result(ToolMessage(content=large_content, tool_call_id="call_2"), runtime)
+        assert isinstance(second, Command)
+        assert list(second.update["files"]) == [file_path]
+        assert second.update["files"][file_path]["modified_at"] > "2021-01-01T00:00:00+00:00"
+        assert file_path in second.update["messages"][0].content
+        assert "call_2" in second.update["messages"][0].content
+
+    def test_before_model_expires_evicted_results_max_results(self):
+        """Test that the least recently used evicted results beyond max_results are deleted."""
+        middleware = FilesystemMiddleware(tool_token_limit_before_evict=1000, eviction_settings={"content_addressed": False, "max_results": 2})
+        files = {
+            "/large_tool_results/old": FileData(content=["old"], created_at="2024-01-01T00:00:00+00:00", modified_at="2024-01-01T00:00:00+00:00"),
+            "/large_tool_results/recent": FileData(
+                content=["recent"], created_at="2024-01-02T00:00:00+00:00", modified_at="2024-01-02T00:00:00+00:00"
+            ),
+            "/notes.txt": FileData(content=["keep"], created_at="2020-01-01T00:00:00+00:00", modified_at="2020-01-01T00:00:00+00:00"),
+        }
+        runtime = ToolRuntime(
+            state={"messages": [], "files": files}, context=None, tool_call_id="new", store=None, stream_writer=lambda _: None, config={}
+        )
+        result = middleware._intercept_large_tool_result(ToolMessage(content="x" * 5000, tool_call_id="new"), runtime)
+
+        # Tool calls only write their own result; retention runs before the next model call
+        assert isinstance(result, Command)
+        assert list(result.update["files"]) == ["/large_tool_results/new"]
+
+        files = _file_data_reducer(files, result.update["files"])
+        update = middleware.before_model({"messages": [], "files": files}, None)
+        assert update == {"files": {"/large_tool_results/old": None}}
+        assert middleware.before_model({"messages": [], "files": _file_data_reducer(files, update["files"])}, None) is None
+
+    async def test_abefore_model_expires_evicted_results_ttl(self):
+        """Test that evicted results older than ttl_seconds are deleted."""
+        middleware = FilesystemMiddleware(tool_token_limit_before_evict=1000, eviction_settings={"content_addressed": False, "ttl_seconds": 60})
+        files = {
+            "/large_tool_results/stale": FileData(content=["stale"], created_at="2024-01-01T00:00:00+00:00", modified_at="2024-01-01T00:00:00+00:00")
+        }
+        runtime = ToolRuntime(
+            state={"messages": [], "files": files}, context=None, tool_call_id="new", store=None, stream_writer=lambda _: None, config={}
+        )
+        command = Command(update={"messages": [ToolMessage(content="x" * 5000, tool_call_id="new")]})
+        result = await middleware._aintercept_large_tool_result(command, runtime)
+        assert isinstance(result, Command)
+
+        files = _file_data_reducer(files, result.update["files"])
+        update = await middleware.abefore_model({"messages": [], "files": files}, None)
+        assert update == {"files": {"/large_tool_results/stale": None}}
+
+    def test_parallel_tool_calls_keep_refreshed_evicted_results(self):
+        """Test that a result refreshed by one parallel tool call is not expired by another."""
+        middleware = FilesystemMiddleware(tool_token_limit_before_evict=1000, eviction_settings={"content_addressed": True, "max_results": 1})
+        shared_content = "x" * 5000
+        runtime = ToolRuntime(
+            state={"messages": [], "files": {}}, context=None, tool_call_id="call_0", store=None, stream_writer=lambda _: None, config={}
+        )
+        first = middleware._intercept_large_tool_result(ToolMessage(content=shared_content, tool_call_id="call_0"), runtime)
+        (shared_path,) = first.update["files"]
+        files = {shared_path: {**first.update["files"][shared_path], "modified_at": "2024-01-01T00:00:00+00:00"}}
+
+        # Both calls run from the same snapshot: one reuses the stored result, the other evicts new content
+        updates = []
+        for tool_call_id, content in (("call_1", shared_content), ("call_2", "y" * 5000)):
+            runtime = ToolRuntime(
+                state={"messages": [], "files": files}, context=None, tool_call_id=tool_call_id, store=None, stream_writer=lambda _: None, config={}
+            )
+            result = middleware._intercept_large_tool_result(ToolMessage(content=content, tool_call_id=tool_call_id), runtime)
+            assert isinstance(result, Command)
+            assert all(file_data is not None for file_data in result.update["files"].values())
+            updates.append(result.update["files"])
+
+        for files_update in reversed(updates):
+            files = _file_data_reducer(files, files_update)
+        assert shared_path in files
+        assert len(files) == 2
+
+        update = middleware.before_model({"messages": [], "files": files}, None)
+        assert update is not None
+        assert len(update["files"]) == 1
+        assert len(_file_data_reducer(files, update["files"])) == 1
+
+    def test_before_model_skips_malformed_evicted_results(self):
+        """Test that retention ignores entries that are not file data."""
+        middleware = FilesystemMiddleware(eviction_settings={"max_results": 0})
+        files = {
+            "/large_tool_results/bad": "not file data",
+            "/large_tool_results/ok": FileData(content=["ok"], created_at="2024-01-01T00:00:00+00:00", modified_at="2024-01-01T00:00:00+00:00"),
+        }
+        assert middleware.before_model({"messages": [], "files": files}, None) == {"files": {"/large_tool_results/ok": None}}
+
     def test_intercept_content_block_with_large_text(self):
         """Test that content blocks with large text get evicted and converted to string."""
         middleware = FilesystemMiddleware(tool_token_limit_before_evict=100)
@@ -1394,15 +1602,8 @@ class TestPatchToolCallsMiddleware:
         ]
         middleware = PatchToolCallsMiddleware()
         state_update = middleware.before_agent({"messages": input_messages}, None)
-        assert state_update is not None
-        assert isinstance(state_update["messages"], Overwrite)
-        patched_messages = state_update["messages"].value
-        assert len(patched_messages) == 2
-        assert patched_messages[0].type == "system"
-        assert patched_messages[0].content == "You are a helpful assistant."
-        assert patched_messages[1].type == "human"
-        assert patched_messages[1].content == "Hello, how are you?"
-        assert patched_messages[1].id == "2"
+        # Nothing to patch, so the message history is left untouched
+        assert state_update is None
 
     def test_missing_tool_call(self) -> None:
         input_messages = [
@@ -1450,23 +1651,33 @@ class TestPatchToolCallsMiddleware:
         ]
         middleware = PatchToolCallsMiddleware()
         state_update = middleware.before_agent({"messages": input_messages}, None)
-        assert state_update is not None
+        # Every tool call is answered, so the message history is left untouched
+        assert state_update is None
+
+    def test_missing_tool_call_on_last_message_is_appended(self) -> None:
+        input_messages = [
+            HumanMessage(content="Hello, how are you?", id="1"),
+            AIMessage(
+                content="",
+                tool_calls=[
+                    ToolCall(id="123", name="get_events_for_days", args={"date_str": "2025-01-01"}),
+                    ToolCall(id="456", name="get_weather", args={"city": "Tokyo"}),
+                ],
+                id="2",
+            ),
+            ToolMessage(content="No events.", tool_call_id="123", id="3"),
+        ]
+        middleware = PatchToolCallsMiddleware()
+
+        # The AIMessage is not the last message, so the answer must be inserted
+        state_update = middleware.before_agent({"messages": input_messages}, None)
         assert isinstance(state_update["messages"], Overwrite)
-        patched_messages = state_update["messages"].value
-        assert len(patched_messages) == 5
-        assert patched_messages[0].type == "system"
-        assert patched_messages[0].content == "You are a helpful assistant."
-        assert patched_messages[1].type == "human"
-        assert patched_messages[1].content == "Hello, how are you?"
-        assert patched_messages[2].type == "ai"
-        assert len(patched_messages[2].tool_calls) == 1
-        assert patched_messages[2].tool_calls[0]["id"] == "123"
-        assert patched_messages[2].tool_calls[0]["name"] == "get_events_for_days"
-        assert patched_messages[2].tool_calls[0]["args"] == {"date_str": "2025-01-01"}
-        assert patched_messages[3].type == "tool"
-        assert patched_messages[3].tool_call_id == "123"
-        assert patched_messages[4].type == "human"
-        assert patched_messages[4].content == "What is the weather in Tokyo?"
+
+        # When the AIMessage is the last message, only the missing answers are appended
+        state_update = middleware.before_agent({"messages": input_messages[:2]}, None)
+        assert isinstance(state_update["messages"], list)
+        assert [m.tool_call_id for m in state_update["messages"]] == ["123", "456"]
+        assert all(m.type == "tool" for m in state_update["messages"])
 
     def test_two_missing_tool_calls(self) -> None:
         input_messages = [
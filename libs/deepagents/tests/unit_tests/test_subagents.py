@@ -5,6 +5,9 @@ are invoked, how they return results, and how state is managed between parent
 and child agents.
 """
 
+import asyncio
+import threading
+import time
 import warnings
 from pathlib import Path
 from typing import Any, TypedDict
@@ -15,12 +18,14 @@ from langchain.agents.middleware import TodoListMiddleware
 from langchain.agents.structured_output import ToolStrategy
 from langchain.tools import ToolRuntime
 from langchain_core.messages import AIMessage, HumanMessage
-from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
 from langchain_core.tools import tool
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command
 from pydantic import BaseModel, Field
 
+from deepagents import graph as graph_module
 from deepagents.backends.filesystem import FilesystemBackend
 from deepagents.graph import create_deep_agent
 from deepagents.middleware.skills import SkillsMiddleware
@@ -1591,3 +1596,353 @@ class TestSubAgentMiddlewareValidation:
         assert len(w) == 1
         assert issubclass(w[0].category, DeprecationWarning)
         assert "deprecated" in str(w[0].message).lower()
+
+
+class TestTaskBatchTool:
+    """Tests for the batched `task_batch` tool."""
+
+    @staticmethod
+    def _middleware(*, concurrency: int = 2) -> SubAgentMiddleware:
+        def writer(state: dict[str, Any]) -> dict[str, Any]:
+            description = state["messages"][-1].content
+            files = {**state.get("files", {}), f"/{description}.txt": {"content": [description], "created_at": "", "modified_at": ""}}
+            return {"messages": [AIMessage(content=f"wrote {description}")], "files": files}
+
+        def reader(state: dict[str, Any]) -> dict[str, Any]:
+            return {"messages": [AIMessage(content=f"read {len(state.get('files', {}))} files")], "files": state.get("files", {})}
+
+        return SubAgentMiddleware(
+            backend=FilesystemBackend(),
+            subagents=[
+                CompiledSubAgent(name="writer", description="Writes a file.", runnable=RunnableLambda(writer)),
+                CompiledSubAgent(name="reader", description="Reads files.", runnable=RunnableLambda(reader)),
+            ],
+            batch_task_concurrency=concurrency,
+        )
+
+    @staticmethod
+    def _runtime(events: list[Any], state: dict[str, Any] | None = None) -> ToolRuntime:
+        return ToolRuntime(
+            state=state or {"messages": [], "files": {"/existing.txt": {"content": ["x"], "created_at": "", "modified_at": ""}}},
+            context=None,
+            config={},
+            stream_writer=events.append,
+            tool_call_id="call_batch",
+            store=None,
+        )
+
+    def test_batch_tool_is_opt_in(self) -> None:
+        default = SubAgentMiddleware(
+            backend=FilesystemBackend(),
+            subagents=[CompiledSubAgent(name="a", description="A.", runnable=RunnableLambda(lambda _: {"messages": []}))],
+        )
+        assert [t.name for t in default.tools] == ["task"]
+        assert [t.name for t in self._middleware().tools] == ["task", "task_batch"]
+        assert "task_batch" in self._middleware().system_prompt
+
+    def test_batch_merges_results_in_task_order(self) -> None:
+        batch_tool = self._middleware().tools[1]
+        events: list[Any] = []
+        tasks = [
+            {"description": "first", "subagent_type": "writer"},
+            {"description": "second", "subagent_type": "reader"},
+            {"description": "third", "subagent_type": "writer"},
+        ]
+
+        command = batch_tool.func(tasks=tasks, runtime=self._runtime(events))
+
+        tool_message = command.update["messages"][0]
+        assert tool_message.content == "[1] writer:\nwrote first\n\n[2] reader:\nread 1 files\n\n[3] writer:\nwrote third"
+        # Only changed files are returned, so the reader's untouched map cannot clobber the writers
+        assert sorted(command.update["files"]) == ["/first.txt", "/third.txt"]
+        timings = tool_message.artifact["tasks"]
+        assert [t["subagent_type"] for t in timings] == ["writer", "reader", "writer"]
+        assert all(t["duration_s"] >= 0 for t in timings)
+        assert sorted(event["index"] for event in events) == [0, 1, 2]
+        assert all(event["type"] == "task_batch_result" for event in events)
+
+    async def test_async_batch_respects_concurrency(self) -> None:
+        active = 0
+        peak = 0
+
+        async def slow(state: dict[str, Any]) -> dict[str, Any]:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {"messages": [AIMessage(content=state["messages"][-1].content.upper())]}
+
+        middleware = SubAgentMiddleware(
+            backend=FilesystemBackend(),
+            subagents=[CompiledSubAgent(name="slow", description="Slow agent.", runnable=RunnableLambda(slow))],
+            batch_task_concurrency=2,
+        )
+        tasks = [{"description": f"task {i}", "subagent_type": "slow"} for i in range(5)]
+
+        command = await middleware.tools[1].coroutine(tasks=tasks, runtime=self._runtime([], {"messages": []}))
+
+        assert peak == 2
+        assert command.update["messages"][0].content.startswith("[1] slow:\nTASK 0")
+        assert "files" not in command.update
+
+    def test_sync_batch_streams_every_event_from_the_calling_thread(self) -> None:
+        @tool
+        def wait(query: str) -> str:
+            """Wait for a result."""
+            time.sleep(0.01)
+            return query
+
+        def worker(name: str) -> SubAgent:
+            tool_call = {"name": "wait", "args": {"query": name}, "id": f"call_{name}", "type": "tool_call"}
+            responses = [AIMessage(content="waiting", tool_calls=[tool_call]), AIMessage(content=f"{name} done")]
+            return SubAgent(
+                name=name, description="Waits.", system_prompt="Wait.", model=GenericFakeChatModel(messages=iter(responses)), tools=[wait]
+            )
+
+        names = [f"worker-{i}" for i in range(4)]
+        middleware = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[worker(name) for name in names], batch_task_concurrency=4)
+        events: list[Any] = []
+        writer_threads: set[int] = set()
+
+        def stream_writer(event: dict[str, Any]) -> None:
+            writer_threads.add(threading.get_ident())
+            events.append(event)
+
+        runtime = ToolRuntime(state={"messages": []}, context=None, config={}, stream_writer=stream_writer, tool_call_id="call_batch", store=None)
+        tasks = [{"description": "go", "subagent_type": name} for name in names]
+
+        command = middleware.tools[1].func(tasks=tasks, runtime=runtime)
+
+        assert command.update["messages"][0].content.endswith("worker-3 done")
+        assert writer_threads == {threading.get_ident()}
+        for name in names:
+            streamed = [event["message"].content for event in events if event["type"] == "subagent_message" and event["subagent_type"] == name]
+            # Both model responses and the tool result; the task description itself is not forwarded
+            assert streamed == ["waiting", name, f"{name} done"]
+        assert sorted(event["index"] for event in events if event["type"] == "task_batch_result") == [0, 1, 2, 3]
+
+    def test_unknown_subagent_type_returns_error(self) -> None:
+        batch_tool = self._middleware().tools[1]
+        tasks = [{"description": "x", "subagent_type": "writer"}, {"description": "y", "subagent_type": "missing"}]
+
+        result = batch_tool.func(tasks=tasks, runtime=self._runtime([]))
+
+        assert isinstance(result, str)
+        assert "missing" in result
+
+    def test_invalid_concurrency_raises(self) -> None:
+        with pytest.raises(ValueError, match="batch_task_concurrency"):
+            self._middleware(concurrency=0)
+
+
+class TestSubagentStateProjection:
+    """Tests for projecting parent state into subagents and returning only changed keys."""
+
+    @staticmethod
+    def _file(content: str) -> dict[str, Any]:
+        return {"content": [content], "created_at": "", "modified_at": ""}
+
+    def _run_task(self, subagent: CompiledSubAgent, state: dict[str, Any]) -> Command:
+        middleware = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[subagent])
+        runtime = ToolRuntime(state=state, context=None, config={}, stream_writer=lambda _: None, tool_call_id="call_1", store=None)
+        return middleware.tools[0].func(description="do it", subagent_type=subagent["name"], runtime=runtime)
+
+    def test_state_keys_limit_what_subagent_receives(self) -> None:
+        received: list[dict[str, Any]] = []
+
+        def capture(state: dict[str, Any]) -> dict[str, Any]:
+            received.append(state)
+            return {**state, "messages": [AIMessage(content="done")]}
+
+        files = {"/a.txt": self._file("a")}
+        state = {"messages": [HumanMessage(content="hi")], "files": files, "notes": "large value"}
+        subagent = CompiledSubAgent(name="worker", description="Worker.", runnable=RunnableLambda(capture), state_keys=["files"])
+
+        command = self._run_task(subagent, state)
+
+        assert set(received[0]) == {"messages", "files"}
+        # The file map is shared by reference, not copied
+        assert received[0]["files"] is files
+        # Nothing changed, so only the tool message is returned
+        assert set(command.update) == {"messages"}
+
+    def test_only_changed_files_are_returned(self) -> None:
+        unchanged = self._file("keep")
+
+        def edit(state: dict[str, Any]) -> dict[str, Any]:
+            files = {k: v for k, v in state["files"].items() if k != "/delete.txt"}
+            files["/edit.txt"] = self._file("new")
+            return {"messages": [AIMessage(content="done")], "files": files, "todos": []}
+
+        state = {
+            "messages": [],
+            "files": {"/keep.txt": unchanged, "/edit.txt": self._file("old"), "/delete.txt": self._file("gone")},
+        }
+        subagent = CompiledSubAgent(name="editor", description="Editor.", runnable=RunnableLambda(edit))
+
+        command = self._run_task(subagent, state)
+
+        assert command.update["files"] == {"/edit.txt": self._file("new"), "/delete.txt": None}
+        assert "todos" not in command.update
+
+
+class TestLazySubagentCompilation:
+    """Tests for lazy compilation and process-wide caching of subagent graphs."""
+
+    def test_subagent_compiled_on_first_use_and_cached(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        compiled: list[str] = []
+        compile_subagent = SubAgentMiddleware._compile_subagent
+
+        def counting_compile(spec: SubAgent) -> Runnable:
+            compiled.append(spec["name"])
+            return compile_subagent(spec)
+
+        monkeypatch.setattr(SubAgentMiddleware, "_compile_subagent", staticmethod(counting_compile))
+        spec = SubAgent(
+            name="worker",
+            description="Worker.",
+            system_prompt="You work.",
+            model=GenericFakeChatModel(messages=iter([AIMessage(content="done")])),
+            tools=[],
+        )
+
+        first = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[spec])
+        second = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[spec])
+        assert compiled == []
+
+        runtime = ToolRuntime(state={"messages": []}, context=None, config={}, stream_writer=lambda _: None, tool_call_id="call_1", store=None)
+        command = first.tools[0].func(description="work", subagent_type="worker", runtime=runtime)
+        assert command.update["messages"][0].content == "done"
+        assert compiled == ["worker"]
+
+        # The same spec object reuses the compiled graph from the process-wide cache
+        first_graph = first._get_subagents()[0]["runnable"].graph
+        assert second._get_subagents()[0]["runnable"].graph is first_graph
+        assert compiled == ["worker"]
+
+    def test_mutated_spec_is_recompiled(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        compiled: list[str] = []
+        compile_subagent = SubAgentMiddleware._compile_subagent
+
+        def counting_compile(spec: SubAgent) -> Runnable:
+            compiled.append(spec["system_prompt"])
+            return compile_subagent(spec)
+
+        @tool
+        def lookup(query: str) -> str:
+            """Look something up."""
+            return query
+
+        monkeypatch.setattr(SubAgentMiddleware, "_compile_subagent", staticmethod(counting_compile))
+        spec = SubAgent(name="editor", description="Edits.", system_prompt="v1", model=GenericFakeChatModel(messages=iter([])), tools=[])
+
+        first_graph = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[spec])._get_subagents()[0]["runnable"].graph
+        spec["system_prompt"] = "v2"
+        second_graph = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[spec])._get_subagents()[0]["runnable"].graph
+        spec["tools"].append(lookup)
+        third_graph = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[spec])._get_subagents()[0]["runnable"].graph
+        cached_graph = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[spec])._get_subagents()[0]["runnable"].graph
+
+        assert compiled == ["v1", "v2", "v2"]
+        assert len({id(first_graph), id(second_graph), id(third_graph)}) == 3
+        assert cached_graph is third_graph
+
+    def test_create_deep_agent_does_not_compile_unused_subagents(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        compiled: list[str] = []
+        compile_subagent = graph_module._compile_subagent
+
+        def counting_compile(spec: SubAgent, **kwargs: Any) -> Runnable:
+            compiled.append(spec["name"])
+            return compile_subagent(spec, **kwargs)
+
+        monkeypatch.setattr(graph_module, "_compile_subagent", counting_compile)
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="done")]))
+        subagents = [SubAgent(name=f"agent-{i}", description=f"Agent {i}.", system_prompt="You help.") for i in range(3)]
+
+        agent = create_deep_agent(model=model, subagents=subagents)
+        result = agent.invoke({"messages": [HumanMessage(content="hi")]})
+
+        assert result["messages"][-1].content == "done"
+        assert compiled == []
+
+
+class TestSubagentBudgets:
+    """Tests for streaming subagent messages and enforcing subagent budgets."""
+
+    @staticmethod
+    def _looping_subagent(*, usage: dict[str, int] | None = None) -> SubAgent:
+        @tool
+        def lookup(query: str) -> str:
+            """Look something up."""
+            return f"found {query}"
+
+        responses = [
+            AIMessage(
+                content=f"searching {i}",
+                tool_calls=[{"name": "lookup", "args": {"query": str(i)}, "id": f"call_{i}", "type": "tool_call"}],
+                usage_metadata=usage,
+            )
+            for i in range(5)
+        ]
+        return SubAgent(
+            name="looper",
+            description="Keeps searching.",
+            system_prompt="Search.",
+            model=GenericFakeChatModel(messages=iter([*responses, AIMessage(content="final answer")])),
+            tools=[lookup],
+        )
+
+    @staticmethod
+    def _runtime(events: list[Any]) -> ToolRuntime:
+        return ToolRuntime(state={"messages": []}, context=None, config={}, stream_writer=events.append, tool_call_id="call_task", store=None)
+
+    def test_subagent_messages_are_streamed(self) -> None:
+        middleware = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[self._looping_subagent()])
+        events: list[Any] = []
+
+        command = middleware.tools[0].func(description="go", subagent_type="looper", runtime=self._runtime(events))
+
+        assert command.update["messages"][0].content == "final answer"
+        streamed = [event["message"] for event in events if event["type"] == "subagent_message"]
+        # 6 model responses and 5 tool results; the task description itself is not forwarded
+        assert len(streamed) == 11
+        assert streamed[-1].content == "final answer"
+        assert all(event["subagent_type"] == "looper" for event in events)
+
+    def test_step_budget_returns_partial_result(self) -> None:
+        middleware = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[self._looping_subagent()], subagent_budget={"max_steps": 2})
+
+        command = middleware.tools[0].func(description="go", subagent_type="looper", runtime=self._runtime([]))
+
+        content = command.update["messages"][0].content
+        assert content.startswith("Subagent stopped early: step budget of 2 model calls reached.")
+        assert content.endswith("searching 1")
+
+    def test_token_budget_from_usage_metadata(self) -> None:
+        spec = self._looping_subagent(usage={"input_tokens": 80, "output_tokens": 20, "total_tokens": 100})
+        spec["budget"] = {"max_tokens": 250}
+        middleware = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[spec])
+
+        command = middleware.tools[0].func(description="go", subagent_type="looper", runtime=self._runtime([]))
+
+        assert "token budget of 250 tokens reached (300 used)" in command.update["messages"][0].content
+
+    async def test_wall_clock_budget_cancels_async_run(self) -> None:
+        async def slow_node(_state: dict[str, Any]) -> dict[str, Any]:
+            await asyncio.sleep(5)
+            return {"messages": [AIMessage(content="too late")]}
+
+        class SlowState(TypedDict):
+            messages: list
+
+        graph = StateGraph(SlowState)
+        graph.add_node("slow", slow_node)
+        graph.add_edge(START, "slow")
+        graph.add_edge("slow", END)
+        subagent = CompiledSubAgent(name="slow", description="Slow.", runnable=graph.compile(), budget={"max_seconds": 0.05})
+        middleware = SubAgentMiddleware(backend=FilesystemBackend(), subagents=[subagent])
+
+        command = await middleware.tools[0].coroutine(description="go", subagent_type="slow", runtime=self._runtime([]))
+
+        assert command.update["messages"][0].content == "Subagent stopped early: wall-clock budget of 0.05s exceeded. No result was produced."
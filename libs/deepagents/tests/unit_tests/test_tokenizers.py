@@ -0,0 +1,96 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolCall
+
+from deepagents.backends import StateBackend
+from deepagents.backends.utils import TOOL_RESULT_TOKEN_LIMIT, TRUNCATION_GUIDANCE, truncate_if_too_long
+from deepagents.graph import _default_subagent_middleware, create_deep_agent
+from deepagents.middleware.filesystem import FilesystemMiddleware
+from deepagents.middleware.summarization import _DeepAgentsSummarizationMiddleware
+from deepagents.tokenizers import (
+    CachedTokenizer,
+    count_tokens_by_chars,
+    count_tokens_heuristic,
+    message_token_counter,
+)
+from tests.unit_tests.chat_model import GenericFakeChatModel
+
+
+class TestTokenizers:
+    def test_count_tokens_by_chars(self) -> None:
+        assert count_tokens_by_chars("") == 0
+        assert count_tokens_by_chars("abcd") == 1
+        assert count_tokens_by_chars("abcde") == 2
+
+    def test_heuristic_counts_punctuation_and_cjk_higher(self) -> None:
+        prose = "the quick brown fox jumps over the lazy dog " * 20
+        json_text = '{"a":[1,2],"b":{"c":"d"}}' * 20
+        cjk_text = "深度代理文件系统" * 20
+
+        # Prose stays close to the flat estimate
+        assert abs(count_tokens_heuristic(prose) - count_tokens_by_chars(prose)) <= 1
+        # Punctuation-heavy and non-ASCII text cost more tokens than characters / 4
+        assert count_tokens_heuristic(json_text) > count_tokens_by_chars(json_text)
+        assert count_tokens_heuristic(cjk_text) == len(cjk_text)
+
+    def test_cached_tokenizer_counts_each_content_once(self) -> None:
+        calls: list[str] = []
+
+        def tokenizer(text: str) -> int:
+            calls.append(text)
+            return len(text)
+
+        cached = CachedTokenizer(tokenizer, maxsize=2, min_length=4)
+        assert cached("a" * 10) == 10
+        assert cached("a" * 10) == 10
+        assert len(calls) == 1
+
+        # Short strings bypass the cache
+        cached("abc")
+        cached("abc")
+        assert len(calls) == 3
+
+        # Least recently used entries are evicted once maxsize is exceeded
+        cached("b" * 10)
+        cached("c" * 10)
+        cached("a" * 10)
+        assert len(calls) == 6
+
+    def test_message_token_counter(self) -> None:
+        counter = message_token_counter(count_tokens_by_chars)
+        messages = [
+            HumanMessage(content="a" * 40),
+            AIMessage(content="", tool_calls=[ToolCall(id="1", name="ls", args={"path": "/"})]),
+        ]
+        without_tools = counter(messages)
+        assert without_tools > count_tokens_by_chars("a" * 40)
+        assert counter(messages, tools=[{"name": "ls", "description": "List files", "parameters": {}}]) > without_tools
+
+    def test_truncate_if_too_long_uses_tokenizer(self) -> None:
+        content = "x" * 1000
+        assert truncate_if_too_long(content) == content
+
+        def expensive(text: str) -> int:
+            return len(text) * TOOL_RESULT_TOKEN_LIMIT // 100
+
+        result = truncate_if_too_long(content, tokenizer=expensive)
+        assert result.endswith(TRUNCATION_GUIDANCE)
+        assert len(result) < 200
+
+    def test_create_deep_agent_shares_tokenizer_with_summarization(self) -> None:
+        counted: list[str] = []
+
+        def tokenizer(text: str) -> int:
+            counted.append(text)
+            return count_tokens_by_chars(text)
+
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="done")]))
+        agent = create_deep_agent(model=model, tokenizer=tokenizer)
+        agent.invoke({"messages": [HumanMessage(content="main-agent-marker")]})
+        assert any("main-agent-marker" in text for text in counted)
+
+        # Subagents get the same tokenizer for eviction and summarization
+        middleware = _default_subagent_middleware(model, StateBackend, tokenizer)
+        filesystem = next(m for m in middleware if isinstance(m, FilesystemMiddleware))
+        summarization = next(m for m in middleware if isinstance(m, _DeepAgentsSummarizationMiddleware))
+        assert filesystem._tokenizer is tokenizer
+        summarization.token_counter([HumanMessage(content="subagent-marker")])
+        assert any("subagent-marker" in text for text in counted)